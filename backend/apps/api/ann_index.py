@@ -0,0 +1,157 @@
+"""
+설정 파일 기반 FAISS 인덱스 생성
+- 지원 타입: flat, ivf_flat, ivf_pq, hnsw (+ 선택적 PCA 차원 축소 / float16 저장)
+- 설정은 vectorstore_index_config.json 의 이름 있는 항목으로 관리
+- 선택된 설정은 벡터스토어 디렉토리에 index_config.json 으로 함께 저장되어
+  로드 시 검색 파라미터(nprobe, efSearch)를 다시 적용
+"""
+import os
+import json
+import logging
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+INDEX_CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "vectorstore_index_config.json")
+SAVED_CONFIG_FILE = "index_config.json"
+INDEX_TYPES = ('flat', 'ivf_flat', 'ivf_pq', 'hnsw')
+
+
+def load_index_configs(path: str = INDEX_CONFIG_PATH) -> Tuple[str, Dict[str, Dict]]:
+    """(기본 설정 이름, 설정 목록) 반환"""
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    return data.get('default', 'ivf_flat'), data['configs']
+
+
+def get_index_config(name: Optional[str] = None, path: str = INDEX_CONFIG_PATH) -> Tuple[str, Dict]:
+    default, configs = load_index_configs(path)
+    name = name or default
+    if name not in configs:
+        raise ValueError(f"알 수 없는 인덱스 설정: {name} (사용 가능: {', '.join(configs)})")
+    return name, configs[name]
+
+
+def resolve_nlist(config: Dict, num_vectors: int) -> int:
+    nlist = config.get('nlist', 'auto')
+    if nlist == 'auto':
+        return max(1, min(100, int(4 * np.sqrt(num_vectors))))
+    return int(nlist)
+
+
+def factory_string(config: Dict, num_vectors: int) -> str:
+    """설정을 faiss.index_factory 문자열로 변환"""
+    index_type = config.get('type', 'ivf_flat')
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"지원하지 않는 인덱스 타입: {index_type}")
+
+    storage = 'SQfp16' if config.get('float16') else 'Flat'
+    if index_type == 'flat':
+        body = storage
+    elif index_type == 'ivf_flat':
+        body = f"IVF{resolve_nlist(config, num_vectors)},{storage}"
+    elif index_type == 'ivf_pq':
+        body = f"IVF{resolve_nlist(config, num_vectors)},PQ{config.get('pq_m', 48)}x{config.get('pq_nbits', 8)}"
+    else:
+        body = f"HNSW{config.get('M', 32)},{storage}"
+
+    if config.get('pca_dim'):
+        return f"PCA{config['pca_dim']},{body}"
+    return body
+
+
+def apply_search_params(index, config: Dict):
+    """검색 시 파라미터 적용 (PCA 래퍼 안쪽 인덱스까지)"""
+    import faiss
+
+    params = faiss.ParameterSpace()
+    if config.get('type') in ('ivf_flat', 'ivf_pq'):
+        params.set_index_parameter(index, 'nprobe', int(config.get('nprobe', 10)))
+    elif config.get('type') == 'hnsw':
+        params.set_index_parameter(index, 'efSearch', int(config.get('ef_search', 64)))
+
+
+def build_index(vectors: np.ndarray, config: Dict, ids: Optional[np.ndarray] = None):
+    """벡터로 설정에 맞는 인덱스 학습 + 추가 (ids 는 IVF 계열에서만 지원)"""
+    import faiss
+
+    vectors = np.ascontiguousarray(vectors, dtype='float32')
+    num_vectors, dimension = vectors.shape
+    description = factory_string(config, num_vectors)
+
+    if config.get('type') == 'ivf_pq':
+        min_train = (2 ** config.get('pq_nbits', 8)) * 39
+        if num_vectors < min_train:
+            logger.warning(f"PQ 학습 벡터가 부족합니다: {num_vectors}개 (권장 {min_train}개 이상)")
+
+    index = faiss.index_factory(dimension, description, faiss.METRIC_L2)
+    if config.get('type') == 'hnsw':
+        # efConstruction 은 벡터 추가 전에 설정해야 함
+        hnsw_index = faiss.downcast_index(index.index if isinstance(index, faiss.IndexPreTransform) else index)
+        hnsw_index.hnsw.efConstruction = int(config.get('ef_construction', 80))
+
+    if not index.is_trained:
+        index.train(vectors)
+    if ids is not None:
+        index.add_with_ids(vectors, np.asarray(ids, dtype='int64'))
+    else:
+        index.add(vectors)
+    apply_search_params(index, config)
+    logger.info(f"인덱스 생성 완료: {description} ({index.ntotal}개 벡터)")
+    return index
+
+
+def extract_vectors(index) -> np.ndarray:
+    """인덱스에 저장된 벡터 일괄 추출 (IVF 는 direct map 생성 후 복원)"""
+    import faiss
+
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None and ivf.direct_map.type == faiss.DirectMap.NoMap:
+        ivf.make_direct_map()
+    return index.reconstruct_n(0, index.ntotal)
+
+
+def mmap_io_flags() -> int:
+    """인덱스를 워커 간 공유 페이지로 열 때 쓸 faiss IO 플래그
+
+    IO_FLAG_MMAP 은 IVF 역리스트만 매핑하고 Flat / SQ / HNSW / IDMap 의 벡터는 워커마다 힙에 복사하므로,
+    faiss 가 IO_FLAG_MMAP_IFC (zero-copy 읽기) 를 제공하면 그것을 사용 (두 플래그는 함께 쓸 수 없음)
+    """
+    import faiss
+
+    if hasattr(faiss, 'IO_FLAG_MMAP_IFC'):
+        return faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY
+    return faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+
+
+def describe_index(index) -> str:
+    """래퍼를 풀어 쓴 인덱스 타입 이름 (예: IndexIDMap(IndexFlatL2))"""
+    import faiss
+
+    index = faiss.downcast_index(index)
+    inner = getattr(index, 'index', None)
+    if inner is None:
+        return type(index).__name__
+    return f"{type(index).__name__}({describe_index(inner)})"
+
+
+def index_memory_bytes(index) -> int:
+    """직렬화 크기로 인덱스 메모리 사용량 추정"""
+    import faiss
+
+    return int(faiss.serialize_index(index).nbytes)
+
+
+def save_index_config(directory: str, name: str, config: Dict):
+    with open(os.path.join(directory, SAVED_CONFIG_FILE), 'w', encoding='utf-8') as f:
+        json.dump({'name': name, **config}, f, ensure_ascii=False, indent=2)
+
+
+def load_saved_index_config(directory: str) -> Optional[Dict]:
+    path = os.path.join(directory, SAVED_CONFIG_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
@@ -7,3 +7,5 @@ class ApiConfig(AppConfig):
     
     def ready(self):
         import apps.api.notification_signals  # 시그널 등록
+        import apps.api.user_memory  # 프로필 → 사용자 기억 동기화 시그널
+        import apps.api.cache_namespace  # 프로필 / 운동 기록 변경 → 캐시 세대 갱신 시그널
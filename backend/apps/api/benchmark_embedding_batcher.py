@@ -0,0 +1,82 @@
+"""
+쿼리 임베딩 마이크로 배칭 벤치마크 스크립트
+- 동시 클라이언트 1/8/32 개에서 배칭 전후 처리량 비교
+"""
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from langchain_huggingface import HuggingFaceEmbeddings
+import torch
+
+# Django 설정
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'healthwise.settings')
+
+import django
+django.setup()
+
+from django.conf import settings
+from apps.api.embedding_batcher import BatchedEmbeddings
+
+test_queries = [
+    "단백질이 많은 음식은 무엇인가요?",
+    "스쿼트 운동 방법을 알려주세요",
+    "스트레스 해소하는 방법은?",
+    "다이어트에 좋은 식단 추천해주세요",
+    "근육을 키우려면 어떻게 해야 하나요?",
+    "유산소 운동의 효과는?",
+    "비타민 D가 부족하면 어떻게 되나요?",
+    "요가의 장점은 무엇인가요?",
+    "하루에 물을 얼마나 마셔야 하나요?",
+    "수면의 중요성에 대해 알려주세요"
+]
+
+
+def run_clients(embeddings, num_clients, queries_per_client):
+    """동시 클라이언트가 각자 쿼리를 순차적으로 임베딩"""
+    def client(client_id):
+        for i in range(queries_per_client):
+            embeddings.embed_query(test_queries[(client_id + i) % len(test_queries)])
+
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=num_clients) as pool:
+        list(pool.map(client, range(num_clients)))
+    elapsed = time.time() - start
+    total = num_clients * queries_per_client
+    return total, elapsed
+
+
+def benchmark_embedding_batcher(queries_per_client=20):
+    print("=== 쿼리 임베딩 마이크로 배칭 벤치마크 ===\n")
+
+    print("임베딩 모델 로드 중...")
+    base = HuggingFaceEmbeddings(
+        model_name="sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2",
+        model_kwargs={"device": "cuda" if torch.cuda.is_available() else "cpu"},
+        encode_kwargs={'normalize_embeddings': True, 'batch_size': 32}
+    )
+    config = getattr(settings, 'CHATBOT_EMBEDDING_BATCHER', {})
+    batched = BatchedEmbeddings(
+        base,
+        max_batch_size=config.get('MAX_BATCH_SIZE', 32),
+        max_wait_ms=config.get('MAX_WAIT_MS', 5),
+    )
+    print(f"배치 설정: max_batch_size={batched.max_batch_size}, max_wait_ms={batched.max_wait * 1000:.1f}\n")
+
+    # 워밍업
+    for query in test_queries[:3]:
+        base.embed_query(query)
+
+    print(f"{'클라이언트':>10} | {'방식':>8} | {'쿼리 수':>7} | {'소요시간':>8} | {'처리량(q/s)':>11}")
+    print("-" * 60)
+    for num_clients in (1, 8, 32):
+        for label, embeddings in (('개별', base), ('배칭', batched)):
+            total, elapsed = run_clients(embeddings, num_clients, queries_per_client)
+            print(f"{num_clients:>10} | {label:>8} | {total:>7} | {elapsed:>7.2f}초 | {total / elapsed:>11.1f}")
+
+    print(f"\n배칭 통계: {batched.stats()}")
+
+
+if __name__ == "__main__":
+    benchmark_embedding_batcher()
@@ -0,0 +1,162 @@
+"""
+키워드 매칭 마이크로 벤치마크 스크립트
+- 기존 방식: 키워드 그룹마다 `keyword in text` 반복 (텍스트를 키워드 수만큼 순회)
+- 매처 방식: 모든 그룹을 하나의 Aho-Corasick 오토마톤으로 컴파일해 한 번만 순회
+카테고리 분류 + 맛/음식/운동 선호도 추출을 메시지 하나당 한 번씩 수행하는 시간을 비교합니다.
+"""
+import time
+try:
+    from .keyword_matcher import MultiPatternMatcher, ahocorasick, best_label
+except ImportError:
+    # 스크립트로 직접 실행 시
+    from keyword_matcher import MultiPatternMatcher, ahocorasick, best_label
+
+category_keywords = {
+    'exercise': ['운동', '스쿼트', '푸시업', '플랭크', '런닝', '요가', '필라테스', '근육', '체력', '헬스', '웨이트', '유산소'],
+    'nutrition': ['영양', '단백질', '탄수화물', '지방', '비타민', '칼로리', '식단', '음식', '다이어트', '먹', '식사'],
+    'health': ['건강', '질병', '증상', '치료', '예방', '면역', '스트레스', '수면', '정신건강', '통증', '피로'],
+    'general': ['안녕', '뭐', '어떻게', '왜', '언제', '누구'],
+}
+taste_keywords = {
+    'spicy': ['매운', '매워', '맵', '얼큰', '칼칼'],
+    'sweet': ['단', '달', '달콤', '단맛'],
+    'salty': ['짠', '짭짤', '간이 센'],
+    'sour': ['신', '새콤', '시큼'],
+    'bitter': ['쓴', '씁쓸'],
+}
+foods = ['치킨', '피자', '파스타', '김치', '된장', '커피', '차', '샐러드', '과일', '야채', '고기', '생선']
+exercises = ['런닝', '달리기', '요가', '필라테스', '헬스', '웨이트', '수영', '자전거', '등산', '걷기']
+sentiment_words = {
+    'food_dislike': ['싫어', '못 먹', '안 먹', '별로'],
+    'food_like': ['좋아', '자주 먹', '즐겨'],
+    'exercise_dislike': ['싫어', '못', '안', '힘들', '어려워'],
+    'exercise_like': ['좋아', '자주', '즐겨'],
+    'taste_dislike': ['싫', '못', '안'],
+    'taste_like': ['좋', '자주'],
+}
+
+test_messages = [
+    "단백질이 많은 음식은 무엇인가요?",
+    "스쿼트 운동 방법을 알려주세요",
+    "요즘 스트레스 때문에 수면이 부족해요",
+    "매운 음식은 못 먹는데 다이어트 식단 추천해주세요",
+    "저는 치킨이랑 피자를 자주 먹어요. 칼로리가 걱정돼요",
+    "달리기는 너무 힘들어서 요가나 필라테스를 해보고 싶어요",
+    "커피를 하루에 세 잔 마시는데 건강에 괜찮을까요?",
+    "헬스장에서 웨이트 하고 나서 근육 통증이 심해요",
+    "짭짤한 음식을 좋아하는데 혈압 예방하려면 어떻게 해야 하나요?",
+    "안녕하세요 오늘 뭐 먹을지 추천해줘",
+] * 10
+
+
+def legacy_scan(text):
+    """기존 챗봇 코드와 같은 키워드 그룹별 부분 문자열 검사"""
+    text = text.lower()
+    scores = {}
+    for category, keywords in category_keywords.items():
+        score = sum(1 for keyword in keywords if keyword in text)
+        if score > 0:
+            scores[category] = score
+    category = max(scores.items(), key=lambda x: x[1])[0] if scores else None
+
+    facts = []
+    for taste, keywords in taste_keywords.items():
+        for keyword in keywords:
+            if keyword in text and ('싫' in text or '못' in text or '안' in text):
+                facts.append(taste)
+            elif keyword in text and ('좋' in text or '자주' in text):
+                facts.append(taste)
+    for food in foods:
+        if food in text:
+            if any(word in text for word in sentiment_words['food_dislike']):
+                facts.append(food)
+            elif any(word in text for word in sentiment_words['food_like']):
+                facts.append(food)
+    for exercise in exercises:
+        if exercise in text:
+            if any(word in text for word in sentiment_words['exercise_dislike']):
+                facts.append(exercise)
+            elif any(word in text for word in sentiment_words['exercise_like']):
+                facts.append(exercise)
+    return category, facts
+
+
+def legacy_classify(text):
+    """기존 optimize_vectorstore.classify_document 와 같은 카테고리 분류"""
+    text = text.lower()
+    category, max_count = 'general', 0
+    for cat, keywords in category_keywords.items():
+        count = sum(1 for keyword in keywords if keyword in text)
+        if count > max_count:
+            category, max_count = cat, count
+    return category
+
+
+def matcher_scan(matcher, text):
+    """컴파일된 매처로 한 번 스캔한 결과에서 같은 정보 추출"""
+    hits = matcher.scan(text.lower())
+    category = best_label(hits.counts('category'), category_keywords.keys())
+
+    facts = []
+    for taste in hits.labels('taste'):
+        if hits.any('sentiment', ['taste_dislike', 'taste_like']):
+            facts.append(taste)
+    for food in hits.labels('food'):
+        if hits.any('sentiment', ['food_dislike', 'food_like']):
+            facts.append(food)
+    for exercise in hits.labels('exercise'):
+        if hits.any('sentiment', ['exercise_dislike', 'exercise_like']):
+            facts.append(exercise)
+    return category, facts
+
+
+def benchmark_keyword_matcher(rounds=200):
+    print("=== 키워드 매칭 마이크로 벤치마크 ===\n")
+    backend = 'pyahocorasick' if ahocorasick else '순수 파이썬'
+
+    start = time.perf_counter()
+    matcher = MultiPatternMatcher({
+        'category': category_keywords,
+        'taste': taste_keywords,
+        'food': {food: [food] for food in foods},
+        'exercise': {exercise: [exercise] for exercise in exercises},
+        'sentiment': sentiment_words,
+    })
+    build_ms = (time.perf_counter() - start) * 1000
+    print(f"매처 백엔드: {backend}, 키워드 {matcher.keyword_count}개, 컴파일 {build_ms:.2f}ms\n")
+
+    # 결과 일치 확인 (카테고리는 동일해야 함)
+    for message in set(test_messages):
+        assert legacy_scan(message)[0] == matcher_scan(matcher, message)[0], message
+
+    total = len(test_messages) * rounds
+    print(f"{'방식':>8} | {'메시지 수':>8} | {'소요시간':>9} | {'메시지당(µs)':>12}")
+    print("-" * 50)
+    results = {}
+    for label, scan in (('기존', legacy_scan), ('매처', lambda text: matcher_scan(matcher, text))):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for message in test_messages:
+                scan(message)
+        elapsed = time.perf_counter() - start
+        results[label] = elapsed
+        print(f"{label:>8} | {total:>8} | {elapsed * 1000:>7.1f}ms | {elapsed / total * 1e6:>12.2f}")
+
+    print(f"\n속도 향상: {results['기존'] / results['매처']:.2f}배")
+
+    # 문서 청크(500자) 카테고리 분류 (optimize_vectorstore.classify_document)
+    chunk = (" ".join(test_messages[:10]) * 3)[:500]
+    category_matcher = MultiPatternMatcher({'category': category_keywords})
+    matcher_classify = lambda text: best_label(
+        category_matcher.scan(text.lower()).counts('category'), category_keywords.keys()
+    )
+    print(f"\n500자 청크 분류 ({rounds * 10}회)")
+    for label, classify in (('기존', legacy_classify), ('매처', matcher_classify)):
+        start = time.perf_counter()
+        for _ in range(rounds * 10):
+            classify(chunk)
+        print(f"{label:>8} | {(time.perf_counter() - start) * 1000:>7.1f}ms")
+
+
+if __name__ == "__main__":
+    benchmark_keyword_matcher()
@@ -1,11 +1,16 @@
 """
 벡터스토어 성능 벤치마크 스크립트
+- 벡터 검색 단독 vs 하이브리드(BM25 + 벡터) 검색의 지연시간 / recall@k 비교
+- 인덱스 설정별(flat / IVF-Flat / IVF-PQ / HNSW, PCA / float16) 지연시간 p50/p95,
+  메모리, 정확 검색(Flat) 대비 recall@k 비교
+
+사용법: python benchmark_vectorstore.py [--mode all|basic|index] [--configs ivf_flat hnsw ...]
 """
 import os
 import time
 import sys
-from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_community.vectorstores import FAISS
+import numpy as np
 import torch
 
 # Django 설정
@@ -15,18 +20,44 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'healthwise.settings')
 import django
 django.setup()
 
-def benchmark_vectorstore():
-    print("=== 벡터스토어 성능 벤치마크 ===\n")
-    
-    # 임베딩 모델 로드
+from apps.api.embedding_backends import get_embedding_backend
+from apps.api.hybrid_retrieval import BM25Index, hybrid_search, vector_search
+from apps.api.ann_index import (
+    build_index, extract_vectors, factory_string, index_memory_bytes, load_index_configs
+)
+
+# 질문별 정답 판정 용어 (상위 k개 중 하나라도 용어를 포함하면 적중)
+relevance_terms = {
+    "단백질이 많은 음식은 무엇인가요?": ["단백질"],
+    "스쿼트 운동 방법을 알려주세요": ["스쿼트"],
+    "스트레스 해소하는 방법은?": ["스트레스"],
+    "다이어트에 좋은 식단 추천해주세요": ["다이어트", "식단"],
+    "근육을 키우려면 어떻게 해야 하나요?": ["근육"],
+    "유산소 운동의 효과는?": ["유산소"],
+    "비타민 D가 부족하면 어떻게 되나요?": ["비타민"],
+    "요가의 장점은 무엇인가요?": ["요가"],
+    "하루에 물을 얼마나 마셔야 하나요?": ["물", "수분"],
+    "수면의 중요성에 대해 알려주세요": ["수면", "잠"],
+}
+
+# 테스트 쿼리
+test_queries = list(relevance_terms.keys())
+
+
+def load_embeddings():
     print("임베딩 모델 로드 중...")
     start = time.time()
-    embeddings = HuggingFaceEmbeddings(
-        model_name="sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2",
-        model_kwargs={"device": "cuda" if torch.cuda.is_available() else "cpu"},
-        encode_kwargs={'normalize_embeddings': True}
+    embeddings = get_embedding_backend(
+        "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2",
+        device="cuda" if torch.cuda.is_available() else "cpu"
     )
+    print(f"임베딩 백엔드: {type(embeddings).__name__}")
     print(f"임베딩 모델 로드 시간: {time.time() - start:.2f}초\n")
+    return embeddings
+
+
+def benchmark_vectorstore(embeddings):
+    print("=== 벡터스토어 성능 벤치마크 ===\n")
     
     # 벡터스토어 로드
     vectorstore_path = os.path.join(os.path.dirname(__file__), "vectorstore")
@@ -42,20 +73,6 @@ def benchmark_vectorstore():
     print(f"벡터 차원: {vectorstore.index.d}")
     print(f"인덱스 타입: {type(vectorstore.index)}\n")
     
-    # 테스트 쿼리
-    test_queries = [
-        "단백질이 많은 음식은 무엇인가요?",
-        "스쿼트 운동 방법을 알려주세요",
-        "스트레스 해소하는 방법은?",
-        "다이어트에 좋은 식단 추천해주세요",
-        "근육을 키우려면 어떻게 해야 하나요?",
-        "유산소 운동의 효과는?",
-        "비타민 D가 부족하면 어떻게 되나요?",
-        "요가의 장점은 무엇인가요?",
-        "하루에 물을 얼마나 마셔야 하나요?",
-        "수면의 중요성에 대해 알려주세요"
-    ]
-    
     print("=== 검색 성능 테스트 ===\n")
     
     # 첫 번째 실행 (워밍업)
@@ -99,7 +116,141 @@ def benchmark_vectorstore():
     results.sort(key=lambda x: x['time'])
     print(f"가장 빠른 쿼리: '{results[0]['query']}' ({results[0]['time']:.3f}초)")
     print(f"가장 느린 쿼리: '{results[-1]['query']}' ({results[-1]['time']:.3f}초)")
+    
+    benchmark_hybrid_retrieval(embeddings, test_queries)
+
+
+def _is_relevant(doc, query):
+    return any(term in doc.page_content for term in relevance_terms.get(query, []))
+
+
+def benchmark_hybrid_retrieval(embeddings, test_queries, k=3):
+    """벡터 검색 단독 vs 하이브리드 검색 비교 (최적화된 벡터스토어 기준)"""
+    print("\n=== 하이브리드 검색 비교 (BM25 + 벡터) ===\n")
+    
+    optimized_path = os.path.join(os.path.dirname(__file__), "vectorstore_optimized")
+    vectorstore = FAISS.load_local(optimized_path, embeddings, allow_dangerous_deserialization=True) \
+        if os.path.exists(optimized_path) else None
+    bm25_index = BM25Index.load(optimized_path) if vectorstore else None
+    if bm25_index is None:
+        print("BM25 인덱스가 없습니다. optimize_vectorstore.py 를 먼저 실행하세요.")
+        return
+    if hasattr(vectorstore.index, 'nprobe'):
+        vectorstore.index.nprobe = 10
+    
+    stats = {'vector': {'times': [], 'hits': 0}, 'hybrid': {'times': [], 'hits': 0}}
+    for query in test_queries:
+        query_embedding = np.asarray(embeddings.embed_query(query), dtype='float32')
+        
+        # 현재 경로: 벡터 검색 단독
+        start = time.perf_counter()
+        vector_hits = vector_search(vectorstore, query_embedding, k)
+        stats['vector']['times'].append(time.perf_counter() - start)
+        vector_docs = [
+            vectorstore.docstore.search(vectorstore.index_to_docstore_id[pos]) for pos, _ in vector_hits
+        ]
+        
+        # 하이브리드 경로: BM25 + 벡터 (RRF)
+        start = time.perf_counter()
+        hybrid_hits = hybrid_search(vectorstore, bm25_index, query, query_embedding, k=k)
+        stats['hybrid']['times'].append(time.perf_counter() - start)
+        hybrid_docs = [hit['document'] for hit in hybrid_hits]
+        
+        stats['vector']['hits'] += any(_is_relevant(doc, query) for doc in vector_docs)
+        stats['hybrid']['hits'] += any(_is_relevant(doc, query) for doc in hybrid_docs)
+    
+    print(f"{'방식':>8} | {'평균(ms)':>8} | {'p95(ms)':>8} | {'recall@' + str(k):>9}")
+    print("-" * 44)
+    for label, data in stats.items():
+        times_ms = np.array(data['times']) * 1000
+        print(
+            f"{label:>8} | {times_ms.mean():>8.2f} | {np.percentile(times_ms, 95):>8.2f} | "
+            f"{data['hits'] / len(test_queries):>9.2f}"
+        )
+    print(f"\nBM25 인덱스: {len(bm25_index.doc_lengths)}개 청크, {len(bm25_index.postings)}개 토큰")
+
+
+
+def benchmark_index_configs(embeddings, vectorstore_path, config_names=None, k=10, num_sample_queries=200):
+    """인덱스 설정별 지연시간 / 메모리 / recall@k (정확 검색 Flat 인덱스 기준)"""
+    import faiss
+    
+    print("\n=== 인덱스 설정별 비교 ===\n")
+    vectorstore = FAISS.load_local(vectorstore_path, embeddings, allow_dangerous_deserialization=True)
+    vectors = np.ascontiguousarray(extract_vectors(vectorstore.index), dtype='float32')
+    print(f"벡터스토어: {vectorstore_path} ({vectors.shape[0]}개 벡터, {vectors.shape[1]}차원)")
+    
+    # 쿼리: 테스트 질문 + 저장된 벡터 샘플에 잡음을 더한 합성 쿼리
+    text_queries = np.asarray([embeddings.embed_query(query) for query in test_queries], dtype='float32')
+    rng = np.random.default_rng(0)
+    sample = vectors[rng.choice(len(vectors), min(num_sample_queries, len(vectors)), replace=False)]
+    sample = sample + rng.normal(scale=0.05, size=sample.shape).astype('float32')
+    queries = np.ascontiguousarray(np.vstack([text_queries, sample]), dtype='float32')
+    
+    # 정답: 정확 검색(Flat)
+    exact = faiss.IndexFlatL2(vectors.shape[1])
+    exact.add(vectors)
+    _, ground_truth = exact.search(queries, k)
+    
+    default, configs = load_index_configs()
+    names = config_names or list(configs.keys())
+    print(f"쿼리 수: {len(queries)}, k={k}, 기본 설정: {default}\n")
+    print(f"{'설정':>16} | {'인덱스':>22} | {'생성(초)':>8} | {'p50(ms)':>8} | {'p95(ms)':>8} | "
+          f"{'메모리(MB)':>10} | {'recall@' + str(k):>9}")
+    print("-" * 100)
+    
+    report = []
+    for name in names:
+        config = configs[name]
+        start = time.time()
+        try:
+            index = build_index(vectors, config)
+        except Exception as e:
+            print(f"{name:>16} | 생성 실패: {str(e)}")
+            continue
+        build_time = time.time() - start
+        
+        # 단건 검색 지연시간 (챗봇 요청과 같은 방식)
+        latencies = []
+        found = np.empty((len(queries), k), dtype='int64')
+        for i in range(len(queries)):
+            start = time.perf_counter()
+            _, ids = index.search(queries[i:i + 1], k)
+            latencies.append((time.perf_counter() - start) * 1000)
+            found[i] = ids[0]
+        
+        recall = np.mean([
+            len(set(found[i]) & set(ground_truth[i])) / k for i in range(len(queries))
+        ])
+        row = {
+            'name': name,
+            'factory': factory_string(config, len(vectors)),
+            'build_time': build_time,
+            'p50_ms': float(np.percentile(latencies, 50)),
+            'p95_ms': float(np.percentile(latencies, 95)),
+            'memory_mb': index_memory_bytes(index) / (1024 * 1024),
+            'recall_at_k': float(recall),
+        }
+        report.append(row)
+        print(f"{name:>16} | {row['factory']:>22} | {build_time:>8.2f} | {row['p50_ms']:>8.3f} | "
+              f"{row['p95_ms']:>8.3f} | {row['memory_mb']:>10.2f} | {row['recall_at_k']:>9.3f}")
+    
+    return report
 
 
 if __name__ == "__main__":
-    benchmark_vectorstore()
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="벡터스토어 벤치마크")
+    parser.add_argument('--mode', choices=['all', 'basic', 'index'], default='all')
+    parser.add_argument('--configs', nargs='+', default=None, help='비교할 인덱스 설정 이름 (기본: 전체)')
+    parser.add_argument('--vectorstore', default=os.path.join(os.path.dirname(__file__), "vectorstore_optimized"),
+                        help='인덱스 비교에 사용할 벡터스토어 경로')
+    parser.add_argument('--k', type=int, default=10)
+    args = parser.parse_args()
+    
+    embeddings = load_embeddings()
+    if args.mode in ('all', 'basic'):
+        benchmark_vectorstore(embeddings)
+    if args.mode in ('all', 'index'):
+        benchmark_index_configs(embeddings, args.vectorstore, args.configs, k=args.k)
@@ -0,0 +1,137 @@
+"""
+벡터스토어 워커별 메모리(RSS/PSS) 측정 스크립트
+- 기존 FAISS.load_local (워커마다 전체 인덱스 + pickle docstore 복사)
+- mmap 로더 (인덱스/청크 페이지를 워커 간 공유)
+여러 워커 프로세스를 띄워 각자 로드하고 검색한 뒤 메모리를 보고합니다.
+PSS 는 공유 페이지를 프로세스 수로 나눈 값이므로 mmap 공유 효과가 드러납니다.
+인덱스 파일(본 인덱스 + 카테고리 샤드)마다 타입과 실제 페이지 공유 여부도 보고합니다.
+"""
+import os
+import sys
+import glob
+import time
+import multiprocessing
+
+# Django 설정
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'healthwise.settings')
+
+test_queries = [
+    "단백질이 많은 음식은 무엇인가요?",
+    "스쿼트 운동 방법을 알려주세요",
+    "스트레스 해소하는 방법은?",
+    "다이어트에 좋은 식단 추천해주세요",
+    "수면의 중요성에 대해 알려주세요"
+]
+
+
+class _QueryVectors:
+    """워커에서는 임베딩 모델을 로드하지 않도록 미리 계산한 벡터를 반환"""
+
+    def __init__(self, vectors):
+        self.vectors = vectors
+
+    def embed_query(self, text):
+        return self.vectors[text]
+
+
+def _worker(mode, vectorstore_path, query_vectors, ready, results):
+    from langchain_community.vectorstores import FAISS
+    from apps.api.mmap_vectorstore import load_mmap_vectorstore, process_memory
+
+    baseline = process_memory()
+    start = time.time()
+    embeddings = _QueryVectors(query_vectors)
+    if mode == 'mmap':
+        vectorstore = load_mmap_vectorstore(vectorstore_path, embeddings)
+    else:
+        vectorstore = FAISS.load_local(vectorstore_path, embeddings, allow_dangerous_deserialization=True)
+        if hasattr(vectorstore.index, 'nprobe'):
+            vectorstore.index.nprobe = 10
+    load_time = time.time() - start
+
+    for query in test_queries:
+        vectorstore.similarity_search_with_score_by_vector(query_vectors[query], k=3)
+
+    # 모든 워커가 로드를 마친 뒤 측정해야 PSS 에 공유가 반영됨
+    ready.wait()
+    memory = process_memory()
+    results.put({
+        'pid': os.getpid(),
+        'load_time': load_time,
+        'rss_delta': memory.get('rss', 0) - baseline.get('rss', 0),
+        **memory,
+    })
+    ready.wait()
+
+
+def measure(mode, vectorstore_path, query_vectors, num_workers):
+    ctx = multiprocessing.get_context('fork')
+    ready = ctx.Barrier(num_workers + 1)
+    results = ctx.Queue()
+    workers = [
+        ctx.Process(target=_worker, args=(mode, vectorstore_path, query_vectors, ready, results))
+        for _ in range(num_workers)
+    ]
+    for worker in workers:
+        worker.start()
+    ready.wait()
+    reports = [results.get() for _ in workers]
+    ready.wait()
+    for worker in workers:
+        worker.join()
+    return reports
+
+
+def benchmark_vectorstore_memory(num_workers=4):
+    import django
+    django.setup()
+
+    import torch
+    from apps.api.embedding_backends import get_embedding_backend
+    from apps.api.mmap_vectorstore import has_mmap_store
+
+    print("=== 벡터스토어 워커별 메모리 측정 ===\n")
+    vectorstore_path = os.path.join(os.path.dirname(__file__), "vectorstore_optimized")
+    if not has_mmap_store(vectorstore_path):
+        print("mmap docstore 가 없습니다. optimize_vectorstore.py 를 먼저 실행하세요.")
+        return
+
+    embeddings = get_embedding_backend(device="cuda" if torch.cuda.is_available() else "cpu")
+    query_vectors = {query: embeddings.embed_query(query) for query in test_queries}
+    del embeddings
+
+    print(f"워커 수: {num_workers}\n")
+    print(f"{'방식':>10} | {'로드(초)':>8} | {'RSS 증가(MB)':>12} | {'RSS(MB)':>8} | {'PSS(MB)':>8}")
+    print("-" * 60)
+    for mode in ('load_local', 'mmap'):
+        reports = measure(mode, vectorstore_path, query_vectors, num_workers)
+        count = len(reports)
+        print(
+            f"{mode:>10} | "
+            f"{sum(r['load_time'] for r in reports) / count:>8.2f} | "
+            f"{sum(r['rss_delta'] for r in reports) / count:>12.1f} | "
+            f"{sum(r.get('rss', 0) for r in reports) / count:>8.1f} | "
+            f"{sum(r.get('pss', 0) for r in reports) / count:>8.1f}"
+        )
+
+    # IO_FLAG_MMAP 만 있는 faiss 에서는 IVF 외 타입이 워커마다 힙에 복사되므로 타입별로 확인
+    from apps.api.mmap_vectorstore import FAISS_INDEX_FILE, index_sharing_report
+    from apps.api.category_shards import SHARD_DIR
+
+    paths = [os.path.join(vectorstore_path, FAISS_INDEX_FILE)]
+    paths += sorted(glob.glob(os.path.join(vectorstore_path, SHARD_DIR, "*.index")))
+    print(f"\n{'인덱스':>20} | {'타입':>32} | {'파일(MB)':>8} | {'힙 복사(MB)':>10} | 공유")
+    print("-" * 90)
+    for entry in index_sharing_report(paths):
+        print(
+            f"{os.path.relpath(entry['path'], vectorstore_path):>20} | "
+            f"{entry['type']:>32} | "
+            f"{entry['file_mb']:>8.1f} | "
+            f"{entry['private_mb']:>10.1f} | "
+            f"{'예' if entry['shared'] else '아니오'}"
+        )
+
+
+if __name__ == "__main__":
+    benchmark_vectorstore_memory(int(sys.argv[1]) if len(sys.argv) > 1 else 4)
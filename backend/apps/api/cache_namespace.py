@@ -0,0 +1,115 @@
+"""
+사용자별 캐시 네임스페이스 (세대 번호 기반 무효화)
+- 사용자 x 도메인(chat, profile, stats)마다 세대 번호를 캐시에 두고 모든 파생 키에 포함
+  예) ns:42:chat1729230000000001.profile1729230000000005:system_prompt_memory:2026-10-18:ko:v3
+- bump_generation() 으로 세대 번호를 올리면 이전 세대의 키는 더 이상 조회되지 않고 TTL 로 만료됨
+- 패턴 삭제를 지원하지 않는 백엔드(파일 / locmem 캐시)에서도 동작
+- 세대 번호는 시각(마이크로초) 기반으로 시작하므로, 캐시에서 밀려나도 이전 세대로 되돌아가지 않음
+
+프로필 / 운동 기록 / 대화 세션이 저장되면 시그널이 해당 도메인의 세대 번호를 올림
+"""
+import time
+import logging
+from typing import Dict, Iterable
+
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.core.models import ChatSession, User, UserProfile, WorkoutLog
+
+logger = logging.getLogger(__name__)
+
+CHAT = 'chat'  # 대화 기록, 시스템 프롬프트, 활성 세션 상태(chat_state)
+PROFILE = 'profile'  # 프로필 / 사용자 컨텍스트 / 운동 목표
+STATS = 'stats'  # 운동 통계
+DOMAINS = (CHAT, PROFILE, STATS)
+
+
+def _generation_key(domain: str, user_id: int) -> str:
+    return f"cache_gen:{domain}:{user_id}"
+
+
+def _new_generation() -> int:
+    return time.time_ns() // 1000
+
+
+def get_generations(user_id: int, domains: Iterable[str]) -> Dict[str, int]:
+    """도메인별 현재 세대 번호 (없으면 새로 시작)"""
+    keys = {_generation_key(domain, user_id): domain for domain in domains}
+    found = cache.get_many(list(keys))
+    generations = {}
+    for key, domain in keys.items():
+        generation = found.get(key)
+        if generation is None:
+            generation = _new_generation()
+            # 동시에 다른 요청이 먼저 만들었으면 그 값을 사용
+            if not cache.add(key, generation, None):
+                generation = cache.get(key, generation)
+        generations[domain] = generation
+    return generations
+
+
+def bump_generation(user_id: int, *domains: str):
+    """도메인(기본: 전체)의 세대 번호를 올려 해당 사용자의 파생 캐시를 모두 무효화"""
+    for domain in domains or DOMAINS:
+        key = _generation_key(domain, user_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # 아직 세대 번호가 없거나 캐시에서 밀려남
+            cache.set(key, _new_generation(), None)
+    logger.debug(f"🧹 캐시 세대 갱신: user={user_id}, {', '.join(domains or DOMAINS)}")
+
+
+class UserCacheNamespace:
+    """사용자 하나의 도메인 세대 번호를 한 번 읽어 두고 파생 키를 만듦
+
+    여러 도메인에 걸친 값(예: 프로필로 만든 시스템 프롬프트)은 도메인을 함께 지정하면
+    어느 쪽 세대가 바뀌어도 무효화됨
+    """
+
+    def __init__(self, user_id: int, *domains: str):
+        if not domains:
+            raise ValueError('도메인을 하나 이상 지정해야 합니다')
+        self.user_id = user_id
+        self.generations = get_generations(user_id, domains)
+        self.prefix = f"ns:{user_id}:" + '.'.join(
+            f"{domain}{self.generations[domain]}" for domain in domains
+        )
+
+    def key(self, *parts) -> str:
+        return ':'.join([self.prefix, *(str(part) for part in parts)])
+
+
+def user_cache_key(user_id: int, domains, *parts) -> str:
+    """UserCacheNamespace(user_id, *domains).key(*parts) 단축형 (domains 는 문자열 하나 또는 튜플)"""
+    if isinstance(domains, str):
+        domains = (domains,)
+    return UserCacheNamespace(user_id, *domains).key(*parts)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def bump_profile_on_user_change(sender, instance, **kwargs):
+    bump_generation(instance.id, PROFILE)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def bump_profile_on_profile_change(sender, instance, **kwargs):
+    # 운동 목표도 프로필에 있으므로 통계 요약도 함께 무효화
+    bump_generation(instance.user_id, PROFILE, STATS)
+
+
+@receiver(post_save, sender=WorkoutLog)
+@receiver(post_delete, sender=WorkoutLog)
+def bump_stats_on_workout_change(sender, instance, **kwargs):
+    bump_generation(instance.user_id, STATS)
+
+
+@receiver(post_save, sender=ChatSession)
+@receiver(post_delete, sender=ChatSession)
+def bump_chat_on_session_change(sender, instance, **kwargs):
+    # 세션 생성 / 종료 / 삭제 시 캐시된 활성 세션 상태가 이전 세션을 가리키지 않도록
+    bump_generation(instance.user_id, CHAT)
@@ -0,0 +1,250 @@
+"""
+카테고리별 FAISS 샤드 인덱스
+- 카테고리(exercise/nutrition/health/general)마다 별도 인덱스를 두고
+  카테고리 쿼리는 해당 샤드 + general 샤드만 검색 (전체 인덱스 과다 검색 후 필터링 대체)
+- 샤드는 벡터와 전역 인덱스 위치만 저장하고, 문서는 전역 docstore 를 공유
+- 샤드 벡터의 ID 는 전역 인덱스 위치이므로 증분 수집 시 add_with_ids / remove_ids 로 갱신
+"""
+import os
+import json
+import logging
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SHARD_DIR = "shards"
+SHARD_MANIFEST_FILE = "manifest.json"
+GENERAL_CATEGORY = 'general'
+CATEGORIES = ('exercise', 'nutrition', 'health', GENERAL_CATEGORY)
+
+# 이보다 작은 샤드는 IVF 학습 대신 Flat 인덱스 사용
+MIN_IVF_VECTORS = 1000
+
+# 샤드 벡터 ID 방식 (없으면 샤드 내 순번을 positions 배열로 변환하는 이전 형식)
+POSITION_IDS = 'position'
+
+
+class CategoryShardIndex:
+    """카테고리별 FAISS 인덱스 모음 (결과는 전역 인덱스 위치로 반환)"""
+
+    def __init__(self, nprobe: int = 10):
+        self.nprobe = nprobe
+        self.indexes: Dict[str, object] = {}
+        self.positions: Dict[str, np.ndarray] = {}
+        self.baseline_errors: Dict[str, float] = {}
+        self.position_ids = True
+        self._position_sets: Dict[str, set] = {}
+
+    def has(self, category: Optional[str]) -> bool:
+        return category in self.indexes
+
+    def allowed_positions(self, category: str) -> set:
+        """카테고리 검색에 포함되는 전역 위치 집합 (해당 카테고리 + general)"""
+        if category not in self._position_sets:
+            positions = set(self.positions.get(category, np.empty(0, dtype='int64')).tolist())
+            if category != GENERAL_CATEGORY:
+                positions.update(self.positions.get(GENERAL_CATEGORY, np.empty(0, dtype='int64')).tolist())
+            self._position_sets[category] = positions
+        return self._position_sets[category]
+
+    def _search_shard(self, category: str, vector: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        index = self.indexes.get(category)
+        if index is None or index.ntotal == 0:
+            return []
+        distances, indices = index.search(vector, min(k, index.ntotal))
+        if self.position_ids:
+            return [(int(i), float(d)) for i, d in zip(indices[0], distances[0]) if i >= 0]
+        positions = self.positions[category]
+        return [(int(positions[i]), float(d)) for i, d in zip(indices[0], distances[0]) if i >= 0]
+
+    def search(self, query_embedding, category: str, k: int) -> List[Tuple[int, float]]:
+        """카테고리 샤드와 general 샤드를 검색하여 거리순으로 병합"""
+        vector = np.asarray(query_embedding, dtype='float32').reshape(1, -1)
+        hits = self._search_shard(category, vector, k)
+        if category != GENERAL_CATEGORY:
+            hits.extend(self._search_shard(GENERAL_CATEGORY, vector, k))
+        hits.sort(key=lambda x: x[1])
+        return hits[:k]
+
+    def _set_shard(self, category: str, vectors: np.ndarray, positions: np.ndarray):
+        """샤드 인덱스를 새로 만들어 교체 (벡터 수가 MIN_IVF_VECTORS 이상이면 IVF 학습)"""
+        import faiss
+
+        dimension = vectors.shape[1]
+        if len(vectors) >= MIN_IVF_VECTORS:
+            nlist = min(100, int(4 * np.sqrt(len(vectors))))
+            quantizer = faiss.IndexFlatL2(dimension)
+            index = faiss.IndexIVFFlat(quantizer, dimension, nlist)
+            index.train(vectors)
+            index.nprobe = self.nprobe
+        else:
+            index = faiss.IndexIDMap(faiss.IndexFlatL2(dimension))
+        index.add_with_ids(vectors, positions)
+
+        self.indexes[category] = index
+        self.positions[category] = positions
+        error = self._quantization_error(index, vectors)
+        if error is None:
+            self.baseline_errors.pop(category, None)
+        else:
+            self.baseline_errors[category] = error
+        self._position_sets.clear()
+        logger.info(f"샤드 생성: {category} ({len(vectors)}개 벡터, {type(index).__name__})")
+
+    @staticmethod
+    def _quantization_error(index, vectors: np.ndarray) -> Optional[float]:
+        """IVF 샤드의 벡터와 가장 가까운 중심점 사이의 평균 거리 (Flat 샤드는 None)"""
+        quantizer = getattr(index, 'quantizer', None)
+        if quantizer is None or not len(vectors):
+            return None
+        distances, _ = quantizer.search(vectors, 1)
+        return float(distances.mean())
+
+    def _needs_rebuild(self, category: str, vectors: np.ndarray, total: int, drift_threshold: float) -> bool:
+        """Flat 샤드가 IVF 크기에 도달했거나 IVF 샤드의 drift 가 임계값을 넘었는지"""
+        index = self.indexes[category]
+        baseline = self.baseline_errors.get(category)
+        if baseline is None:
+            return total >= MIN_IVF_VECTORS
+        error = self._quantization_error(index, vectors)
+        return error is not None and error / baseline - 1 > drift_threshold
+
+    def add(self, vectors: np.ndarray, categories: List[str], positions: np.ndarray,
+            reconstruct: Callable[[np.ndarray], np.ndarray], drift_threshold: float = 0.2) -> List[str]:
+        """새 벡터를 카테고리 샤드에 재학습 없이 추가 (add_with_ids), 다시 만든 샤드 목록 반환
+
+        Flat 샤드가 MIN_IVF_VECTORS 에 도달하거나 IVF 샤드의 drift 가 drift_threshold 를 넘을 때만
+        reconstruct(전역 위치 → 벡터) 로 기존 벡터를 복원하여 해당 샤드만 다시 만듭니다.
+        """
+        labels = np.asarray(categories)
+        positions = np.asarray(positions, dtype='int64')
+        rebuilt = []
+
+        for category in CATEGORIES:
+            rows = np.flatnonzero(labels == category)
+            if not len(rows):
+                continue
+            shard_vectors = np.ascontiguousarray(vectors[rows], dtype='float32')
+            shard_positions = positions[rows]
+
+            if category not in self.indexes:
+                self._set_shard(category, shard_vectors, shard_positions)
+                rebuilt.append(category)
+                continue
+
+            all_positions = np.concatenate([self.positions[category], shard_positions])
+            if self._needs_rebuild(category, shard_vectors, len(all_positions), drift_threshold):
+                existing = np.asarray(reconstruct(self.positions[category]), dtype='float32')
+                self._set_shard(category, np.ascontiguousarray(np.vstack([existing, shard_vectors])), all_positions)
+                rebuilt.append(category)
+                continue
+
+            self.indexes[category].add_with_ids(shard_vectors, shard_positions)
+            self.positions[category] = all_positions
+
+        self._position_sets.clear()
+        return rebuilt
+
+    def remove(self, positions: List[int]) -> int:
+        """전역 위치에 해당하는 벡터를 모든 샤드에서 제거 (remove_ids), 제거한 개수 반환"""
+        if not positions:
+            return 0
+        removed_positions = np.asarray(positions, dtype='int64')
+        removed = 0
+        for category, shard_positions in self.positions.items():
+            mask = np.isin(shard_positions, removed_positions)
+            if not mask.any():
+                continue
+            removed += int(self.indexes[category].remove_ids(shard_positions[mask]))
+            self.positions[category] = shard_positions[~mask]
+        self._position_sets.clear()
+        return removed
+
+    @classmethod
+    def build(cls, vectors: np.ndarray, categories: List[str], nprobe: int = 10,
+              positions: Optional[np.ndarray] = None) -> 'CategoryShardIndex':
+        """벡터와 카테고리 목록으로 샤드 생성
+
+        positions 는 각 벡터의 전역 인덱스 위치 (생략하면 0..n-1)
+        """
+        shards = cls(nprobe=nprobe)
+        labels = np.asarray(categories)
+        global_positions = np.arange(len(vectors), dtype='int64') if positions is None \
+            else np.asarray(positions, dtype='int64')
+
+        for category in CATEGORIES:
+            rows = np.flatnonzero(labels == category)
+            if not len(rows):
+                continue
+            shards._set_shard(
+                category, np.ascontiguousarray(vectors[rows], dtype='float32'), global_positions[rows]
+            )
+
+        return shards
+
+    @classmethod
+    def from_vectorstore(cls, vectorstore, nprobe: int = 10) -> 'CategoryShardIndex':
+        """LangChain FAISS 벡터스토어의 벡터와 category 메타데이터로 샤드 생성
+
+        IVF 인덱스는 direct map 이 있어야 벡터를 복원할 수 있습니다.
+        """
+        positions = np.array(sorted(vectorstore.index_to_docstore_id.keys()), dtype='int64')
+        vectors = vectorstore.index.reconstruct_batch(positions)
+        categories = []
+        for position in positions:
+            doc = vectorstore.docstore.search(vectorstore.index_to_docstore_id[int(position)])
+            metadata = getattr(doc, 'metadata', None) or {}
+            categories.append(metadata.get('category', GENERAL_CATEGORY))
+        return cls.build(vectors, categories, nprobe=nprobe, positions=positions)
+
+    def save(self, directory: str):
+        import faiss
+
+        shard_dir = os.path.join(directory, SHARD_DIR)
+        os.makedirs(shard_dir, exist_ok=True)
+        manifest = {
+            'nprobe': self.nprobe,
+            'ids': POSITION_IDS if self.position_ids else None,
+            'baseline_errors': self.baseline_errors,
+            'shards': {},
+        }
+        for category, index in self.indexes.items():
+            faiss.write_index(index, os.path.join(shard_dir, f"{category}.index"))
+            np.save(os.path.join(shard_dir, f"{category}.positions.npy"), self.positions[category])
+            manifest['shards'][category] = int(index.ntotal)
+        with open(os.path.join(shard_dir, SHARD_MANIFEST_FILE), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = False) -> Optional['CategoryShardIndex']:
+        shard_dir = os.path.join(directory, SHARD_DIR)
+        manifest_path = os.path.join(shard_dir, SHARD_MANIFEST_FILE)
+        if not os.path.exists(manifest_path):
+            return None
+
+        import faiss
+
+        try:
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+            shards = cls(nprobe=manifest.get('nprobe', 10))
+            shards.position_ids = manifest.get('ids') == POSITION_IDS
+            shards.baseline_errors = manifest.get('baseline_errors', {})
+            io_flags = 0
+            if mmap:
+                from .ann_index import mmap_io_flags
+                io_flags = mmap_io_flags()
+            for category in manifest['shards']:
+                index = faiss.read_index(os.path.join(shard_dir, f"{category}.index"), io_flags)
+                if hasattr(index, 'nprobe'):
+                    index.nprobe = shards.nprobe
+                shards.indexes[category] = index
+                shards.positions[category] = np.load(
+                    os.path.join(shard_dir, f"{category}.positions.npy"), mmap_mode='r' if mmap else None
+                )
+            return shards
+        except Exception as e:
+            logger.error(f"❌ 카테고리 샤드 로드 실패: {str(e)}")
+            return None
@@ -0,0 +1,197 @@
+"""
+활성 대화 세션의 사용자별 상태 캐시
+- 턴마다 반복되던 DB 조회(활성 세션, 1시간 유휴 확인용 마지막 메시지, 최근 대화)를 캐시 하나로 대체
+- 상태: 활성 세션 필드, 마지막 활동 시각, 요약되지 않은 최근 메시지 링 버퍼(최신 TURNS 개)
+- 메시지를 쓸 때(쓰기 버퍼에 넣을 때) 함께 갱신하고, 캐시에 없으면 DB + 쓰기 버퍼에서 다시 만듦
+- 키에 CHAT 세대 번호가 들어가므로 세션이 생성 / 종료 / 삭제되면(cache_namespace 시그널) 이전 상태는 조회되지 않음
+  세대 번호를 DB 조회 전에 읽으므로, 조회 도중 세션이 바뀌어도 오래된 상태는 이전 세대 키에만 저장됨
+- 다른 세션의 메시지(세션 교체 직전 턴의 답변 등)는 링 버퍼에 넣지 않음
+- 롤링 요약이 갱신되면 상태를 지우고 다음 턴에 DB 에서 다시 만듦 (요약된 메시지가 링 버퍼에 남지 않도록)
+"""
+import time
+import logging
+import threading
+from datetime import datetime, timezone as dt_timezone
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+from apps.core.models import ChatMessage, ChatSession
+from .cache_namespace import CHAT, user_cache_key
+from .context_builder import get_budget_config
+from .write_buffer import get_write_buffer, merge_pending
+
+logger = logging.getLogger(__name__)
+
+SESSION_FIELDS = [field.attname for field in ChatSession._meta.concrete_fields]
+
+
+def _turn(message: ChatMessage) -> tuple:
+    created_at = message.created_at.timestamp() if message.created_at else time.time()
+    return (message.pk, message.sender, message.message, created_at)
+
+
+class ChatState:
+    """캐시에 저장되는 대화 상태 (data 는 캐시 값 그대로인 dict)"""
+
+    def __init__(self, data: Dict):
+        self.data = data
+        self._session = None
+
+    @classmethod
+    def build(cls, session: ChatSession, last_activity: Optional[float], messages: List) -> 'ChatState':
+        """messages 는 최신순"""
+        state = cls({
+            'session': {name: getattr(session, name) for name in SESSION_FIELDS},
+            'last_activity': last_activity,
+            'turns': [_turn(message) for message in messages],
+        })
+        state._session = session
+        return state
+
+    @property
+    def session_id(self) -> int:
+        return self.data['session']['id']
+
+    @property
+    def session(self) -> ChatSession:
+        """캐시된 필드로 만든 세션 인스턴스 (DB 조회 없음)"""
+        if self._session is None:
+            fields = self.data['session']
+            self._session = ChatSession.from_db(DEFAULT_DB_ALIAS, list(fields), list(fields.values()))
+        return self._session
+
+    def is_idle(self, idle_timeout: float) -> bool:
+        last_activity = self.data['last_activity']
+        return last_activity is not None and time.time() - last_activity > idle_timeout
+
+    def recent_messages(self) -> List[ChatMessage]:
+        """요약되지 않은 최근 메시지 (최신순, 저장 전에 기록된 메시지는 id 없음)"""
+        user_id, session_id = self.data['session']['user_id'], self.session_id
+        return [
+            ChatMessage(
+                id=message_id, user_id=user_id, session_id=session_id, sender=sender, message=message,
+                created_at=datetime.fromtimestamp(created_at, tz=dt_timezone.utc)
+            )
+            for message_id, sender, message, created_at in self.data['turns']
+        ]
+
+
+class ChatStateStore:
+    """사용자별 대화 상태 캐시"""
+
+    def __init__(self, enabled: bool = True, turns: int = 12, timeout: int = 7200, idle_timeout: float = 3600):
+        self.enabled = enabled
+        self.turns = turns
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+
+        self._stats = {'hits': 0, 'misses': 0, 'appends': 0, 'skipped_appends': 0, 'invalidations': 0}
+        self._stats_lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls) -> 'ChatStateStore':
+        config = getattr(settings, 'CHATBOT_CHAT_STATE', {})
+        return cls(
+            enabled=config.get('ENABLED', True),
+            # 최근 대화(HISTORY_MAX_MESSAGES) + 현재 질문은 항상 담을 수 있어야 함
+            turns=max(config.get('TURNS', 12), get_budget_config()['HISTORY_MAX_MESSAGES'] + 1),
+            timeout=config.get('TIMEOUT', 7200),
+            idle_timeout=config.get('IDLE_TIMEOUT', 3600),
+        )
+
+    def _count(self, name: str):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    @staticmethod
+    def _key(user_id: int) -> str:
+        return user_cache_key(user_id, CHAT, 'chat_state')
+
+    def get(self, user_id: int) -> Optional[ChatState]:
+        """캐시된 상태 (없으면 None, DB 조회 없음)"""
+        if not self.enabled:
+            return None
+        data = cache.get(self._key(user_id))
+        self._count('hits' if data is not None else 'misses')
+        return ChatState(data) if data is not None else None
+
+    def load(self, user) -> Optional[ChatState]:
+        """DB 와 쓰기 버퍼에서 상태를 만들어 저장 (활성 세션이 없으면 None)"""
+        # 세대 번호를 먼저 읽어야 조회 도중 세션이 바뀌었을 때 이전 세대 키에 저장됨
+        key = self._key(user.id) if self.enabled else None
+        session = ChatSession.objects.filter(user=user, is_active=True).first()
+        if not session:
+            return None
+
+        # 쓰기 버퍼를 DB 보다 먼저 읽어야 flush 중인 메시지가 누락되지 않음
+        pending = get_write_buffer().pending(ChatMessage, session_id=session.id)
+        rows = list(
+            session.messages.filter(id__gt=session.summarized_message_id or 0).order_by('-created_at')[:self.turns]
+        )
+        messages = merge_pending(pending, rows)[:self.turns]
+
+        if pending:
+            last_activity = time.time()
+        elif rows:
+            last_activity = rows[0].created_at.timestamp()
+        else:
+            # 최근 메시지가 모두 요약된 경우
+            last_message = session.messages.order_by('-created_at').first()
+            last_activity = last_message.created_at.timestamp() if last_message else None
+
+        state = ChatState.build(session, last_activity, messages)
+        if key:
+            cache.set(key, state.data, self.timeout)
+        return state
+
+    def start(self, session: ChatSession) -> ChatState:
+        """새 세션의 빈 상태 저장 (세션 생성 시그널로 세대 번호가 바뀐 뒤 호출)"""
+        state = ChatState.build(session, None, [])
+        if self.enabled:
+            cache.set(self._key(session.user_id), state.data, self.timeout)
+        return state
+
+    def append(self, message: ChatMessage, state: Optional[ChatState] = None):
+        """메시지를 링 버퍼에 추가하고 마지막 활동 시각 갱신
+
+        state 를 주면 그 상태를 갱신해 저장하고, 없으면 캐시에서 읽음
+        (상태가 없거나 다른 세션이면 건너뜀 - 다음 조회 때 DB 와 쓰기 버퍼에서 다시 만듦)
+        """
+        key = self._key(message.user_id) if self.enabled else None
+        if state is None:
+            data = cache.get(key) if key else None
+            state = ChatState(data) if data is not None else None
+        if state is None or state.session_id != message.session_id:
+            self._count('skipped_appends')
+            return
+
+        state.data['turns'] = [_turn(message), *state.data['turns']][:self.turns]
+        state.data['last_activity'] = time.time()
+        if key:
+            cache.set(key, state.data, self.timeout)
+        self._count('appends')
+
+    def invalidate(self, user_id: int):
+        if self.enabled:
+            cache.delete(self._key(user_id))
+            self._count('invalidations')
+
+    def stats(self) -> Dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['enabled'] = self.enabled
+        return stats
+
+
+# 전역 대화 상태 캐시 인스턴스
+chat_state_store_instance = None
+
+def get_chat_state_store() -> ChatStateStore:
+    """대화 상태 캐시 인스턴스 가져오기"""
+    global chat_state_store_instance
+    if not chat_state_store_instance:
+        chat_state_store_instance = ChatStateStore.from_settings()
+    return chat_state_store_instance
@@ -0,0 +1,46 @@
+"""
+챗봇 백그라운드 작업 정의 (jobs.get_job_queue().submit(이름, ...) 으로 실행)
+- 인자는 ID / 문자열만 사용하여 Celery 백엔드에서도 그대로 직렬화
+"""
+from django.contrib.auth import get_user_model
+
+from .jobs import register_job
+
+
+def _load_user(user_id: int):
+    return get_user_model().objects.select_related('profile').filter(id=user_id).first()
+
+
+def _chatbot():
+    from .ultrafast_chatbot_enhanced import get_chatbot
+    return get_chatbot()
+
+
+@register_job('chatbot.extract_preferences')
+def extract_preferences(user_id: int, text: str):
+    """답변에서도 선호도 추출"""
+    user = _load_user(user_id)
+    if user is not None:
+        _chatbot()._extract_and_save_preferences(user, text)
+
+
+@register_job('chatbot.daily_recommendations')
+def daily_recommendations(user_id: int):
+    """오늘의 추천 생성 (야간 배치 이후 처음 조회한 사용자)"""
+    user = _load_user(user_id)
+    if user is not None:
+        _chatbot()._generate_daily_recommendations(user)
+
+
+@register_job('chatbot.vectorize_conversations')
+def vectorize_conversations(user_id: int):
+    """새 대화를 장기 기억 스니펫으로 저장 및 임베딩"""
+    user = _load_user(user_id)
+    if user is not None:
+        _chatbot()._vectorize_important_conversations(user)
+
+
+@register_job('chatbot.session_summary')
+def session_summary(session_id: int):
+    """예산을 넘은 오래된 대화를 세션 요약으로 이동"""
+    _chatbot()._update_session_summary(session_id)
@@ -0,0 +1,14 @@
+"""
+챗봇 응답 경로 오프라인 부하 테스트 (가짜 OpenAI 서버 사용)
+
+python manage.py loadtest_chatbot --users 50 --turns 5 --concurrency 16 --latency 0.5 --output <결과.json>
+"""
+from .fake_openai import FakeOpenAIServer
+from .runner import DEFAULT_FIXTURE, ChatbotLoadTest, load_questions
+
+__all__ = [
+    'DEFAULT_FIXTURE',
+    'ChatbotLoadTest',
+    'FakeOpenAIServer',
+    'load_questions',
+]
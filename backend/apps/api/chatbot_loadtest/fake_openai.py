@@ -0,0 +1,209 @@
+"""
+로컬 OpenAI 호환 스텁 서버 (부하 테스트용)
+- POST /v1/chat/completions 만 지원 (stream=True 이면 SSE 청크 전송)
+- 첫 토큰 지연(first_token_latency)과 초당 토큰 수(tokens_per_second)로 모델 응답 시간을 흉내냄
+- 질문에 한글이 있으면 한국어, 없으면 영어 답변을 reply_tokens 개 토큰(단어)으로 생성
+- error_rate 비율만큼 500 오류 응답 (재시도 / 오류 경로 측정)
+"""
+import json
+import random
+import re
+import threading
+import time
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+HANGUL = re.compile('[가-힣]')
+
+REPLY_WORDS = {
+    'ko': (
+        "규칙적인 운동과 균형 잡힌 식단이 가장 중요합니다. 주 3회 이상 30분씩 유산소 운동을 하고, "
+        "근력 운동은 큰 근육 위주로 천천히 시작하세요. 단백질은 체중 1kg당 1.2g 정도가 적당하며 "
+        "충분한 수면과 수분 섭취도 잊지 마세요."
+    ).split(),
+    'en': (
+        "Regular exercise and a balanced diet matter most. Aim for at least thirty minutes of cardio three "
+        "times a week, start strength training with the large muscle groups, eat about 1.2 g of protein per "
+        "kilogram of body weight, and keep up with sleep and hydration."
+    ).split(),
+}
+
+
+def _reply_tokens(language: str, count: int) -> List[str]:
+    words = REPLY_WORDS[language]
+    return [('' if index == 0 else ' ') + words[index % len(words)] for index in range(count)]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload: Dict):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        fake = self.server.fake
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            request = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            self._send_json(400, {'error': {'message': 'invalid JSON', 'type': 'invalid_request_error'}})
+            return
+
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self._send_json(404, {'error': {'message': f'unsupported path: {self.path}', 'type': 'not_found'}})
+            return
+        if fake.error_rate and random.random() < fake.error_rate:
+            fake.record(errors=1)
+            self._send_json(500, {'error': {'message': 'injected failure', 'type': 'server_error'}})
+            return
+
+        messages = request.get('messages') or []
+        prompt = ''.join(str(message.get('content') or '') for message in messages)
+        question = next(
+            (str(message.get('content') or '') for message in reversed(messages) if message.get('role') == 'user'), ''
+        )
+        language = 'ko' if HANGUL.search(question) else 'en'
+        count = min(fake.reply_tokens, request.get('max_tokens') or fake.reply_tokens)
+        tokens = _reply_tokens(language, count)
+        usage = {
+            # 프롬프트 토큰은 문자 수 기반 추정 (스텁에는 토크나이저가 없음)
+            'prompt_tokens': len(prompt) // 3,
+            'completion_tokens': len(tokens),
+            'total_tokens': len(prompt) // 3 + len(tokens),
+        }
+        fake.record(requests=1, streamed=int(bool(request.get('stream'))),
+                    prompt_tokens=usage['prompt_tokens'], completion_tokens=len(tokens))
+
+        model = request.get('model', 'fake-model')
+        completion_id = f"chatcmpl-fake-{fake.next_id()}"
+        created = int(time.time())
+        if request.get('stream'):
+            self._stream(fake, completion_id, created, model, tokens)
+        else:
+            time.sleep(fake.first_token_latency + len(tokens) / fake.tokens_per_second)
+            self._send_json(200, {
+                'id': completion_id,
+                'object': 'chat.completion',
+                'created': created,
+                'model': model,
+                'choices': [{
+                    'index': 0,
+                    'message': {'role': 'assistant', 'content': ''.join(tokens)},
+                    'finish_reason': 'stop',
+                }],
+                'usage': usage,
+            })
+
+    def _stream(self, fake, completion_id: str, created: int, model: str, tokens: List[str]):
+        def event(delta: Dict, finish_reason=None) -> bytes:
+            chunk = {
+                'id': completion_id,
+                'object': 'chat.completion.chunk',
+                'created': created,
+                'model': model,
+                'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}],
+            }
+            return f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode('utf-8')
+
+        # 길이를 모르는 응답이므로 전송 후 연결을 닫아 끝을 알림
+        self.close_connection = True
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        try:
+            time.sleep(fake.first_token_latency)
+            started = time.monotonic()
+            self.wfile.write(event({'role': 'assistant', 'content': ''}))
+            for index, token in enumerate(tokens):
+                # 누적 오차 없이 목표 속도에 맞춤
+                delay = started + index / fake.tokens_per_second - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                self.wfile.write(event({'content': token}))
+                self.wfile.flush()
+            self.wfile.write(event({}, 'stop'))
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # 클라이언트가 스트림을 중간에 끊음
+            fake.record(disconnects=1)
+
+
+class FakeOpenAIServer:
+    """별도 스레드에서 실행되는 OpenAI 호환 스텁
+
+    with FakeOpenAIServer(first_token_latency=0.3) as server:
+        client = OpenAI(base_url=server.base_url, api_key='fake')
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, first_token_latency: float = 0.3,
+                 tokens_per_second: float = 50.0, reply_tokens: int = 120, error_rate: float = 0.0):
+        self.host = host
+        self.port = port
+        self.first_token_latency = first_token_latency
+        self.tokens_per_second = max(tokens_per_second, 1e-3)
+        self.reply_tokens = reply_tokens
+        self.error_rate = error_rate
+
+        self._httpd = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._counter = 0
+        self._stats = {
+            'requests': 0, 'streamed': 0, 'errors': 0, 'disconnects': 0,
+            'prompt_tokens': 0, 'completion_tokens': 0,
+        }
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1"
+
+    def next_id(self) -> int:
+        with self._lock:
+            self._counter += 1
+            return self._counter
+
+    def record(self, **counts):
+        with self._lock:
+            for name, value in counts.items():
+                self._stats[name] += value
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return dict(self._stats)
+
+    def start(self) -> 'FakeOpenAIServer':
+        self._httpd = ThreadingHTTPServer((self.host, self.port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.fake = self
+        self.port = self._httpd.server_address[1]
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='fake-openai', daemon=True)
+        self._thread.start()
+        logger.info(f"🧪 가짜 OpenAI 서버 시작: {self.base_url}")
+        return self
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self) -> 'FakeOpenAIServer':
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+        return False
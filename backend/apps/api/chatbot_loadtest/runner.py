@@ -0,0 +1,246 @@
+"""
+챗봇 부하 테스트 실행기
+- 가짜 OpenAI 서버(fake_openai)를 띄우고 LLM 게이트웨이의 openai 프로바이더를 그 서버로 교체 (과금 / 네트워크 없음)
+- 시뮬레이션 사용자마다 질문 세트(fixtures/questions.json)에서 뽑은 질문으로 여러 턴 대화
+- 사용자 하나의 턴은 순서대로, 사용자끼리는 concurrency 개 스레드에서 동시에 실행
+- 턴별 지연시간 / 첫 토큰 시간 / 요청 스레드의 DB 쿼리 수와 단계별 소요 시간(debug timings)을 집계
+
+주의
+- DB 쿼리 수는 요청을 처리한 스레드의 연결만 셈 (쓰기 버퍼 flush / 백그라운드 작업의 쿼리는 제외)
+- 시뮬레이션 사용자는 @loadtest.local 이메일로 생성되며 기본적으로 실행 후 삭제됨
+"""
+import os
+import json
+import random
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+from django.db import connection
+
+from ..retrieval_benchmark.metrics import latency_summary
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "questions.json")
+LOADTEST_EMAIL_DOMAIN = 'loadtest.local'
+LANGUAGES = ('ko', 'en')
+
+
+def load_questions(path: str = DEFAULT_FIXTURE) -> Dict[str, List[str]]:
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+class _QueryCounter:
+    """connection.execute_wrapper 용 쿼리 카운터"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def count_summary(values: List[int]) -> Dict[str, float]:
+    if not values:
+        return {'total': 0, 'mean': 0.0, 'p50': 0.0, 'p95': 0.0, 'max': 0}
+    array = np.asarray(values)
+    return {
+        'total': int(array.sum()),
+        'mean': float(array.mean()),
+        'p50': float(np.percentile(array, 50)),
+        'p95': float(np.percentile(array, 95)),
+        'max': int(array.max()),
+    }
+
+
+class ChatbotLoadTest:
+    """시뮬레이션 사용자로 챗봇 응답 경로를 반복 실행"""
+
+    def __init__(self, users: int = 20, turns: int = 5, concurrency: int = 8, mode: str = 'response',
+                 language: str = 'mixed', think_time: float = 0.0, questions: Optional[Dict] = None,
+                 seed: int = 0):
+        self.users = users
+        self.turns = turns
+        self.concurrency = concurrency
+        self.mode = mode
+        self.language = language
+        self.think_time = think_time
+        self.questions = questions or load_questions()
+        self.random = random.Random(seed)
+
+    def _language_for(self, index: int) -> str:
+        if self.language == 'mixed':
+            return LANGUAGES[index % len(LANGUAGES)]
+        return self.language
+
+    def setup_users(self) -> List:
+        """시뮬레이션 사용자와 프로필 생성 (이미 있으면 재사용)"""
+        from django.contrib.auth import get_user_model
+        from apps.core.models import UserProfile
+
+        User = get_user_model()
+        users = []
+        for index in range(self.users):
+            user, created = User.objects.get_or_create(
+                email=f"loadtest_{index}@{LOADTEST_EMAIL_DOMAIN}",
+                defaults={'username': f"loadtest_{index}"},
+            )
+            if created:
+                user.set_unusable_password()
+                user.save(update_fields=['password'])
+            UserProfile.objects.get_or_create(user=user, defaults={
+                'age': 20 + index % 40,
+                'height': 160 + index % 25,
+                'weight': 55 + index % 30,
+                'goal': ('weight_loss', 'muscle_gain', 'health_improvement')[index % 3],
+            })
+            users.append(user)
+        return users
+
+    @staticmethod
+    def cleanup_users() -> int:
+        """시뮬레이션 사용자 삭제 (세션 / 메시지 / 기억은 CASCADE)"""
+        from django.contrib.auth import get_user_model
+
+        deleted, _ = get_user_model().objects.filter(email__endswith=f"@{LOADTEST_EMAIL_DOMAIN}").delete()
+        return deleted
+
+    @staticmethod
+    def attach(server):
+        """LLM 게이트웨이의 openai 프로바이더를 가짜 서버로 교체 (동시성 제한 / 재시도 / 서킷은 실제 설정 그대로)"""
+        from ..llm_gateway import OpenAIProvider, get_llm_gateway
+        from ..ultrafast_chatbot_enhanced import get_chatbot
+
+        get_llm_gateway().set_provider('openai', OpenAIProvider(api_key='fake', base_url=server.base_url))
+        return get_chatbot()
+
+    def _run_turn(self, chatbot, user, question: str, language: str) -> Dict:
+        counter = _QueryCounter()
+        first_token = None
+        start = time.perf_counter()
+        with connection.execute_wrapper(counter):
+            if self.mode == 'stream':
+                result = {'success': False}
+                for event in chatbot.stream_response(user, question, language, debug=True):
+                    if event['type'] == 'token' and first_token is None:
+                        first_token = time.perf_counter() - start
+                    elif event['type'] == 'done':
+                        result = {**event, 'success': True}
+                    elif event['type'] == 'error':
+                        result = {**event, 'success': False}
+            else:
+                result = chatbot.get_response(user, question, language, debug=True)
+        latency = time.perf_counter() - start
+
+        return {
+            'user_id': user.id,
+            'language': language,
+            'question': question,
+            'success': bool(result.get('success')),
+            'error': result.get('error'),
+            'latency_ms': latency * 1000,
+            'first_token_ms': first_token * 1000 if first_token is not None else None,
+            'queries': counter.count,
+            'semantic_cache_hit': bool(result.get('semantic_cache_hit')),
+            'cached': bool(result.get('cached')),
+            'timings': (result.get('debug') or {}).get('timings'),
+            'context_tokens': ((result.get('debug') or {}).get('context_tokens') or {}).get('total'),
+        }
+
+    def _run_user(self, chatbot, user, index: int, plan: List[str]) -> List[Dict]:
+        language = self._language_for(index)
+        results = []
+        try:
+            for question in plan:
+                results.append(self._run_turn(chatbot, user, question, language))
+                if self.think_time:
+                    time.sleep(self.think_time)
+        finally:
+            # 풀 스레드의 DB 연결 정리
+            connection.close()
+        return results
+
+    def run(self, server, users: Optional[List] = None) -> Dict:
+        from ..jobs import get_job_queue
+        from ..llm_gateway import get_llm_gateway
+        from ..write_buffer import get_write_buffer
+
+        chatbot = self.attach(server)
+        users = users if users is not None else self.setup_users()
+        plans = [
+            [self.random.choice(self.questions[self._language_for(index)]) for _ in range(self.turns)]
+            for index in range(len(users))
+        ]
+
+        logger.info(f"🏋️ 부하 테스트 시작: 사용자 {len(users)}명 x {self.turns}턴, 동시 {self.concurrency}")
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='loadtest') as pool:
+            futures = [
+                pool.submit(self._run_user, chatbot, user, index, plans[index])
+                for index, user in enumerate(users)
+            ]
+            turns = [turn for future in futures for turn in future.result()]
+        elapsed = time.perf_counter() - start
+
+        # 응답 이후에 남은 쓰기 / 백그라운드 작업을 마저 처리하는 데 걸린 시간
+        drain_start = time.perf_counter()
+        get_write_buffer().flush()
+        drained = get_job_queue().drain()
+        drain_seconds = time.perf_counter() - drain_start
+
+        return self.build_report(turns, elapsed, server.stats(), {
+            'drain_seconds': drain_seconds,
+            'drained': drained,
+            'write_buffer': get_write_buffer().stats(),
+            'background_jobs': get_job_queue().stats(),
+            'llm_gateway': get_llm_gateway().stats(),
+        })
+
+    def build_report(self, turns: List[Dict], elapsed: float, fake_llm: Dict, after: Dict) -> Dict:
+        succeeded = [turn for turn in turns if turn['success']]
+        first_tokens = [turn['first_token_ms'] for turn in succeeded if turn['first_token_ms'] is not None]
+
+        stage_totals: Dict[str, List[float]] = {}
+        for turn in succeeded:
+            for stage, value in ((turn['timings'] or {}).get('stages_ms') or {}).items():
+                stage_totals.setdefault(stage, []).append(value)
+
+        context_tokens = [turn['context_tokens'] for turn in succeeded if turn['context_tokens']]
+        errors: Dict[str, int] = {}
+        for turn in turns:
+            if not turn['success']:
+                errors[turn['error'] or 'unknown'] = errors.get(turn['error'] or 'unknown', 0) + 1
+
+        return {
+            'timestamp': time.time(),
+            'settings': {
+                'users': self.users,
+                'turns_per_user': self.turns,
+                'concurrency': self.concurrency,
+                'mode': self.mode,
+                'language': self.language,
+                'think_time': self.think_time,
+            },
+            'metrics': {
+                'turns': len(turns),
+                'errors': len(turns) - len(succeeded),
+                'duration_s': elapsed,
+                'throughput_tps': len(turns) / elapsed if elapsed else 0.0,
+                **latency_summary([turn['latency_ms'] for turn in succeeded]),
+                'first_token': latency_summary(first_tokens) if first_tokens else None,
+                'db_queries_per_turn': count_summary([turn['queries'] for turn in turns]),
+                'semantic_cache_hits': sum(1 for turn in succeeded if turn['semantic_cache_hit']),
+                'simple_cache_hits': sum(1 for turn in succeeded if turn['cached']),
+                'context_tokens_mean': float(np.mean(context_tokens)) if context_tokens else 0.0,
+                'stages_mean_ms': {stage: float(np.mean(values)) for stage, values in stage_totals.items()},
+            },
+            'errors': errors,
+            'fake_llm': fake_llm,
+            'after_run': after,
+            'per_turn': [{key: value for key, value in turn.items() if key != 'timings'} for turn in turns],
+        }
@@ -0,0 +1,123 @@
+"""
+챗봇 무거운 의존성(임베딩 모델, 벡터스토어)의 지연 로딩 레지스트리
+- 모듈 import 시점에는 torch / langchain 을 로드하지 않음
+- ASGI 시작 시 백그라운드 스레드에서 워밍업 (선택)
+- 워밍업이 끝나기 전에는 요청을 막지 않고 "검색 불가" 모드로 동작
+"""
+import threading
+import time
+import logging
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+STATE_IDLE = 'idle'
+STATE_LOADING = 'loading'
+STATE_READY = 'ready'
+STATE_FAILED = 'failed'
+
+
+class _Resource:
+    def __init__(self, name: str, loader: Callable):
+        self.name = name
+        self.loader = loader
+        self.state = STATE_IDLE
+        self.value = None
+        self.error = None
+        self.load_time = None
+        self.loaded = threading.Event()
+
+
+class LazyResourceRegistry:
+    """이름으로 등록된 리소스를 최초 요청 시 또는 백그라운드에서 로드"""
+
+    def __init__(self):
+        self._resources: Dict[str, _Resource] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, loader: Callable):
+        with self._lock:
+            if name not in self._resources:
+                self._resources[name] = _Resource(name, loader)
+
+    def _load(self, resource: _Resource):
+        start = time.time()
+        try:
+            logger.info(f"🔧 리소스 로드 시작: {resource.name}")
+            resource.value = resource.loader()
+            resource.state = STATE_READY
+            resource.load_time = time.time() - start
+            logger.info(f"✅ 리소스 로드 완료: {resource.name} ({resource.load_time:.2f}초)")
+        except Exception as e:
+            resource.state = STATE_FAILED
+            resource.error = str(e)
+            logger.error(f"❌ 리소스 로드 실패: {resource.name} - {str(e)}")
+        finally:
+            resource.loaded.set()
+
+    def _start(self, name: str, background: bool) -> Optional[_Resource]:
+        """IDLE(또는 실패) 상태인 리소스의 로드를 시작"""
+        with self._lock:
+            resource = self._resources.get(name)
+            if resource is None:
+                logger.warning(f"⚠️ 등록되지 않은 리소스: {name}")
+                return None
+            if resource.state not in (STATE_IDLE, STATE_FAILED):
+                return resource
+            resource.state = STATE_LOADING
+            resource.error = None
+            resource.loaded.clear()
+
+        if background:
+            threading.Thread(
+                target=self._load, args=(resource,), name=f'warmup-{name}', daemon=True
+            ).start()
+        else:
+            self._load(resource)
+        return resource
+
+    def warm_up(self, *names: str, background: bool = True):
+        """리소스 워밍업 (기본: 등록된 전체 리소스를 백그라운드에서 로드)"""
+        for name in names or list(self._resources.keys()):
+            self._start(name, background)
+
+    def get(self, name: str, wait: bool = False, timeout: Optional[float] = None):
+        """리소스 반환. 준비되지 않았으면 로드를 시작하고 None 반환 (wait=True면 대기)"""
+        resource = self._start(name, background=True)
+        if resource is None:
+            return None
+        if resource.state != STATE_READY and wait:
+            resource.loaded.wait(timeout)
+        return resource.value if resource.state == STATE_READY else None
+
+    def is_ready(self, *names: str) -> bool:
+        targets = names or list(self._resources.keys())
+        return all(
+            name in self._resources and self._resources[name].state == STATE_READY
+            for name in targets
+        )
+
+    def status(self) -> Dict:
+        return {
+            name: {
+                'state': resource.state,
+                'load_time': resource.load_time,
+                'error': resource.error,
+            }
+            for name, resource in self._resources.items()
+        }
+
+
+resource_registry = LazyResourceRegistry()
+
+CHATBOT_KNOWLEDGE = 'chatbot_knowledge'
+
+
+def _load_chatbot_knowledge():
+    """임베딩 모델과 PDF 벡터스토어 로드 (무거운 import 포함)"""
+    from .ultrafast_chatbot_enhanced import UltraFastHealthChatbot
+    UltraFastHealthChatbot._initialize_shared_resources()
+    return UltraFastHealthChatbot._vectorstore
+
+
+resource_registry.register(CHATBOT_KNOWLEDGE, _load_chatbot_knowledge)
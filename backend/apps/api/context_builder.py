@@ -0,0 +1,259 @@
+"""
+토큰 예산 기반 프롬프트 구성
+- 로컬 토크나이저(tiktoken)로 토큰 수를 세고, 없으면 문자 기반 추정으로 대체
+- 시스템 프롬프트 + 현재 질문은 항상 포함하고, 나머지 섹션(기억, 참고 자료, 요약, 대화 기록)을
+  우선순위대로 남은 예산 안에 채움
+- 섹션별 토큰 수를 기록하여 비용 / 지연시간 분석에 사용
+- 세션 기록이 예산을 넘으면 오래된 메시지를 ChatSession.history_summary 로 요약 (롤링 요약)
+"""
+import logging
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ENCODING = 'o200k_base'
+MESSAGE_OVERHEAD_TOKENS = 4  # 메시지마다 role / 구분자에 쓰이는 토큰
+REPLY_PRIMING_TOKENS = 3
+
+DEFAULT_BUDGET = {
+    'MAX_PROMPT_TOKENS': 1800,
+    'PRIORITY': ['memory', 'knowledge', 'summary', 'history'],
+    'SECTION_TOKENS': {'memory': 200, 'knowledge': 600, 'summary': 300, 'history': None},  # None: 남은 예산 전부
+    'PROFILE_LIST_TOKENS': 60,  # 시스템 프롬프트의 선호도/기억 목록 하나당
+    'KNOWLEDGE_CHUNK_TOKENS': 250,
+    'MEMORY_SNIPPET_TOKENS': 80,
+    'HISTORY_MESSAGE_TOKENS': 300,
+    'HISTORY_MAX_MESSAGES': 10,
+    'SUMMARY_KEEP_TOKENS': 800,  # 요약하지 않고 기록으로 남길 최근 메시지 토큰
+    'SUMMARY_TRIGGER_MESSAGES': 6,  # 요약 대상 메시지가 이만큼 쌓이면 요약 갱신
+    'SUMMARY_MODEL': 'gpt-4o-mini',
+    'SUMMARY_MAX_TOKENS': 300,
+}
+
+
+def get_budget_config() -> Dict:
+    config = {**DEFAULT_BUDGET, **getattr(settings, 'CHATBOT_CONTEXT_BUDGET', {})}
+    config['SECTION_TOKENS'] = {**DEFAULT_BUDGET['SECTION_TOKENS'], **config.get('SECTION_TOKENS', {})}
+    return config
+
+
+@lru_cache(maxsize=16)
+def _encoding_for(model: str):
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding(DEFAULT_ENCODING)
+    except Exception as e:
+        # BPE 파일을 받을 수 없는 환경 (오프라인) 등
+        logger.warning(f"⚠️ tiktoken 인코딩 로드 실패, 문자 기반 추정 사용: {str(e)}")
+        return None
+
+
+class TokenCounter:
+    """모델별 토큰 수 계산 (tiktoken 이 없으면 추정)"""
+
+    def __init__(self, model: str = 'gpt-4o-mini'):
+        self.model = model
+        self.encoding = _encoding_for(model)
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self.encoding is not None:
+            return len(self.encoding.encode(text))
+        # 추정: ASCII 는 4자당 1토큰, 한글 등 비ASCII 문자는 1자당 1토큰
+        ascii_chars = sum(1 for char in text if ord(char) < 128)
+        return (ascii_chars + 3) // 4 + (len(text) - ascii_chars)
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """max_tokens 이하로 자르기 (잘린 경우 ... 추가)"""
+        if max_tokens <= 0:
+            return ''
+        if self.count(text) <= max_tokens:
+            return text
+        if self.encoding is not None:
+            return self.encoding.decode(self.encoding.encode(text)[:max(max_tokens - 1, 1)]) + '...'
+
+        # 추정 모드: 이분 탐색으로 길이 결정
+        low, high = 0, len(text)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self.count(text[:middle]) <= max_tokens - 1:
+                low = middle
+            else:
+                high = middle - 1
+        return text[:low] + '...'
+
+    def count_message(self, message: Dict) -> int:
+        return MESSAGE_OVERHEAD_TOKENS + self.count(message.get('content', ''))
+
+    def count_messages(self, messages: Sequence[Dict]) -> int:
+        return sum(self.count_message(message) for message in messages) + REPLY_PRIMING_TOKENS
+
+    def fit_items(self, items: Sequence[str], max_tokens: int, separator: str = ', ') -> List[str]:
+        """목록에서 최근(뒤쪽) 항목부터 예산 안에 들어가는 만큼 선택 (원래 순서 유지)"""
+        selected = []
+        used = 0
+        separator_tokens = self.count(separator)
+        for item in reversed(list(items)):
+            cost = self.count(str(item)) + (separator_tokens if selected else 0)
+            if used + cost > max_tokens:
+                break
+            selected.append(item)
+            used += cost
+        return list(reversed(selected))
+
+
+class ContextBuilder:
+    """우선순위 / 섹션 한도에 따라 LLM 메시지 목록 구성"""
+
+    def __init__(self, model: str, config: Optional[Dict] = None):
+        self.config = config or get_budget_config()
+        self.counter = TokenCounter(model)
+
+    def _pack_lines(self, header: str, lines: List[str], limit: int) -> Tuple[str, int]:
+        """머리말 + 줄 목록을 한도 안에서 앞에서부터 채움"""
+        if not lines or limit <= 0:
+            return '', 0
+        text = header
+        used = self.counter.count(header)
+        if used >= limit:
+            return '', 0
+        for line in lines:
+            cost = self.counter.count(line)
+            if used + cost > limit:
+                break
+            text += line
+            used += cost
+        if text == header:
+            return '', 0
+        return text, used
+
+    def _knowledge_section(self, pdf_knowledge: List[Dict], limit: int) -> Tuple[str, int]:
+        chunk_tokens = self.config['KNOWLEDGE_CHUNK_TOKENS']
+        lines = [
+            f"{index + 1}. {self.counter.truncate(doc['content'], chunk_tokens)}\n"
+            for index, doc in enumerate(pdf_knowledge)
+        ]
+        return self._pack_lines("\n\n참고 자료:\n", lines, limit)
+
+    def _memory_section(self, past_snippets: List[Dict], limit: int) -> Tuple[str, int]:
+        snippet_tokens = self.config['MEMORY_SNIPPET_TOKENS']
+        lines = []
+        for snippet in past_snippets:
+            date = snippet['date'].strftime('%Y-%m-%d') if snippet.get('date') else ''
+            lines.append(f"- ({date}) {self.counter.truncate(snippet['text'], snippet_tokens)}\n")
+        return self._pack_lines("\n\n이전 대화에서 사용자가 말한 관련 내용:\n", lines, limit)
+
+    def _summary_section(self, summary: str, limit: int) -> Tuple[str, int]:
+        if not summary:
+            return '', 0
+        header = "\n\n이전 대화 요약:\n"
+        body = self.counter.truncate(summary, limit - self.counter.count(header))
+        if not body:
+            return '', 0
+        text = header + body
+        return text, self.counter.count(text)
+
+    def _history_section(self, history: List, limit: int) -> Tuple[List[Dict], int]:
+        """최신 메시지부터 한도 안에 들어가는 만큼 선택 (history 는 최신순)"""
+        message_tokens = self.config['HISTORY_MESSAGE_TOKENS']
+        selected = []
+        used = 0
+        for msg in history:
+            content = self.counter.truncate(msg.message, message_tokens)
+            entry = {"role": "user" if msg.sender == 'user' else "assistant", "content": content}
+            cost = self.counter.count_message(entry)
+            if used + cost > limit:
+                break
+            selected.append(entry)
+            used += cost
+        selected.reverse()
+        return selected, used
+
+    def build(self, system_prompt: str, question: str, pdf_knowledge: List[Dict] = None,
+              past_snippets: List[Dict] = None, summary: str = '', history: List = None) -> Tuple[List[Dict], Dict]:
+        """(messages, 섹션별 토큰 수) 반환"""
+        budget = self.config['MAX_PROMPT_TOKENS']
+        section_limits = self.config['SECTION_TOKENS']
+
+        question_message = {"role": "user", "content": question}
+        tokens = {
+            'system': self.counter.count_message({"content": system_prompt}),
+            'question': self.counter.count_message(question_message),
+        }
+        remaining = budget - tokens['system'] - tokens['question'] - REPLY_PRIMING_TOKENS
+
+        system_sections = {}
+        history_messages = []
+        for section in self.config['PRIORITY']:
+            limit = remaining if section_limits.get(section) is None else min(section_limits[section], remaining)
+            if section == 'memory':
+                system_sections[section], used = self._memory_section(past_snippets or [], limit)
+            elif section == 'knowledge':
+                system_sections[section], used = self._knowledge_section(pdf_knowledge or [], limit)
+            elif section == 'summary':
+                system_sections[section], used = self._summary_section(summary, limit)
+            elif section == 'history':
+                history_messages, used = self._history_section(history or [], limit)
+            else:
+                continue
+            tokens[section] = used
+            remaining -= used
+
+        # 시스템 메시지 안의 순서는 고정 (참고 자료 → 기억 → 요약)
+        system_content = system_prompt + ''.join(
+            system_sections.get(section, '') for section in ('knowledge', 'memory', 'summary')
+        )
+        messages = [{"role": "system", "content": system_content}, *history_messages, question_message]
+        tokens['history_messages'] = len(history_messages)
+        tokens['total'] = self.counter.count_messages(messages)
+        tokens['budget'] = budget
+        return messages, tokens
+
+
+def split_overflow(messages: List[Tuple[int, str, str]], counter: TokenCounter, keep_messages: int,
+                   keep_tokens: Optional[int]) -> Tuple[List[Tuple[int, str, str]], List[Tuple[int, str, str]]]:
+    """(id, sender, message) 목록(오래된 순)을 (요약할 메시지, 기록으로 남길 메시지)로 분리
+
+    최근 keep_messages 개 중 keep_tokens 안에 들어가는 메시지만 기록으로 남김
+    """
+    keep = []
+    used = 0
+    for message in reversed(messages):
+        cost = MESSAGE_OVERHEAD_TOKENS + counter.count(message[2])
+        if len(keep) >= keep_messages or (keep_tokens is not None and keep and used + cost > keep_tokens):
+            break
+        keep.append(message)
+        used += cost
+    keep.reverse()
+    return messages[:len(messages) - len(keep)], keep
+
+
+def build_summary_messages(previous_summary: str, messages: List[Tuple[int, str, str]], counter: TokenCounter,
+                           message_tokens: int) -> List[Dict]:
+    """기존 요약 + 새로 밀려난 메시지로 롤링 요약 요청 메시지 구성"""
+    transcript = '\n'.join(
+        f"{'사용자' if sender == 'user' else '어시스턴트'}: {counter.truncate(message, message_tokens)}"
+        for _, sender, message in messages
+    )
+    content = f"기존 요약:\n{previous_summary or '(없음)'}\n\n새 대화:\n{transcript}"
+    return [
+        {"role": "system", "content": (
+            "당신은 헬스케어 상담 대화를 요약하는 도우미입니다.\n"
+            "기존 요약과 새 대화를 합쳐 하나의 요약으로 갱신하세요.\n"
+            "사용자의 목표, 건강 상태, 선호/비선호, 이미 받은 조언과 약속한 내용을 우선 보존하고 인사말은 생략하세요.\n"
+            "대화에 사용된 언어로 간결한 문장 몇 개로 작성하세요."
+        )},
+        {"role": "user", "content": content},
+    ]
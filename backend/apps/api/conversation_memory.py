@@ -0,0 +1,270 @@
+"""
+장기 대화 기억 검색 (VectorizedChatHistory)
+- 사용자 메시지를 스니펫으로 모아 float16 바이너리 임베딩으로 저장 (임베딩은 배치로 처리)
+- 사용자별 프로세스 내 인덱스를 처음 조회할 때 생성하고 LRU 로 제거
+- 다른 워커에서 새 스니펫이 임베딩되면 캐시의 버전 키로 감지하여 다시 생성
+- 응답 생성 시 현재 질문과 관련된 과거 스니펫 top-k 반환
+"""
+import threading
+import time
+import logging
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max
+
+from apps.core.models import ChatMessage, VectorizedChatHistory
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_DTYPE = np.float16
+MIN_SNIPPET_CHARS = 8  # 이보다 짧은 메시지("응", "고마워")는 저장하지 않음
+HNSW_MIN_VECTORS = 4096  # 이보다 적으면 전체 내적 검색이 HNSW 보다 빠르고 정확
+
+
+def encode_embedding(vector) -> bytes:
+    """L2 정규화 후 float16 바이트로 변환"""
+    vector = np.asarray(vector, dtype='float32').reshape(-1)
+    norm = np.linalg.norm(vector)
+    if norm > 0:
+        vector = vector / norm
+    return vector.astype(EMBEDDING_DTYPE).tobytes()
+
+
+def decode_embeddings(blobs: Iterable) -> np.ndarray:
+    """float16 바이트 목록을 float32 행렬로 변환 (Postgres 는 memoryview 반환)"""
+    return np.vstack([np.frombuffer(bytes(blob), dtype=EMBEDDING_DTYPE) for blob in blobs]).astype('float32')
+
+
+def _version_key(user_id: int) -> str:
+    return f"conversation_memory_version:{user_id}"
+
+
+class _UserIndex:
+    """사용자 한 명의 스니펫 인덱스 (정규화된 벡터의 내적 검색)"""
+
+    def __init__(self, records: List[Dict], matrix: Optional[np.ndarray], version):
+        self.records = records
+        self.matrix = matrix
+        self.version = version
+        self.ann = None
+        if len(records) >= HNSW_MIN_VECTORS:
+            self.ann = self._build_hnsw(matrix)
+
+    def __len__(self):
+        return len(self.records)
+
+    @staticmethod
+    def _build_hnsw(matrix: np.ndarray):
+        try:
+            import faiss
+        except ImportError:
+            return None
+        index = faiss.IndexHNSWFlat(matrix.shape[1], 32, faiss.METRIC_INNER_PRODUCT)
+        index.add(matrix)
+        index.hnsw.efSearch = 64
+        return index
+
+    def search(self, query: np.ndarray, k: int) -> List[tuple]:
+        """(레코드 위치, 점수) 목록을 점수 내림차순으로 반환"""
+        k = min(k, len(self.records))
+        if k <= 0:
+            return []
+        if self.ann is not None:
+            scores, positions = self.ann.search(query.reshape(1, -1), k)
+            return [(int(p), float(s)) for p, s in zip(positions[0], scores[0]) if p >= 0]
+
+        scores = self.matrix @ query
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(p), float(scores[p])) for p in top]
+
+
+class ConversationMemory:
+    """사용자별 장기 대화 기억 인덱스 캐시"""
+
+    def __init__(self, top_k: int = 3, min_score: float = 0.45, max_users: int = 200,
+                 max_vectors: int = 200000):
+        self.top_k = top_k
+        self.min_score = min_score
+        self.max_users = max_users
+        self.max_vectors = max_vectors
+
+        self._indexes: "OrderedDict[int, _UserIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # 메트릭
+        self.hits = 0
+        self.builds = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_settings(cls) -> 'ConversationMemory':
+        config = getattr(settings, 'CHATBOT_CONVERSATION_MEMORY', {})
+        return cls(
+            top_k=config.get('TOP_K', 3),
+            min_score=config.get('MIN_SCORE', 0.45),
+            max_users=config.get('MAX_CACHED_USERS', 200),
+            max_vectors=config.get('MAX_CACHED_VECTORS', 200000),
+        )
+
+    def _load(self, user_id: int, version) -> _UserIndex:
+        rows = list(
+            VectorizedChatHistory.objects.filter(user_id=user_id, embedding__isnull=False)
+            .order_by('id')
+            .values_list('source_message_id', 'summary', 'date_range_end', 'embedding')
+        )
+        records = [
+            {'message_id': message_id, 'text': summary, 'date': created_at}
+            for message_id, summary, created_at, _ in rows
+        ]
+        matrix = decode_embeddings(row[3] for row in rows) if rows else None
+        return _UserIndex(records, matrix, version)
+
+    def _evict(self):
+        """사용자 수 / 전체 벡터 수 한도를 넘으면 가장 오래 사용되지 않은 인덱스부터 제거"""
+        total = sum(len(index) for index in self._indexes.values())
+        while len(self._indexes) > 1 and (len(self._indexes) > self.max_users or total > self.max_vectors):
+            _, index = self._indexes.popitem(last=False)
+            total -= len(index)
+            self.evictions += 1
+
+    def get_index(self, user_id: int) -> _UserIndex:
+        version = cache.get(_version_key(user_id), 0)
+        with self._lock:
+            index = self._indexes.get(user_id)
+            if index is not None and index.version == version:
+                self._indexes.move_to_end(user_id)
+                self.hits += 1
+                return index
+
+        # DB 로드는 잠금 밖에서 (다른 사용자 조회를 막지 않음)
+        index = self._load(user_id, version)
+        with self._lock:
+            self._indexes[user_id] = index
+            self._indexes.move_to_end(user_id)
+            self.builds += 1
+            self._evict()
+        logger.debug(f"🧠 대화 기억 인덱스 생성: user={user_id}, {len(index)}개 스니펫")
+        return index
+
+    def size(self, user_id: int) -> int:
+        return len(self.get_index(user_id))
+
+    def search(self, user_id: int, query_embedding, k: Optional[int] = None,
+               exclude_message_ids: Iterable[int] = ()) -> List[Dict]:
+        """질문과 관련된 과거 스니펫 (최소 유사도 이상, 제외 메시지 제외)"""
+        index = self.get_index(user_id)
+        if not len(index):
+            return []
+
+        k = k or self.top_k
+        exclude = set(exclude_message_ids)
+        query = np.asarray(query_embedding, dtype='float32').reshape(-1)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+
+        results = []
+        for position, score in index.search(query, k + len(exclude)):
+            record = index.records[position]
+            if score < self.min_score or record['message_id'] in exclude:
+                continue
+            results.append({**record, 'score': score})
+            if len(results) >= k:
+                break
+        return results
+
+    def invalidate(self, user_id: int):
+        """새 스니펫이 임베딩되면 모든 워커의 인덱스를 무효화"""
+        cache.set(_version_key(user_id), time.time(), None)
+        with self._lock:
+            self._indexes.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._indexes.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'users': len(self._indexes),
+                'vectors': sum(len(index) for index in self._indexes.values()),
+                'hits': self.hits,
+                'builds': self.builds,
+                'evictions': self.evictions,
+            }
+
+
+def collect_snippets(user_id: int) -> int:
+    """아직 기록되지 않은 사용자 메시지를 임베딩 대기 스니펫으로 추가"""
+    last_id = VectorizedChatHistory.objects.filter(user_id=user_id).aggregate(
+        last=Max('source_message_id')
+    )['last'] or 0
+
+    messages = ChatMessage.objects.filter(
+        user_id=user_id,
+        sender='user',
+        id__gt=last_id
+    ).order_by('id').values_list('id', 'session_id', 'message', 'context', 'created_at')
+
+    records = [
+        VectorizedChatHistory(
+            user_id=user_id,
+            sessions=[session_id] if session_id else [],
+            source_message_id=message_id,
+            summary=message,
+            message_count=1,
+            date_range_start=created_at,
+            date_range_end=created_at,
+            topics=[context['category']] if context and context.get('category') else [],
+        )
+        for message_id, session_id, message, context, created_at in messages
+        if len(message.strip()) >= MIN_SNIPPET_CHARS
+    ]
+    # 동시에 실행된 다른 작업이 먼저 추가한 메시지는 (user, source_message_id) 제약으로 건너뜀
+    VectorizedChatHistory.objects.bulk_create(records, batch_size=500, ignore_conflicts=True)
+    return len(records)
+
+
+def embed_pending(embeddings, user_id: Optional[int] = None, batch_size: int = 64,
+                  limit: Optional[int] = None) -> int:
+    """임베딩이 없는 스니펫을 배치로 임베딩하여 저장, 처리한 수 반환"""
+    pending = VectorizedChatHistory.objects.filter(embedding__isnull=True)
+    if user_id is not None:
+        pending = pending.filter(user_id=user_id)
+
+    total = 0
+    users = set()
+    while limit is None or total < limit:
+        size = batch_size if limit is None else min(batch_size, limit - total)
+        batch = list(pending.order_by('id').only('id', 'user_id', 'summary')[:size])
+        if not batch:
+            break
+
+        vectors = embeddings.embed_documents([record.summary for record in batch])
+        for record, vector in zip(batch, vectors):
+            record.embedding = encode_embedding(vector)
+        VectorizedChatHistory.objects.bulk_update(batch, ['embedding'])
+
+        total += len(batch)
+        users.update(record.user_id for record in batch)
+
+    memory = get_conversation_memory()
+    for changed_user_id in users:
+        memory.invalidate(changed_user_id)
+    return total
+
+
+# 전역 대화 기억 인스턴스
+conversation_memory_instance = None
+
+def get_conversation_memory() -> ConversationMemory:
+    """대화 기억 인스턴스 가져오기"""
+    global conversation_memory_instance
+    if not conversation_memory_instance:
+        conversation_memory_instance = ConversationMemory.from_settings()
+    return conversation_memory_instance
@@ -0,0 +1,399 @@
+"""
+일일 추천(운동 / 식단) 야간 일괄 생성
+- 활성 사용자를 CHUNK_SIZE 명씩 읽고 프로필 버킷(목표, 운동 경력, BMI 구간, 언어)으로 묶음
+- 버킷마다 LLM 으로 추천을 하나만 만들고 (같은 날 같은 버킷은 게이트웨이 응답 캐시로 재사용)
+  사용자별 선호 / 비선호 운동, 음식, 알레르기, 질병은 규칙으로 반영 (사용자별 LLM 호출 없음)
+  알레르기는 ALLERGEN_TERMS 의 재료 / 음식 이름으로 거르며, 숨은 재료까지 보장하지 않으므로 재료 확인을 안내
+- DailyRecommendation 은 청크마다 bulk_create 로 저장, 요청 경로는 미리 만든 행만 읽음
+- 추천 언어는 사용자가 마지막으로 추천을 조회한 언어 (없으면 DEFAULT_LANGUAGE)
+
+실행: Celery beat (CELERY_BEAT_SCHEDULE) 또는 python manage.py generate_daily_recommendations
+"""
+import json
+import logging
+from collections import namedtuple
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from apps.core.models import ChatMessage, DailyRecommendation, User, UserProfile
+from .llm_gateway import get_llm_gateway
+
+logger = logging.getLogger(__name__)
+
+ProfileBucket = namedtuple('ProfileBucket', ['goal', 'experience', 'bmi_band', 'language'])
+
+LANGUAGE_CACHE_TIMEOUT = 60 * 60 * 24 * 90
+TEMPLATE_CACHE_TIMEOUT = 60 * 60 * 24
+
+# 대한비만학회 기준 BMI 구간
+BMI_BANDS = [(18.5, 'underweight'), (23.0, 'normal'), (25.0, 'overweight'), (float('inf'), 'obese')]
+BMI_LABELS = {
+    'ko': {'underweight': '저체중 (18.5 미만)', 'normal': '정상 (18.5~23)', 'overweight': '과체중 (23~25)',
+           'obese': '비만 (25 이상)', 'unknown': '알 수 없음'},
+    'en': {'underweight': 'Underweight (below 18.5)', 'normal': 'Normal (18.5-23)', 'overweight': 'Overweight (23-25)',
+           'obese': 'Obese (25 and above)', 'unknown': 'Unknown'},
+}
+
+WORKOUT_FORMAT = {
+    'ko': """{
+                    "title": "운동 제목",
+                    "description": "운동 설명 (2-3문장)",
+                    "details": {
+                        "duration": "운동 시간",
+                        "intensity": "운동 강도",
+                        "exercises": ["운동1", "운동2", "운동3"]
+                    },
+                    "reasoning": "추천 이유 (2-3문장)"
+                }""",
+    'en': """{
+                    "title": "Exercise title",
+                    "description": "Exercise description (2-3 sentences)",
+                    "details": {
+                        "duration": "Exercise duration",
+                        "intensity": "Exercise intensity",
+                        "exercises": ["exercise1", "exercise2", "exercise3"]
+                    },
+                    "reasoning": "Reason for recommendation (2-3 sentences)"
+                }""",
+}
+DIET_FORMAT = {
+    'ko': """{
+                    "title": "식단 제목",
+                    "description": "식단 설명 (2-3문장)",
+                    "details": {
+                        "breakfast": ["음식1", "음식2"],
+                        "lunch": ["음식1", "음식2", "음식3"],
+                        "dinner": ["음식1", "음식2", "음식3"],
+                        "snack": ["간식1"]
+                    },
+                    "reasoning": "추천 이유 (2-3문장)"
+                }""",
+    'en': """{
+                    "title": "Diet title",
+                    "description": "Diet description (2-3 sentences)",
+                    "details": {
+                        "breakfast": ["food1", "food2"],
+                        "lunch": ["food1", "food2", "food3"],
+                        "dinner": ["food1", "food2", "food3"],
+                        "snack": ["snack1"]
+                    },
+                    "reasoning": "Reason for recommendation (2-3 sentences)"
+                }""",
+}
+MEALS = ('breakfast', 'lunch', 'dinner', 'snack')
+
+# 알레르기(ALLERGY_CHOICES) → 음식 이름에서 찾을 재료 / 대표 음식 (한국어 / 영어 버킷 공통)
+# 이름으로만 거르므로 가공식품의 숨은 재료까지 보장하지는 않음 (추천 이유에 재료 확인 안내)
+ALLERGEN_TERMS = {
+    '계란': ['계란', '달걀', '오믈렛', '마요네즈', 'egg', 'omelet', 'mayonnaise'],
+    '우유': ['우유', '치즈', '요거트', '요구르트', '버터', '크림', '라떼', '유청', 'milk', 'cheese', 'yogurt',
+           'butter', 'cream', 'latte', 'whey'],
+    '밀': ['밀가루', '빵', '토스트', '베이글', '파스타', '국수', '라면', '시리얼', 'wheat', 'bread', 'toast', 'bagel',
+          'pasta', 'noodle', 'cereal'],
+    '콩': ['콩', '두부', '두유', '된장', '낫토', 'soy', 'tofu', 'edamame', 'natto'],
+    '땅콩': ['땅콩', 'peanut'],
+    '견과류': ['견과', '아몬드', '호두', '캐슈', '피스타치오', '마카다미아', '잣', '땅콩', 'nut', 'almond', 'walnut',
+            'cashew', 'pistachio', 'macadamia', 'pecan', 'peanut'],
+    '생선': ['생선', '연어', '고등어', '참치', '대구', '멸치', 'fish', 'salmon', 'mackerel', 'tuna', 'cod', 'anchov'],
+    '조개류': ['조개', '굴', '홍합', '바지락', '전복', '가리비', 'clam', 'oyster', 'mussel', 'abalone', 'scallop'],
+    '갑각류': ['새우', '꽃게', '대게', '게살', '랍스터', 'shrimp', 'prawn', 'crab', 'lobster'],
+    '돼지고기': ['돼지', '삼겹살', '베이컨', '햄', '소시지', 'pork', 'bacon', 'ham', 'sausage'],
+    '소고기': ['소고기', '쇠고기', '불고기', '스테이크', 'beef', 'steak'],
+    '닭고기': ['닭', 'chicken'],
+    '토마토': ['토마토', 'tomato'],
+    '딸기': ['딸기', 'strawberr'],
+    '복숭아': ['복숭아', 'peach'],
+    '키위': ['키위', 'kiwi'],
+    '바나나': ['바나나', 'banana'],
+    '아보카도': ['아보카도', 'avocado'],
+    '메밀': ['메밀', '소바', 'buckwheat', 'soba'],
+    '참깨': ['참깨', '참기름', 'sesame'],
+}
+
+
+def get_recommendation_config() -> Dict:
+    config = getattr(settings, 'DAILY_RECOMMENDATIONS', {})
+    return {
+        'CHUNK_SIZE': config.get('CHUNK_SIZE', 500),
+        'ACTIVE_DAYS': config.get('ACTIVE_DAYS', 14),
+        'DEFAULT_LANGUAGE': config.get('DEFAULT_LANGUAGE', 'ko'),
+        'MODEL': config.get('MODEL', 'gpt-3.5-turbo'),
+    }
+
+
+def recommendation_date() -> date:
+    """추천 기준 날짜 (서버 TIME_ZONE 기준, 야간 배치와 조회가 같은 날짜를 사용)"""
+    return timezone.localdate()
+
+
+def _normalize_language(language: Optional[str]) -> str:
+    # 추천 프롬프트는 한국어 / 영어만 지원
+    return 'en' if language == 'en' else 'ko'
+
+
+def _language_key(user_id: int) -> str:
+    return f"daily_recommendation_language:{user_id}"
+
+
+def remember_language(user_id: int, language: str):
+    """사용자가 조회한 추천 언어 기록 (다음 야간 배치에서 사용)"""
+    language = _normalize_language(language)
+    key = _language_key(user_id)
+    if cache.get(key) != language:
+        cache.set(key, language, LANGUAGE_CACHE_TIMEOUT)
+
+
+def _languages(user_ids: List[int], default: str) -> Dict[int, str]:
+    found = cache.get_many([_language_key(user_id) for user_id in user_ids])
+    return {user_id: found.get(_language_key(user_id), default) for user_id in user_ids}
+
+
+def calculate_bmi(profile: UserProfile) -> Optional[float]:
+    if profile.height and profile.weight:
+        height_m = profile.height / 100
+        return round(profile.weight / (height_m ** 2), 1)
+    return None
+
+
+def bmi_band(bmi: Optional[float]) -> str:
+    if bmi is None:
+        return 'unknown'
+    return next(band for limit, band in BMI_BANDS if bmi < limit)
+
+
+def profile_bucket(profile: UserProfile, language: str) -> ProfileBucket:
+    return ProfileBucket(
+        profile.goal, profile.exercise_experience, bmi_band(calculate_bmi(profile)), _normalize_language(language)
+    )
+
+
+# 버킷 추천 (LLM)
+
+def _bucket_prompt(kind: str, bucket: ProfileBucket) -> List[Dict]:
+    if bucket.language == 'en':
+        goal = bucket.goal.replace('_', ' ')
+        experience = bucket.experience
+        subject, role = ("exercise", "a professional fitness trainer") if kind == 'workout' else ("diet", "a professional nutritionist")
+        prompt = f"""
+                User group:
+                - Fitness goal: {goal}
+                - Exercise experience: {experience}
+                - BMI range: {BMI_LABELS['en'][bucket.bmi_band]}
+
+                Please recommend today's {subject} that suits users in this group.
+                Please answer in JSON format:
+                {(WORKOUT_FORMAT if kind == 'workout' else DIET_FORMAT)['en']}
+                All text must be in English.
+                """
+        system_content = f"You are {role}."
+    else:
+        goal = dict(UserProfile.GOAL_CHOICES).get(bucket.goal, bucket.goal)
+        experience = dict(UserProfile.EXPERIENCE_CHOICES).get(bucket.experience, bucket.experience)
+        subject, role = ("운동", "전문 피트니스 트레이너") if kind == 'workout' else ("식단", "전문 영양사")
+        prompt = f"""
+                사용자 그룹 정보:
+                - 운동 목표: {goal}
+                - 운동 경력: {experience}
+                - BMI 구간: {BMI_LABELS['ko'][bucket.bmi_band]}
+
+                이 그룹의 사용자에게 공통으로 맞는 오늘의 {subject}을 추천해주세요.
+                JSON 형식으로 답변해주세요:
+                {(WORKOUT_FORMAT if kind == 'workout' else DIET_FORMAT)['ko']}
+                """
+        system_content = f"당신은 {role}입니다."
+    return [
+        {"role": "system", "content": system_content},
+        {"role": "user", "content": prompt},
+    ]
+
+
+def bucket_template(kind: str, bucket: ProfileBucket, day: date, model: str) -> Optional[Dict]:
+    """버킷 하나의 추천 (같은 날 같은 버킷은 캐시된 응답 사용, 실패하면 None)"""
+    cache_key = f"daily_recommendation:{day.isoformat()}:{kind}:{':'.join(bucket)}"
+    try:
+        response = get_llm_gateway().chat(
+            _bucket_prompt(kind, bucket),
+            model=model,
+            temperature=0.7,
+            cache_ttl=TEMPLATE_CACHE_TIMEOUT,
+            cache_key=cache_key,
+            operation=f'daily_{kind}_recommendation'
+        )
+        template = json.loads(response.content)
+        if not all(template.get(field) for field in ('title', 'description', 'details', 'reasoning')):
+            raise ValueError('필수 항목 누락')
+        return template
+    except Exception as e:
+        # 잘못된 응답이 하루 동안 재사용되지 않도록
+        cache.delete(cache_key)
+        logger.error(f"버킷 추천 생성 실패 ({kind}, {bucket}): {str(e)}")
+        return None
+
+
+# 사용자별 반영 (규칙)
+
+def _contains_any(item: str, words: Iterable[str]) -> bool:
+    text = str(item).lower()
+    return any(word and str(word).lower() in text for word in words)
+
+
+def personalize_workout(template: Dict, profile: UserProfile, bmi: Optional[float], bucket: ProfileBucket) -> Dict:
+    details = dict(template['details'])
+    exercises = [
+        exercise for exercise in details.get('exercises') or []
+        if not _contains_any(exercise, profile.disliked_exercises or [])
+    ]
+    # 목록에 없는 선호 운동 하나를 맨 앞에 추가
+    preferred = [
+        exercise for exercise in profile.preferred_exercises or []
+        if not any(_contains_any(existing, [exercise]) for existing in exercises)
+    ]
+    if preferred:
+        exercises.insert(0, preferred[0])
+    details['exercises'] = exercises
+
+    reasoning = template['reasoning']
+    if profile.diseases:
+        diseases = ', '.join(profile.diseases)
+        reasoning += (
+            f" Because of your conditions ({diseases}), keep the intensity low and stop if you feel pain."
+            if bucket.language == 'en' else
+            f" {diseases} 질환이 있으므로 강도를 낮추고 통증이 있으면 중단하세요."
+        )
+
+    return {
+        'title': template['title'],
+        'description': template['description'],
+        'details': details,
+        'reasoning': reasoning,
+        'based_on': {
+            'bmi': bmi,
+            'experience': profile.get_exercise_experience_display(),
+            'preferred_exercises': profile.preferred_exercises or [],
+            'disliked_exercises': profile.disliked_exercises or [],
+            'diseases': profile.diseases or [],
+            'age': profile.age,
+            'bucket': bucket._asdict(),
+        },
+    }
+
+
+def allergen_terms(allergies: Iterable[str]) -> List[str]:
+    """알레르기 이름과 관련 재료 / 음식 이름 (목록에 없는 알레르기는 이름 그대로)"""
+    terms = []
+    for allergy in allergies:
+        for term in [allergy, *ALLERGEN_TERMS.get(allergy, [])]:
+            if term not in terms:
+                terms.append(term)
+    return terms
+
+
+def personalize_diet(template: Dict, profile: UserProfile, bmi: Optional[float], bucket: ProfileBucket) -> Dict:
+    excluded = [*allergen_terms(profile.allergies or []), *(profile.disliked_foods or [])]
+    details = dict(template['details'])
+    for meal in MEALS:
+        if isinstance(details.get(meal), list):
+            details[meal] = [food for food in details[meal] if not _contains_any(food, excluded)]
+
+    # 식단에 없는 선호 음식 하나를 점심에 추가 (알레르기 / 비선호와 겹치면 제외)
+    planned = [food for meal in MEALS for food in details.get(meal) or []]
+    preferred = [
+        food for food in profile.preferred_foods or []
+        if not _contains_any(food, excluded) and not any(_contains_any(existing, [food]) for existing in planned)
+    ]
+    if preferred and isinstance(details.get('lunch'), list):
+        details['lunch'].append(preferred[0])
+
+    reasoning = template['reasoning']
+    if profile.allergies:
+        allergies = ', '.join(profile.allergies)
+        # 이름으로 거른 것이므로 제외를 보장하지 않고 재료 확인을 안내
+        reasoning += (
+            f" You have allergies ({allergies}), so check the ingredients of every dish before eating."
+            if bucket.language == 'en' else
+            f" 알레르기({allergies})가 있으므로 드시기 전에 모든 음식의 재료를 꼭 확인하세요."
+        )
+
+    return {
+        'title': template['title'],
+        'description': template['description'],
+        'details': details,
+        'reasoning': reasoning,
+        'based_on': {
+            'bmi': bmi,
+            'preferred_foods': profile.preferred_foods or [],
+            'disliked_foods': profile.disliked_foods or [],
+            'allergies': profile.allergies or [],
+            'diseases': profile.diseases or [],
+            'bucket': bucket._asdict(),
+        },
+    }
+
+
+PERSONALIZERS = (('workout', personalize_workout), ('diet', personalize_diet))
+
+
+# 일괄 생성
+
+def active_user_ids(active_days: int) -> List[int]:
+    """프로필이 있고 최근 active_days 일 안에 로그인했거나 챗봇을 사용한 사용자"""
+    since = timezone.now() - timedelta(days=active_days)
+    recent_chat = ChatMessage.objects.filter(user_id=OuterRef('pk'), created_at__gte=since)
+    return list(
+        User.objects.filter(is_active=True, profile__isnull=False)
+        .filter(Q(last_login__gte=since) | Exists(recent_chat))
+        .order_by('id')
+        .values_list('id', flat=True)
+    )
+
+
+def generate_daily_recommendations(day: Optional[date] = None, user_ids: Optional[Iterable[int]] = None,
+                                   chunk_size: Optional[int] = None) -> Dict:
+    """오늘(day) 추천이 없는 사용자의 운동 / 식단 추천 생성 (기본: 활성 사용자 전체)"""
+    config = get_recommendation_config()
+    day = day or recommendation_date()
+    chunk_size = chunk_size or config['CHUNK_SIZE']
+    user_ids = list(user_ids) if user_ids is not None else active_user_ids(config['ACTIVE_DAYS'])
+
+    templates: Dict = {}  # (kind, bucket) -> 버킷 추천
+    stats = {'users': len(user_ids), 'created': 0, 'skipped': 0, 'buckets': 0, 'failed_buckets': 0}
+
+    for start in range(0, len(user_ids), chunk_size):
+        chunk = user_ids[start:start + chunk_size]
+        existing = set(
+            DailyRecommendation.objects.filter(user_id__in=chunk, date=day).values_list('user_id', 'type')
+        )
+        languages = _languages(chunk, config['DEFAULT_LANGUAGE'])
+
+        rows = []
+        for profile in UserProfile.objects.filter(user_id__in=chunk):
+            bmi = calculate_bmi(profile)
+            bucket = profile_bucket(profile, languages[profile.user_id])
+            for kind, personalize in PERSONALIZERS:
+                if (profile.user_id, kind) in existing:
+                    stats['skipped'] += 1
+                    continue
+                if (kind, bucket) not in templates:
+                    templates[kind, bucket] = bucket_template(kind, bucket, day, config['MODEL'])
+                    stats['buckets' if templates[kind, bucket] else 'failed_buckets'] += 1
+                template = templates[kind, bucket]
+                if template is None:
+                    continue
+                rows.append(DailyRecommendation(
+                    user_id=profile.user_id, date=day, type=kind, **personalize(template, profile, bmi, bucket)
+                ))
+
+        DailyRecommendation.objects.bulk_create(rows, batch_size=chunk_size)
+        stats['created'] += len(rows)
+        logger.debug(f"📅 일일 추천 {start + len(chunk)}/{len(user_ids)}명 처리, {len(rows)}개 저장")
+
+    logger.info(
+        f"✅ 일일 추천 생성 완료 ({day}): 사용자 {stats['users']}명, 추천 {stats['created']}개, "
+        f"버킷 {stats['buckets']}개 (실패 {stats['failed_buckets']})"
+    )
+    return stats
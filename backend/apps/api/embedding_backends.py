@@ -0,0 +1,211 @@
+"""
+교체 가능한 임베딩 백엔드
+- torch: 기존 HuggingFaceEmbeddings (sentence-transformers, full precision)
+- onnx: ONNX Runtime 추론 (int8 동적 양자화 모델 지원, CPU 전용 노드용)
+
+두 백엔드 모두 mean pooling + L2 정규화를 사용하므로
+기존 FAISS 인덱스와 호환되는 벡터를 생성합니다.
+"""
+import os
+import time
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EMBEDDING_MODEL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+ONNX_MODEL_FILE = "model.onnx"
+ONNX_QUANTIZED_MODEL_FILE = "model_quantized.onnx"
+
+
+def _backend_config() -> Dict:
+    """Django 설정이 있으면 사용하고, 없으면 환경변수로 대체 (단독 스크립트 실행용)"""
+    try:
+        from django.conf import settings
+        if settings.configured:
+            return getattr(settings, 'CHATBOT_EMBEDDING_BACKEND', {})
+    except ImportError:
+        pass
+
+    return {
+        'BACKEND': os.environ.get('CHATBOT_EMBEDDING_BACKEND', 'torch'),
+        'ONNX_MODEL_DIR': os.environ.get(
+            'CHATBOT_EMBEDDING_ONNX_DIR',
+            os.path.join(os.path.dirname(__file__), "embedding_onnx")
+        ),
+        'QUANTIZED': os.environ.get('CHATBOT_EMBEDDING_ONNX_QUANTIZED', 'True') == 'True',
+        'NUM_THREADS': int(os.environ.get('CHATBOT_EMBEDDING_ONNX_THREADS', '0')),
+    }
+
+
+class OnnxSentenceEmbeddings(Embeddings):
+    """ONNX Runtime 기반 sentence-transformers 호환 임베딩"""
+
+    def __init__(self, model_dir: str, quantized: bool = True, num_threads: int = 0,
+                 max_length: int = 128, batch_size: int = 32):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        model_file = ONNX_QUANTIZED_MODEL_FILE if quantized else ONNX_MODEL_FILE
+        model_path = os.path.join(model_dir, model_file)
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(
+                f"ONNX 모델이 없습니다: {model_path} (python manage.py export_embedding_onnx 실행 필요)"
+            )
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+
+        self.session = ort.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+        self.input_names = {inp.name for inp in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.max_length = max_length
+        self.batch_size = batch_size
+        logger.info(f"✅ ONNX 임베딩 모델 로드 완료: {model_path}")
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        encoded = self.tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=self.max_length,
+            return_tensors='np'
+        )
+        inputs = {
+            name: encoded[name].astype('int64')
+            for name in ('input_ids', 'attention_mask', 'token_type_ids')
+            if name in self.input_names and name in encoded
+        }
+        token_embeddings = self.session.run(None, inputs)[0]
+
+        # mean pooling (sentence-transformers Pooling 레이어와 동일)
+        mask = encoded['attention_mask'][..., None].astype('float32')
+        summed = (token_embeddings * mask).sum(axis=1)
+        counts = np.clip(mask.sum(axis=1), 1e-9, None)
+        vectors = summed / counts
+
+        # L2 정규화 (normalize_embeddings=True 와 동일)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.clip(norms, 1e-12, None)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors = []
+        for i in range(0, len(texts), self.batch_size):
+            vectors.append(self._encode(texts[i:i + self.batch_size]))
+        if not vectors:
+            return []
+        return np.vstack(vectors).astype('float32').tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._encode([text])[0].astype('float32').tolist()
+
+
+def get_embedding_backend(model_name: str = DEFAULT_EMBEDDING_MODEL, device: Optional[str] = None,
+                          backend: Optional[str] = None) -> Embeddings:
+    """설정에 따라 임베딩 백엔드 생성 (onnx 로드 실패 시 torch로 대체)"""
+    config = _backend_config()
+    backend = backend or config.get('BACKEND', 'torch')
+
+    if backend == 'onnx':
+        try:
+            return OnnxSentenceEmbeddings(
+                config.get('ONNX_MODEL_DIR'),
+                quantized=config.get('QUANTIZED', True),
+                num_threads=config.get('NUM_THREADS', 0),
+            )
+        except Exception as e:
+            logger.error(f"❌ ONNX 임베딩 백엔드 로드 실패, torch 백엔드 사용: {str(e)}")
+
+    import torch
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    return HuggingFaceEmbeddings(
+        model_name=model_name,
+        model_kwargs={"device": device or ("cuda" if torch.cuda.is_available() else "cpu")},
+        encode_kwargs={'normalize_embeddings': True, 'batch_size': 32}
+    )
+
+
+def export_onnx_model(output_dir: str, model_name: str = DEFAULT_EMBEDDING_MODEL,
+                      quantize: bool = True, opset: int = 14) -> Dict[str, str]:
+    """트랜스포머 인코더를 ONNX로 내보내고 int8 동적 양자화 적용"""
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    os.makedirs(output_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name)
+    model.eval()
+
+    sample = tokenizer(["샘플 문장", "sample sentence"], padding=True, return_tensors='pt')
+    input_names = [name for name in ('input_ids', 'attention_mask', 'token_type_ids') if name in sample]
+    dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in input_names}
+    dynamic_axes['last_hidden_state'] = {0: 'batch', 1: 'sequence'}
+
+    model_path = os.path.join(output_dir, ONNX_MODEL_FILE)
+    logger.info(f"ONNX 내보내기 중: {model_name} → {model_path}")
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            model_path,
+            input_names=input_names,
+            output_names=['last_hidden_state'],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+        )
+    tokenizer.save_pretrained(output_dir)
+
+    paths = {'model': model_path}
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantized_path = os.path.join(output_dir, ONNX_QUANTIZED_MODEL_FILE)
+        logger.info(f"int8 동적 양자화 중: {quantized_path}")
+        quantize_dynamic(model_path, quantized_path, weight_type=QuantType.QInt8)
+        paths['quantized'] = quantized_path
+
+    return paths
+
+
+def check_backend_recall(reference: Embeddings, candidate: Embeddings, vectorstore,
+                         queries: List[str], k: int = 5) -> Dict:
+    """동일한 FAISS 인덱스에서 두 백엔드의 검색 결과 일치율(recall@k) 비교"""
+    recalls = []
+    cosines = []
+    reference_times = []
+    candidate_times = []
+
+    for query in queries:
+        start = time.perf_counter()
+        reference_vector = np.asarray(reference.embed_query(query), dtype='float32')
+        reference_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        candidate_vector = np.asarray(candidate.embed_query(query), dtype='float32')
+        candidate_times.append(time.perf_counter() - start)
+
+        cosines.append(float(np.dot(reference_vector, candidate_vector) / (
+            np.linalg.norm(reference_vector) * np.linalg.norm(candidate_vector)
+        )))
+
+        _, reference_ids = vectorstore.index.search(reference_vector.reshape(1, -1), k)
+        _, candidate_ids = vectorstore.index.search(candidate_vector.reshape(1, -1), k)
+        expected = set(int(i) for i in reference_ids[0] if i >= 0)
+        found = set(int(i) for i in candidate_ids[0] if i >= 0)
+        recalls.append(len(expected & found) / len(expected) if expected else 1.0)
+
+    return {
+        'queries': len(queries),
+        'k': k,
+        'recall_at_k': float(np.mean(recalls)) if recalls else 0.0,
+        'min_recall_at_k': float(np.min(recalls)) if recalls else 0.0,
+        'mean_cosine': float(np.mean(cosines)) if cosines else 0.0,
+        'reference_encode_ms': float(np.mean(reference_times) * 1000) if reference_times else 0.0,
+        'candidate_encode_ms': float(np.mean(candidate_times) * 1000) if candidate_times else 0.0,
+    }
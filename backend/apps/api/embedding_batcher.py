@@ -0,0 +1,132 @@
+"""
+쿼리 임베딩 마이크로 배처
+- 동시에 들어온 여러 요청의 쿼리를 수 ms 동안 모아서 한 번에 인코딩
+- max_batch_size 개가 모이거나 max_wait_ms 가 지나면 즉시 실행
+- LangChain Embeddings 인터페이스를 그대로 제공하므로 FAISS에 바로 전달 가능
+- 비동기 호출(aembed_query)은 스레드를 점유하지 않고 배치 Future 를 직접 기다림
+"""
+import asyncio
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+
+class BatchedEmbeddings(Embeddings):
+    """embed_query 호출을 요청 간에 묶어 배치 인코딩하는 래퍼"""
+
+    def __init__(self, embeddings: Embeddings, max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        self.embeddings = embeddings
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+
+        # 메트릭
+        self.batches = 0
+        self.queries = 0
+
+    def _ensure_worker(self):
+        """작업 스레드가 없으면 시작 (_worker_lock 안에서 호출)"""
+        if self._worker and self._worker.is_alive():
+            return
+        self._worker = threading.Thread(
+            target=self._run, name='embedding-batcher', daemon=True
+        )
+        self._worker.start()
+
+    def _run(self):
+        batch = []
+        try:
+            while True:
+                # 첫 요청이 올 때까지 대기
+                batch = []
+                self._admit(batch, self._queue.get())
+                deadline = time.monotonic() + self.max_wait
+
+                # 대기 시간 동안 또는 배치가 찰 때까지 추가 요청 수집
+                while len(batch) < self.max_batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        self._admit(batch, self._queue.get(timeout=remaining))
+                    except queue.Empty:
+                        break
+                if not batch:
+                    continue
+
+                texts = [text for text, _ in batch]
+                try:
+                    vectors = self.embeddings.embed_documents(texts)
+                    if len(vectors) != len(batch):
+                        raise ValueError(f"임베딩 결과 수 불일치: {len(vectors)}/{len(batch)}")
+                    for (_, future), vector in zip(batch, vectors):
+                        future.set_result(vector)
+                except Exception as e:
+                    logger.error(f"❌ 배치 임베딩 실패 ({len(batch)}개): {str(e)}")
+                    for _, future in batch:
+                        if not future.done():
+                            future.set_exception(e)
+
+                self.batches += 1
+                self.queries += len(batch)
+        finally:
+            # 작업 스레드가 죽으면 대기 중인 호출자가 영원히 기다리지 않도록 실패 처리
+            # (submit 과 같은 잠금 안에서 비우므로 이후 요청은 새 작업 스레드가 처리)
+            error = RuntimeError("임베딩 배처 작업 스레드가 종료되었습니다")
+            pending = list(batch)
+            with self._worker_lock:
+                self._worker = None
+                while True:
+                    try:
+                        pending.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(error)
+            logger.error(f"❌ 임베딩 배처 작업 스레드 종료 (대기 중 {len(pending)}개 실패 처리)")
+
+    @staticmethod
+    def _admit(batch: List, item):
+        """취소된 요청은 버리고 나머지는 실행 중으로 표시하여 배치에 추가 (이후에는 취소되지 않음)"""
+        if item[1].set_running_or_notify_cancel():
+            batch.append(item)
+
+    def submit(self, text: str) -> Future:
+        """배치 큐에 쿼리를 넣고 결과 Future 반환"""
+        future = Future()
+        with self._worker_lock:
+            self._ensure_worker()
+            self._queue.put((text, future))
+        return future
+
+    def embed_query(self, text: str) -> List[float]:
+        """배치 큐에 쿼리를 넣고 결과 벡터를 기다림"""
+        return self.submit(text).result()
+
+    async def aembed_query(self, text: str) -> List[float]:
+        """embed_query() 의 비동기 버전 (스레드 없이 배치 Future 를 기다리므로 동시 요청 수만큼 배치가 참)"""
+        return await asyncio.wrap_future(self.submit(text))
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """문서 임베딩은 이미 배치 단위이므로 그대로 위임"""
+        return self.embeddings.embed_documents(texts)
+
+    def stats(self):
+        return {
+            'batches': self.batches,
+            'queries': self.queries,
+            'avg_batch_size': self.queries / self.batches if self.batches else 0.0,
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000,
+        }
@@ -0,0 +1,203 @@
+"""
+하이브리드(BM25 + 벡터) 검색
+- 한국어 대응 문자 n-gram 토크나이저 (형태소 분석기 없이 조사/어미 변화에 강함)
+- 벡터스토어와 같은 청크에 대한 BM25 역색인 (vectorstore 디렉토리에 함께 저장)
+- Reciprocal Rank Fusion 으로 벡터 검색 결과와 결합
+"""
+import math
+import os
+import pickle
+import re
+import logging
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BM25_INDEX_FILE = "bm25_index.pkl"
+
+_TOKEN_PATTERN = re.compile(r'[가-힣]+|[a-z0-9]+')
+_HANGUL_PATTERN = re.compile(r'[가-힣]+')
+
+
+def tokenize(text: str, ngram_sizes: Sequence[int] = (2, 3)) -> List[str]:
+    """한글은 문자 n-gram, 영문/숫자는 단어 단위로 토큰화"""
+    tokens = []
+    for word in _TOKEN_PATTERN.findall(text.lower()):
+        if _HANGUL_PATTERN.fullmatch(word):
+            if len(word) == 1:
+                tokens.append(word)
+                continue
+            for n in ngram_sizes:
+                if len(word) < n:
+                    continue
+                tokens.extend(word[i:i + n] for i in range(len(word) - n + 1))
+        else:
+            tokens.append(word)
+    return tokens
+
+
+class BM25Index:
+    """FAISS 인덱스 위치(position)를 문서 ID로 사용하는 BM25 역색인"""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75, ngram_sizes: Sequence[int] = (2, 3)):
+        self.k1 = k1
+        self.b = b
+        self.ngram_sizes = tuple(ngram_sizes)
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+        self.doc_lengths: Dict[int, int] = {}
+        self.avg_doc_length = 0.0
+        self.idf: Dict[str, float] = {}
+
+    def build(self, documents: Iterable[Tuple[int, str]]) -> 'BM25Index':
+        self.postings = {}
+        self.doc_lengths = {}
+        return self.add(documents)
+
+    def add(self, documents: Iterable[Tuple[int, str]]) -> 'BM25Index':
+        """문서를 역색인에 추가 (추가한 문서만 토큰화)"""
+        for doc_id, text in documents:
+            counts = Counter(tokenize(text, self.ngram_sizes))
+            self.doc_lengths[doc_id] = sum(counts.values())
+            for token, freq in counts.items():
+                self.postings.setdefault(token, []).append((doc_id, freq))
+        self._update_statistics()
+        return self
+
+    def remove(self, documents: Iterable[Tuple[int, str]]) -> 'BM25Index':
+        """문서를 역색인에서 제거 (제거할 문서의 토큰에 해당하는 posting 만 갱신)"""
+        removed = set()
+        tokens = set()
+        for doc_id, text in documents:
+            if self.doc_lengths.pop(doc_id, None) is None:
+                continue
+            removed.add(doc_id)
+            tokens.update(tokenize(text, self.ngram_sizes))
+        if not removed:
+            return self
+
+        for token in tokens:
+            docs = [posting for posting in self.postings.get(token, []) if posting[0] not in removed]
+            if docs:
+                self.postings[token] = docs
+            else:
+                self.postings.pop(token, None)
+        self._update_statistics()
+        return self
+
+    def _update_statistics(self):
+        """문서 수 / 평균 길이가 바뀌면 idf 갱신"""
+        num_docs = len(self.doc_lengths)
+        self.avg_doc_length = sum(self.doc_lengths.values()) / num_docs if num_docs else 0.0
+        self.idf = {
+            token: math.log(1 + (num_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            for token, docs in self.postings.items()
+        }
+
+    def search(self, query: str, k: int = 10, allowed_ids: Optional[set] = None) -> List[Tuple[int, float]]:
+        scores = defaultdict(float)
+        for token in set(tokenize(query, self.ngram_sizes)):
+            idf = self.idf.get(token)
+            if idf is None:
+                continue
+            for doc_id, freq in self.postings[token]:
+                if allowed_ids is not None and doc_id not in allowed_ids:
+                    continue
+                length_norm = 1 - self.b + self.b * self.doc_lengths[doc_id] / (self.avg_doc_length or 1)
+                scores[doc_id] += idf * freq * (self.k1 + 1) / (freq + self.k1 * length_norm)
+
+        return sorted(scores.items(), key=lambda x: x[1], reverse=True)[:k]
+
+    def save(self, directory: str):
+        # 스크립트 실행/Django 실행의 모듈 경로가 달라도 읽을 수 있도록 인스턴스 대신 상태만 저장
+        with open(os.path.join(directory, BM25_INDEX_FILE), 'wb') as f:
+            pickle.dump(self.__dict__, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, directory: str) -> Optional['BM25Index']:
+        path = os.path.join(directory, BM25_INDEX_FILE)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'rb') as f:
+                state = pickle.load(f)
+        except Exception as e:
+            logger.error(f"❌ BM25 인덱스 로드 실패: {str(e)}")
+            return None
+        index = cls()
+        index.__dict__.update(state)
+        return index
+
+    @classmethod
+    def from_vectorstore(cls, vectorstore, **kwargs) -> 'BM25Index':
+        """LangChain FAISS 벡터스토어의 청크로 BM25 인덱스 생성"""
+        def documents():
+            for position, doc_id in vectorstore.index_to_docstore_id.items():
+                doc = vectorstore.docstore.search(doc_id)
+                if doc is not None and hasattr(doc, 'page_content'):
+                    yield position, doc.page_content
+
+        return cls(**kwargs).build(documents())
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[int]], k: int = 60) -> List[Tuple[int, float]]:
+    """여러 순위 목록을 RRF 점수로 결합"""
+    scores = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            scores[doc_id] += 1.0 / (k + rank + 1)
+    return sorted(scores.items(), key=lambda x: x[1], reverse=True)
+
+
+def vector_search(vectorstore, query_embedding, k: int) -> List[Tuple[int, float]]:
+    """FAISS 인덱스를 직접 검색하여 (위치, 거리) 목록 반환"""
+    vector = np.asarray(query_embedding, dtype='float32').reshape(1, -1)
+    distances, indices = vectorstore.index.search(vector, k)
+    return [(int(i), float(d)) for i, d in zip(indices[0], distances[0]) if i >= 0]
+
+
+def hybrid_search(vectorstore, bm25_index: Optional[BM25Index], query: str, query_embedding,
+                  k: int = 3, fetch_k: int = 20, max_distance: Optional[float] = None,
+                  rrf_k: int = 60, shards=None, category: Optional[str] = None) -> List[Dict]:
+    """벡터 + BM25 결과를 RRF로 결합한 검색
+
+    shards(CategoryShardIndex)와 category 가 주어지면 벡터/BM25 모두
+    해당 카테고리 + general 청크로 범위를 좁혀 검색합니다.
+
+    반환 항목: {'position', 'document', 'score'(RRF), 'vector_score'(L2 거리), 'bm25_score'}
+    """
+    routed = shards is not None and shards.has(category)
+    if routed:
+        vector_hits = shards.search(query_embedding, category, fetch_k)
+    else:
+        vector_hits = vector_search(vectorstore, query_embedding, fetch_k)
+    if max_distance is not None:
+        vector_hits = [(pos, dist) for pos, dist in vector_hits if dist <= max_distance]
+
+    bm25_hits = []
+    if bm25_index:
+        allowed_ids = shards.allowed_positions(category) if routed else None
+        bm25_hits = bm25_index.search(query, fetch_k, allowed_ids=allowed_ids)
+
+    vector_scores = dict(vector_hits)
+    bm25_scores = dict(bm25_hits)
+    fused = reciprocal_rank_fusion(
+        [[pos for pos, _ in vector_hits], [pos for pos, _ in bm25_hits]], k=rrf_k
+    )
+
+    results = []
+    for position, score in fused[:k]:
+        doc_id = vectorstore.index_to_docstore_id.get(position)
+        doc = vectorstore.docstore.search(doc_id) if doc_id is not None else None
+        if doc is None or not hasattr(doc, 'page_content'):
+            continue
+        results.append({
+            'position': position,
+            'document': doc,
+            'score': score,
+            'vector_score': vector_scores.get(position),
+            'bm25_score': bm25_scores.get(position),
+        })
+    return results
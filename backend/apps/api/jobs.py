@@ -0,0 +1,271 @@
+"""
+챗봇 백그라운드 작업 큐
+- 작업은 이름으로 등록하고 (register_job) 직렬화 가능한 인자(ID, 문자열)로만 제출
+- thread 백엔드: 크기가 제한된 큐 + 고정 워커 스레드, 큐가 가득 차면 작업을 버림 (요청 경로를 막지 않음)
+- coalesce_key 가 같은 작업이 아직 대기 중이면 새로 넣지 않음 (예: 사용자당 벡터화 작업 하나)
+- 대기 시간 / 실행 시간 / 실패 수 등 작업별 메트릭 제공
+- 프로세스 종료 시 대기 중인 작업을 DRAIN_TIMEOUT 동안 처리한 뒤 종료
+- celery 백엔드: 등록된 작업을 Celery 태스크로 실행 (재시작에도 작업이 유실되지 않음, 테스트는 eager 모드)
+"""
+import atexit
+import threading
+import time
+import logging
+import traceback
+from collections import OrderedDict, deque
+from typing import Callable, Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+JOB_REGISTRY: Dict[str, Callable] = {}
+
+
+def register_job(name: str):
+    """백그라운드 작업 등록 데코레이터"""
+    def decorator(func: Callable) -> Callable:
+        JOB_REGISTRY[name] = func
+        return func
+    return decorator
+
+
+def run_job(name: str, args: tuple = (), kwargs: Optional[Dict] = None):
+    """등록된 작업 실행 (Celery 워커에서도 사용)"""
+    if name not in JOB_REGISTRY:
+        # Celery 워커 등 작업 모듈이 아직 import 되지 않은 프로세스
+        from . import chatbot_jobs  # noqa: F401
+    return JOB_REGISTRY[name](*args, **(kwargs or {}))
+
+
+class _JobStats:
+    """작업 이름별 메트릭"""
+
+    def __init__(self):
+        self.submitted = 0
+        self.coalesced = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.run_total = 0.0
+        self.run_max = 0.0
+
+    def to_dict(self) -> Dict:
+        finished = self.completed + self.failed
+        return {
+            'submitted': self.submitted,
+            'coalesced': self.coalesced,
+            'rejected': self.rejected,
+            'completed': self.completed,
+            'failed': self.failed,
+            'avg_wait': self.wait_total / finished if finished else 0.0,
+            'max_wait': self.wait_max,
+            'avg_run': self.run_total / finished if finished else 0.0,
+            'max_run': self.run_max,
+        }
+
+
+class ThreadJobQueue:
+    """프로세스 내 스레드 기반 작업 큐"""
+
+    backend = 'thread'
+
+    def __init__(self, workers: int = 2, max_queue: int = 500, drain_timeout: float = 10.0):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.drain_timeout = drain_timeout
+
+        self._queue = deque()
+        self._pending_keys = set()
+        self._active = 0
+        self._accepting = True
+        self._stopped = False
+        self._condition = threading.Condition()
+        self._threads = []
+        self._stats: "OrderedDict[str, _JobStats]" = OrderedDict()
+
+        atexit.register(self.shutdown)
+
+    def _ensure_workers(self):
+        self._threads = [thread for thread in self._threads if thread.is_alive()]
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(
+                target=self._worker, name=f'chatbot-jobs-{len(self._threads)}', daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def _stat(self, name: str) -> _JobStats:
+        if name not in self._stats:
+            self._stats[name] = _JobStats()
+        return self._stats[name]
+
+    def submit(self, name: str, *args, coalesce_key: Optional[str] = None, **kwargs) -> bool:
+        """작업 제출, 대기열에 들어갔거나 이미 같은 작업이 대기 중이면 True"""
+        with self._condition:
+            stat = self._stat(name)
+            if not self._accepting:
+                stat.rejected += 1
+                return False
+            if coalesce_key is not None and coalesce_key in self._pending_keys:
+                stat.coalesced += 1
+                return True
+            if len(self._queue) >= self.max_queue:
+                stat.rejected += 1
+                logger.warning(f"⚠️ 작업 큐 가득 참 ({self.max_queue}), 작업 버림: {name}")
+                return False
+
+            self._queue.append((name, args, kwargs, coalesce_key, time.monotonic()))
+            if coalesce_key is not None:
+                self._pending_keys.add(coalesce_key)
+            stat.submitted += 1
+            self._ensure_workers()
+            self._condition.notify()
+        return True
+
+    def _worker(self):
+        while True:
+            with self._condition:
+                while not self._queue and not self._stopped:
+                    self._condition.wait()
+                if not self._queue:
+                    return
+                name, args, kwargs, coalesce_key, enqueued_at = self._queue.popleft()
+                # 실행을 시작하면 같은 키의 새 작업을 다시 받음 (실행 중 생긴 변경도 처리되도록)
+                self._pending_keys.discard(coalesce_key)
+                self._active += 1
+
+            started_at = time.monotonic()
+            failed = False
+            try:
+                run_job(name, args, kwargs)
+            except Exception as e:
+                failed = True
+                logger.error(f"❌ 백그라운드 작업 실패 ({name}): {str(e)}\n{traceback.format_exc()}")
+            finally:
+                close_old_connections()
+
+            finished_at = time.monotonic()
+            with self._condition:
+                self._active -= 1
+                stat = self._stat(name)
+                if failed:
+                    stat.failed += 1
+                else:
+                    stat.completed += 1
+                wait, run = started_at - enqueued_at, finished_at - started_at
+                stat.wait_total += wait
+                stat.wait_max = max(stat.wait_max, wait)
+                stat.run_total += run
+                stat.run_max = max(stat.run_max, run)
+                self._condition.notify_all()
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """대기 중인 작업과 실행 중인 작업이 모두 끝날 때까지 대기, 제한 시간 내에 끝나면 True"""
+        deadline = time.monotonic() + (self.drain_timeout if timeout is None else timeout)
+        with self._condition:
+            while self._queue or self._active:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def shutdown(self, timeout: Optional[float] = None):
+        """새 작업을 받지 않고 남은 작업을 처리한 뒤 워커 종료 (프로세스 종료 시 호출)"""
+        with self._condition:
+            if self._stopped:
+                return
+            self._accepting = False
+            pending = len(self._queue) + self._active
+        if pending:
+            logger.info(f"⏳ 백그라운드 작업 {pending}개 처리 후 종료")
+        if not self.drain(timeout):
+            with self._condition:
+                logger.warning(f"⚠️ 종료 제한 시간 초과, 작업 {len(self._queue)}개 버림")
+                self._queue.clear()
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+
+    def stats(self) -> Dict:
+        with self._condition:
+            return {
+                'backend': self.backend,
+                'depth': len(self._queue),
+                'active': self._active,
+                'max_queue': self.max_queue,
+                'workers': self.workers,
+                'jobs': {name: stat.to_dict() for name, stat in self._stats.items()},
+            }
+
+
+class CeleryJobQueue:
+    """Celery 태스크로 작업 실행 (coalesce_key 는 캐시 키로 워커 간 공유)"""
+
+    backend = 'celery'
+
+    def __init__(self, coalesce_timeout: int = 300):
+        from .tasks import run_chatbot_job
+        self.task = run_chatbot_job
+        self.coalesce_timeout = coalesce_timeout
+        self._stats: "OrderedDict[str, _JobStats]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, name: str, *args, coalesce_key: Optional[str] = None, **kwargs) -> bool:
+        with self._lock:
+            stat = self._stats.setdefault(name, _JobStats())
+        marker = f"chatbot_job_pending:{coalesce_key}" if coalesce_key is not None else None
+        if marker is not None and not cache.add(marker, 1, self.coalesce_timeout):
+            stat.coalesced += 1
+            return True
+        try:
+            self.task.delay(name, list(args), kwargs, marker)
+        except Exception as e:
+            # 브로커 연결 실패 등
+            if marker is not None:
+                cache.delete(marker)
+            stat.rejected += 1
+            logger.error(f"❌ Celery 작업 제출 실패 ({name}): {str(e)}")
+            return False
+        stat.submitted += 1
+        return True
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        return True
+
+    def shutdown(self, timeout: Optional[float] = None):
+        pass
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'backend': self.backend,
+                'jobs': {name: stat.to_dict() for name, stat in self._stats.items()},
+            }
+
+
+# 전역 작업 큐 인스턴스
+job_queue_instance = None
+_job_queue_lock = threading.Lock()
+
+def get_job_queue():
+    """작업 큐 인스턴스 가져오기 (CHATBOT_JOBS['BACKEND'] 에 따라 thread / celery)"""
+    global job_queue_instance
+    if not job_queue_instance:
+        with _job_queue_lock:
+            if not job_queue_instance:
+                config = getattr(settings, 'CHATBOT_JOBS', {})
+                if config.get('BACKEND', 'thread') == 'celery':
+                    job_queue_instance = CeleryJobQueue(coalesce_timeout=config.get('COALESCE_TIMEOUT', 300))
+                else:
+                    job_queue_instance = ThreadJobQueue(
+                        workers=config.get('WORKERS', 2),
+                        max_queue=config.get('MAX_QUEUE', 500),
+                        drain_timeout=config.get('DRAIN_TIMEOUT', 10.0),
+                    )
+    return job_queue_instance
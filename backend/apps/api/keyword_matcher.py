@@ -0,0 +1,112 @@
+"""
+사전 컴파일된 다중 키워드 매처
+- 카테고리 분류, 선호도/맛 추출 등 여러 키워드 그룹을 텍스트 한 번 스캔으로 모두 찾음
+- pyahocorasick(C 확장)이 설치되어 있으면 Aho-Corasick 오토마톤으로 한 번만 순회하고,
+  없으면 그룹 간 중복을 제거한 키워드 표를 부분 문자열 검사로 확인
+"""
+import logging
+from collections import defaultdict
+from typing import Dict, Iterable, List, Set, Tuple
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+logger = logging.getLogger(__name__)
+
+# 키워드 하나에 연결된 (그룹, 라벨) 목록
+Target = Tuple[str, str]
+
+
+class _SubstringTable:
+    """pyahocorasick 이 없을 때의 대체 구현 (Automaton 과 같은 add_word / make_automaton / iter 인터페이스)
+
+    짧은 채팅 메시지에서는 파이썬 루프로 문자를 순회하는 오토마톤보다
+    중복 제거된 키워드마다 C 구현 `in` 검사를 하는 편이 빠름
+    """
+
+    def __init__(self):
+        self.entries: List[Tuple[str, object]] = []
+
+    def add_word(self, word: str, value):
+        self.entries.append((word, value))
+
+    def make_automaton(self):
+        # 긴 키워드부터 검사 (결과는 집합으로 모이므로 순서는 성능에만 영향)
+        self.entries.sort(key=lambda entry: -len(entry[0]))
+
+    def iter(self, text: str) -> List[Tuple[int, object]]:
+        # 위치는 사용하지 않으므로 -1 (Automaton.iter 의 (끝 위치, 값) 형식만 맞춤)
+        return [(-1, value) for word, value in self.entries if word in text]
+
+
+class MatchResult:
+    """한 번의 스캔 결과 (그룹 → 라벨 → 찾은 키워드 집합)"""
+
+    def __init__(self):
+        self.hits: Dict[str, Dict[str, Set[str]]] = {}
+
+    def add(self, group: str, label: str, keyword: str):
+        labels = self.hits.get(group)
+        if labels is None:
+            labels = self.hits[group] = {}
+        keywords = labels.get(label)
+        if keywords is None:
+            labels[label] = {keyword}
+        else:
+            keywords.add(keyword)
+
+    def labels(self, group: str) -> Set[str]:
+        return set(self.hits.get(group, ()))
+
+    def has(self, group: str, label: str) -> bool:
+        return label in self.hits.get(group, ())
+
+    def any(self, group: str, labels: Iterable[str]) -> bool:
+        found = self.hits.get(group)
+        return bool(found) and any(label in found for label in labels)
+
+    def counts(self, group: str) -> Dict[str, int]:
+        """라벨별로 찾은 서로 다른 키워드 수 (기존 sum(1 for kw in keywords if kw in text) 와 동일)"""
+        return {label: len(keywords) for label, keywords in self.hits.get(group, {}).items()}
+
+
+class MultiPatternMatcher:
+    """{그룹: {라벨: [키워드, ...]}} 를 하나의 오토마톤으로 컴파일"""
+
+    def __init__(self, groups: Dict[str, Dict[str, Iterable[str]]]):
+        targets: Dict[str, List[Target]] = defaultdict(list)
+        for group, labels in groups.items():
+            for label, keywords in labels.items():
+                for keyword in keywords:
+                    targets[keyword].append((group, label))
+
+        self.automaton = ahocorasick.Automaton() if ahocorasick else _SubstringTable()
+        for keyword, keyword_targets in targets.items():
+            self.automaton.add_word(keyword, (keyword, tuple(keyword_targets)))
+        if targets:
+            self.automaton.make_automaton()
+        self.keyword_count = len(targets)
+
+    def scan(self, text: str) -> MatchResult:
+        result = MatchResult()
+        if not self.keyword_count or not text:
+            return result
+        # 같은 키워드가 여러 번 나와도 한 번만 반영
+        found = {value for _, value in self.automaton.iter(text)}
+        add = result.add
+        for keyword, keyword_targets in found:
+            for group, label in keyword_targets:
+                add(group, label, keyword)
+        return result
+
+
+def best_label(counts: Dict[str, int], order: Iterable[str]):
+    """가장 많이 매칭된 라벨 (동점이면 order 순서상 앞선 라벨)"""
+    best, best_count = None, 0
+    for label in order:
+        count = counts.get(label, 0)
+        if count > best_count:
+            best, best_count = label, count
+    return best
@@ -0,0 +1,871 @@
+"""
+LLM 호출 게이트웨이
+- 프로바이더(openai / gemini / fake)마다 오래 유지되는 클라이언트 하나 (HTTP 연결 풀 재사용)
+- 프로바이더별 동시 호출 수 제한 (세마포어), 슬롯 대기 시간도 호출 기한(deadline)에 포함
+- 기한 기반 타임아웃: 시도마다 남은 시간만 기다리고, 남은 시간이 없으면 재시도하지 않음
+- 일시적 오류(타임아웃, 연결 오류, 429, 5xx)는 지수 백오프 + full jitter 로 재시도
+- 서킷 브레이커: 연속 실패가 임계값을 넘으면 CIRCUIT_RESET 동안 바로 실패 (느린 외부 API 에 워커가 묶이지 않도록)
+- 응답 캐시: cache_ttl 을 주면 (프로바이더, 모델, 메시지, 옵션) 해시 키로 single-flight 캐시
+- 호출별 지연시간 / 토큰 메트릭 (/chatbot/metrics/) 과 프로바이더별 통계 (chatbot_status)
+- 테스트 / 개발용 FakeProvider (네트워크 없음, LLM_GATEWAY['FAKE'] 또는 set_provider 로 사용)
+
+사용 예
+    result = get_llm_gateway().chat(messages, model='gpt-4o-mini', max_tokens=500, operation='chat')
+    result.content, result.usage
+
+    async for delta in get_llm_gateway().astream(messages, model='gpt-4o-mini'):  # ASGI 스트리밍 응답
+        ...
+"""
+import asyncio
+import hashlib
+import random
+import threading
+import time
+import logging
+from collections import deque, namedtuple
+from contextlib import aclosing
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional
+
+from django.conf import settings
+
+from .stage_metrics import Counter, Histogram, register_metric
+
+logger = logging.getLogger(__name__)
+
+LLMResult = namedtuple('LLMResult', ['content', 'model', 'provider', 'usage', 'latency', 'cached'])
+
+DEFAULT_PROVIDER_CONFIG = {
+    'MAX_CONCURRENCY': 16,
+    'TIMEOUT': 30.0,  # 호출 하나의 전체 기한 (슬롯 대기 + 재시도 포함)
+    'MAX_RETRIES': 2,
+    'BACKOFF_BASE': 0.5,
+    'BACKOFF_MAX': 4.0,
+    'CIRCUIT_FAILURES': 5,
+    'CIRCUIT_RESET': 30.0,
+    'MAX_CONNECTIONS': 32,
+}
+
+LLM_SECONDS = register_metric(Histogram(
+    'llm_request_seconds', 'LLM 호출 소요 시간 (초, 슬롯 대기 / 재시도 포함)', ('provider', 'operation', 'outcome')
+))
+LLM_TOKENS = register_metric(Counter(
+    'llm_tokens_total', 'LLM 토큰 사용량', ('provider', 'operation', 'kind')
+))
+LLM_RETRIES = register_metric(Counter(
+    'llm_retries_total', 'LLM 호출 재시도 횟수', ('provider', 'operation')
+))
+
+
+class LLMError(Exception):
+    """게이트웨이 오류"""
+
+
+class LLMUnavailable(LLMError):
+    """서킷이 열려 있거나 기한 안에 호출 슬롯을 얻지 못함"""
+
+
+class LLMTimeout(LLMError):
+    """호출 기한 초과"""
+
+
+RETRYABLE_STATUS = {408, 409, 429}
+RETRYABLE_ERRORS = {
+    # openai / httpx
+    'APITimeoutError', 'APIConnectionError', 'RateLimitError', 'InternalServerError',
+    'TimeoutException', 'ConnectError', 'ReadTimeout', 'RemoteProtocolError',
+    # google.api_core
+    'DeadlineExceeded', 'ServiceUnavailable', 'ResourceExhausted', 'InternalServerError',
+}
+
+
+def is_retryable(error: Exception) -> bool:
+    """일시적 오류 여부 (재시도 / 서킷 실패로 셈)"""
+    if isinstance(error, (LLMTimeout, TimeoutError, ConnectionError)):
+        return True
+    status = getattr(error, 'status_code', None) or getattr(error, 'code', None)
+    if isinstance(status, int) and (status in RETRYABLE_STATUS or status >= 500):
+        return True
+    return type(error).__name__ in RETRYABLE_ERRORS
+
+
+AUTH_STATUS = {401, 403}
+AUTH_ERRORS = {
+    # openai
+    'AuthenticationError', 'PermissionDeniedError',
+    # google.api_core
+    'Unauthenticated', 'PermissionDenied',
+}
+
+
+def is_auth_error(error: Exception) -> bool:
+    """인증 / 권한 오류 여부 (재시도하지 않지만 프로바이더 설정 문제이므로 서킷 실패로 셈)"""
+    status = getattr(error, 'status_code', None) or getattr(error, 'code', None)
+    if isinstance(status, int) and status in AUTH_STATUS:
+        return True
+    return type(error).__name__ in AUTH_ERRORS
+
+
+def get_gateway_config() -> Dict:
+    config = getattr(settings, 'LLM_GATEWAY', {})
+    return {
+        'DEFAULT_PROVIDER': config.get('DEFAULT_PROVIDER', 'openai'),
+        'FAKE': config.get('FAKE', False),
+        'PROVIDERS': config.get('PROVIDERS', {}),
+    }
+
+
+class CircuitBreaker:
+    """연속 실패 기반 서킷 브레이커 (closed → open → half_open 에서 한 번 시험 호출)"""
+
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def acquire(self) -> Optional[bool]:
+        """호출 허용 여부 (None: 거부, True: half_open 시험 호출, False: 일반 호출)"""
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return None
+                self.state = self.HALF_OPEN
+                self._probing = False
+            if self.state == self.HALF_OPEN:
+                if self._probing:
+                    return None
+                self._probing = True
+                return True
+            return False
+
+    def release_probe(self):
+        """결과를 기록하지 못하고 끝난 시험 호출(취소) 정리 - 다음 호출이 다시 시험"""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._probing = False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.opened += 1
+                    logger.warning(f"⚠️ LLM 서킷 열림 ({self.failures}회 연속 실패, {self.reset_timeout}초)")
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4) if text else 0
+
+
+class OpenAIProvider:
+    """OpenAI (및 호환 서버) - 동기 / 비동기 클라이언트를 한 번만 만들어 연결 풀 재사용"""
+
+    name = 'openai'
+
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None, max_connections: int = 32):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.max_connections = max_connections
+        self._client = None
+        self._async_client = None
+        self._lock = threading.Lock()
+
+    def _http_client_kwargs(self, async_client: bool) -> Dict:
+        try:
+            import httpx
+            from openai import DefaultAsyncHttpxClient, DefaultHttpxClient
+        except ImportError:
+            # 오래된 openai 버전: 기본 클라이언트(연결 풀 포함) 사용
+            return {}
+        limits = httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections)
+        http_client = DefaultAsyncHttpxClient(limits=limits) if async_client else DefaultHttpxClient(limits=limits)
+        return {'http_client': http_client}
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from openai import OpenAI
+                    # 재시도는 게이트웨이가 처리
+                    self._client = OpenAI(api_key=self.api_key, base_url=self.base_url, max_retries=0,
+                                          **self._http_client_kwargs(False))
+        return self._client
+
+    @property
+    def async_client(self):
+        if self._async_client is None:
+            with self._lock:
+                if self._async_client is None:
+                    from openai import AsyncOpenAI
+                    self._async_client = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url, max_retries=0,
+                                                     **self._http_client_kwargs(True))
+        return self._async_client
+
+    @staticmethod
+    def _result(response):
+        usage = getattr(response, 'usage', None)
+        return (
+            response.choices[0].message.content or '',
+            {
+                'prompt_tokens': getattr(usage, 'prompt_tokens', 0) or 0,
+                'completion_tokens': getattr(usage, 'completion_tokens', 0) or 0,
+            },
+            getattr(response, 'model', None),
+        )
+
+    def chat(self, messages: List[Dict], model: str, timeout: float, **options):
+        return self._result(self.client.chat.completions.create(
+            model=model, messages=messages, timeout=timeout, **options
+        ))
+
+    async def achat(self, messages: List[Dict], model: str, timeout: float, **options):
+        return self._result(await self.async_client.chat.completions.create(
+            model=model, messages=messages, timeout=timeout, **options
+        ))
+
+    @staticmethod
+    def _delta(chunk, usage: Dict) -> Optional[str]:
+        """스트림 청크의 텍스트 조각 (마지막 청크의 사용량은 usage 에 기록)"""
+        if getattr(chunk, 'usage', None):
+            usage['prompt_tokens'] = chunk.usage.prompt_tokens or 0
+            usage['completion_tokens'] = chunk.usage.completion_tokens or 0
+        if not chunk.choices:
+            return None
+        return chunk.choices[0].delta.content
+
+    def stream(self, messages: List[Dict], model: str, timeout: float, usage: Dict, **options) -> Iterator[str]:
+        stream = self.client.chat.completions.create(
+            model=model, messages=messages, timeout=timeout, stream=True,
+            stream_options={'include_usage': True}, **options
+        )
+        for chunk in stream:
+            delta = self._delta(chunk, usage)
+            if delta:
+                yield delta
+
+    async def astream(self, messages: List[Dict], model: str, timeout: float, usage: Dict,
+                      **options) -> AsyncIterator[str]:
+        stream = await self.async_client.chat.completions.create(
+            model=model, messages=messages, timeout=timeout, stream=True,
+            stream_options={'include_usage': True}, **options
+        )
+        try:
+            async for chunk in stream:
+                delta = self._delta(chunk, usage)
+                if delta:
+                    yield delta
+        finally:
+            # 중간에 닫히면 HTTP 연결을 풀에 바로 돌려줌
+            await stream.close()
+
+
+class GeminiProvider:
+    """Google Gemini - 모델 객체를 이름별로 재사용
+
+    메시지 content 는 문자열 또는 parts 목록 (예: [프롬프트, {"mime_type": "image/jpeg", "data": bytes}])
+    """
+
+    name = 'gemini'
+
+    def __init__(self, api_key: Optional[str] = None):
+        self.api_key = api_key
+        self._models = {}
+        self._configured = False
+        self._lock = threading.Lock()
+
+    def _model(self, model: str):
+        if model not in self._models:
+            with self._lock:
+                import google.generativeai as genai
+                if not self._configured:
+                    genai.configure(api_key=self.api_key)
+                    self._configured = True
+                if model not in self._models:
+                    self._models[model] = genai.GenerativeModel(model)
+        return self._models[model]
+
+    @staticmethod
+    def _contents(messages: List[Dict]) -> List:
+        contents = []
+        for message in messages:
+            content = message.get('content')
+            if isinstance(content, (list, tuple)):
+                contents.extend(content)
+            elif content:
+                contents.append(content)
+        return contents
+
+    @staticmethod
+    def _config(temperature=None, max_tokens=None) -> Optional[Dict]:
+        config = {}
+        if temperature is not None:
+            config['temperature'] = temperature
+        if max_tokens is not None:
+            config['max_output_tokens'] = max_tokens
+        return config or None
+
+    @staticmethod
+    def _usage(response) -> Dict:
+        metadata = getattr(response, 'usage_metadata', None)
+        return {
+            'prompt_tokens': getattr(metadata, 'prompt_token_count', 0) or 0,
+            'completion_tokens': getattr(metadata, 'candidates_token_count', 0) or 0,
+        }
+
+    def chat(self, messages: List[Dict], model: str, timeout: float, temperature=None, max_tokens=None):
+        response = self._model(model).generate_content(
+            self._contents(messages), generation_config=self._config(temperature, max_tokens),
+            request_options={'timeout': timeout}
+        )
+        return response.text, self._usage(response), model
+
+    async def achat(self, messages: List[Dict], model: str, timeout: float, temperature=None, max_tokens=None):
+        response = await self._model(model).generate_content_async(
+            self._contents(messages), generation_config=self._config(temperature, max_tokens),
+            request_options={'timeout': timeout}
+        )
+        return response.text, self._usage(response), model
+
+    def stream(self, messages: List[Dict], model: str, timeout: float, usage: Dict,
+               temperature=None, max_tokens=None) -> Iterator[str]:
+        response = self._model(model).generate_content(
+            self._contents(messages), generation_config=self._config(temperature, max_tokens),
+            request_options={'timeout': timeout}, stream=True
+        )
+        for chunk in response:
+            if chunk.text:
+                yield chunk.text
+        usage.update(self._usage(response))
+
+    async def astream(self, messages: List[Dict], model: str, timeout: float, usage: Dict,
+                      temperature=None, max_tokens=None) -> AsyncIterator[str]:
+        response = await self._model(model).generate_content_async(
+            self._contents(messages), generation_config=self._config(temperature, max_tokens),
+            request_options={'timeout': timeout}, stream=True
+        )
+        async for chunk in response:
+            if chunk.text:
+                yield chunk.text
+        usage.update(self._usage(response))
+
+
+class FakeProvider:
+    """네트워크 없이 응답하는 가짜 프로바이더 (테스트 / 개발)
+
+    failures 에 넣은 예외를 순서대로 던진 뒤 정상 응답, responder(messages, model) 로 답변 지정 가능
+    """
+
+    name = 'fake'
+
+    def __init__(self, reply: str = '가짜 LLM 응답입니다. This is a fake LLM response.', latency: float = 0.0,
+                 tokens_per_second: float = 0.0, failures: Optional[List[Exception]] = None,
+                 responder: Optional[Callable] = None):
+        self.reply = reply
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.failures = deque(failures or [])
+        self.responder = responder
+        self.calls: List[Dict] = []
+        self._lock = threading.Lock()
+
+    def _reply(self, messages: List[Dict], model: str, options: Dict) -> str:
+        with self._lock:
+            self.calls.append({'messages': messages, 'model': model, **options})
+            failure = self.failures.popleft() if self.failures else None
+        if failure is not None:
+            raise failure
+        return self.responder(messages, model) if self.responder else self.reply
+
+    def _duration(self, text: str) -> float:
+        words = len(text.split())
+        return self.latency + (words / self.tokens_per_second if self.tokens_per_second else 0.0)
+
+    @staticmethod
+    def _usage(messages: List[Dict], text: str) -> Dict:
+        prompt = ''.join(str(message.get('content') or '') for message in messages)
+        return {'prompt_tokens': _estimate_tokens(prompt), 'completion_tokens': _estimate_tokens(text)}
+
+    def chat(self, messages: List[Dict], model: str, timeout: float, **options):
+        text = self._reply(messages, model, options)
+        duration = self._duration(text)
+        if duration > timeout:
+            time.sleep(timeout)
+            raise LLMTimeout(f'fake provider timed out after {timeout:.2f}s')
+        time.sleep(duration)
+        return text, self._usage(messages, text), model
+
+    async def achat(self, messages: List[Dict], model: str, timeout: float, **options):
+        text = self._reply(messages, model, options)
+        duration = self._duration(text)
+        if duration > timeout:
+            await asyncio.sleep(timeout)
+            raise LLMTimeout(f'fake provider timed out after {timeout:.2f}s')
+        await asyncio.sleep(duration)
+        return text, self._usage(messages, text), model
+
+    def stream(self, messages: List[Dict], model: str, timeout: float, usage: Dict, **options) -> Iterator[str]:
+        text = self._reply(messages, model, options)
+        time.sleep(min(self.latency, timeout))
+        if self.latency > timeout:
+            raise LLMTimeout(f'fake provider timed out after {timeout:.2f}s')
+        for index, word in enumerate(text.split(' ')):
+            if self.tokens_per_second:
+                time.sleep(1 / self.tokens_per_second)
+            yield word if index == 0 else ' ' + word
+        usage.update(self._usage(messages, text))
+
+    async def astream(self, messages: List[Dict], model: str, timeout: float, usage: Dict,
+                      **options) -> AsyncIterator[str]:
+        text = self._reply(messages, model, options)
+        await asyncio.sleep(min(self.latency, timeout))
+        if self.latency > timeout:
+            raise LLMTimeout(f'fake provider timed out after {timeout:.2f}s')
+        for index, word in enumerate(text.split(' ')):
+            if self.tokens_per_second:
+                await asyncio.sleep(1 / self.tokens_per_second)
+            yield word if index == 0 else ' ' + word
+        usage.update(self._usage(messages, text))
+
+
+def _notify(waiter: asyncio.Future):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class _ProviderSlot:
+    """프로바이더 하나의 동시성 제한 / 서킷 / 재시도 설정과 통계"""
+
+    def __init__(self, provider, config: Dict):
+        self.provider = provider
+        self.name = provider.name
+        self.max_concurrency = config['MAX_CONCURRENCY']
+        self.timeout = config['TIMEOUT']
+        self.max_retries = config['MAX_RETRIES']
+        self.backoff_base = config['BACKOFF_BASE']
+        self.backoff_max = config['BACKOFF_MAX']
+        self.semaphore = threading.BoundedSemaphore(self.max_concurrency)
+        self.breaker = CircuitBreaker(config['CIRCUIT_FAILURES'], config['CIRCUIT_RESET'])
+        self.inflight = 0
+        self.counts = {
+            'calls': 0, 'errors': 0, 'retries': 0, 'rejected': 0, 'cache_hits': 0,
+            'prompt_tokens': 0, 'completion_tokens': 0,
+        }
+        self.latency_total = 0.0
+        self._lock = threading.Lock()
+        # 슬롯을 기다리는 코루틴 (loop, future) - release() 가 하나씩 깨움
+        self._waiters = deque()
+
+    def release(self):
+        """세마포어 반환 후 기다리는 코루틴이 있으면 하나를 깨움"""
+        self.semaphore.release()
+        self._wake()
+
+    def _wake(self):
+        with self._lock:
+            while self._waiters:
+                loop, waiter = self._waiters.popleft()
+                if not loop.is_closed():
+                    loop.call_soon_threadsafe(_notify, waiter)
+                    return
+
+    def _discard(self, entry, pass_on: bool):
+        """대기 등록 해제 (이미 깨워진 뒤 포기했다면 깨움을 다음 대기자에게 넘김)"""
+        with self._lock:
+            try:
+                self._waiters.remove(entry)
+                return
+            except ValueError:
+                pass
+        if pass_on:
+            self._wake()
+
+    async def acquire_async(self, timeout: float) -> bool:
+        """스레드를 점유하거나 폴링하지 않고 세마포어를 기다림 (스레드 호출자와 같은 한도 공유)"""
+        loop = asyncio.get_running_loop()
+        deadline = time.monotonic() + timeout
+        while True:
+            # 시도 전에 등록해야 시도와 등록 사이의 release 를 놓치지 않음
+            entry = (loop, loop.create_future())
+            with self._lock:
+                self._waiters.append(entry)
+            if self.semaphore.acquire(blocking=False):
+                self._discard(entry, pass_on=False)
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self._discard(entry, pass_on=True)
+                return False
+            try:
+                await asyncio.wait_for(entry[1], remaining)
+            except asyncio.TimeoutError:
+                self._discard(entry, pass_on=True)
+                return False
+            except asyncio.CancelledError:
+                self._discard(entry, pass_on=True)
+                raise
+
+    def count(self, name: str, value: float = 1):
+        with self._lock:
+            self.counts[name] += value
+
+    def enter(self):
+        with self._lock:
+            self.inflight += 1
+
+    def leave(self):
+        with self._lock:
+            self.inflight -= 1
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def stats(self) -> Dict:
+        with self._lock:
+            finished = self.counts['calls']
+            return {
+                'provider': self.name,
+                'max_concurrency': self.max_concurrency,
+                'inflight': self.inflight,
+                'circuit': self.breaker.state,
+                'circuit_opened': self.breaker.opened,
+                **self.counts,
+                'avg_latency': self.latency_total / finished if finished else 0.0,
+            }
+
+
+class LLMGateway:
+    """모든 LLM 호출의 단일 진입점"""
+
+    def __init__(self, config: Optional[Dict] = None):
+        self.config = config or get_gateway_config()
+        self._slots: Dict[str, _ProviderSlot] = {}
+        self._lock = threading.Lock()
+
+    def _provider_config(self, name: str) -> Dict:
+        return {**DEFAULT_PROVIDER_CONFIG, **self.config['PROVIDERS'].get(name, {})}
+
+    def _build_provider(self, name: str, config: Dict):
+        if self.config['FAKE'] or name == 'fake':
+            return FakeProvider()
+        if name == 'openai':
+            return OpenAIProvider(config.get('API_KEY'), config.get('BASE_URL'), config['MAX_CONNECTIONS'])
+        if name == 'gemini':
+            return GeminiProvider(config.get('API_KEY'))
+        raise LLMError(f'알 수 없는 LLM 프로바이더: {name}')
+
+    def _slot(self, name: Optional[str]) -> _ProviderSlot:
+        name = name or self.config['DEFAULT_PROVIDER']
+        slot = self._slots.get(name)
+        if slot is None:
+            with self._lock:
+                slot = self._slots.get(name)
+                if slot is None:
+                    config = self._provider_config(name)
+                    slot = self._slots[name] = _ProviderSlot(self._build_provider(name, config), config)
+        return slot
+
+    def set_provider(self, name: str, provider, **overrides):
+        """프로바이더 교체 (테스트 / 부하 테스트), overrides 로 MAX_CONCURRENCY 등 설정 변경"""
+        config = {**self._provider_config(name), **overrides}
+        with self._lock:
+            self._slots[name] = _ProviderSlot(provider, config)
+
+    def reset(self):
+        """설정에서 프로바이더를 다시 만듦"""
+        with self._lock:
+            self._slots.clear()
+
+    # 공통 처리
+
+    @staticmethod
+    def _cache_key(provider: str, model: str, messages: List[Dict], options: Dict) -> str:
+        payload = repr((provider, model, messages, sorted(options.items())))
+        return f"llm_response:{provider}:{hashlib.sha256(payload.encode()).hexdigest()}"
+
+    def _admit(self, slot: _ProviderSlot, operation: str) -> bool:
+        """세마포어를 얻은 뒤 서킷 확인 (서킷이 열려 있으면 슬롯을 돌려주고 실패, 시험 호출이면 True)"""
+        probe = slot.breaker.acquire()
+        if probe is None:
+            slot.release()
+            self._reject(slot, operation, 'circuit_open')
+            raise LLMUnavailable(f'{slot.name} 서킷이 열려 있습니다')
+        slot.enter()
+        return probe
+
+    def _reject(self, slot: _ProviderSlot, operation: str, outcome: str):
+        slot.count('rejected')
+        LLM_SECONDS.observe((slot.name, operation, outcome), 0.0)
+
+    def _failure_delay(self, slot: _ProviderSlot, operation: str, error: Exception, attempt: int,
+                       deadline: float) -> Optional[float]:
+        """실패 기록 후 재시도할 대기 시간 (재시도하지 않으면 None)"""
+        if not is_retryable(error):
+            # 요청 자체의 오류 (잘못된 파라미터 등) 는 프로바이더 상태를 알려주지 않으므로 기록하지 않음
+            # (half_open 시험 호출이었다면 호출부의 finally 에서 release_probe)
+            if is_auth_error(error):
+                slot.breaker.record_failure()
+            return None
+        slot.breaker.record_failure()
+        if attempt >= slot.max_retries or slot.breaker.state == CircuitBreaker.OPEN:
+            return None
+        delay = slot.backoff(attempt)
+        if time.monotonic() + delay >= deadline:
+            return None
+        slot.count('retries')
+        LLM_RETRIES.inc((slot.name, operation))
+        logger.warning(f"⚠️ LLM 호출 재시도 ({slot.name}/{operation}, {attempt + 1}회): {type(error).__name__} {str(error)}")
+        return delay
+
+    def _finish(self, slot: _ProviderSlot, operation: str, started: float, outcome: str,
+                usage: Optional[Dict] = None):
+        latency = time.monotonic() - started
+        LLM_SECONDS.observe((slot.name, operation, outcome), latency)
+        slot.count('calls')
+        with slot._lock:
+            slot.latency_total += latency
+        if outcome != 'success':
+            slot.count('errors')
+        if usage:
+            for kind in ('prompt_tokens', 'completion_tokens'):
+                tokens = usage.get(kind, 0)
+                if tokens:
+                    slot.count(kind, tokens)
+                    LLM_TOKENS.inc((slot.name, operation, kind.replace('_tokens', '')), tokens)
+        return latency
+
+    @staticmethod
+    def _outcome(error: Exception) -> str:
+        if isinstance(error, LLMTimeout) or 'Timeout' in type(error).__name__ or 'DeadlineExceeded' in type(error).__name__:
+            return 'timeout'
+        return 'error'
+
+    # 동기 호출
+
+    def chat(self, messages: List[Dict], model: str, provider: Optional[str] = None, timeout: Optional[float] = None,
+             cache_ttl: Optional[int] = None, cache_key: Optional[str] = None, operation: str = 'chat',
+             **options) -> LLMResult:
+        """LLM 호출 (options: temperature, max_tokens 등 프로바이더 파라미터)
+
+        cache_ttl 을 주면 같은 요청의 응답을 캐시 (동시 요청은 single-flight 로 한 번만 호출)
+        """
+        slot = self._slot(provider)
+        if not cache_ttl:
+            return self._chat(slot, messages, model, timeout, operation, options)
+
+        from .single_flight import get_single_flight
+        key = cache_key or self._cache_key(slot.name, model, messages, options)
+        computed = []
+
+        def compute():
+            computed.append(True)
+            return self._chat(slot, messages, model, timeout, operation, options)
+
+        result = get_single_flight().get_or_compute(key, compute, cache_ttl)
+        if computed:
+            return result
+        slot.count('cache_hits')
+        return result._replace(cached=True, latency=0.0)
+
+    def _chat(self, slot: _ProviderSlot, messages, model, timeout, operation, options) -> LLMResult:
+        started = time.monotonic()
+        deadline = started + (timeout or slot.timeout)
+        if not slot.semaphore.acquire(timeout=max(deadline - time.monotonic(), 0)):
+            self._reject(slot, operation, 'saturated')
+            raise LLMUnavailable(f'{slot.name} 동시 호출 한도({slot.max_concurrency}) 대기 시간 초과')
+        probe = self._admit(slot, operation)
+        try:
+            attempt = 0
+            while True:
+                remaining = deadline - time.monotonic()
+                try:
+                    if remaining <= 0:
+                        raise LLMTimeout(f'{slot.name} 호출 기한 초과')
+                    content, usage, used_model = slot.provider.chat(messages, model, remaining, **options)
+                except Exception as e:
+                    delay = self._failure_delay(slot, operation, e, attempt, deadline)
+                    if delay is None:
+                        self._finish(slot, operation, started, self._outcome(e))
+                        raise
+                    time.sleep(delay)
+                    attempt += 1
+                    continue
+                slot.breaker.record_success()
+                latency = self._finish(slot, operation, started, 'success', usage)
+                return LLMResult(content, used_model or model, slot.name, usage, latency, False)
+        finally:
+            # 취소(CancelledError 등)로 결과 없이 끝난 시험 호출이 서킷을 half_open 에 묶어 두지 않도록
+            if probe:
+                slot.breaker.release_probe()
+            slot.leave()
+            slot.release()
+
+    # 비동기 호출
+
+    async def achat(self, messages: List[Dict], model: str, provider: Optional[str] = None,
+                    timeout: Optional[float] = None, operation: str = 'chat', **options) -> LLMResult:
+        """chat() 의 비동기 버전 (응답 캐시 없음)"""
+        slot = self._slot(provider)
+        started = time.monotonic()
+        deadline = started + (timeout or slot.timeout)
+        if not await slot.acquire_async(max(deadline - time.monotonic(), 0)):
+            self._reject(slot, operation, 'saturated')
+            raise LLMUnavailable(f'{slot.name} 동시 호출 한도({slot.max_concurrency}) 대기 시간 초과')
+        probe = self._admit(slot, operation)
+        try:
+            attempt = 0
+            while True:
+                remaining = deadline - time.monotonic()
+                try:
+                    if remaining <= 0:
+                        raise LLMTimeout(f'{slot.name} 호출 기한 초과')
+                    content, usage, used_model = await slot.provider.achat(messages, model, remaining, **options)
+                except Exception as e:
+                    delay = self._failure_delay(slot, operation, e, attempt, deadline)
+                    if delay is None:
+                        self._finish(slot, operation, started, self._outcome(e))
+                        raise
+                    await asyncio.sleep(delay)
+                    attempt += 1
+                    continue
+                slot.breaker.record_success()
+                latency = self._finish(slot, operation, started, 'success', usage)
+                return LLMResult(content, used_model or model, slot.name, usage, latency, False)
+        finally:
+            # 취소(CancelledError 등)로 결과 없이 끝난 시험 호출이 서킷을 half_open 에 묶어 두지 않도록
+            if probe:
+                slot.breaker.release_probe()
+            slot.leave()
+            slot.release()
+
+    # 스트리밍
+
+    def stream(self, messages: List[Dict], model: str, provider: Optional[str] = None,
+               timeout: Optional[float] = None, operation: str = 'chat', **options) -> Iterator[str]:
+        """텍스트 조각을 yield (첫 조각을 받기 전까지만 재시도, 스트림이 끝나거나 닫히면 슬롯 반환)"""
+        slot = self._slot(provider)
+        started = time.monotonic()
+        deadline = started + (timeout or slot.timeout)
+        if not slot.semaphore.acquire(timeout=max(deadline - time.monotonic(), 0)):
+            self._reject(slot, operation, 'saturated')
+            raise LLMUnavailable(f'{slot.name} 동시 호출 한도({slot.max_concurrency}) 대기 시간 초과')
+        probe = self._admit(slot, operation)
+        usage: Dict = {}
+        outcome = 'error'
+        try:
+            attempt = 0
+            while True:
+                remaining = deadline - time.monotonic()
+                received = False
+                try:
+                    if remaining <= 0:
+                        raise LLMTimeout(f'{slot.name} 호출 기한 초과')
+                    for delta in slot.provider.stream(messages, model, remaining, usage, **options):
+                        received = True
+                        yield delta
+                except GeneratorExit:
+                    # 클라이언트가 스트림을 중간에 닫음
+                    outcome = 'cancelled'
+                    raise
+                except Exception as e:
+                    delay = None if received else self._failure_delay(slot, operation, e, attempt, deadline)
+                    if received:
+                        slot.breaker.record_failure()
+                    if delay is None:
+                        outcome = self._outcome(e)
+                        raise
+                    time.sleep(delay)
+                    attempt += 1
+                    continue
+                slot.breaker.record_success()
+                outcome = 'success'
+                return
+        finally:
+            # 스트림이 중간에 닫힌(GeneratorExit) 시험 호출은 결과 없이 끝나므로 다음 호출이 다시 시험
+            if probe:
+                slot.breaker.release_probe()
+            self._finish(slot, operation, started, outcome, usage)
+            slot.leave()
+            slot.release()
+
+    async def astream(self, messages: List[Dict], model: str, provider: Optional[str] = None,
+                      timeout: Optional[float] = None, operation: str = 'chat', **options) -> AsyncIterator[str]:
+        """stream() 의 비동기 버전 (ASGI 스트리밍 응답에서 이벤트 루프를 막지 않음)"""
+        slot = self._slot(provider)
+        started = time.monotonic()
+        deadline = started + (timeout or slot.timeout)
+        if not await slot.acquire_async(max(deadline - time.monotonic(), 0)):
+            self._reject(slot, operation, 'saturated')
+            raise LLMUnavailable(f'{slot.name} 동시 호출 한도({slot.max_concurrency}) 대기 시간 초과')
+        probe = self._admit(slot, operation)
+        usage: Dict = {}
+        outcome = 'error'
+        try:
+            attempt = 0
+            while True:
+                remaining = deadline - time.monotonic()
+                received = False
+                try:
+                    if remaining <= 0:
+                        raise LLMTimeout(f'{slot.name} 호출 기한 초과')
+                    async with aclosing(slot.provider.astream(messages, model, remaining, usage, **options)) as deltas:
+                        async for delta in deltas:
+                            received = True
+                            yield delta
+                except (GeneratorExit, asyncio.CancelledError):
+                    # 클라이언트 연결이 끊겨 스트림이 닫히거나 작업이 취소됨
+                    outcome = 'cancelled'
+                    raise
+                except Exception as e:
+                    delay = None if received else self._failure_delay(slot, operation, e, attempt, deadline)
+                    if received:
+                        slot.breaker.record_failure()
+                    if delay is None:
+                        outcome = self._outcome(e)
+                        raise
+                    await asyncio.sleep(delay)
+                    attempt += 1
+                    continue
+                slot.breaker.record_success()
+                outcome = 'success'
+                return
+        finally:
+            if probe:
+                slot.breaker.release_probe()
+            self._finish(slot, operation, started, outcome, usage)
+            slot.leave()
+            slot.release()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            slots = list(self._slots.values())
+        return {slot.name: slot.stats() for slot in slots}
+
+
+# 전역 게이트웨이 인스턴스
+llm_gateway_instance = None
+_llm_gateway_lock = threading.Lock()
+
+def get_llm_gateway() -> LLMGateway:
+    """LLM 게이트웨이 인스턴스 가져오기"""
+    global llm_gateway_instance
+    if not llm_gateway_instance:
+        with _llm_gateway_lock:
+            if not llm_gateway_instance:
+                llm_gateway_instance = LLMGateway()
+    return llm_gateway_instance
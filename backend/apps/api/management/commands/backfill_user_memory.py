@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from apps.core.models import ChatMessage
+from apps.api.user_memory import backfill_user_memory
+
+
+class Command(BaseCommand):
+    help = '기존 ChatMessage 기록으로 사용자 기억(UserMemory)을 채움'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, nargs='+', default=None, help='대상 사용자 ID (기본: 메시지가 있는 전체 사용자)')
+        parser.add_argument('--rebuild', action='store_true', help='대화에서 추출한 정보를 비우고 처음부터 다시 계산')
+        parser.add_argument('--chunk-size', type=int, default=500, help='메시지를 읽어올 묶음 크기')
+
+    def handle(self, *args, **options):
+        user_ids = options['user']
+        if not user_ids:
+            user_ids = list(
+                ChatMessage.objects.filter(sender='user').values_list('user_id', flat=True).distinct().order_by('user_id')
+            )
+
+        total_messages = 0
+        for index, user_id in enumerate(user_ids, start=1):
+            try:
+                memory, processed = backfill_user_memory(
+                    user_id, rebuild=options['rebuild'], chunk_size=options['chunk_size']
+                )
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f"사용자 {user_id} 처리 실패: {str(e)}"))
+                continue
+
+            total_messages += processed
+            if processed:
+                self.stdout.write(f"[{index}/{len(user_ids)}] 사용자 {user_id}: 메시지 {processed}개 반영 (v{memory.version})")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"사용자 기억 백필 완료: 사용자 {len(user_ids)}명, 메시지 {total_messages}개"
+        ))
@@ -0,0 +1,126 @@
+import os
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.api.retrieval_benchmark import (
+    DEFAULT_BASELINE, DEFAULT_FIXTURE, DEFAULT_THRESHOLDS, RetrievalBenchmark, find_regressions,
+    load_fixture, load_report, run_corpus_benchmark, validate_fixture, write_report
+)
+from apps.api.retrieval_benchmark.runner import use_offline_models
+
+
+class Command(BaseCommand):
+    help = '라벨링된 질의 세트로 벡터스토어 검색 품질(recall@k, MRR)과 지연시간/처리량을 측정하고 회귀 검사'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--vectorstore',
+            type=str,
+            default=None,
+            help='평가할 벡터스토어 디렉토리 (생략하면 저장소의 knowledge_corpus.json 으로 오프라인 평가)'
+        )
+        parser.add_argument('--fixture', type=str, default=DEFAULT_FIXTURE, help='라벨링된 질의 세트 JSON')
+        parser.add_argument('--output', type=str, default=None, help='결과 JSON 저장 경로')
+        parser.add_argument('--baseline', type=str, default=None,
+                            help='비교할 기준 결과 JSON (코퍼스 평가에서는 기본값 knowledge_baseline.json)')
+        parser.add_argument('--mode', choices=['hybrid', 'vector'], default='hybrid', help='검색 경로')
+        parser.add_argument('--k', type=int, default=5)
+        parser.add_argument('--threads', type=int, default=8, help='처리량 측정 스레드 수')
+        parser.add_argument('--repeat', type=int, default=3, help='처리량 측정 시 질의 세트 반복 횟수')
+        parser.add_argument('--max-quality-drop', type=float, default=DEFAULT_THRESHOLDS['max_quality_drop'],
+                            help='recall@k / MRR 허용 감소량 (절대값)')
+        parser.add_argument('--max-latency-increase', type=float,
+                            default=DEFAULT_THRESHOLDS['max_latency_increase'],
+                            help='p50/p95/p99 허용 증가율')
+        parser.add_argument('--max-qps-drop', type=float, default=DEFAULT_THRESHOLDS['max_qps_drop'],
+                            help='처리량 허용 감소율')
+        parser.add_argument('--min-recall', type=float, default=None, help='recall@k 절대 하한')
+        parser.add_argument('--label', action='store_true',
+                            help='label_hints 에 맞는 청크를 벡터스토어 전체에서 찾아 후보(label_candidates)로 출력 (검토 후 expected 로 옮김)')
+        parser.add_argument('--allow-download', action='store_true', help='임베딩 모델 다운로드 허용')
+
+    def handle(self, *args, **options):
+        corpus = options['vectorstore'] is None
+        if corpus and options['label']:
+            raise CommandError("--label 은 --vectorstore 로 운영 벡터스토어를 지정해야 합니다")
+        if not corpus and not os.path.exists(options['vectorstore']):
+            raise CommandError(f"벡터스토어가 없습니다: {options['vectorstore']}")
+        if not options['allow_download']:
+            use_offline_models()
+
+        queries = load_fixture(options['fixture'])
+        if not options['label']:
+            problems = validate_fixture(queries)
+            if problems:
+                for problem in problems:
+                    self.stdout.write(self.style.ERROR(f"  {problem}"))
+                raise CommandError(f"라벨링되지 않은 질의 {len(problems)}개 (--label 로 후보를 만든 뒤 검토해서 expected 를 채우세요)")
+
+        if corpus:
+            report = run_corpus_benchmark(
+                queries, k=options['k'], mode=options['mode'], threads=options['threads'], repeat=options['repeat']
+            )
+            options['baseline'] = options['baseline'] or self._corpus_baseline(options)
+        else:
+            from apps.api.embedding_backends import get_embedding_backend
+
+            benchmark = RetrievalBenchmark(
+                options['vectorstore'],
+                get_embedding_backend(),
+                k=options['k'],
+                mode=options['mode'],
+            )
+
+            if options['label']:
+                labelled = benchmark.label(queries)
+                output = options['output'] or f"{options['fixture']}.labelled"
+                with open(output, 'w', encoding='utf-8') as f:
+                    json.dump({'queries': labelled}, f, ensure_ascii=False, indent=2)
+                self.stdout.write(self.style.SUCCESS(f"라벨링 결과 저장: {output}"))
+                return
+
+            report = benchmark.run(queries, threads=options['threads'], repeat=options['repeat'])
+
+        metrics = report['metrics']
+        self.stdout.write(f"벡터스토어: {report['vectorstore']} ({report['settings']['num_vectors']}개 벡터)")
+        self.stdout.write(
+            f"recall@{options['k']}: {metrics['recall_at_k']:.3f}, MRR: {metrics['mrr']:.3f}"
+        )
+        self.stdout.write(
+            f"지연시간 p50/p95/p99: {metrics['p50_ms']:.1f} / {metrics['p95_ms']:.1f} / {metrics['p99_ms']:.1f}ms, "
+            f"처리량: {metrics['qps']:.1f} q/s ({options['threads']} 스레드)"
+        )
+
+        if options['output']:
+            write_report(report, options['output'])
+            self.stdout.write(f"결과 저장: {options['output']}")
+
+        baseline = load_report(options['baseline'])
+        if options['baseline'] and baseline is None:
+            raise CommandError(f"기준 결과가 없습니다: {options['baseline']}")
+
+        regressions = find_regressions(report, baseline, {
+            'max_quality_drop': options['max_quality_drop'],
+            'max_latency_increase': options['max_latency_increase'],
+            'max_qps_drop': options['max_qps_drop'],
+            'min_recall_at_k': options['min_recall'],
+        })
+        if regressions:
+            for regression in regressions:
+                self.stdout.write(self.style.ERROR(f"  회귀: {regression}"))
+            raise CommandError(f"검색 회귀 {len(regressions)}건 발견")
+        self.stdout.write(self.style.SUCCESS('검색 회귀 없음'))
+
+    def _corpus_baseline(self, options):
+        """기준 결과가 같은 설정(k, mode)으로 측정되었을 때만 기본 기준으로 사용"""
+        baseline = load_report(DEFAULT_BASELINE)
+        if options['fixture'] != DEFAULT_FIXTURE or baseline is None:
+            return None
+        measured = baseline['settings']
+        if (measured['k'], measured['mode']) != (options['k'], options['mode']):
+            self.stdout.write(self.style.WARNING(
+                f"기준 결과는 k={measured['k']}, mode={measured['mode']} 로 측정되어 비교하지 않습니다"
+            ))
+            return None
+        return DEFAULT_BASELINE
@@ -0,0 +1,57 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.core.models import ChatMessage, VectorizedChatHistory
+from apps.api.conversation_memory import collect_snippets, embed_pending
+from apps.api.embedding_backends import get_embedding_backend
+
+
+class Command(BaseCommand):
+    help = '기존 대화 기록을 장기 기억 스니펫으로 모으고 임베딩이 없는 스니펫을 배치로 임베딩'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, nargs='+', default=None, help='대상 사용자 ID (기본: 전체)')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=getattr(settings, 'CHATBOT_CONVERSATION_MEMORY', {}).get('EMBED_BATCH_SIZE', 64),
+            help='한 번에 임베딩할 스니펫 수'
+        )
+        parser.add_argument('--limit', type=int, default=None, help='이번 실행에서 임베딩할 최대 스니펫 수')
+        parser.add_argument('--skip-collect', action='store_true', help='메시지 수집 없이 대기 스니펫만 임베딩')
+
+    def handle(self, *args, **options):
+        user_ids = options['user']
+
+        if not options['skip_collect']:
+            collect_ids = user_ids or list(
+                ChatMessage.objects.filter(sender='user').values_list('user_id', flat=True).distinct().order_by('user_id')
+            )
+            collected = sum(collect_snippets(user_id) for user_id in collect_ids)
+            self.stdout.write(f"스니펫 수집: 사용자 {len(collect_ids)}명, {collected}개 추가")
+
+        pending = VectorizedChatHistory.objects.filter(embedding__isnull=True)
+        if user_ids:
+            pending = pending.filter(user_id__in=user_ids)
+        pending_count = pending.count()
+        if not pending_count:
+            self.stdout.write(self.style.SUCCESS('임베딩할 스니펫이 없습니다.'))
+            return
+
+        self.stdout.write(f"임베딩 대기: {pending_count}개, 모델 로드 중...")
+        embeddings = get_embedding_backend()
+
+        start = time.time()
+        embedded = 0
+        for user_id in (user_ids or [None]):
+            remaining = None if options['limit'] is None else options['limit'] - embedded
+            if remaining is not None and remaining <= 0:
+                break
+            embedded += embed_pending(embeddings, user_id=user_id, batch_size=options['batch_size'], limit=remaining)
+
+        elapsed = time.time() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"임베딩 완료: {embedded}개 ({elapsed:.1f}초, {embedded / elapsed if elapsed else 0:.1f}개/초)"
+        ))
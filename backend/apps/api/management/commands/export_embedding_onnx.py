@@ -0,0 +1,85 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.api.embedding_backends import (
+    DEFAULT_EMBEDDING_MODEL, OnnxSentenceEmbeddings, check_backend_recall,
+    export_onnx_model, get_embedding_backend
+)
+
+
+class Command(BaseCommand):
+    help = '임베딩 모델을 ONNX로 내보내고 int8 양자화 후 기존 FAISS 인덱스 대비 recall 검증'
+
+    recall_queries = [
+        "단백질이 많은 음식은 무엇인가요?",
+        "스쿼트 운동 방법을 알려주세요",
+        "스트레스 해소하는 방법은?",
+        "다이어트에 좋은 식단 추천해주세요",
+        "근육을 키우려면 어떻게 해야 하나요?",
+        "유산소 운동의 효과는?",
+        "비타민 D가 부족하면 어떻게 되나요?",
+        "요가의 장점은 무엇인가요?",
+        "하루에 물을 얼마나 마셔야 하나요?",
+        "수면의 중요성에 대해 알려주세요",
+        "How much protein should I eat after a workout?",
+        "Best stretching routine for lower back pain",
+    ]
+
+    def add_arguments(self, parser):
+        config = getattr(settings, 'CHATBOT_EMBEDDING_BACKEND', {})
+        parser.add_argument(
+            '--output',
+            type=str,
+            default=str(config.get('ONNX_MODEL_DIR', os.path.join(settings.BASE_DIR, 'apps', 'api', 'embedding_onnx'))),
+            help='ONNX 모델 저장 경로'
+        )
+        parser.add_argument('--model', type=str, default=DEFAULT_EMBEDDING_MODEL, help='임베딩 모델 이름')
+        parser.add_argument('--no-quantize', action='store_true', help='int8 양자화 생략')
+        parser.add_argument('--skip-export', action='store_true', help='내보내기 없이 recall 검증만 수행')
+        parser.add_argument('--vectorstore', type=str, default=None, help='recall 검증에 사용할 벡터스토어 경로')
+        parser.add_argument('--k', type=int, default=5, help='recall@k 의 k')
+        parser.add_argument('--min-recall', type=float, default=0.9, help='허용 최소 recall@k')
+
+    def handle(self, *args, **options):
+        output = options['output']
+        quantize = not options['no_quantize']
+
+        if not options['skip_export']:
+            paths = export_onnx_model(output, model_name=options['model'], quantize=quantize)
+            for label, path in paths.items():
+                size_mb = os.path.getsize(path) / (1024 * 1024)
+                self.stdout.write(f"{label}: {path} ({size_mb:.1f}MB)")
+
+        vectorstore_path = options['vectorstore'] or os.path.join(settings.BASE_DIR, "api", "vectorstore_optimized")
+        if not os.path.exists(vectorstore_path):
+            vectorstore_path = os.path.join(settings.BASE_DIR, "api", "vectorstore")
+        if not os.path.exists(vectorstore_path):
+            self.stdout.write(self.style.WARNING('벡터스토어가 없어 recall 검증을 생략합니다.'))
+            return
+
+        from langchain_community.vectorstores import FAISS
+
+        reference = get_embedding_backend(options['model'], backend='torch')
+        candidate = OnnxSentenceEmbeddings(output, quantized=quantize)
+        vectorstore = FAISS.load_local(vectorstore_path, reference, allow_dangerous_deserialization=True)
+        if hasattr(vectorstore.index, 'nprobe'):
+            vectorstore.index.nprobe = 10
+
+        report = check_backend_recall(reference, candidate, vectorstore, self.recall_queries, k=options['k'])
+        self.stdout.write(f"벡터스토어: {vectorstore_path}")
+        self.stdout.write(
+            f"recall@{report['k']}: {report['recall_at_k']:.3f} (최소 {report['min_recall_at_k']:.3f}), "
+            f"평균 코사인 유사도: {report['mean_cosine']:.4f}"
+        )
+        self.stdout.write(
+            f"쿼리 인코딩 평균: torch {report['reference_encode_ms']:.1f}ms → "
+            f"onnx {report['candidate_encode_ms']:.1f}ms"
+        )
+
+        if report['recall_at_k'] < options['min_recall']:
+            raise CommandError(
+                f"recall@{report['k']} {report['recall_at_k']:.3f} 가 기준 {options['min_recall']} 보다 낮습니다."
+            )
+        self.stdout.write(self.style.SUCCESS('ONNX 임베딩 백엔드 검증 완료'))
@@ -0,0 +1,31 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.api.daily_recommendations import generate_daily_recommendations
+
+
+class Command(BaseCommand):
+    help = '활성 사용자의 일일 운동 / 식단 추천을 미리 생성 (프로필 버킷별로 LLM 한 번 호출)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', default=None, help='추천 날짜 YYYY-MM-DD (기본: 오늘)')
+        parser.add_argument('--user', type=int, nargs='+', default=None, help='대상 사용자 ID (기본: 활성 사용자 전체)')
+        parser.add_argument('--chunk-size', type=int, default=None, help='한 번에 처리할 사용자 수')
+
+    def handle(self, *args, **options):
+        day = None
+        if options['date']:
+            try:
+                day = date.fromisoformat(options['date'])
+            except ValueError:
+                raise CommandError(f"날짜 형식이 올바르지 않습니다: {options['date']}")
+
+        stats = generate_daily_recommendations(
+            day=day, user_ids=options['user'], chunk_size=options['chunk_size']
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"일일 추천 생성 완료: 사용자 {stats['users']}명, 추천 {stats['created']}개 "
+            f"(기존 {stats['skipped']}개 건너뜀), 버킷 {stats['buckets']}개 (실패 {stats['failed_buckets']})"
+        ))
@@ -0,0 +1,48 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.api.vectorstore_ingestion import VectorstoreIngestor
+
+
+class Command(BaseCommand):
+    help = '새로 추가/변경된 원본 파일의 청크만 임베딩하여 벡터스토어에 증분 수집'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*', help='수집할 원본 파일 (PDF / 텍스트)')
+        parser.add_argument('--remove', nargs='+', default=[], help='벡터스토어에서 제거할 원본 파일')
+        parser.add_argument(
+            '--vectorstore',
+            type=str,
+            default=os.path.join(settings.BASE_DIR, 'api', 'vectorstore_optimized'),
+            help='IVF 벡터스토어 경로'
+        )
+        parser.add_argument('--drift-threshold', type=float, default=0.2,
+                            help='양자화 오차 증가율이 이 값을 넘으면 IVF 재학습')
+        parser.add_argument('--retrain', action='store_true', help='drift 와 관계없이 IVF 재학습')
+
+    def handle(self, *args, **options):
+        paths = options['paths']
+        missing = [path for path in paths if not os.path.exists(path)]
+        if missing:
+            raise CommandError(f"파일이 없습니다: {', '.join(missing)}")
+        if not paths and not options['remove'] and not options['retrain']:
+            raise CommandError('수집하거나 제거할 파일을 지정하세요.')
+        if not os.path.exists(options['vectorstore']):
+            raise CommandError(f"벡터스토어가 없습니다: {options['vectorstore']} (optimize_vectorstore.py 먼저 실행)")
+
+        ingestor = VectorstoreIngestor(options['vectorstore'], drift_threshold=options['drift_threshold'])
+        try:
+            stats = ingestor.ingest(paths, options['remove'], force_retrain=options['retrain'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(
+            f"추가: {stats['added']}개, 재사용: {stats['reused']}개, 제거(tombstone): {stats['tombstoned']}개, "
+            f"변경 없는 파일: {stats['unchanged_sources']}개"
+        )
+        self.stdout.write(f"drift: {stats['drift']:.3f} (임계값 {options['drift_threshold']})")
+        if stats['retrained']:
+            self.stdout.write(self.style.WARNING('IVF 인덱스를 재학습했습니다.'))
+        self.stdout.write(self.style.SUCCESS(f"증분 수집 완료: 총 {ingestor.vectorstore.index.ntotal}개 벡터"))
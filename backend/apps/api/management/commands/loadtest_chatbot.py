@@ -0,0 +1,114 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.api.chatbot_loadtest import DEFAULT_FIXTURE, ChatbotLoadTest, FakeOpenAIServer, load_questions
+from apps.api.retrieval_benchmark import write_report
+
+
+class Command(BaseCommand):
+    help = '가짜 OpenAI 서버로 챗봇 응답 경로 부하 테스트 (처리량, p50/p95/p99 지연시간, 턴당 DB 쿼리 수)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20, help='시뮬레이션 사용자 수')
+        parser.add_argument('--turns', type=int, default=5, help='사용자당 대화 턴 수')
+        parser.add_argument('--concurrency', type=int, default=8, help='동시에 대화하는 사용자 수 (스레드)')
+        parser.add_argument('--mode', choices=['response', 'stream'], default='response',
+                            help='response: get_response, stream: stream_response')
+        parser.add_argument('--language', choices=['mixed', 'ko', 'en'], default='mixed',
+                            help='질문 언어 (mixed: 사용자별로 한국어/영어 번갈아)')
+        parser.add_argument('--think-time', type=float, default=0.0, help='턴 사이 대기 시간 (초)')
+        parser.add_argument('--fixture', type=str, default=DEFAULT_FIXTURE, help='질문 세트 JSON ({"ko": [...], "en": [...]})')
+        parser.add_argument('--seed', type=int, default=0, help='질문 선택 난수 시드')
+
+        # 가짜 LLM 서버
+        parser.add_argument('--latency', type=float, default=0.3, help='가짜 LLM 첫 토큰 지연 (초)')
+        parser.add_argument('--tokens-per-second', type=float, default=50.0, help='가짜 LLM 생성 속도')
+        parser.add_argument('--reply-tokens', type=int, default=120, help='가짜 LLM 답변 토큰 수')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='가짜 LLM 500 오류 비율 (0~1)')
+        parser.add_argument('--port', type=int, default=0, help='가짜 LLM 서버 포트 (0: 임의)')
+
+        parser.add_argument('--wait-retrieval', type=float, default=0.0,
+                            help='시작 전 임베딩 모델 / 벡터스토어 로드를 기다릴 최대 시간 (초, 0: 기다리지 않음)')
+        parser.add_argument('--output', type=str, default=None, help='결과 JSON 저장 경로')
+        parser.add_argument('--keep-users', action='store_true', help='실행 후 시뮬레이션 사용자를 삭제하지 않음')
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['turns'] < 1 or options['concurrency'] < 1:
+            raise CommandError('--users, --turns, --concurrency 는 1 이상이어야 합니다')
+        try:
+            import openai  # noqa: F401
+        except ImportError:
+            raise CommandError('openai 패키지가 필요합니다 (pip install -r requirements.txt)')
+
+        loadtest = ChatbotLoadTest(
+            users=options['users'],
+            turns=options['turns'],
+            concurrency=options['concurrency'],
+            mode=options['mode'],
+            language=options['language'],
+            think_time=options['think_time'],
+            questions=load_questions(options['fixture']),
+            seed=options['seed'],
+        )
+        server = FakeOpenAIServer(
+            port=options['port'],
+            first_token_latency=options['latency'],
+            tokens_per_second=options['tokens_per_second'],
+            reply_tokens=options['reply_tokens'],
+            error_rate=options['error_rate'],
+        )
+
+        with server:
+            chatbot = loadtest.attach(server)
+            if options['wait_retrieval']:
+                from apps.api.chatbot_resources import CHATBOT_KNOWLEDGE, resource_registry
+                self.stdout.write('임베딩 모델 / 벡터스토어 로드 대기 중...')
+                if resource_registry.get(CHATBOT_KNOWLEDGE, wait=True, timeout=options['wait_retrieval']) is None:
+                    self.stdout.write(self.style.WARNING('검색 리소스 없이 진행 (검색 불가 모드)'))
+
+            users = loadtest.setup_users()
+            try:
+                report = loadtest.run(server, users)
+            finally:
+                if not options['keep_users']:
+                    loadtest.cleanup_users()
+
+        report['settings']['fake_llm'] = {
+            'latency': options['latency'],
+            'tokens_per_second': options['tokens_per_second'],
+            'reply_tokens': options['reply_tokens'],
+            'error_rate': options['error_rate'],
+        }
+        report['settings']['retrieval_available'] = type(chatbot)._vectorstore is not None
+
+        metrics = report['metrics']
+        self.stdout.write(
+            f"턴 {metrics['turns']}개 ({metrics['errors']}개 실패), {metrics['duration_s']:.1f}초, "
+            f"처리량: {metrics['throughput_tps']:.1f} 턴/초 ({options['concurrency']} 동시)"
+        )
+        self.stdout.write(
+            f"지연시간 p50/p95/p99: {metrics['p50_ms']:.1f} / {metrics['p95_ms']:.1f} / {metrics['p99_ms']:.1f}ms"
+        )
+        if metrics['first_token']:
+            first_token = metrics['first_token']
+            self.stdout.write(
+                f"첫 토큰 p50/p95/p99: {first_token['p50_ms']:.1f} / {first_token['p95_ms']:.1f} / "
+                f"{first_token['p99_ms']:.1f}ms"
+            )
+        queries = metrics['db_queries_per_turn']
+        self.stdout.write(
+            f"턴당 DB 쿼리: 평균 {queries['mean']:.1f}, p95 {queries['p95']:.0f}, 최대 {queries['max']}"
+        )
+        if metrics['stages_mean_ms']:
+            stages = ', '.join(f"{stage} {value:.1f}" for stage, value in metrics['stages_mean_ms'].items())
+            self.stdout.write(f"단계별 평균(ms): {stages}")
+        self.stdout.write(
+            f"캐시 히트: 간단 {metrics['simple_cache_hits']}, 시맨틱 {metrics['semantic_cache_hits']} / "
+            f"LLM 호출 {report['fake_llm']['requests']}회, "
+            f"종료 후 정리 {report['after_run']['drain_seconds']:.2f}초"
+        )
+        for error, count in report['errors'].items():
+            self.stdout.write(self.style.ERROR(f"  실패 {count}회: {error}"))
+
+        if options['output']:
+            write_report(report, options['output'])
+            self.stdout.write(f"결과 저장: {options['output']}")
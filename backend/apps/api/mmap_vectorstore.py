@@ -0,0 +1,164 @@
+"""
+메모리 매핑(mmap) 벡터스토어 로더
+- FAISS 인덱스를 IO_FLAG_MMAP_IFC (없으면 IO_FLAG_MMAP, IVF 만 해당) 로 열어 워커 프로세스 간 페이지 공유
+- 청크 텍스트/메타데이터를 pickle InMemoryDocstore 대신
+  오프셋 파일(int64) + UTF-8 JSON 블롭으로 저장하고 필요할 때만 디코딩
+- 여러 gunicorn/uvicorn 워커가 같은 파일을 읽으면 OS 페이지 캐시를 공유
+"""
+import os
+import json
+import mmap
+import logging
+from collections.abc import Mapping
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+from langchain_community.docstore.base import Docstore
+from langchain_core.documents import Document
+
+logger = logging.getLogger(__name__)
+
+FAISS_INDEX_FILE = "index.faiss"
+DOCSTORE_BLOB_FILE = "chunks.bin"
+DOCSTORE_OFFSETS_FILE = "chunks.offsets.npy"
+
+
+class MmapDocstore(Docstore):
+    """읽기 전용 mmap 문서 저장소 (문서 ID = FAISS 인덱스 위치 문자열)"""
+
+    def __init__(self, directory: str):
+        self.offsets = np.load(os.path.join(directory, DOCSTORE_OFFSETS_FILE), mmap_mode='r')
+        self._file = open(os.path.join(directory, DOCSTORE_BLOB_FILE), 'rb')
+        self._blob = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def get(self, position: int) -> Optional[Document]:
+        if position < 0 or position >= len(self):
+            return None
+        start, end = int(self.offsets[position]), int(self.offsets[position + 1])
+        record = json.loads(self._blob[start:end].decode('utf-8'))
+        return Document(page_content=record['page_content'], metadata=record['metadata'])
+
+    def search(self, search: str) -> Union[str, Document]:
+        try:
+            doc = self.get(int(search))
+        except (TypeError, ValueError):
+            doc = None
+        return doc if doc is not None else f"ID {search} not found."
+
+    def close(self):
+        self._blob.close()
+        self._file.close()
+
+
+class PositionDocstoreIds(Mapping):
+    """index_to_docstore_id 대체 (위치 → 위치 문자열, 딕셔너리를 만들지 않음)"""
+
+    def __init__(self, size: int):
+        self.size = size
+
+    def __getitem__(self, position: int) -> str:
+        if not 0 <= position < self.size:
+            raise KeyError(position)
+        return str(position)
+
+    def __iter__(self):
+        return iter(range(self.size))
+
+    def __len__(self) -> int:
+        return self.size
+
+
+def has_mmap_store(directory: str) -> bool:
+    return all(
+        os.path.exists(os.path.join(directory, name))
+        for name in (FAISS_INDEX_FILE, DOCSTORE_BLOB_FILE, DOCSTORE_OFFSETS_FILE)
+    )
+
+
+def export_mmap_docstore(vectorstore, directory: str) -> Dict:
+    """LangChain FAISS 벡터스토어의 docstore 를 FAISS 위치 순서의 오프셋 + 블롭 파일로 저장
+
+    증분 수집으로 제거된 위치(빈 자리)는 빈 레코드로 채워 위치 = 레코드 번호를 유지합니다.
+    """
+    num_records = max(vectorstore.index_to_docstore_id.keys(), default=-1) + 1
+    offsets = np.zeros(num_records + 1, dtype='int64')
+
+    with open(os.path.join(directory, DOCSTORE_BLOB_FILE), 'wb') as f:
+        for position in range(num_records):
+            doc_id = vectorstore.index_to_docstore_id.get(position)
+            doc = vectorstore.docstore.search(doc_id) if doc_id is not None else None
+            if isinstance(doc, Document):
+                record = {'page_content': doc.page_content, 'metadata': doc.metadata or {}}
+            else:
+                record = {'page_content': '', 'metadata': {'tombstone': True}}
+            f.write(json.dumps(record, ensure_ascii=False, default=str).encode('utf-8'))
+            offsets[position + 1] = f.tell()
+
+    np.save(os.path.join(directory, DOCSTORE_OFFSETS_FILE), offsets)
+    return {'documents': vectorstore.index.ntotal, 'records': num_records, 'blob_bytes': int(offsets[-1])}
+
+
+def read_index_mmap(path: str):
+    """FAISS 인덱스를 mmap + 읽기 전용으로 열기"""
+    import faiss
+    from .ann_index import mmap_io_flags
+
+    return faiss.read_index(path, mmap_io_flags())
+
+
+def index_sharing_report(paths) -> List[Dict]:
+    """인덱스 파일을 mmap 으로 열 때 워커 힙에 복사되는 양(익명 메모리 증가)으로 실제 페이지 공유 여부 측정"""
+    from .ann_index import describe_index
+
+    report = []
+    for path in paths:
+        before = process_memory().get('anonymous', 0)
+        index = read_index_mmap(path)
+        private_mb = process_memory().get('anonymous', 0) - before
+        file_mb = os.path.getsize(path) / (1024 * 1024)
+        report.append({
+            'path': path,
+            'type': describe_index(index),
+            'file_mb': file_mb,
+            'private_mb': private_mb,
+            'shared': private_mb < file_mb / 2,
+        })
+        del index
+    return report
+
+
+def load_mmap_vectorstore(directory: str, embeddings, nprobe: int = 10):
+    """mmap 인덱스와 mmap docstore 로 LangChain FAISS 벡터스토어 구성"""
+    from langchain_community.vectorstores import FAISS
+
+    index = read_index_mmap(os.path.join(directory, FAISS_INDEX_FILE))
+    if hasattr(index, 'nprobe'):
+        index.nprobe = nprobe
+    docstore = MmapDocstore(directory)
+    if len(docstore) < index.ntotal:
+        raise ValueError(f"docstore 문서 수({len(docstore)})가 인덱스 벡터 수({index.ntotal})보다 적습니다")
+
+    return FAISS(
+        embedding_function=embeddings,
+        index=index,
+        docstore=docstore,
+        index_to_docstore_id=PositionDocstoreIds(len(docstore)),
+    )
+
+
+def process_memory() -> Dict[str, float]:
+    """현재 프로세스의 RSS / PSS(공유 페이지를 프로세스 수로 나눈 값) MB 단위 (Linux)"""
+    memory = {}
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                if key in ('Rss', 'Pss', 'Shared_Clean', 'Private_Dirty', 'Anonymous'):
+                    memory[key.lower()] = int(value.split()[0]) / 1024
+    except OSError:
+        import resource
+        memory['rss'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return memory
@@ -6,15 +6,27 @@ from django.http import JsonResponse
 from django.conf import settings
 from django.utils import timezone
 from django.core.cache import cache
-from openai import OpenAI
 import json
 import os
 import requests
 import hashlib
 import logging
+from ..llm_gateway import LLMUnavailable, get_llm_gateway
+from ..single_flight import get_single_flight
 
 logger = logging.getLogger(__name__)
 
+YOUTUBE_SEARCH_CACHE_TIMEOUT = 60 * 60 * 12  # 12시간
+AI_KEYWORDS_CACHE_TIMEOUT = 60 * 60 * 12  # 같은 운동 / 기분 조합의 추천 키워드
+
+
+class _YouTubeSearchFailed(Exception):
+    """캐시하지 않고 그대로 돌려줄 검색 응답 (할당량 초과 / API 오류)"""
+
+    def __init__(self, response):
+        super().__init__()
+        self.response = response
+
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -42,14 +54,14 @@ def get_ai_keywords(request):
     """
     
     try:
-        client = OpenAI(api_key=settings.OPENAI_API_KEY)
-        
-        response = client.chat.completions.create(
+        response = get_llm_gateway().chat(
+            [{"role": "user", "content": prompt}],
             model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": prompt}]
+            cache_ttl=AI_KEYWORDS_CACHE_TIMEOUT,
+            operation='music_keywords'
         )
         
-        content = response.choices[0].message.content
+        content = response.content
         keywords = [line.strip("123.-• ").strip() for line in content.split('\n') if line.strip()]
         
         # Save user preference
@@ -83,6 +95,11 @@ def get_ai_keywords(request):
         
         return Response({'keywords': keywords})
         
+    except LLMUnavailable as e:
+        return Response(
+            {'error': str(e)},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
     except Exception as e:
         return Response(
             {'error': str(e)},
@@ -162,49 +179,43 @@ def youtube_search(request):
     # 캐시 키 생성
     cache_key = f"youtube_search_{hashlib.md5(f'{query}_{max_results}'.encode()).hexdigest()}"
     
-    # 캐시 확인
-    cached_result = cache.get(cache_key)
-    if cached_result:
-        logger.info(f"Returning cached YouTube search result for query: {query}")
-        return Response(cached_result)
-    
-    # API 키 가져오기
-    api_key = settings.YOUTUBE_API_KEY
-    
-    # 기본값이거나 비어있으면 환경변수에서 다시 읽기
-    if not api_key or api_key == 'your_youtube_api_key_here' or api_key == '':
-        # .env 파일에서 직접 읽기 시도
-        from pathlib import Path
-        from dotenv import load_dotenv
-        env_path = Path(settings.BASE_DIR) / '.env'
-        load_dotenv(env_path)
-        api_key = os.environ.get('YOUTUBE_API_KEY', '')
+    def search():
+        # API 키 가져오기
+        api_key = settings.YOUTUBE_API_KEY
+        
+        # 기본값이거나 비어있으면 환경변수에서 다시 읽기
+        if not api_key or api_key == 'your_youtube_api_key_here' or api_key == '':
+            # .env 파일에서 직접 읽기 시도
+            from pathlib import Path
+            from dotenv import load_dotenv
+            env_path = Path(settings.BASE_DIR) / '.env'
+            load_dotenv(env_path)
+            api_key = os.environ.get('YOUTUBE_API_KEY', '')
+        
+            # 그래도 없으면 .env 파일 직접 파싱
+            if not api_key or api_key == 'your_youtube_api_key_here':
+                if env_path.exists():
+                    with open(env_path, 'r') as f:
+                        for line in f:
+                            if line.strip().startswith('YOUTUBE_API_KEY='):
+                                api_key = line.strip().split('=', 1)[1]
+                                break
+        
+        if not api_key:
+            # API 키가 없는 경우 기본 검색 결과 반환
+            logger.warning("YouTube API key not configured, returning default results")
+            raise _YouTubeSearchFailed(Response(get_default_search_results(query)))
         
-        # 그래도 없으면 .env 파일 직접 파싱
-        if not api_key or api_key == 'your_youtube_api_key_here':
-            if env_path.exists():
-                with open(env_path, 'r') as f:
-                    for line in f:
-                        if line.strip().startswith('YOUTUBE_API_KEY='):
-                            api_key = line.strip().split('=', 1)[1]
-                            break
-    
-    if not api_key:
-        # API 키가 없는 경우 기본 검색 결과 반환
-        logger.warning("YouTube API key not configured, returning default results")
-        default_results = get_default_search_results(query)
-        return Response(default_results)
-    
-    try:
         url = "https://www.googleapis.com/youtube/v3/search"
         # 운동 관련 키워드 추가
+        search_query = query
         if 'workout' not in query.lower() and 'exercise' not in query.lower() and 'fitness' not in query.lower():
-            query = f"{query} workout music mix"
+            search_query = f"{query} workout music mix"
         
         params = {
             'part': 'snippet',
             'maxResults': max_results,
-            'q': query,
+            'q': search_query,
             'type': 'video',
             'videoCategoryId': '10',  # 음악 카테고리
             'key': api_key
@@ -215,24 +226,25 @@ def youtube_search(request):
         if response.status_code == 403:
             # 할당량 초과 시 기본 결과 반환
             logger.error(f"YouTube API quota exceeded: {response.text}")
-            default_results = get_default_search_results(query)
-            return Response(default_results)
+            raise _YouTubeSearchFailed(Response(get_default_search_results(search_query)))
         
         if response.status_code != 200:
             logger.error(f"YouTube API Error: {response.text}")
-            return Response(
+            raise _YouTubeSearchFailed(Response(
                 {'error': f'YouTube API error: {response.status_code}', 'details': response.text},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
-        
-        result = response.json()
-        
-        # 결과를 캐시에 저장 (12시간)
-        cache.set(cache_key, result, 60 * 60 * 12)
-        logger.info(f"Cached YouTube search result for query: {query}")
+            ))
         
+        logger.info(f"Cached YouTube search result for query: {search_query}")
+        return response.json()
+    
+    try:
+        # 같은 검색이 동시에 들어와도 YouTube API 는 한 번만 호출 (만료 직후에는 이전 결과를 주며 갱신)
+        result = get_single_flight().get_or_compute(cache_key, search, YOUTUBE_SEARCH_CACHE_TIMEOUT)
         return Response(result)
         
+    except _YouTubeSearchFailed as failure:
+        return failure.response
     except Exception as e:
         logger.exception("YouTube search error")
         # 오류 발생 시 기본 결과 반환
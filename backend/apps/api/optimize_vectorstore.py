@@ -1,39 +1,53 @@
 """
 벡터스토어 최적화 스크립트
-- IVF 인덱스 적용
+- 설정 파일 기반 ANN 인덱스 적용 (flat / IVF-Flat / IVF-PQ / HNSW, PCA / float16)
 - 메타데이터 추가
 - 청크 크기 조정
+- 하이브리드 검색용 BM25 인덱스 생성
+- 카테고리별 샤드 인덱스 생성
+- 워커 간 공유용 mmap docstore 생성
 """
 import os
 import pickle
-import numpy as np
-import faiss
-from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_community.vectorstores import FAISS
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.schema import Document
 import torch
 import time
 import logging
+try:
+    from .embedding_backends import get_embedding_backend
+    from .hybrid_retrieval import BM25Index
+    from .category_shards import CategoryShardIndex
+    from .mmap_vectorstore import export_mmap_docstore
+    from .vectorstore_ingestion import IngestionManifest
+    from .ann_index import build_index, factory_string, get_index_config, save_index_config
+    from .keyword_matcher import MultiPatternMatcher, best_label
+except ImportError:
+    # 스크립트로 직접 실행하는 경우
+    from embedding_backends import get_embedding_backend
+    from hybrid_retrieval import BM25Index
+    from category_shards import CategoryShardIndex
+    from mmap_vectorstore import export_mmap_docstore
+    from vectorstore_ingestion import IngestionManifest
+    from ann_index import build_index, factory_string, get_index_config, save_index_config
+    from keyword_matcher import MultiPatternMatcher, best_label
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class VectorstoreOptimizer:
-    def __init__(self):
+    def __init__(self, index_config=None):
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
         self.embedding_model_name = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
         self.vectorstore_path = os.path.join(os.path.dirname(__file__), "vectorstore")
         self.optimized_path = os.path.join(os.path.dirname(__file__), "vectorstore_optimized")
+        self.index_config_name, self.index_config = get_index_config(index_config)
         
     def load_embeddings(self):
         """임베딩 모델 로드"""
         logger.info("임베딩 모델 로드 중...")
-        return HuggingFaceEmbeddings(
-            model_name=self.embedding_model_name,
-            model_kwargs={"device": self.device},
-            encode_kwargs={'normalize_embeddings': True, 'batch_size': 32}
-        )
+        return get_embedding_backend(self.embedding_model_name, device=self.device)
     
     def analyze_current_vectorstore(self):
         """현재 벡터스토어 분석"""
@@ -87,57 +101,42 @@ class VectorstoreOptimizer:
         
         return vectorstore, num_vectors, dimension
     
-    def create_ivf_index(self, vectorstore, num_vectors, dimension):
-        """IVF 인덱스 생성"""
-        logger.info("IVF 인덱스 생성 중...")
-        
-        # 최적 nlist 계산
-        nlist = min(100, int(4 * np.sqrt(num_vectors)))
-        logger.info(f"nlist 값: {nlist}")
-        
-        # 벡터 추출
-        vectors = []
-        for i in range(num_vectors):
-            try:
-                vec = vectorstore.index.reconstruct(i)
-                vectors.append(vec)
-            except:
-                logger.warning(f"벡터 {i} 추출 실패")
+    def create_ann_index(self, vectorstore):
+        """설정 파일(vectorstore_index_config.json)의 인덱스 타입으로 인덱스 생성"""
+        logger.info(f"인덱스 생성 중: {self.index_config_name} ({self.index_config})")
         
-        vectors = np.array(vectors).astype('float32')
+        # 벡터 일괄 추출 (Flat 인덱스)
+        vectors = vectorstore.index.reconstruct_n(0, vectorstore.index.ntotal)
         logger.info(f"추출된 벡터: {vectors.shape}")
         
-        # IVF 인덱스 생성
-        quantizer = faiss.IndexFlatL2(dimension)
-        index_ivf = faiss.IndexIVFFlat(quantizer, dimension, nlist)
+        index = build_index(vectors, self.index_config)
+        logger.info(f"인덱스 생성 완료: {factory_string(self.index_config, index.ntotal)}, {index.ntotal} 벡터")
         
-        # 학습
-        logger.info("IVF 인덱스 학습 중...")
-        index_ivf.train(vectors)
-        
-        # 벡터 추가
-        logger.info("벡터 추가 중...")
-        index_ivf.add(vectors)
-        
-        # nprobe 설정 (검색 시 탐색할 클러스터 수)
-        index_ivf.nprobe = 10
-        
-        logger.info(f"IVF 인덱스 생성 완료: {index_ivf.ntotal} 벡터")
+        return index
+    
+    # 카테고리 키워드 정의
+    category_keywords = {
+        'exercise': ['운동', '스쿼트', '푸시업', '플랭크', '런닝', '요가', '필라테스', '근육', '체력'],
+        'nutrition': ['영양', '단백질', '탄수화물', '지방', '비타민', '칼로리', '식단', '음식', '다이어트'],
+        'health': ['건강', '질병', '증상', '치료', '예방', '면역', '스트레스', '수면', '정신건강'],
+        'general': []  # 기본 카테고리
+    }
+    
+    # category_keywords 를 컴파일한 매처 (첫 분류 시 생성)
+    _category_matcher = None
+    
+    def classify_document(self, content):
+        """문서 내용의 키워드 수로 카테고리 결정"""
+        if self._category_matcher is None:
+            self._category_matcher = MultiPatternMatcher({'category': self.category_keywords})
         
-        return index_ivf
+        counts = self._category_matcher.scan(content.lower()).counts('category')
+        return best_label(counts, self.category_keywords.keys()) or 'general'
     
     def add_metadata_to_documents(self, vectorstore):
         """문서에 메타데이터 추가"""
         logger.info("메타데이터 추가 중...")
         
-        # 카테고리 키워드 정의
-        category_keywords = {
-            'exercise': ['운동', '스쿼트', '푸시업', '플랭크', '런닝', '요가', '필라테스', '근육', '체력'],
-            'nutrition': ['영양', '단백질', '탄수화물', '지방', '비타민', '칼로리', '식단', '음식', '다이어트'],
-            'health': ['건강', '질병', '증상', '치료', '예방', '면역', '스트레스', '수면', '정신건강'],
-            'general': []  # 기본 카테고리
-        }
-        
         updated_docs = []
         
         # 문서 처리
@@ -148,17 +147,7 @@ class VectorstoreOptimizer:
                     doc = vectorstore.docstore.search(doc_id)
                     if doc and isinstance(doc, Document):
                         # 카테고리 결정
-                        content_lower = doc.page_content.lower()
-                        category = 'general'
-                        max_count = 0
-                        
-                        for cat, keywords in category_keywords.items():
-                            if cat == 'general':
-                                continue
-                            count = sum(1 for keyword in keywords if keyword in content_lower)
-                            if count > max_count:
-                                max_count = count
-                                category = cat
+                        category = self.classify_document(doc.page_content)
                         
                         # 메타데이터 업데이트
                         if not hasattr(doc, 'metadata'):
@@ -178,11 +167,8 @@ class VectorstoreOptimizer:
         logger.info(f"메타데이터 추가 완료: {len(updated_docs)}개 문서")
         return updated_docs
     
-    def create_optimized_vectorstore(self, documents, embeddings):
-        """최적화된 벡터스토어 생성"""
-        logger.info("최적화된 벡터스토어 생성 중...")
-        
-        # 청크 크기 500자로 재분할
+    def split_documents(self, documents):
+        """청크 크기 500자로 재분할"""
         text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=500,
             chunk_overlap=50,
@@ -211,12 +197,39 @@ class VectorstoreOptimizer:
                 split_docs.append(doc)
         
         logger.info(f"문서 분할 완료: {len(documents)}개 → {len(split_docs)}개")
+        return split_docs
+    
+    def create_optimized_vectorstore(self, documents, embeddings):
+        """최적화된 벡터스토어 생성"""
+        logger.info("최적화된 벡터스토어 생성 중...")
+        
+        split_docs = self.split_documents(documents)
         
         # 새 벡터스토어 생성
         vectorstore = FAISS.from_documents(split_docs, embeddings)
         
         return vectorstore
     
+    def create_category_shards(self, vectorstore):
+        """카테고리별 샤드 인덱스 생성 (category 메타데이터 기준)"""
+        logger.info("카테고리 샤드 인덱스 생성 중...")
+        category_shards = CategoryShardIndex.from_vectorstore(vectorstore, nprobe=10)
+        for category, positions in category_shards.positions.items():
+            logger.info(f"  {category}: {len(positions)}개 벡터")
+        return category_shards
+    
+    def create_bm25_index(self, vectorstore):
+        """하이브리드 검색용 BM25 인덱스 생성 및 저장"""
+        logger.info("BM25 인덱스 생성 중...")
+        start_time = time.time()
+        bm25_index = BM25Index.from_vectorstore(vectorstore)
+        bm25_index.save(self.optimized_path)
+        logger.info(
+            f"BM25 인덱스 생성 완료: {len(bm25_index.doc_lengths)}개 청크, "
+            f"{len(bm25_index.postings)}개 토큰 ({time.time() - start_time:.2f}초)"
+        )
+        return bm25_index
+    
     def optimize_vectorstore(self):
         """전체 최적화 프로세스"""
         logger.info("=== 벡터스토어 최적화 시작 ===")
@@ -248,21 +261,36 @@ class VectorstoreOptimizer:
             # 5. 최적화된 벡터스토어 생성 (청크 500자)
             optimized_vectorstore = self.create_optimized_vectorstore(documents, embeddings)
             
-            # 6. IVF 인덱스 적용
-            ivf_index = self.create_ivf_index(
-                optimized_vectorstore, 
-                optimized_vectorstore.index.ntotal, 
-                dimension
-            )
+            # 5-1. 카테고리별 샤드 인덱스 생성 (IVF 교체 전 Flat 인덱스에서 벡터 추출)
+            category_shards = self.create_category_shards(optimized_vectorstore)
+            
+            # 6. 설정된 ANN 인덱스 적용 (기본 IVF-Flat)
+            ann_index = self.create_ann_index(optimized_vectorstore)
             
-            # 기존 인덱스를 IVF로 교체
-            optimized_vectorstore.index = ivf_index
+            # 기존 Flat 인덱스를 교체
+            optimized_vectorstore.index = ann_index
             
-            # 7. 최적화된 벡터스토어 저장
+            # 7. 최적화된 벡터스토어 저장 (검색 파라미터 복원용 인덱스 설정 포함)
             os.makedirs(self.optimized_path, exist_ok=True)
             optimized_vectorstore.save_local(self.optimized_path)
+            save_index_config(self.optimized_path, self.index_config_name, self.index_config)
             logger.info(f"최적화된 벡터스토어 저장 완료: {self.optimized_path}")
             
+            # 7-1. 같은 청크에 대한 BM25 인덱스 생성 (FAISS 위치를 문서 ID로 사용)
+            self.create_bm25_index(optimized_vectorstore)
+            category_shards.save(self.optimized_path)
+            logger.info(f"카테고리 샤드 저장 완료: {os.path.join(self.optimized_path, 'shards')}")
+            
+            # 7-2. mmap docstore 저장 (청크 텍스트/메타데이터를 FAISS 위치 순서로)
+            docstore_stats = export_mmap_docstore(optimized_vectorstore, self.optimized_path)
+            logger.info(
+                f"mmap docstore 저장 완료: {docstore_stats['documents']}개 문서, "
+                f"{docstore_stats['blob_bytes'] / (1024 * 1024):.1f}MB"
+            )
+            
+            # 7-3. 증분 수집용 매니페스트 초기화 (전체 재구축이므로 이전 매니페스트 대체)
+            IngestionManifest.from_vectorstore(optimized_vectorstore).save(self.optimized_path)
+            
             # 8. 벤치마크 - 최적화 후 성능
             logger.info("\n--- 최적화된 벡터스토어 성능 테스트 ---")
             
@@ -278,15 +306,13 @@ class VectorstoreOptimizer:
                 category = self._classify_query(query)
                 
                 start_time = time.time()
-                if category:
-                    # 메타데이터 필터링 시뮬레이션
+                if category_shards.has(category):
+                    # 카테고리 샤드 + general 샤드만 검색
+                    query_embedding = embeddings.embed_query(query)
                     results = []
-                    all_results = optimized_vectorstore.similarity_search_with_score(query, k=10)
-                    for doc, score in all_results:
-                        if doc.metadata.get('category') == category:
-                            results.append((doc, score))
-                            if len(results) >= 3:
-                                break
+                    for position, score in category_shards.search(query_embedding, category, k=3):
+                        doc_id = optimized_vectorstore.index_to_docstore_id[position]
+                        results.append((optimized_vectorstore.docstore.search(doc_id), score))
                 else:
                     results = optimized_vectorstore.similarity_search_with_score(query, k=3)
                 
@@ -304,7 +330,8 @@ class VectorstoreOptimizer:
             logger.info(f"기존 벡터 수: {num_vectors}")
             logger.info(f"최적화 후 벡터 수: {optimized_vectorstore.index.ntotal}")
             logger.info(f"청크 크기: 500자")
-            logger.info(f"인덱스 타입: IVF (nlist={ivf_index.nlist}, nprobe={ivf_index.nprobe})")
+            logger.info(f"인덱스 타입: {self.index_config_name} ({factory_string(self.index_config, ann_index.ntotal)})")
+            logger.info(f"카테고리 샤드: {list(category_shards.indexes.keys())}")
             
             return optimized_vectorstore
             
@@ -329,5 +356,11 @@ class VectorstoreOptimizer:
 
 
 if __name__ == "__main__":
-    optimizer = VectorstoreOptimizer()
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="벡터스토어 최적화")
+    parser.add_argument('--index', default=None, help='vectorstore_index_config.json 의 인덱스 설정 이름')
+    args = parser.parse_args()
+    
+    optimizer = VectorstoreOptimizer(index_config=args.index)
     optimizer.optimize_vectorstore()
@@ -12,7 +12,7 @@ from apps.core.models import (
     ChatMessage, ChatSession, UserProfile, VectorizedChatHistory,
     DailyRecommendation, EXERCISE_CHOICES, FOOD_CATEGORIES
 )
-from openai import OpenAI
+from .llm_gateway import get_llm_gateway
 import traceback
 import json
 import numpy as np
@@ -44,8 +44,7 @@ class OptimizedHealthChatbot:
     def __init__(self):
         logger.debug("🚀 OptimizedHealthChatbot 초기화 시작")
         try:
-            api_key = settings.OPENAI_API_KEY
-            self.client = OpenAI(api_key=api_key)
+            self.llm = get_llm_gateway()
             self.max_recent_sessions = 7
             
             # Vectorstore 관련 설정
@@ -203,14 +202,14 @@ class OptimizedHealthChatbot:
             
             # 8. OpenAI API 호출
             logger.debug(f"🤖 OpenAI API 호출 시작 (경과: {time.time() - start_time:.2f}초)")
-            response = self.client.chat.completions.create(
+            response = self.llm.chat(
+                messages,
                 model="gpt-4o-mini",
-                messages=messages,
                 temperature=0.7,
                 max_tokens=1000
             )
             
-            answer = response.choices[0].message.content
+            answer = response.content
             logger.debug(f"✅ OpenAI 응답 완료 (경과: {time.time() - start_time:.2f}초)")
             
             # 9. 봇 응답 저장 (비동기)
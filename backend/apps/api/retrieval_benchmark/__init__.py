@@ -0,0 +1,31 @@
+"""
+지식 베이스 검색 품질 / 지연시간 회귀 벤치마크
+
+python manage.py benchmark_retrieval  (저장소 코퍼스로 오프라인 실행 + 기준 결과와 비교)
+python manage.py benchmark_retrieval --vectorstore <경로> --fixture <질의.json> --output <결과.json> --baseline <기준.json>
+"""
+from .corpus import (
+    DEFAULT_BASELINE, DEFAULT_CORPUS, HashingEmbeddings, build_corpus_vectorstore, load_corpus,
+    run_corpus_benchmark
+)
+from .metrics import DEFAULT_THRESHOLDS, find_regressions, recall_at_k, reciprocal_rank, validate_fixture
+from .runner import DEFAULT_FIXTURE, RetrievalBenchmark, load_fixture, load_report, write_report
+
+__all__ = [
+    'DEFAULT_BASELINE',
+    'DEFAULT_CORPUS',
+    'DEFAULT_FIXTURE',
+    'DEFAULT_THRESHOLDS',
+    'HashingEmbeddings',
+    'RetrievalBenchmark',
+    'build_corpus_vectorstore',
+    'find_regressions',
+    'load_corpus',
+    'load_fixture',
+    'load_report',
+    'recall_at_k',
+    'reciprocal_rank',
+    'run_corpus_benchmark',
+    'validate_fixture',
+    'write_report',
+]
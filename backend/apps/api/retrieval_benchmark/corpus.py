@@ -0,0 +1,87 @@
+"""
+저장소에 포함된 소형 지식 코퍼스(fixtures/knowledge_corpus.json)로 오프라인 벤치마크 실행
+- 임베딩 모델 / 네트워크 없이 동작하는 해싱 n-gram 임베딩 사용
+- 챗봇과 같은 파생 인덱스(BM25, 카테고리 샤드)를 함께 만들어 같은 검색 경로로 평가
+- 기준 결과(fixtures/knowledge_baseline.json)는 품질 지표만 담고 있어 머신과 무관하게 회귀 검사 가능
+"""
+import os
+import json
+import zlib
+import tempfile
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from ..hybrid_retrieval import tokenize
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+DEFAULT_CORPUS = os.path.join(FIXTURE_DIR, "knowledge_corpus.json")
+DEFAULT_BASELINE = os.path.join(FIXTURE_DIR, "knowledge_baseline.json")
+
+
+class HashingEmbeddings(Embeddings):
+    """토큰(한글 문자 n-gram / 영문 단어)을 고정 차원으로 해싱한 결정적 임베딩 (L2 정규화)"""
+
+    def __init__(self, dimension: int = 512):
+        self.dimension = dimension
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dimension, dtype='float32')
+        for token in tokenize(text):
+            vector[zlib.crc32(token.encode('utf-8')) % self.dimension] += 1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+def load_corpus(path: str = DEFAULT_CORPUS) -> List[Dict]:
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)['chunks']
+
+
+def build_corpus_vectorstore(directory: str, embeddings: Embeddings, path: str = DEFAULT_CORPUS):
+    """코퍼스 청크로 FAISS(Flat) 벡터스토어 + BM25 + 카테고리 샤드를 directory 에 저장"""
+    from langchain_community.vectorstores import FAISS
+    from langchain_core.documents import Document
+    from ..category_shards import CategoryShardIndex
+    from ..hybrid_retrieval import BM25Index
+    from ..vectorstore_ingestion import chunk_hash
+
+    documents = [
+        Document(
+            page_content=chunk['content'],
+            metadata={
+                'source': chunk['source'],
+                'category': chunk['category'],
+                'content_hash': chunk_hash(chunk['content']),
+            },
+        )
+        for chunk in load_corpus(path)
+    ]
+    vectorstore = FAISS.from_documents(documents, embeddings)
+    vectorstore.save_local(directory)
+    BM25Index.from_vectorstore(vectorstore).save(directory)
+    CategoryShardIndex.from_vectorstore(vectorstore).save(directory)
+    return vectorstore
+
+
+def run_corpus_benchmark(queries: List[Dict], k: int = 5, mode: str = 'hybrid', threads: int = 2,
+                         repeat: int = 1, path: str = DEFAULT_CORPUS,
+                         embeddings: Optional[Embeddings] = None) -> Dict:
+    """임시 디렉토리에 코퍼스 벡터스토어를 만들어 벤치마크 실행"""
+    from .runner import RetrievalBenchmark
+
+    embeddings = embeddings or HashingEmbeddings()
+    with tempfile.TemporaryDirectory() as directory:
+        build_corpus_vectorstore(directory, embeddings, path)
+        report = RetrievalBenchmark(directory, embeddings, k=k, mode=mode).run(
+            queries, threads=threads, repeat=repeat
+        )
+    report['vectorstore'] = os.path.abspath(path)
+    return report
@@ -0,0 +1,106 @@
+"""
+검색 품질 / 지연시간 지표와 회귀 비교
+"""
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+
+def chunk_matches(chunk: Dict, expected: Dict) -> bool:
+    """검색된 청크가 정답 항목(검토된 content_hash + 선택적 source)과 일치하는지 판정"""
+    if not expected.get('content_hash') or chunk.get('content_hash') != expected['content_hash']:
+        return False
+    return not expected.get('source') or chunk.get('source', '').endswith(expected['source'])
+
+
+def hint_matches(content: str, source: str, hint: Dict) -> bool:
+    """청크가 라벨링 조건(label_hints 항목: contains 구절 모두 포함 + 선택적 source)에 맞는지 판정"""
+    if hint.get('source') and not (source or '').endswith(hint['source']):
+        return False
+    phrases = hint.get('contains', [])
+    if isinstance(phrases, str):
+        phrases = [phrases]
+    return bool(phrases) and all(phrase in content for phrase in phrases)
+
+
+def validate_fixture(queries: Sequence[Dict]) -> List[str]:
+    """채점할 수 없는 질의 목록 (정답 청크가 검토된 content_hash 로 지정되지 않음)"""
+    problems = []
+    for entry in queries:
+        if not entry.get('expected'):
+            problems.append(f"{entry['id']}: 정답 청크 없음 (--label 후 검토 필요)")
+        elif not all(item.get('content_hash') for item in entry['expected']):
+            problems.append(f"{entry['id']}: content_hash 없는 정답 항목")
+    return problems
+
+
+def recall_at_k(retrieved: Sequence[Dict], expected: Sequence[Dict], k: int) -> float:
+    """상위 k개 안에서 찾은 정답 항목 비율"""
+    if not expected:
+        return 1.0
+    top = retrieved[:k]
+    found = sum(1 for item in expected if any(chunk_matches(chunk, item) for chunk in top))
+    return found / len(expected)
+
+
+def reciprocal_rank(retrieved: Sequence[Dict], expected: Sequence[Dict]) -> float:
+    """첫 번째 정답 청크 순위의 역수 (없으면 0)"""
+    for rank, chunk in enumerate(retrieved, start=1):
+        if any(chunk_matches(chunk, item) for item in expected):
+            return 1.0 / rank
+    return 0.0
+
+
+def latency_summary(latencies_ms: List[float]) -> Dict[str, float]:
+    if not latencies_ms:
+        return {'mean_ms': 0.0, 'p50_ms': 0.0, 'p95_ms': 0.0, 'p99_ms': 0.0}
+    values = np.asarray(latencies_ms)
+    return {
+        'mean_ms': float(values.mean()),
+        'p50_ms': float(np.percentile(values, 50)),
+        'p95_ms': float(np.percentile(values, 95)),
+        'p99_ms': float(np.percentile(values, 99)),
+    }
+
+
+# 품질 지표는 감소, 지연 지표는 증가가 회귀
+QUALITY_METRICS = ('recall_at_k', 'mrr')
+LATENCY_METRICS = ('p50_ms', 'p95_ms', 'p99_ms')
+THROUGHPUT_METRICS = ('qps',)
+
+DEFAULT_THRESHOLDS = {
+    'max_quality_drop': 0.02,  # 절대값 (예: recall 0.90 → 0.88 까지 허용)
+    'max_latency_increase': 0.25,  # 비율 (예: p95 가 25% 넘게 느려지면 실패)
+    'max_qps_drop': 0.25,  # 비율
+    'min_recall_at_k': None,  # 절대 하한 (선택)
+}
+
+
+def find_regressions(current: Dict, baseline: Dict = None, thresholds: Dict = None) -> List[str]:
+    """현재 결과를 기준 결과와 비교하여 회귀 목록 반환"""
+    thresholds = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+    metrics = current['metrics']
+    regressions = []
+
+    min_recall = thresholds.get('min_recall_at_k')
+    if min_recall is not None and metrics['recall_at_k'] < min_recall:
+        regressions.append(f"recall@k {metrics['recall_at_k']:.3f} < 최소 {min_recall:.3f}")
+
+    if not baseline:
+        return regressions
+    base = baseline['metrics']
+
+    for name in QUALITY_METRICS:
+        drop = base[name] - metrics[name]
+        if drop > thresholds['max_quality_drop']:
+            regressions.append(f"{name}: {base[name]:.3f} → {metrics[name]:.3f} (-{drop:.3f})")
+
+    for name in LATENCY_METRICS:
+        if base.get(name) and metrics[name] > base[name] * (1 + thresholds['max_latency_increase']):
+            regressions.append(f"{name}: {base[name]:.2f}ms → {metrics[name]:.2f}ms")
+
+    for name in THROUGHPUT_METRICS:
+        if base.get(name) and metrics[name] < base[name] * (1 - thresholds['max_qps_drop']):
+            regressions.append(f"{name}: {base[name]:.1f} → {metrics[name]:.1f}")
+
+    return regressions
@@ -0,0 +1,210 @@
+"""
+지식 베이스 검색 벤치마크 실행기
+- 라벨링된 질의 세트(fixtures/knowledge_queries.json)로 임의의 벡터스토어 디렉토리를 평가
+- 챗봇과 같은 검색 경로(벡터 / BM25 하이브리드 / 카테고리 샤드)를 사용
+"""
+import os
+import json
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .metrics import latency_summary, recall_at_k, reciprocal_rank
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "knowledge_queries.json")
+
+
+def load_fixture(path: str = DEFAULT_FIXTURE) -> List[Dict]:
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)['queries']
+
+
+def use_offline_models():
+    """로컬 캐시된 임베딩 모델만 사용 (네트워크 접근 없음)"""
+    os.environ['HF_HUB_OFFLINE'] = '1'
+    os.environ['TRANSFORMERS_OFFLINE'] = '1'
+
+
+class RetrievalBenchmark:
+    """벡터스토어 디렉토리 하나에 대한 검색 품질 / 지연시간 측정"""
+
+    def __init__(self, vectorstore_path: str, embeddings, k: int = 5, mode: str = 'hybrid'):
+        self.vectorstore_path = vectorstore_path
+        self.embeddings = embeddings
+        self.k = k
+        self.mode = mode
+        self.vectorstore = None
+        self.bm25_index = None
+        self.category_shards = None
+
+    def load(self):
+        from langchain_community.vectorstores import FAISS
+        from ..ann_index import apply_search_params, load_saved_index_config
+        from ..category_shards import CategoryShardIndex
+        from ..hybrid_retrieval import BM25Index
+        from ..mmap_vectorstore import has_mmap_store, load_mmap_vectorstore
+
+        if has_mmap_store(self.vectorstore_path):
+            self.vectorstore = load_mmap_vectorstore(self.vectorstore_path, self.embeddings)
+        else:
+            self.vectorstore = FAISS.load_local(
+                self.vectorstore_path, self.embeddings, allow_dangerous_deserialization=True
+            )
+        index_config = load_saved_index_config(self.vectorstore_path)
+        if index_config:
+            apply_search_params(self.vectorstore.index, index_config)
+        elif hasattr(self.vectorstore.index, 'nprobe'):
+            self.vectorstore.index.nprobe = 10
+
+        if self.mode == 'hybrid':
+            self.bm25_index = BM25Index.load(self.vectorstore_path)
+            self.category_shards = CategoryShardIndex.load(self.vectorstore_path)
+
+    def search(self, entry: Dict) -> List[Dict]:
+        """질의 하나 검색 (임베딩 포함), 청크 정보 목록 반환"""
+        from ..hybrid_retrieval import hybrid_search
+        from ..vectorstore_ingestion import chunk_hash
+
+        query_embedding = np.asarray(self.embeddings.embed_query(entry['query']), dtype='float32')
+        hits = hybrid_search(
+            self.vectorstore,
+            self.bm25_index,
+            entry['query'],
+            query_embedding,
+            k=self.k,
+            fetch_k=max(20, self.k),
+            shards=self.category_shards,
+            category=entry.get('category'),
+        )
+        return [
+            {
+                'position': hit['position'],
+                'content': hit['document'].page_content,
+                'source': (hit['document'].metadata or {}).get('source', ''),
+                'content_hash': chunk_hash(hit['document'].page_content),
+            }
+            for hit in hits
+        ]
+
+    def _timed_search(self, entry: Dict):
+        start = time.perf_counter()
+        retrieved = self.search(entry)
+        return retrieved, (time.perf_counter() - start) * 1000
+
+    def run(self, queries: List[Dict], threads: int = 8, repeat: int = 3) -> Dict:
+        if self.vectorstore is None:
+            self.load()
+
+        # 워밍업
+        for entry in queries[:3]:
+            self.search(entry)
+
+        # 순차 실행: 품질 지표 + 단건 지연시간
+        per_query = []
+        latencies = []
+        for entry in queries:
+            retrieved, latency = self._timed_search(entry)
+            latencies.append(latency)
+            per_query.append({
+                'id': entry['id'],
+                'query': entry['query'],
+                'recall_at_k': recall_at_k(retrieved, entry['expected'], self.k),
+                'reciprocal_rank': reciprocal_rank(retrieved, entry['expected']),
+                'latency_ms': latency,
+                'retrieved': [
+                    {'position': chunk['position'], 'content_hash': chunk['content_hash'], 'source': chunk['source']}
+                    for chunk in retrieved
+                ],
+            })
+
+        # 스레드 풀 동시 실행: 처리량
+        workload = queries * repeat
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(self._timed_search, workload))
+        elapsed = time.perf_counter() - start
+
+        return {
+            'vectorstore': os.path.abspath(self.vectorstore_path),
+            'timestamp': time.time(),
+            'settings': {
+                'k': self.k,
+                'mode': self.mode,
+                'threads': threads,
+                'queries': len(queries),
+                'embeddings': type(self.embeddings).__name__,
+                'num_vectors': int(self.vectorstore.index.ntotal),
+            },
+            'metrics': {
+                'recall_at_k': float(np.mean([q['recall_at_k'] for q in per_query])) if per_query else 0.0,
+                'mrr': float(np.mean([q['reciprocal_rank'] for q in per_query])) if per_query else 0.0,
+                **latency_summary(latencies),
+                'qps': len(workload) / elapsed if elapsed else 0.0,
+            },
+            'per_query': per_query,
+        }
+
+    def _corpus(self):
+        """벡터스토어의 모든 청크 (위치, 문서)"""
+        for position, doc_id in self.vectorstore.index_to_docstore_id.items():
+            doc = self.vectorstore.docstore.search(doc_id)
+            if hasattr(doc, 'page_content'):
+                yield position, doc
+
+    def label(self, queries: List[Dict], max_candidates: int = 10) -> List[Dict]:
+        """label_hints 에 맞는 청크를 현재 검색 결과가 아닌 벡터스토어 전체에서 찾아 label_candidates 로 출력
+
+        후보는 검토용이며 expected 는 바꾸지 않음 (검토 후 정답 청크를 expected 로 옮김)
+        """
+        from ..vectorstore_ingestion import chunk_hash
+        from .metrics import hint_matches
+
+        if self.vectorstore is None:
+            self.load()
+        corpus = [
+            (position, doc.page_content, (doc.metadata or {}).get('source', ''))
+            for position, doc in self._corpus()
+        ]
+
+        labelled = []
+        for entry in queries:
+            # 현재 검색 순위는 참고용으로만 표시
+            ranks = {chunk['content_hash']: rank for rank, chunk in enumerate(self.search(entry), start=1)}
+            candidates = []
+            for hint in entry.get('label_hints', []):
+                matches = [
+                    (position, content, source) for position, content, source in corpus
+                    if hint_matches(content, source, hint)
+                ]
+                if not matches:
+                    logger.warning(f"⚠️ 라벨링 조건에 맞는 청크 없음 ({entry['id']}): {hint}")
+                for position, content, source in matches[:max_candidates]:
+                    content_hash = chunk_hash(content)
+                    candidates.append({
+                        'hint': hint,
+                        'content_hash': content_hash,
+                        'source': source,
+                        'position': position,
+                        'current_rank': ranks.get(content_hash),
+                        'preview': ' '.join(content.split())[:200],
+                    })
+            labelled.append({**entry, 'label_candidates': candidates})
+        return labelled
+
+
+def load_report(path: str) -> Optional[Dict]:
+    if not path or not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_report(report: Dict, path: str):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,210 @@
+"""
+챗봇 시맨틱(임베딩 유사도) 캐시
+- FAISS 검색에 사용한 쿼리 임베딩을 재사용
+- 카테고리/언어별 네임스페이스로 분리된 프로세스 내 인덱스
+- LRU + TTL 기반 만료
+- 적중률 및 절약된 LLM 지연시간 메트릭 제공
+- 답변은 사용자 간에 공유되므로 정의형 질문 + 제약 없는 사용자 + 이어지는 대화 없음 인 턴의 답변만 저장
+"""
+import threading
+import time
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SemanticCacheEntry:
+    """캐시 항목"""
+    question: str
+    embedding: np.ndarray
+    retrieval: Optional[List[Dict]] = None
+    answer: Optional[str] = None
+    llm_latency: float = 0.0
+    created_at: float = field(default_factory=time.time)
+
+
+class _Namespace:
+    """카테고리/언어별 소형 인덱스 (정규화된 벡터의 내적 검색)"""
+
+    def __init__(self):
+        self.entries: "OrderedDict[int, SemanticCacheEntry]" = OrderedDict()
+        self._matrix = None
+        self._ids: List[int] = []
+        self._dirty = True
+
+    def mark_dirty(self):
+        self._dirty = True
+
+    def search(self, embedding: np.ndarray) -> Tuple[Optional[int], float]:
+        """가장 유사한 항목 ID와 코사인 유사도 반환"""
+        if not self.entries:
+            return None, 0.0
+
+        if self._dirty:
+            self._ids = list(self.entries.keys())
+            self._matrix = np.vstack([self.entries[i].embedding for i in self._ids])
+            self._dirty = False
+
+        scores = self._matrix @ embedding
+        best = int(np.argmax(scores))
+        return self._ids[best], float(scores[best])
+
+
+class SemanticCache:
+    """임베딩 유사도 기반 질문/검색 결과/답변 캐시"""
+
+    def __init__(self, threshold: float = 0.9, max_entries: int = 500, ttl: int = 1800):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+
+        self._namespaces: Dict[Tuple[str, str], _Namespace] = {}
+        self._lock = threading.Lock()
+        self._next_id = 0
+
+        # 메트릭
+        self.retrieval_hits = 0
+        self.retrieval_misses = 0
+        self.answer_hits = 0
+        self.answer_misses = 0
+        self.saved_llm_seconds = 0.0
+
+    @classmethod
+    def from_settings(cls) -> 'SemanticCache':
+        config = getattr(settings, 'CHATBOT_SEMANTIC_CACHE', {})
+        return cls(
+            threshold=config.get('THRESHOLD', 0.9),
+            max_entries=config.get('MAX_ENTRIES', 500),
+            ttl=config.get('TTL', 1800),
+        )
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype='float32').reshape(-1)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def _namespace(self, category: Optional[str], language: str) -> _Namespace:
+        key = (category or 'general', language or 'ko')
+        namespace = self._namespaces.get(key)
+        if namespace is None:
+            namespace = self._namespaces[key] = _Namespace()
+        return namespace
+
+    def _expire(self, namespace: _Namespace):
+        """TTL이 지난 항목 제거 (OrderedDict 앞쪽이 가장 오래 사용되지 않은 항목)"""
+        now = time.time()
+        expired = [
+            entry_id for entry_id, entry in namespace.entries.items()
+            if now - entry.created_at > self.ttl
+        ]
+        for entry_id in expired:
+            del namespace.entries[entry_id]
+        if expired:
+            namespace.mark_dirty()
+
+    def _find(self, embedding, category, language) -> Tuple[_Namespace, Optional[int], float, np.ndarray]:
+        vector = self._normalize(embedding)
+        namespace = self._namespace(category, language)
+        self._expire(namespace)
+        entry_id, score = namespace.search(vector)
+        return namespace, entry_id, score, vector
+
+    def lookup_retrieval(self, embedding, category: Optional[str], language: str) -> Optional[List[Dict]]:
+        """유사한 이전 질문의 검색 결과 반환"""
+        with self._lock:
+            namespace, entry_id, score, _ = self._find(embedding, category, language)
+            if entry_id is not None and score >= self.threshold:
+                entry = namespace.entries[entry_id]
+                if entry.retrieval is not None:
+                    namespace.entries.move_to_end(entry_id)
+                    self.retrieval_hits += 1
+                    logger.debug(f"🧲 시맨틱 검색 캐시 히트 ({score:.3f}): '{entry.question}'")
+                    return entry.retrieval
+            self.retrieval_misses += 1
+            return None
+
+    def lookup_answer(self, embedding, category: Optional[str], language: str) -> Optional[str]:
+        """유사한 이전 질문의 답변 반환 (프로필과 무관한 질문 전용)"""
+        with self._lock:
+            namespace, entry_id, score, _ = self._find(embedding, category, language)
+            if entry_id is not None and score >= self.threshold:
+                entry = namespace.entries[entry_id]
+                if entry.answer is not None:
+                    namespace.entries.move_to_end(entry_id)
+                    self.answer_hits += 1
+                    self.saved_llm_seconds += entry.llm_latency
+                    logger.debug(f"🧲 시맨틱 답변 캐시 히트 ({score:.3f}): '{entry.question}'")
+                    return entry.answer
+            self.answer_misses += 1
+            return None
+
+    def store(self, embedding, category: Optional[str], language: str, question: str,
+              retrieval: Optional[List[Dict]] = None, answer: Optional[str] = None,
+              llm_latency: float = 0.0):
+        """항목 저장 (거의 동일한 질문이 있으면 해당 항목을 갱신)"""
+        with self._lock:
+            namespace, entry_id, score, vector = self._find(embedding, category, language)
+
+            if entry_id is not None and score >= 0.99:
+                entry = namespace.entries[entry_id]
+                if retrieval is not None:
+                    entry.retrieval = retrieval
+                if answer is not None:
+                    entry.answer = answer
+                    entry.llm_latency = llm_latency
+                namespace.entries.move_to_end(entry_id)
+                return
+
+            self._next_id += 1
+            namespace.entries[self._next_id] = SemanticCacheEntry(
+                question=question,
+                embedding=vector,
+                retrieval=retrieval,
+                answer=answer,
+                llm_latency=llm_latency,
+            )
+
+            # LRU 제거
+            while len(namespace.entries) > self.max_entries:
+                namespace.entries.popitem(last=False)
+            namespace.mark_dirty()
+
+    def clear(self):
+        with self._lock:
+            self._namespaces.clear()
+
+    def stats(self) -> Dict:
+        """캐시 메트릭"""
+        with self._lock:
+            retrieval_total = self.retrieval_hits + self.retrieval_misses
+            answer_total = self.answer_hits + self.answer_misses
+            return {
+                'entries': sum(len(ns.entries) for ns in self._namespaces.values()),
+                'namespaces': len(self._namespaces),
+                'retrieval_hits': self.retrieval_hits,
+                'retrieval_misses': self.retrieval_misses,
+                'retrieval_hit_ratio': self.retrieval_hits / retrieval_total if retrieval_total else 0.0,
+                'answer_hits': self.answer_hits,
+                'answer_misses': self.answer_misses,
+                'answer_hit_ratio': self.answer_hits / answer_total if answer_total else 0.0,
+                'saved_llm_seconds': round(self.saved_llm_seconds, 3),
+            }
+
+
+# 전역 시맨틱 캐시 인스턴스
+semantic_cache_instance = None
+
+def get_semantic_cache() -> SemanticCache:
+    """시맨틱 캐시 인스턴스 가져오기"""
+    global semantic_cache_instance
+    if not semantic_cache_instance:
+        semantic_cache_instance = SemanticCache.from_settings()
+    return semantic_cache_instance
@@ -0,0 +1,173 @@
+"""
+캐시 스탬피드(dogpile) 방지 - single-flight
+- 같은 키의 값이 없을 때 한 요청만 계산하고 나머지는 그 결과를 기다림 (프로세스 내 키별 잠금)
+- 선택적으로 Redis 잠금(django_redis 의 cache.lock)으로 워커 프로세스 간에도 한 번만 계산
+- stale-while-revalidate: 값은 ttl 이 지나도 stale_ttl 동안 남겨 두고, 한 요청이 갱신하는 동안
+  다른 요청은 이전 값을 바로 받음 (갱신이 실패해도 이전 값 사용)
+
+값은 (값, 신선 기한) 봉투로 저장되므로 같은 키를 cache.get 으로 직접 읽으면 안 됨
+"""
+import threading
+import time
+import logging
+from collections import namedtuple
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+CachedValue = namedtuple('CachedValue', ['value', 'fresh_until'])
+
+
+class SingleFlight:
+    """키별로 계산을 하나만 실행하는 캐시 래퍼"""
+
+    def __init__(self, wait_timeout: float = 10.0, lock_timeout: float = 30.0, stale_ttl: int = 300,
+                 distributed: bool = True):
+        self.wait_timeout = wait_timeout
+        self.lock_timeout = lock_timeout
+        self.stale_ttl = stale_ttl
+        # Redis 잠금은 django_redis 백엔드일 때만 사용 가능
+        self.distributed = distributed
+
+        self._locks: Dict[str, list] = {}  # key -> [Lock, 참조 수]
+        self._locks_guard = threading.Lock()
+        self._stats = {
+            'hits': 0, 'stale_served': 0, 'computed': 0, 'waited': 0,
+            'lock_timeouts': 0, 'errors': 0,
+        }
+        self._stats_lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls) -> 'SingleFlight':
+        config = getattr(settings, 'CHATBOT_SINGLE_FLIGHT', {})
+        return cls(
+            wait_timeout=config.get('WAIT_TIMEOUT', 10.0),
+            lock_timeout=config.get('LOCK_TIMEOUT', 30.0),
+            stale_ttl=config.get('STALE_TTL', 300),
+            distributed=config.get('DISTRIBUTED', True),
+        )
+
+    def _count(self, name: str):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    @contextmanager
+    def _local_lock(self, key: str, blocking: bool):
+        with self._locks_guard:
+            entry = self._locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        lock = entry[0]
+        acquired = lock.acquire(timeout=self.wait_timeout) if blocking else lock.acquire(blocking=False)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                lock.release()
+            with self._locks_guard:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    self._locks.pop(key, None)
+
+    @contextmanager
+    def _remote_lock(self, key: str, blocking: bool):
+        if not (self.distributed and hasattr(cache, 'lock')):
+            yield True
+            return
+        lock = cache.lock(f"single_flight:{key}", timeout=self.lock_timeout)
+        try:
+            acquired = lock.acquire(blocking=blocking, blocking_timeout=self.wait_timeout if blocking else None)
+        except Exception as e:
+            # Redis 장애 시 프로세스 내 잠금만으로 진행
+            logger.warning(f"⚠️ 분산 잠금 실패, 로컬 잠금만 사용: {str(e)}")
+            yield True
+            return
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                try:
+                    lock.release()
+                except Exception:
+                    # 계산이 lock_timeout 보다 오래 걸려 잠금이 이미 만료됨
+                    pass
+
+    @contextmanager
+    def _lock(self, key: str, blocking: bool):
+        with self._local_lock(key, blocking) as local_acquired:
+            if not local_acquired:
+                yield False
+                return
+            with self._remote_lock(key, blocking) as remote_acquired:
+                yield remote_acquired
+
+    @staticmethod
+    def _read(key: str) -> Optional[CachedValue]:
+        entry = cache.get(key)
+        return entry if isinstance(entry, CachedValue) else None
+
+    def _store(self, key: str, compute: Callable, ttl: int, stale_ttl: int):
+        self._count('computed')
+        value = compute()
+        if value is not None:
+            cache.set(key, CachedValue(value, time.time() + ttl), ttl + stale_ttl)
+        return value
+
+    def get_or_compute(self, key: str, compute: Callable, ttl: int, stale_ttl: Optional[int] = None):
+        """캐시 값을 반환하고, 없거나 오래됐으면 한 요청만 compute() 실행 (None 결과는 캐시하지 않음)"""
+        stale_ttl = self.stale_ttl if stale_ttl is None else stale_ttl
+        entry = self._read(key)
+        if entry is not None and entry.fresh_until > time.time():
+            self._count('hits')
+            return entry.value
+
+        if entry is not None:
+            # 오래된 값: 갱신은 한 요청만, 나머지는 이전 값을 바로 반환
+            with self._lock(key, blocking=False) as acquired:
+                if not acquired:
+                    self._count('stale_served')
+                    return entry.value
+                current = self._read(key)
+                if current is not None and current.fresh_until > time.time():
+                    self._count('hits')
+                    return current.value
+                try:
+                    return self._store(key, compute, ttl, stale_ttl)
+                except Exception as e:
+                    self._count('errors')
+                    logger.error(f"❌ 캐시 갱신 실패, 이전 값 사용 ({key}): {str(e)}")
+                    return entry.value
+
+        # 값 없음: 한 요청이 계산하는 동안 나머지는 대기 후 결과를 읽음
+        with self._lock(key, blocking=True) as acquired:
+            current = self._read(key)
+            if current is not None:
+                self._count('waited')
+                return current.value
+            if not acquired:
+                # 대기 시간 초과 (앞선 계산이 너무 오래 걸림): 직접 계산
+                self._count('lock_timeouts')
+                logger.warning(f"⚠️ single-flight 대기 시간 초과, 직접 계산: {key}")
+            return self._store(key, compute, ttl, stale_ttl)
+
+    def stats(self) -> Dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        with self._locks_guard:
+            stats['inflight_keys'] = len(self._locks)
+        stats['distributed'] = self.distributed and hasattr(cache, 'lock')
+        return stats
+
+
+# 전역 single-flight 인스턴스
+single_flight_instance = None
+
+def get_single_flight() -> SingleFlight:
+    """single-flight 인스턴스 가져오기"""
+    global single_flight_instance
+    if not single_flight_instance:
+        single_flight_instance = SingleFlight.from_settings()
+    return single_flight_instance
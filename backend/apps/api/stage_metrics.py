@@ -0,0 +1,221 @@
+"""
+챗봇 응답 단계별 지연시간 계측
+- with timer.stage('llm'): ... 형태로 단계별 시간을 누적 (같은 단계가 여러 번 실행되면 합산)
+- 샘플링된 요청만 계측하고, 나머지 요청은 아무 일도 하지 않는 NULL_TIMER 를 사용 (비활성화 시 비용 거의 없음)
+- 프로세스 내 히스토그램으로 집계하여 Prometheus 텍스트 형식으로 노출 (워커별 값, 스크레이프 시 합산)
+"""
+import random
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# get_response 단계 (표시 순서)
+STAGES = (
+    'simple_cache', 'classify', 'session', 'user_context', 'memory', 'message_insert',
+    'preferences', 'retrieval', 'history', 'prompt_build', 'semantic_cache', 'llm', 'persistence',
+)
+
+
+class Histogram:
+    """레이블별 누적 버킷 히스토그램"""
+
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str, ...],
+                 buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], List] = {}  # labels -> [버킷별 개수..., 합계, 개수]
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Tuple[str, ...], value: float):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * len(self.buckets) + [0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[index] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def _format_labels(self, labels: Tuple[str, ...], extra: str = '') -> str:
+        pairs = [f'{name}="{value}"' for name, value in zip(self.label_names, labels)]
+        if extra:
+            pairs.append(extra)
+        return '{' + ','.join(pairs) + '}' if pairs else ''
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {labels: list(values) for labels, values in self._series.items()}
+        for labels, values in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                bucket_labels = self._format_labels(labels, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            bucket_labels = self._format_labels(labels, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{bucket_labels} {values[-1]}")
+            lines.append(f"{self.name}_sum{self._format_labels(labels)} {values[-2]}")
+            lines.append(f"{self.name}_count{self._format_labels(labels)} {values[-1]}")
+        return lines
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+
+class Counter:
+    """레이블별 누적 카운터"""
+
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str, ...]):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Tuple[str, ...], value: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = dict(self._values)
+        for labels, value in sorted(values.items()):
+            pairs = ','.join(f'{name}="{label}"' for name, label in zip(self.label_names, labels))
+            lines.append(f"{self.name}{{{pairs}}} {value}")
+        return lines
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+STAGE_SECONDS = Histogram(
+    'chatbot_stage_seconds', '챗봇 응답 단계별 소요 시간 (초)', ('mode', 'stage')
+)
+RESPONSE_SECONDS = Histogram(
+    'chatbot_response_seconds', '챗봇 응답 전체 소요 시간 (초)', ('mode', 'outcome')
+)
+HISTOGRAMS = (STAGE_SECONDS, RESPONSE_SECONDS)
+_extra_metrics: List = []  # 다른 모듈이 register_metric 으로 추가 (예: llm_gateway)
+
+
+def register_metric(metric):
+    """/chatbot/metrics/ 노출 대상에 히스토그램 / 카운터 추가"""
+    if metric not in _extra_metrics:
+        _extra_metrics.append(metric)
+    return metric
+
+
+class _Stage:
+    __slots__ = ('timer', 'name', 'started')
+
+    def __init__(self, timer: 'StageTimer', name: str):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.timer.record(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class StageTimer:
+    """요청 하나의 단계별 시간"""
+
+    enabled = True
+
+    def __init__(self, mode: str):
+        self.mode = mode
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+
+    def stage(self, name: str) -> _Stage:
+        return _Stage(self, name)
+
+    def record(self, name: str, seconds: float):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def finish(self, outcome: str = 'success') -> Dict:
+        """히스토그램에 기록하고 응답 debug 필드용 딕셔너리 반환"""
+        total = time.perf_counter() - self.started
+        for name, seconds in self.stages.items():
+            STAGE_SECONDS.observe((self.mode, name), seconds)
+        RESPONSE_SECONDS.observe((self.mode, outcome), total)
+        return self.as_dict(total)
+
+    def as_dict(self, total: Optional[float] = None) -> Dict:
+        total = time.perf_counter() - self.started if total is None else total
+        order = {name: index for index, name in enumerate(STAGES)}
+        return {
+            'total_ms': round(total * 1000, 1),
+            'stages_ms': {
+                name: round(seconds * 1000, 1)
+                for name, seconds in sorted(self.stages.items(), key=lambda item: order.get(item[0], len(order)))
+            },
+        }
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+class _NullTimer:
+    """계측하지 않는 요청용 (모든 호출이 즉시 반환)"""
+
+    enabled = False
+    _stage = _NullStage()
+
+    def stage(self, name: str) -> _NullStage:
+        return self._stage
+
+    def record(self, name: str, seconds: float):
+        pass
+
+    def finish(self, outcome: str = 'success') -> None:
+        return None
+
+    def as_dict(self, total: Optional[float] = None) -> None:
+        return None
+
+
+NULL_TIMER = _NullTimer()
+
+
+def start_timer(mode: str, force: bool = False):
+    """요청 계측 시작 (CHATBOT_METRICS 의 샘플링 비율 적용, force 면 항상 계측)"""
+    if force:
+        return StageTimer(mode)
+    config = getattr(settings, 'CHATBOT_METRICS', {})
+    if not config.get('ENABLED', True):
+        return NULL_TIMER
+    sample_rate = config.get('SAMPLE_RATE', 1.0)
+    if sample_rate < 1.0 and random.random() >= sample_rate:
+        return NULL_TIMER
+    return StageTimer(mode)
+
+
+def render_metrics() -> str:
+    """Prometheus 텍스트 노출 형식"""
+    lines = []
+    for metric in (*HISTOGRAMS, *_extra_metrics):
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
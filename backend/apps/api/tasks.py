@@ -0,0 +1,23 @@
+from celery import shared_task
+from django.core.cache import cache
+import logging
+
+from .jobs import run_job
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(name='apps.api.run_chatbot_job', ignore_result=True)
+def run_chatbot_job(name, args, kwargs, coalesce_marker=None):
+    """챗봇 백그라운드 작업 실행 (CHATBOT_JOBS['BACKEND'] == 'celery')"""
+    # 실행을 시작하면 같은 키의 새 작업을 다시 받음
+    if coalesce_marker:
+        cache.delete(coalesce_marker)
+    run_job(name, tuple(args), kwargs)
+
+
+@shared_task(name='apps.api.generate_daily_recommendations', ignore_result=True)
+def generate_daily_recommendations():
+    """야간 일일 추천 사전 생성 (CELERY_BEAT_SCHEDULE)"""
+    from .daily_recommendations import generate_daily_recommendations as generate
+    generate()
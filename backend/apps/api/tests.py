@@ -1,3 +1,677 @@
-from django.test import TestCase
+import asyncio
+import json
+import threading
+import time
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from apps.core.models import ChatMessage, ChatSession, DailyRecommendation, User, UserMemory, UserProfile
+from .category_shards import CategoryShardIndex
+from .chat_state import ChatStateStore
+from .daily_recommendations import generate_daily_recommendations, remember_language
+from .embedding_batcher import BatchedEmbeddings
+from .hybrid_retrieval import BM25Index
+from .llm_gateway import FakeProvider, LLMGateway, LLMTimeout, LLMUnavailable
+from .management.commands.benchmark_retrieval import Command as BenchmarkRetrievalCommand
+from .retrieval_benchmark import (
+    DEFAULT_BASELINE, find_regressions, load_corpus, load_fixture, load_report, recall_at_k,
+    reciprocal_rank, validate_fixture
+)
+from .retrieval_benchmark.metrics import hint_matches
+from .single_flight import CachedValue, SingleFlight
+from .ultrafast_chatbot_enhanced import UltraFastHealthChatbot
+from .user_memory import update_user_memory
+from .write_buffer import WriteBehindBuffer
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class SingleFlightTests(SimpleTestCase):
+    """동시 요청에서 계산이 한 번만 실행되는지 확인"""
+
+    def setUp(self):
+        cache.clear()
+        self.flight = SingleFlight(wait_timeout=5, stale_ttl=60, distributed=False)
+        self.calls = 0
+        self.calls_lock = threading.Lock()
+
+    def slow_compute(self, value='fresh', delay=0.2):
+        def compute():
+            with self.calls_lock:
+                self.calls += 1
+            time.sleep(delay)
+            return value
+        return compute
+
+    def run_concurrently(self, func, count=16):
+        barrier = threading.Barrier(count)
+        results = [None] * count
+
+        def worker(index):
+            barrier.wait()
+            results[index] = func()
+
+        threads = [threading.Thread(target=worker, args=(index,)) for index in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_cold_key_is_computed_once(self):
+        compute = self.slow_compute()
+        results = self.run_concurrently(lambda: self.flight.get_or_compute('key', compute, ttl=60))
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(results, ['fresh'] * 16)
+        self.assertEqual(self.flight.stats()['waited'], 15)
+        self.assertEqual(self.flight.stats()['inflight_keys'], 0)
+
+    def test_stale_value_is_served_while_one_request_refreshes(self):
+        cache.set('key', CachedValue('stale', time.time() - 1), 60)
+        compute = self.slow_compute(delay=0.5)
+
+        started = time.monotonic()
+        results = self.run_concurrently(lambda: (self.flight.get_or_compute('key', compute, ttl=60),
+                                                 time.monotonic() - started))
+
+        self.assertEqual(self.calls, 1)
+        values = [value for value, _ in results]
+        self.assertEqual(values.count('fresh'), 1)
+        self.assertEqual(values.count('stale'), 15)
+        # 이전 값을 받은 요청은 갱신을 기다리지 않음
+        self.assertTrue(all(elapsed < 0.4 for value, elapsed in results if value == 'stale'))
+        self.assertEqual(self.flight.get_or_compute('key', compute, ttl=60), 'fresh')
+
+    def test_failed_refresh_keeps_stale_value(self):
+        cache.set('key', CachedValue('stale', time.time() - 1), 60)
+
+        def failing():
+            raise RuntimeError('upstream down')
+
+        self.assertEqual(self.flight.get_or_compute('key', failing, ttl=60), 'stale')
+        self.assertEqual(self.flight.stats()['errors'], 1)
+
+    def test_none_result_is_not_cached(self):
+        self.assertIsNone(self.flight.get_or_compute('key', lambda: None, ttl=60))
+        self.assertEqual(self.flight.get_or_compute('key', lambda: 'value', ttl=60), 'value')
+
+
+class _ServerError(Exception):
+    status_code = 503
+
+
+class _BadRequest(Exception):
+    status_code = 400
+
+
+class _Unauthorized(Exception):
+    status_code = 401
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class LLMGatewayTests(SimpleTestCase):
+    """FakeProvider 로 게이트웨이의 재시도 / 서킷 / 동시성 / 기한 / 캐시 확인"""
+
+    messages = [{'role': 'user', 'content': '스쿼트 자세 알려줘'}]
+
+    def setUp(self):
+        cache.clear()
+        self.gateway = LLMGateway({'DEFAULT_PROVIDER': 'fake', 'FAKE': False, 'PROVIDERS': {}})
+
+    def use(self, provider, **overrides):
+        self.gateway.set_provider('fake', provider, **{'BACKOFF_BASE': 0.01, 'BACKOFF_MAX': 0.02, **overrides})
+        return provider
+
+    def test_transient_errors_are_retried(self):
+        provider = self.use(FakeProvider(reply='ok', failures=[_ServerError(), TimeoutError()]))
+
+        result = self.gateway.chat(self.messages, model='fake-model')
+
+        self.assertEqual(result.content, 'ok')
+        self.assertEqual(len(provider.calls), 3)
+        stats = self.gateway.stats()['fake']
+        self.assertEqual(stats['retries'], 2)
+        self.assertEqual(stats['circuit'], 'closed')
+        self.assertGreater(stats['completion_tokens'], 0)
+
+    def test_request_errors_are_not_retried(self):
+        provider = self.use(FakeProvider(failures=[_BadRequest()]))
+
+        with self.assertRaises(_BadRequest):
+            self.gateway.chat(self.messages, model='fake-model')
+        self.assertEqual(len(provider.calls), 1)
+
+    def test_circuit_opens_after_consecutive_failures(self):
+        provider = self.use(FakeProvider(failures=[_ServerError()] * 3),
+                            MAX_RETRIES=0, CIRCUIT_FAILURES=3, CIRCUIT_RESET=60)
+
+        for _ in range(3):
+            with self.assertRaises(_ServerError):
+                self.gateway.chat(self.messages, model='fake-model')
+        with self.assertRaises(LLMUnavailable):
+            self.gateway.chat(self.messages, model='fake-model')
+
+        self.assertEqual(len(provider.calls), 3)
+        self.assertEqual(self.gateway.stats()['fake']['circuit'], 'open')
+
+    def test_request_errors_leave_circuit_state_alone(self):
+        provider = self.use(FakeProvider(failures=[_ServerError(), _BadRequest(), _BadRequest()]),
+                            MAX_RETRIES=0, CIRCUIT_FAILURES=2, CIRCUIT_RESET=0)
+        with self.assertRaises(_ServerError):
+            self.gateway.chat(self.messages, model='fake-model')
+
+        # 400 은 연속 실패 횟수를 초기화하지 않음
+        with self.assertRaises(_BadRequest):
+            self.gateway.chat(self.messages, model='fake-model')
+        self.assertEqual(self.gateway._slot('fake').breaker.failures, 1)
+
+        # half_open 시험 호출이 400 이면 서킷을 닫지 않고 다음 호출이 다시 시험
+        self.gateway._slot('fake').breaker.record_failure()
+        with self.assertRaises(_BadRequest):
+            self.gateway.chat(self.messages, model='fake-model')
+        self.assertEqual(self.gateway.stats()['fake']['circuit'], 'half_open')
+        self.assertEqual(self.gateway.chat(self.messages, model='fake-model').content, provider.reply)
+        self.assertEqual(self.gateway.stats()['fake']['circuit'], 'closed')
+
+    def test_auth_errors_open_circuit(self):
+        provider = self.use(FakeProvider(failures=[_Unauthorized()] * 3),
+                            MAX_RETRIES=2, CIRCUIT_FAILURES=2, CIRCUIT_RESET=60)
+
+        for _ in range(2):
+            with self.assertRaises(_Unauthorized):
+                self.gateway.chat(self.messages, model='fake-model')
+        with self.assertRaises(LLMUnavailable):
+            self.gateway.chat(self.messages, model='fake-model')
+
+        # 인증 오류는 재시도하지 않음
+        self.assertEqual(len(provider.calls), 2)
+        self.assertEqual(self.gateway.stats()['fake']['circuit'], 'open')
+
+    def test_cancelled_probe_releases_half_open_circuit(self):
+        provider = self.use(FakeProvider(reply='하나 둘 셋', failures=[_ServerError()]),
+                            MAX_RETRIES=0, CIRCUIT_FAILURES=1, CIRCUIT_RESET=0)
+        with self.assertRaises(_ServerError):
+            self.gateway.chat(self.messages, model='fake-model')
+
+        # 시험 호출인 스트림을 첫 조각만 받고 닫음
+        stream = self.gateway.stream(self.messages, model='fake-model')
+        next(stream)
+        stream.close()
+        self.assertEqual(self.gateway.stats()['fake']['circuit'], 'half_open')
+
+        # 시험 호출인 비동기 스트림을 첫 조각만 받고 닫음
+        async def close_after_first():
+            stream = self.gateway.astream(self.messages, model='fake-model')
+            await stream.__anext__()
+            await stream.aclose()
+
+        asyncio.run(close_after_first())
+        self.assertEqual(self.gateway.stats()['fake']['circuit'], 'half_open')
+
+        # 시험 호출인 비동기 호출이 취소됨
+        provider.latency = 1.0
+        with self.assertRaises(asyncio.TimeoutError):
+            asyncio.run(asyncio.wait_for(self.gateway.achat(self.messages, model='fake-model'), 0.05))
+        provider.latency = 0.0
+
+        self.assertEqual(self.gateway.chat(self.messages, model='fake-model').content, '하나 둘 셋')
+        self.assertEqual(self.gateway.stats()['fake']['circuit'], 'closed')
+
+    def test_concurrency_is_capped(self):
+        active, peak = [0], [0]
+        lock = threading.Lock()
+
+        def responder(messages, model):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+            return 'ok'
+
+        self.use(FakeProvider(responder=responder), MAX_CONCURRENCY=2)
+        threads = [
+            threading.Thread(target=self.gateway.chat, args=(self.messages,), kwargs={'model': 'fake-model'})
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(peak[0], 2)
+        self.assertEqual(self.gateway.stats()['fake']['calls'], 8)
+
+    def test_async_callers_share_the_concurrency_cap(self):
+        peak = [0]
+
+        def responder(messages, model):
+            peak[0] = max(peak[0], slot.inflight)
+            return 'ok'
+
+        provider = self.use(FakeProvider(latency=0.05, responder=responder), MAX_CONCURRENCY=2)
+        slot = self.gateway._slot('fake')
+
+        async def burst():
+            return await asyncio.gather(*[
+                self.gateway.achat(self.messages, model='fake-model') for _ in range(8)
+            ])
+
+        started = time.monotonic()
+        results = asyncio.run(burst())
+        self.assertEqual([result.content for result in results], ['ok'] * 8)
+        self.assertEqual(peak[0], 2)
+        # 반환 즉시 다음 대기자가 깨어나므로 4 라운드 * 50ms 근처에서 끝남
+        self.assertLess(time.monotonic() - started, 0.4)
+        self.assertFalse(slot._waiters)
+
+        # 스레드 호출이 슬롯을 잡고 있으면 비동기 호출은 기한까지만 기다림
+        provider.latency = 0.5
+        holder = threading.Thread(target=self.gateway.chat, args=(self.messages,), kwargs={'model': 'fake-model'})
+        holder2 = threading.Thread(target=self.gateway.chat, args=(self.messages,), kwargs={'model': 'fake-model'})
+        holder.start()
+        holder2.start()
+        time.sleep(0.05)
+        with self.assertRaises(LLMUnavailable):
+            asyncio.run(self.gateway.achat(self.messages, model='fake-model', timeout=0.1))
+        self.assertFalse(slot._waiters)
+
+        # 스레드 호출이 슬롯을 돌려주면 기다리던 비동기 호출이 이어받음
+        provider.latency = 0.0
+        self.assertEqual(asyncio.run(self.gateway.achat(self.messages, model='fake-model', timeout=2.0)).content, 'ok')
+        holder.join()
+        holder2.join()
+
+    def test_deadline_bounds_total_time(self):
+        self.use(FakeProvider(latency=1.0), MAX_RETRIES=3)
+
+        started = time.monotonic()
+        with self.assertRaises(LLMTimeout):
+            self.gateway.chat(self.messages, model='fake-model', timeout=0.2)
+        self.assertLess(time.monotonic() - started, 0.5)
+
+    def test_cached_response_skips_provider(self):
+        provider = self.use(FakeProvider(reply='cached answer'))
+
+        first = self.gateway.chat(self.messages, model='fake-model', cache_ttl=60)
+        second = self.gateway.chat(self.messages, model='fake-model', cache_ttl=60)
+
+        self.assertFalse(first.cached)
+        self.assertTrue(second.cached)
+        self.assertEqual(second.content, 'cached answer')
+        self.assertEqual(len(provider.calls), 1)
+        self.assertEqual(self.gateway.stats()['fake']['cache_hits'], 1)
+
+    def test_stream_and_async_calls(self):
+        self.use(FakeProvider(reply='하체 운동 추천 드립니다'))
+
+        self.assertEqual(''.join(self.gateway.stream(self.messages, model='fake-model')), '하체 운동 추천 드립니다')
+        result = asyncio.run(self.gateway.achat(self.messages, model='fake-model'))
+        self.assertEqual(result.content, '하체 운동 추천 드립니다')
+        stats = self.gateway.stats()['fake']
+        self.assertEqual((stats['calls'], stats['inflight']), (2, 0))
+
+    def test_async_stream_yields_before_completion(self):
+        self.use(FakeProvider(reply='하체 운동 추천 드립니다', tokens_per_second=10))
+
+        async def consume():
+            started = time.monotonic()
+            arrivals = []
+            async for delta in self.gateway.astream(self.messages, model='fake-model'):
+                arrivals.append((delta, time.monotonic() - started))
+            return arrivals
+
+        arrivals = asyncio.run(consume())
+        self.assertEqual(''.join(delta for delta, _ in arrivals), '하체 운동 추천 드립니다')
+        # 첫 조각은 전체 생성이 끝나기 전에 도착
+        self.assertLess(arrivals[0][1], arrivals[-1][1] - 0.2)
+        self.assertEqual(self.gateway.stats()['fake']['inflight'], 0)
+
+
+class _RecordingEmbeddings:
+    """배치 크기를 기록하는 임베딩 (fail 이 있으면 그 예외를 던짐)"""
+
+    def __init__(self, fail: BaseException = None):
+        self.batch_sizes = []
+        self.fail = fail
+
+    def embed_documents(self, texts):
+        if self.fail:
+            raise self.fail
+        self.batch_sizes.append(len(texts))
+        return [[float(len(text))] for text in texts]
+
+
+class _WorkerKilled(BaseException):
+    pass
+
+
+class EmbeddingBatcherTests(SimpleTestCase):
+    """비동기 호출이 스레드 없이 배치를 채우고, 작업 스레드가 죽어도 호출자가 멈추지 않는지 확인"""
+
+    def test_async_queries_share_one_batch(self):
+        inner = _RecordingEmbeddings()
+        batcher = BatchedEmbeddings(inner, max_batch_size=32, max_wait_ms=50)
+
+        async def embed_all():
+            return await asyncio.gather(*(batcher.aembed_query('q' * i) for i in range(1, 21)))
+
+        vectors = asyncio.run(embed_all())
+        self.assertEqual(vectors, [[float(i)] for i in range(1, 21)])
+        self.assertEqual(inner.batch_sizes, [20])
+
+    def test_cancelled_query_is_skipped(self):
+        inner = _RecordingEmbeddings()
+        batcher = BatchedEmbeddings(inner, max_batch_size=32, max_wait_ms=50)
+
+        cancelled = batcher.submit('취소')
+        cancelled.cancel()
+        self.assertEqual(batcher.embed_query('abc'), [3.0])
+        self.assertEqual(inner.batch_sizes, [1])
+
+    def test_dead_worker_fails_pending_queries(self):
+        batcher = BatchedEmbeddings(_RecordingEmbeddings(fail=_WorkerKilled()), max_wait_ms=20)
+        futures = [batcher.submit(f'q{i}') for i in range(3)]
+
+        with mock.patch('threading.excepthook'):
+            for future in futures:
+                with self.assertRaises(RuntimeError):
+                    future.result(timeout=1)
+
+        # 다음 호출은 작업 스레드를 다시 시작
+        batcher.embeddings = _RecordingEmbeddings()
+        self.assertEqual(batcher.embed_query('ab'), [2.0])
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ChatStateTests(TestCase):
+    """대화 상태 캐시가 DB 조회 없이 세션 / 최근 대화를 돌려주고 세션 교체 시 무효화되는지 확인"""
+
+    def setUp(self):
+        cache.clear()
+        self.store = ChatStateStore(turns=4)
+        self.user = User.objects.create_user(username='state', email='state@example.com', password='pw')
+        self.session = ChatSession.objects.create(user=self.user)
+
+    def message(self, text, session=None, sender='user'):
+        return ChatMessage(user=self.user, session=session or self.session, sender=sender, message=text)
+
+    def test_cached_state_answers_without_queries(self):
+        ChatMessage.objects.create(user=self.user, session=self.session, sender='user', message='첫 질문')
+        self.store.load(self.user)
+        for index in range(5):
+            self.store.append(self.message(f'질문 {index}'))
+
+        with self.assertNumQueries(0):
+            state = self.store.get(self.user.id)
+            self.assertEqual(state.session.id, self.session.id)
+            self.assertFalse(state.is_idle(3600))
+            self.assertEqual([msg.message for msg in state.recent_messages()], ['질문 4', '질문 3', '질문 2', '질문 1'])
+
+    def test_session_rotation_invalidates_state(self):
+        self.store.load(self.user)
+        ChatSession.objects.filter(user=self.user, is_active=True).update(is_active=False)
+        new_session = ChatSession.objects.create(user=self.user)
+
+        self.assertIsNone(self.store.get(self.user.id))
+        self.assertEqual(self.store.load(self.user).session_id, new_session.id)
+
+        # 이전 세션의 늦은 답변은 새 세션의 최근 대화에 섞이지 않음
+        self.store.append(self.message('이전 세션 답변', sender='bot'))
+        self.assertEqual(self.store.get(self.user.id).recent_messages(), [])
+
+    def test_load_merges_write_buffer_pending_messages(self):
+        ChatMessage.objects.create(user=self.user, session=self.session, sender='user', message='저장된 질문')
+        other_session = ChatSession.objects.create(user=User.objects.create_user(
+            username='other', email='other@example.com', password='pw'
+        ))
+        buffer = WriteBehindBuffer(enabled=True, flush_interval=3600)
+        self.addCleanup(buffer.close)
+        buffer.add(self.message('버퍼 답변', sender='bot'))
+        buffer.add(self.message('버퍼 질문'))
+        buffer.add(ChatMessage(user=other_session.user, session=other_session, sender='user', message='다른 세션'))
+
+        with mock.patch('apps.api.chat_state.get_write_buffer', return_value=buffer):
+            state = self.store.load(self.user)
+            self.assertEqual([msg.message for msg in state.recent_messages()], ['버퍼 질문', '버퍼 답변', '저장된 질문'])
+            self.assertFalse(state.is_idle(60))
+
+            # flush 후 다시 만들어도 중복 / 누락 없음
+            buffer.flush()
+            self.store.invalidate(self.user.id)
+            state = self.store.load(self.user)
+            self.assertEqual([msg.message for msg in state.recent_messages()], ['버퍼 질문', '버퍼 답변', '저장된 질문'])
+
+    def test_idle_state(self):
+        state = self.store.start(self.session)
+        self.assertFalse(state.is_idle(3600))
+        self.store.append(self.message('질문'), state)
+        state.data['last_activity'] -= 7200
+        self.assertTrue(state.is_idle(3600))
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class UserMemoryTests(TestCase):
+    """메시지마다 호출되는 기억 갱신이 바뀔 내용이 없으면 DB 를 건드리지 않는지 확인"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='memory', email='memory@example.com', password='pw')
+
+    def test_message_without_preferences_skips_database(self):
+        with self.assertNumQueries(0):
+            self.assertIsNone(update_user_memory(self.user.id, preferences={'taste': {}, 'conditions': []}))
+        self.assertFalse(UserMemory.objects.filter(user=self.user).exists())
+
+    def test_repeated_preference_is_not_rewritten(self):
+        preferences = {'taste': {'매운맛': 'dislike'}, 'conditions': []}
+        memory = update_user_memory(self.user.id, preferences=preferences, message_id=1)
+        self.assertEqual((memory.taste_preferences, memory.version), ({'매운맛': 'dislike'}, 1))
+
+        # 이미 반영된 선호도는 조회 한 번으로 끝남 (잠금 / 저장 없음)
+        with self.assertNumQueries(1):
+            memory = update_user_memory(self.user.id, preferences=preferences, message_id=2)
+        self.assertEqual(memory.version, 1)
+
+
+class BM25IncrementalTests(SimpleTestCase):
+    """증분 수집의 BM25 추가/제거가 전체 재생성과 같은 인덱스를 만드는지 확인"""
+
+    DOCUMENTS = [
+        (0, '단백질이 많은 음식은 닭가슴살과 계란입니다'),
+        (1, '스쿼트는 하체 근력 운동입니다'),
+        (2, '수면 부족은 스트레스를 높입니다'),
+        (3, '계란 노른자에는 비타민 D 가 있습니다'),
+    ]
+
+    def assertSameIndex(self, index, expected):
+        self.assertEqual(index.doc_lengths, expected.doc_lengths)
+        self.assertEqual(
+            {token: sorted(docs) for token, docs in index.postings.items()},
+            {token: sorted(docs) for token, docs in expected.postings.items()},
+        )
+        self.assertAlmostEqual(index.avg_doc_length, expected.avg_doc_length)
+        self.assertEqual(index.idf.keys(), expected.idf.keys())
+        for token, idf in expected.idf.items():
+            self.assertAlmostEqual(index.idf[token], idf)
+
+    def test_add_matches_full_build(self):
+        index = BM25Index().build(self.DOCUMENTS[:2]).add(self.DOCUMENTS[2:])
+        self.assertSameIndex(index, BM25Index().build(self.DOCUMENTS))
+
+    def test_remove_matches_full_build(self):
+        index = BM25Index().build(self.DOCUMENTS).remove([self.DOCUMENTS[0], (99, '없는 문서')])
+        self.assertSameIndex(index, BM25Index().build(self.DOCUMENTS[1:]))
+        self.assertEqual([doc_id for doc_id, _ in index.search('계란')], [3])
+
+
+class CategoryShardIncrementalTests(SimpleTestCase):
+    """카테고리 샤드가 재학습 없이 전역 위치 ID 로 추가/제거되는지 확인"""
+
+    def test_add_and_remove_by_position(self):
+        vectors = np.eye(6, dtype='float32')
+        shards = CategoryShardIndex.build(vectors[:4], ['exercise', 'exercise', 'nutrition', 'general'])
+
+        rebuilt = shards.add(
+            vectors[4:], ['exercise', 'nutrition'], np.array([10, 11]),
+            reconstruct=lambda positions: self.fail('작은 샤드는 다시 만들지 않아야 함')
+        )
+        self.assertEqual(rebuilt, [])
+        self.assertEqual(shards.search(vectors[4], 'exercise', k=1)[0][0], 10)
+        self.assertEqual(shards.allowed_positions('nutrition'), {2, 11, 3})
+
+        self.assertEqual(shards.remove([10, 3]), 2)
+        self.assertEqual([position for position, _ in shards.search(vectors[4], 'exercise', k=5)], [0, 1])
+        self.assertEqual(shards.allowed_positions('nutrition'), {2, 11})
+
+
+class RetrievalBenchmarkTests(SimpleTestCase):
+    """검색 벤치마크 지표와 저장소 코퍼스 기준 회귀 검사"""
+
+    def test_metrics_on_hand_built_ranking(self):
+        retrieved = [{'content_hash': h, 'source': 'guide.txt'} for h in ('x', 'a', 'y', 'b')]
+        expected = [{'content_hash': 'a'}, {'content_hash': 'b', 'source': 'guide.txt'}]
+
+        self.assertEqual(recall_at_k(retrieved, expected, 1), 0.0)
+        self.assertEqual(recall_at_k(retrieved, expected, 2), 0.5)
+        self.assertEqual(recall_at_k(retrieved, expected, 4), 1.0)
+        self.assertEqual(reciprocal_rank(retrieved, expected), 0.5)
+        self.assertEqual(reciprocal_rank(retrieved, [{'content_hash': 'z'}]), 0.0)
+        # source 가 다르면 같은 해시라도 정답이 아님
+        self.assertEqual(reciprocal_rank(retrieved, [{'content_hash': 'a', 'source': 'other.txt'}]), 0.0)
+
+    def test_regressions_against_baseline(self):
+        baseline = {'metrics': {'recall_at_k': 0.9, 'mrr': 0.8, 'p95_ms': 10.0, 'qps': 100.0}}
+        current = {'metrics': {'recall_at_k': 0.85, 'mrr': 0.79, 'p50_ms': 5.0, 'p95_ms': 14.0, 'p99_ms': 20.0,
+                               'qps': 90.0}}
+
+        regressions = find_regressions(current, baseline)
+        self.assertEqual([r.split(':')[0] for r in regressions], ['recall_at_k', 'p95_ms'])
+
+    def test_fixture_is_labelled_against_corpus(self):
+        from .vectorstore_ingestion import chunk_hash
+
+        queries = load_fixture()
+        self.assertEqual(validate_fixture(queries), [])
+        corpus = {chunk_hash(chunk['content']): chunk for chunk in load_corpus()}
+        for entry in queries:
+            chunks = [corpus.get(item['content_hash']) for item in entry['expected']]
+            self.assertNotIn(None, chunks, entry['id'])
+            # 라벨링 조건마다 정답 청크 중 하나가 맞아야 함
+            for hint in entry['label_hints']:
+                self.assertTrue(
+                    any(hint_matches(chunk['content'], chunk['source'], hint) for chunk in chunks),
+                    f"{entry['id']}: {hint}"
+                )
+
+    def test_corpus_benchmark_has_no_regressions(self):
+        out = StringIO()
+        call_command(BenchmarkRetrievalCommand(), threads=1, repeat=1, stdout=out)
+        self.assertIn('검색 회귀 없음', out.getvalue())
+        self.assertIsNotNone(load_report(DEFAULT_BASELINE))
+
+
+class SemanticAnswerSharingTests(SimpleTestCase):
+    """사용자 간에 공유되는 답변 캐시는 정의형 질문 + 제약 없는 사용자 + 새 대화에서만 쓰는지 확인"""
+
+    def setUp(self):
+        with mock.patch('apps.api.ultrafast_chatbot_enhanced.resource_registry'):
+            self.chatbot = UltraFastHealthChatbot()
+        self.session = ChatSession(history_summary='')
+
+    def shareable(self, question, user_context=None, user_memory=None, recent_messages=(), past_snippets=()):
+        return self.chatbot._is_shareable_turn(
+            question, user_context or {'username': 'u'}, user_memory or {}, self.session,
+            list(recent_messages), list(past_snippets)
+        )
+
+    def test_definition_question_is_shared(self):
+        self.assertTrue(self.shareable('단백질이란 무엇인가요?'))
+        self.assertTrue(self.shareable('What is creatine?'))
+
+    def test_general_but_non_definition_question_is_not_shared(self):
+        self.assertFalse(self.shareable('땅콩버터 간식 괜찮아?'))
+        self.assertFalse(self.shareable('스쿼트는 몇 세트?'))
+
+    def test_user_constraints_disable_sharing(self):
+        self.assertFalse(self.shareable('땅콩이란 무엇인가요?', user_context={'username': 'u', 'allergies': ['땅콩']}))
+        self.assertFalse(self.shareable('당뇨란 무엇인가요?', user_memory={'health_conditions': ['당뇨']}))
+
+    def test_active_history_disables_sharing(self):
+        self.assertFalse(self.shareable('단백질이란 무엇인가요?', recent_messages=[ChatMessage(message='안녕')]))
+        self.assertFalse(self.shareable('단백질이란 무엇인가요?', past_snippets=[{'content': '지난 대화'}]))
+        self.session.history_summary = '이전 대화 요약'
+        self.assertFalse(self.shareable('단백질이란 무엇인가요?'))
+
+
+WORKOUT_TEMPLATE = {
+    'title': '전신 근력 운동', 'description': '기본 근력 운동입니다.',
+    'details': {'duration': '40분', 'intensity': '중간', 'exercises': ['스쿼트', '런지', '플랭크']},
+    'reasoning': '근력 향상에 좋습니다.',
+}
+DIET_TEMPLATE = {
+    'title': '고단백 식단', 'description': '단백질 위주 식단입니다.',
+    'details': {'breakfast': ['계란', '우유'], 'lunch': ['닭가슴살', '현미밥'], 'dinner': ['연어', '샐러드'],
+                'snack': ['땅콩', '아몬드 한 줌', 'Greek yogurt']},
+    'reasoning': '근육 회복에 좋습니다.',
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class DailyRecommendationTests(TestCase):
+    """버킷마다 LLM 을 한 번만 호출하고 사용자별 반영 후 일괄 저장하는지 확인"""
+
+    def setUp(self):
+        cache.clear()
+        self.gateway = LLMGateway({'DEFAULT_PROVIDER': 'fake', 'FAKE': False, 'PROVIDERS': {}})
+        self.provider = FakeProvider(responder=lambda messages, model: json.dumps(
+            WORKOUT_TEMPLATE if '"exercises"' in messages[-1]['content'] else DIET_TEMPLATE, ensure_ascii=False
+        ))
+        self.gateway.set_provider('fake', self.provider)
+        patcher = mock.patch('apps.api.daily_recommendations.get_llm_gateway', return_value=self.gateway)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def create_user(self, name, **profile):
+        user = User.objects.create_user(username=name, email=f'{name}@example.com', password='pw')
+        UserProfile.objects.create(user=user, age=30, height=175, weight=70, goal='muscle_gain', **profile)
+        return user
+
+    def test_one_llm_call_per_bucket(self):
+        users = [self.create_user(f'user{index}') for index in range(5)]
+        english = self.create_user('english')
+        remember_language(english.id, 'en')
+
+        stats = generate_daily_recommendations(user_ids=[user.id for user in [*users, english]], chunk_size=2)
+
+        # 한국어 / 영어 버킷 x 운동 / 식단
+        self.assertEqual(len(self.provider.calls), 4)
+        self.assertEqual((stats['created'], stats['buckets']), (12, 4))
+        self.assertEqual(DailyRecommendation.objects.count(), 12)
+
+        # 이미 생성된 날은 건너뜀
+        stats = generate_daily_recommendations(user_ids=[users[0].id])
+        self.assertEqual((stats['created'], stats['skipped']), (0, 2))
+
+    def test_personalization_excludes_allergens(self):
+        user = self.create_user('allergy', allergies=['견과류', '우유'], disliked_exercises=['런지'],
+                                preferred_exercises=['수영'])
+
+        generate_daily_recommendations(user_ids=[user.id])
+
+        diet = DailyRecommendation.objects.get(user=user, type='diet')
+        workout = DailyRecommendation.objects.get(user=user, type='workout')
+        # 알레르기 이름이 아닌 관련 재료 / 영어 음식 이름도 거름
+        self.assertEqual(diet.details['snack'], [])
+        self.assertEqual(diet.details['breakfast'], ['계란'])
+        # 제외를 보장한다고 하지 않고 재료 확인을 안내
+        self.assertIn('재료를 꼭 확인', diet.reasoning)
+        self.assertEqual(workout.details['exercises'], ['수영', '스쿼트', '플랭크'])
@@ -12,7 +12,7 @@ from apps.core.models import (
     ChatMessage, ChatSession, UserProfile, VectorizedChatHistory,
     DailyRecommendation, EXERCISE_CHOICES, FOOD_CATEGORIES
 )
-from openai import OpenAI
+from .llm_gateway import get_llm_gateway
 import traceback
 import json
 import numpy as np
@@ -44,8 +44,7 @@ class UltraFastHealthChatbot:
     def __init__(self):
         logger.debug("[START] UltraFastHealthChatbot 초기화 시작")
         try:
-            api_key = settings.OPENAI_API_KEY
-            self.client = OpenAI(api_key=api_key)
+            self.llm = get_llm_gateway()
             self.max_recent_sessions = 7
             
             # Vectorstore 관련 설정
@@ -312,14 +311,14 @@ class UltraFastHealthChatbot:
             
             # 12. OpenAI API 호출
             logger.debug(f"[API] OpenAI API 호출 시작 (경과: {time.time() - start_time:.2f}초)")
-            response = self.client.chat.completions.create(
+            response = self.llm.chat(
+                messages,
                 model=model,
-                messages=messages,
                 temperature=0.7,
                 max_tokens=500  # 토큰 수 감소
             )
             
-            answer = response.choices[0].message.content
+            answer = response.content
             logger.debug(f"[API] OpenAI 응답 완료 (경과: {time.time() - start_time:.2f}초)")
             
             # 13. 봇 응답 저장 (비동기)
@@ -1061,17 +1060,18 @@ class UltraFastHealthChatbot:
             }}
             """
             
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
+            response = self.llm.chat(
+                [
                     {"role": "system", "content": "당신은 전문 피트니스 트레이너입니다."},
                     {"role": "user", "content": prompt}
                 ],
-                temperature=0.7
+                model="gpt-3.5-turbo",
+                temperature=0.7,
+                operation='workout_recommendation'
             )
             
             # JSON 파싱
-            result = json.loads(response.choices[0].message.content)
+            result = json.loads(response.content)
             result['based_on'] = reasoning_data
             
             return result
@@ -1116,17 +1116,18 @@ class UltraFastHealthChatbot:
             }}
             """
             
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
+            response = self.llm.chat(
+                [
                     {"role": "system", "content": "당신은 전문 영양사입니다."},
                     {"role": "user", "content": prompt}
                 ],
-                temperature=0.7
+                model="gpt-3.5-turbo",
+                temperature=0.7,
+                operation='diet_recommendation'
             )
             
             # JSON 파싱
-            result = json.loads(response.choices[0].message.content)
+            result = json.loads(response.content)
             result['based_on'] = reasoning_data
             
             return result
@@ -3,25 +3,38 @@ import logging
 import re
 import asyncio
 import time
-from typing import Dict, List, Optional, Tuple
+from contextlib import aclosing
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
 from django.conf import settings
 from django.utils import timezone
-from django.db.models import Q
 from django.core.cache import cache
 from apps.core.models import (
-    ChatMessage, ChatSession, UserProfile, VectorizedChatHistory,
-    DailyRecommendation, EXERCISE_CHOICES, FOOD_CATEGORIES
+    ChatMessage, ChatSession, UserProfile, DailyRecommendation
 )
-from openai import OpenAI
+from asgiref.sync import async_to_sync, sync_to_async
 import traceback
-import json
 import numpy as np
-from datetime import datetime, timedelta
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_community.vectorstores import FAISS
-import torch
 from concurrent.futures import ThreadPoolExecutor
 import hashlib
+from .semantic_cache import get_semantic_cache
+from .chatbot_resources import resource_registry, CHATBOT_KNOWLEDGE
+from .keyword_matcher import MultiPatternMatcher, best_label
+from .conversation_memory import collect_snippets, embed_pending, get_conversation_memory
+from .write_buffer import get_write_buffer
+from .jobs import get_job_queue
+from .stage_metrics import NULL_TIMER, start_timer
+from .cache_namespace import CHAT, PROFILE, UserCacheNamespace, bump_generation
+from .chat_state import get_chat_state_store
+from .daily_recommendations import generate_daily_recommendations, recommendation_date, remember_language
+from .single_flight import get_single_flight
+from .llm_gateway import get_llm_gateway
+from .context_builder import (
+    ContextBuilder, TokenCounter, build_summary_messages, get_budget_config, split_overflow
+)
+from .user_memory import (
+    TASTE_KEYWORDS, extract_preferences, get_user_memory, memory_cache_key,
+    preference_groups, update_user_memory
+)
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
@@ -39,13 +52,15 @@ class UltraFastHealthChatbot:
     # 클래스 변수로 공유 리소스 관리
     _embeddings = None
     _vectorstore = None
-    _executor = ThreadPoolExecutor(max_workers=4)
+    _bm25_index = None
+    _category_shards = None
+    _executor = ThreadPoolExecutor(max_workers=4)  # 요청 경로의 FAISS 검색 전용 (비동기 임베딩은 배처 Future 를 직접 대기)
     
     def __init__(self):
         logger.debug("🚀 UltraFastHealthChatbot 초기화 시작")
         try:
-            api_key = settings.OPENAI_API_KEY
-            self.client = OpenAI(api_key=api_key)
+            # LLM 호출은 게이트웨이(연결 풀, 동시성 제한, 재시도, 서킷 브레이커)를 통해서만
+            self.llm = get_llm_gateway()
             self.max_recent_sessions = 7
             
             # Vectorstore 관련 설정
@@ -56,7 +71,6 @@ class UltraFastHealthChatbot:
                 logger.warning("⚠️ 최적화된 벡터스토어가 없습니다. 기존 벡터스토어 사용")
             
             self.embedding_model_name = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
-            self.device = "cuda" if torch.cuda.is_available() else "cpu"
             
             # 캐시 설정
             self.cache_timeout = 3600  # 1시간
@@ -69,6 +83,23 @@ class UltraFastHealthChatbot:
                 'health': ['건강', '질병', '증상', '치료', '예방', '면역', '스트레스', '수면', '정신건강', '의학']
             }
             
+            # 개인화가 필요한 질문 판별 (시맨틱 답변 캐시 제외 대상)
+            self.personal_question_pattern = re.compile(
+                r'(^|\s)(나|내|저|제|우리)(는|가|게|의|를|도|한테|에게|랑)?(\s|$)'
+                r"|\b(i|me|my|mine|i'm)\b"
+            )
+            self.personal_question_keywords = [
+                '추천', '맞춤', '기억', '아까', '그럼', '그거', '그건', '이거',
+                'recommend', 'remember', 'for me'
+            ]
+            
+            # 다른 사용자와 답변을 공유해도 되는 정의형 질문 (보수적 허용 목록)
+            self.definition_question_pattern = re.compile(
+                r'(이란|란|이라는 건|라는 건)\s*(무엇|뭐)'
+                r'|(뜻|정의|의미)(은|는|이|가)?\s*(무엇|뭐)'
+                r'|^\s*(what\s+(is|are)|define|definition\s+of|meaning\s+of)\b'
+            )
+            
             # 사용자 기억 패턴 정의
             self.memory_patterns = {
                 'food_like': [
@@ -94,18 +125,17 @@ class UltraFastHealthChatbot:
                     r'(.*?)\s*진단받',
                     r'(.*?)\s*앓고',
                 ],
-                'taste_preference': {
-                    'spicy': ['매운', '맵', '스파이시', '칼칼'],
-                    'sweet': ['단', '달', '스위트', '디저트'],
-                    'salty': ['짠', '짭짤', '소금'],
-                    'sour': ['신', '새콤', '시큼'],
-                    'bitter': ['쓴', '씁쓸'],
-                }
+                'taste_preference': TASTE_KEYWORDS,
             }
             
-            # Vectorstore 초기화 (싱글톤 패턴)
-            if not UltraFastHealthChatbot._embeddings:
-                self._initialize_shared_resources()
+            # 카테고리 + 선호도 키워드 전체를 한 번의 텍스트 순회로 찾는 매처 (Aho-Corasick)
+            self.text_matcher = MultiPatternMatcher({
+                'category': self.category_keywords,
+                **preference_groups(),
+            })
+            
+            # Vectorstore 초기화 (백그라운드 워밍업, 요청을 막지 않음)
+            resource_registry.warm_up(CHATBOT_KNOWLEDGE)
             
             logger.debug("✅ UltraFastHealthChatbot 초기화 완료")
         except Exception as e:
@@ -114,16 +144,38 @@ class UltraFastHealthChatbot:
     
     @classmethod
     def _initialize_shared_resources(cls):
-        """공유 리소스 초기화 (한 번만 실행)"""
+        """공유 리소스 초기화 (한 번만 실행)
+        
+        torch / langchain 은 여기서만 import 하며, chatbot_resources 레지스트리가
+        백그라운드 스레드에서 호출합니다.
+        """
         try:
             logger.info("🔧 공유 리소스 초기화 시작")
+            import torch
+            from langchain_community.vectorstores import FAISS
+            from .embedding_backends import get_embedding_backend
+            from .embedding_batcher import BatchedEmbeddings
+            from .hybrid_retrieval import BM25Index
+            from .category_shards import CategoryShardIndex
+            from .mmap_vectorstore import has_mmap_store, load_mmap_vectorstore
+            from .ann_index import apply_search_params, load_saved_index_config
             
             # 임베딩 모델 초기화
-            cls._embeddings = HuggingFaceEmbeddings(
-                model_name="sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2",
-                model_kwargs={"device": "cuda" if torch.cuda.is_available() else "cpu"},
-                encode_kwargs={'normalize_embeddings': True, 'batch_size': 32}
+            # 설정에 따라 torch 또는 ONNX(int8) 백엔드 사용
+            embeddings = get_embedding_backend(
+                "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2",
+                device="cuda" if torch.cuda.is_available() else "cpu"
             )
+            
+            # 동시 요청의 쿼리 임베딩을 묶어서 처리 (마이크로 배칭)
+            batcher_config = getattr(settings, 'CHATBOT_EMBEDDING_BATCHER', {})
+            if batcher_config.get('ENABLED', True):
+                embeddings = BatchedEmbeddings(
+                    embeddings,
+                    max_batch_size=batcher_config.get('MAX_BATCH_SIZE', 32),
+                    max_wait_ms=batcher_config.get('MAX_WAIT_MS', 5),
+                )
+            cls._embeddings = embeddings
             logger.info("✅ 임베딩 모델 초기화 완료")
             
             # Vectorstore 로드
@@ -131,42 +183,56 @@ class UltraFastHealthChatbot:
             if not os.path.exists(vectorstore_path):
                 vectorstore_path = os.path.join(settings.BASE_DIR, "api", "vectorstore")
                 
-            if os.path.exists(vectorstore_path):
+            use_mmap = getattr(settings, 'CHATBOT_VECTORSTORE_MMAP', True) and has_mmap_store(vectorstore_path)
+            if use_mmap:
+                # 인덱스/청크를 mmap 으로 열어 워커 간 페이지 공유
+                cls._vectorstore = load_mmap_vectorstore(vectorstore_path, cls._embeddings)
+                logger.info("✅ mmap 벡터스토어 사용")
+            elif os.path.exists(vectorstore_path):
                 cls._vectorstore = FAISS.load_local(
                     vectorstore_path, 
                     cls._embeddings, 
                     allow_dangerous_deserialization=True
                 )
-                
-                # IVF 인덱스인 경우 nprobe 설정
-                if hasattr(cls._vectorstore.index, 'nprobe'):
+            
+            if cls._vectorstore is not None:
+                # 최적화 시 저장한 인덱스 설정의 검색 파라미터 적용 (nprobe / efSearch)
+                index_config = load_saved_index_config(vectorstore_path)
+                if index_config:
+                    apply_search_params(cls._vectorstore.index, index_config)
+                    logger.info(f"✅ 인덱스 설정 적용: {index_config.get('name')}")
+                elif hasattr(cls._vectorstore.index, 'nprobe'):
+                    # IVF 인덱스인 경우 nprobe 설정
                     cls._vectorstore.index.nprobe = 10  # 검색 시 탐색할 클러스터 수
                     logger.info(f"✅ IVF 인덱스 감지: nprobe={cls._vectorstore.index.nprobe}")
                 
                 logger.info(f"✅ Vectorstore 로드 완료: {vectorstore_path}")
                 logger.info(f"   총 벡터 수: {cls._vectorstore.index.ntotal}")
+                
+                # 같은 청크에 대한 BM25 인덱스 (있으면 하이브리드 검색)
+                if getattr(settings, 'CHATBOT_HYBRID_RETRIEVAL', {}).get('ENABLED', True):
+                    cls._bm25_index = BM25Index.load(vectorstore_path)
+                    if cls._bm25_index:
+                        logger.info(f"✅ BM25 인덱스 로드 완료: {len(cls._bm25_index.doc_lengths)}개 청크")
+                
+                # 카테고리별 샤드 인덱스 (있으면 카테고리 쿼리를 해당 샤드로 라우팅)
+                cls._category_shards = CategoryShardIndex.load(vectorstore_path, mmap=use_mmap)
+                if cls._category_shards:
+                    logger.info(f"✅ 카테고리 샤드 로드 완료: {list(cls._category_shards.indexes.keys())}")
             else:
                 logger.warning(f"⚠️ Vectorstore 경로가 존재하지 않음: {vectorstore_path}")
                 
         except Exception as e:
             logger.error(f"❌ 공유 리소스 초기화 실패: {str(e)}")
+            raise
     
     def _classify_query(self, query: str) -> Optional[str]:
         """쿼리를 카테고리로 분류"""
-        query_lower = query.lower()
-        
-        # 각 카테고리별 키워드 매칭 점수 계산
-        category_scores = {}
-        for category, keywords in self.category_keywords.items():
-            score = sum(1 for keyword in keywords if keyword in query_lower)
-            if score > 0:
-                category_scores[category] = score
+        # 각 카테고리별 키워드 매칭 점수 계산 (한 번의 스캔)
+        category_scores = self.text_matcher.scan(query.lower()).counts('category')
         
-        # 가장 높은 점수의 카테고리 반환
-        if category_scores:
-            return max(category_scores.items(), key=lambda x: x[1])[0]
-        
-        return None
+        # 가장 높은 점수의 카테고리 반환 (동점이면 정의 순서 우선)
+        return best_label(category_scores, self.category_keywords.keys())
     
     def _get_cache_key(self, prefix: str, query: str, user_id: int = None, category: str = None) -> str:
         """캐시 키 생성"""
@@ -179,42 +245,89 @@ class UltraFastHealthChatbot:
         
         return ":".join(components)
     
-    def _search_pdf_knowledge_cached(self, query: str, k: int = 3, category: str = None) -> List[Dict]:
+    def _embed_query(self, query: str) -> Optional[np.ndarray]:
+        """쿼리 임베딩 계산 (FAISS 검색과 시맨틱 캐시에서 공유)"""
+        if not UltraFastHealthChatbot._embeddings:
+            return None
+        try:
+            return np.asarray(UltraFastHealthChatbot._embeddings.embed_query(query), dtype='float32')
+        except Exception as e:
+            logger.error(f"❌ 쿼리 임베딩 실패: {str(e)}")
+            return None
+    
+    async def _aembed_query(self, query: str) -> Optional[np.ndarray]:
+        """_embed_query() 의 비동기 버전
+
+        배처의 Future 를 직접 기다리므로 동시에 들어온 요청 수만큼 마이크로 배치가 참
+        (스레드풀을 거치면 풀 크기가 배치 크기의 상한이 됨)
+        """
+        if not UltraFastHealthChatbot._embeddings:
+            return None
+        try:
+            return np.asarray(await UltraFastHealthChatbot._embeddings.aembed_query(query), dtype='float32')
+        except Exception as e:
+            logger.error(f"❌ 쿼리 임베딩 실패: {str(e)}")
+            return None
+    
+    def _search_pdf_knowledge_cached(self, query: str, k: int = 3, category: str = None,
+                                     language: str = 'ko', query_embedding: Optional[np.ndarray] = None) -> List[Dict]:
         """캐시된 PDF vectorstore 검색 (카테고리 필터링 포함)"""
+        # 워밍업 중에는 빈 결과를 캐시하지 않도록 바로 반환
+        if not UltraFastHealthChatbot._vectorstore:
+            return []
+        
         # 캐시 키 생성
         cache_key = self._get_cache_key("pdf_search", query, category=category)
         
-        # 캐시 확인
-        cached_result = cache.get(cache_key)
-        if cached_result is not None:
-            logger.debug(f"✅ PDF 검색 캐시 히트: {cache_key}")
-            return cached_result
-        
-        # 캐시 미스 - 실제 검색 수행
-        result = self._search_pdf_knowledge(query, k, category)
+        def search():
+            embedding = query_embedding if query_embedding is not None else self._embed_query(query)
+            
+            # 시맨틱 캐시 확인 (표현만 다른 유사 질문)
+            if embedding is not None:
+                semantic_result = get_semantic_cache().lookup_retrieval(embedding, category, language)
+                if semantic_result is not None:
+                    return semantic_result
+            
+            # 캐시 미스 - 실제 검색 수행
+            result = self._search_pdf_knowledge(query, k, category, query_embedding=embedding)
+            if embedding is not None:
+                get_semantic_cache().store(embedding, category, language, query, retrieval=result)
+            return result
         
-        # 결과 캐싱
-        cache.set(cache_key, result, self.search_cache_timeout)
-        return result
+        # 같은 질문이 동시에 들어와도 검색은 한 번만 (나머지는 결과를 기다리거나 이전 결과 사용)
+        return get_single_flight().get_or_compute(cache_key, search, self.search_cache_timeout)
     
-    def _search_pdf_knowledge(self, query: str, k: int = 3, category: str = None) -> List[Dict]:
+    def _search_pdf_knowledge(self, query: str, k: int = 3, category: str = None,
+                              query_embedding: Optional[np.ndarray] = None) -> List[Dict]:
         """PDF vectorstore에서 관련 지식 검색 (메타데이터 필터링 적용)"""
+        # 워밍업 전에는 검색 없이 응답 (retrieval unavailable 모드)
         if not UltraFastHealthChatbot._vectorstore:
             return []
             
         try:
             start_time = time.time()
             
-            # 카테고리가 있으면 더 많이 검색해서 필터링
-            search_k = k * 3 if category else k
+            # 카테고리 샤드가 있으면 해당 샤드 + general 만 검색 (필터링으로 버려지는 결과 없음)
+            shards = UltraFastHealthChatbot._category_shards
+            routed = query_embedding is not None and shards is not None and shards.has(category)
+            
+            # 샤드가 없을 때만 카테고리 필터링을 위해 더 많이 검색
+            search_k = k * 3 if category and not routed else k
             
-            # 관련 문서 검색
-            docs = UltraFastHealthChatbot._vectorstore.similarity_search_with_score(query, k=search_k)
+            # 관련 문서 검색 (임베딩이 이미 있으면 재사용)
+            if query_embedding is not None and (routed or UltraFastHealthChatbot._bm25_index is not None):
+                docs = self._hybrid_search(query, query_embedding, search_k, category if routed else None)
+            elif query_embedding is not None:
+                docs = UltraFastHealthChatbot._vectorstore.similarity_search_with_score_by_vector(
+                    query_embedding.tolist(), k=search_k
+                )
+            else:
+                docs = UltraFastHealthChatbot._vectorstore.similarity_search_with_score(query, k=search_k)
             
             results = []
             for doc, score in docs:
-                # 점수가 낮은 결과는 제외 (관련성이 낮음)
-                if score > 0.8:  # 임계값
+                # 점수가 낮은 결과는 제외 (관련성이 낮음, 하이브리드 검색은 내부에서 처리)
+                if score is not None and score > 0.8:  # 임계값
                     continue
                 
                 # 카테고리 필터링
@@ -244,7 +357,33 @@ class UltraFastHealthChatbot:
             logger.error(f"❌ PDF 지식 검색 실패: {str(e)}")
             return []
     
-    async def _search_pdf_knowledge_async(self, query: str, k: int = 3, category: str = None) -> List[Dict]:
+    def _hybrid_search(self, query: str, query_embedding: np.ndarray, k: int,
+                       category: str = None) -> List[Tuple]:
+        """BM25 + 벡터 검색을 RRF로 결합 (정확한 용어 매칭 보완)
+        
+        category 가 주어지면 해당 카테고리 샤드 + general 샤드로 라우팅합니다.
+        반환 형식은 similarity_search_with_score 와 같은 (doc, score) 목록이며,
+        score 는 벡터 L2 거리 (BM25 로만 찾은 문서는 None)
+        """
+        from .hybrid_retrieval import hybrid_search
+        
+        config = getattr(settings, 'CHATBOT_HYBRID_RETRIEVAL', {})
+        hits = hybrid_search(
+            UltraFastHealthChatbot._vectorstore,
+            UltraFastHealthChatbot._bm25_index,
+            query,
+            query_embedding,
+            k=k,
+            fetch_k=max(config.get('FETCH_K', 20), k),
+            max_distance=0.8,
+            rrf_k=config.get('RRF_K', 60),
+            shards=UltraFastHealthChatbot._category_shards,
+            category=category,
+        )
+        return [(hit['document'], hit['vector_score']) for hit in hits]
+    
+    async def _search_pdf_knowledge_async(self, query: str, k: int = 3, category: str = None,
+                                          language: str = 'ko', query_embedding: Optional[np.ndarray] = None) -> List[Dict]:
         """비동기 PDF 검색"""
         loop = asyncio.get_event_loop()
         return await loop.run_in_executor(
@@ -252,113 +391,360 @@ class UltraFastHealthChatbot:
             self._search_pdf_knowledge_cached,
             query,
             k,
-            category
+            category,
+            language,
+            query_embedding
         )
     
-    def get_response(self, user, question: str, language: str = 'ko') -> Dict:
-        """사용자 질문에 대한 응답 생성 (초고속 버전)"""
-        logger.debug("🎯 get_response 함수 시작")
-        logger.debug(f"🌍 언어 설정: {language}")
-        start_time = time.time()
+    def _is_profile_independent(self, question: str) -> bool:
+        """사용자 프로필/기억과 무관한 일반 지식 질문인지 판단"""
+        question_lower = question.lower()
+        if self.personal_question_pattern.search(question_lower):
+            return False
+        return not any(marker in question_lower for marker in self.personal_question_keywords)
+    
+    def _is_shareable_turn(self, question: str, user_context: Dict, user_memory: Dict, session,
+                           recent_messages: List, past_snippets: List[Dict]) -> bool:
+        """시맨틱 답변 캐시를 조회/저장해도 되는 턴인지 판단
         
-        try:
-            # 1. 간단한 인사나 일반적인 질문은 캐시에서 확인
-            simple_response = self._check_simple_questions_cache(question)
-            if simple_response:
-                logger.debug(f"✅ 간단한 질문 캐시 히트: {time.time() - start_time:.2f}초")
-                return simple_response
-            
-            # 2. 쿼리 분류
+        정의형 질문이고, 제약 (질병 / 알레르기 / 비선호 / 기억된 건강 정보) 이 없는 사용자이며,
+        이어지는 대화가 없을 때만 답변을 공유 (그 외에는 검색 결과만 캐시)
+        """
+        if not self.definition_question_pattern.search(question.lower()):
+            return False
+        if not self._is_profile_independent(question):
+            return False
+        if recent_messages or past_snippets or session.history_summary:
+            return False
+        constraints = (
+            user_context.get('diseases'),
+            user_context.get('allergies'),
+            user_context.get('disliked_foods'),
+            user_context.get('disliked_exercises'),
+            user_memory.get('health_conditions'),
+            user_memory.get('important_facts'),
+            (user_memory.get('food_preferences') or {}).get('disliked'),
+            (user_memory.get('exercise_preferences') or {}).get('disliked'),
+        )
+        return not any(constraints)
+    
+    def _lookup_semantic_answer(self, prepared: Dict, language: str) -> Optional[str]:
+        """시맨틱 캐시에서 답변 조회 (공유 가능한 턴만)"""
+        if not prepared['shared']:
+            return None
+        return get_semantic_cache().lookup_answer(prepared['query_embedding'], prepared['category'], language)
+    
+    def _store_semantic_answer(self, prepared: Dict, question: str, language: str, answer: str, llm_latency: float):
+        """공유 가능한 턴의 답변을 시맨틱 캐시에 저장 (다른 사용자에게도 제공됨)"""
+        if not answer or not prepared['shared']:
+            return
+        # 사용자 이름을 부른 답변은 공유하지 않음
+        username = prepared['user_context'].get('username')
+        if username and username in answer:
+            return
+        get_semantic_cache().store(
+            prepared['query_embedding'], prepared['category'], language, question,
+            answer=answer, llm_latency=llm_latency
+        )
+    
+    def _prepare_response(self, user, question: str, language: str, timer=NULL_TIMER) -> Dict:
+        """LLM 호출 직전까지의 준비 작업 (세션, 컨텍스트, 검색, 프롬프트 구성)"""
+        # 2. 쿼리 분류
+        with timer.stage('classify'):
             category = self._classify_query(question)
-            logger.debug(f"📂 쿼리 카테고리: {category}")
-            
-            # 3. 세션 가져오기 또는 생성
-            session = self.get_or_create_session(user)
-            
-            # 4. 사용자 프로필 정보 가져오기 (캐시 사용)
+        logger.debug(f"📂 쿼리 카테고리: {category}")
+        
+        # 3. 세션 가져오기 또는 생성 (대화 상태 캐시, 없을 때만 DB)
+        with timer.stage('session'):
+            state = self._get_session_state(user)
+            session = state.session
+        
+        # 4. 사용자 프로필 정보 가져오기 (캐시 사용)
+        with timer.stage('user_context'):
             user_context = self._get_user_context_cached(user)
-            
-            # 5. 사용자 기억 정보 가져오기
+        
+        # 5. 사용자 기억 정보 가져오기
+        with timer.stage('memory'):
             user_memory = self._get_user_memory(user, question)
-            
-            # 6. 사용자 메시지 저장 (비동기) - 선호도 추출 포함
-            user_msg = ChatMessage.objects.create(
+        
+        # 6. 사용자 메시지 저장 (쓰기 버퍼에 넣고 백그라운드에서 일괄 저장)
+        with timer.stage('message_insert'):
+            user_message = self._save_message(ChatMessage(
                 user=user,
                 session=session,
                 sender='user',
                 message=question,
                 context={'action': 'question', 'category': category}
-            )
-            
-            # 7. 질문에서 선호도/기억 정보 추출 및 저장
-            self._extract_and_save_preferences(user, question)
-            
-            # 8. 시스템 프롬프트 생성 (사용자 기억 포함)
+            ), state)
+        
+        # 7. 질문에서 선호도/기억 정보 추출 및 저장 (UserMemory 증분 갱신)
+        with timer.stage('preferences'):
+            self._extract_and_save_preferences(user, question, message_id=user_message.id, from_user=True)
+        
+        # 8. 시스템 프롬프트 생성 (사용자 기억 포함)
+        with timer.stage('prompt_build'):
             system_prompt = self._get_cached_system_prompt_with_memory(user, user_context, user_memory, language)
-            
-            # 9. 필요한 경우에만 PDF 검색 수행 (카테고리 필터링 적용)
-            pdf_knowledge = []
-            if self._should_search_pdf(question):
-                pdf_knowledge = self._search_pdf_knowledge_cached(question, k=2, category=category)
-                logger.debug(f"📚 PDF 검색 완료: {len(pdf_knowledge)}개 문서")
-            
-            # 10. 대화 컨텍스트 구성 (최적화)
-            messages = self._build_optimized_conversation_context(
-                user, session, system_prompt, question, pdf_knowledge
+        
+        # 9. 필요한 경우에만 PDF 검색 수행 (카테고리 필터링 적용)
+        pdf_knowledge = []
+        query_embedding = None
+        if self._should_search_pdf(question):
+            with timer.stage('retrieval'):
+                query_embedding = self._embed_query(question)
+                pdf_knowledge = self._search_pdf_knowledge_cached(
+                    question, k=2, category=category, language=language, query_embedding=query_embedding
+                )
+            logger.debug(f"📚 PDF 검색 완료: {len(pdf_knowledge)}개 문서")
+        
+        # 10. 관련된 과거 대화 검색 (최근 대화에 포함되는 메시지는 제외)
+        with timer.stage('history'):
+            recent_messages = self._recent_messages(state)
+        with timer.stage('retrieval'):
+            past_snippets = self._retrieve_past_conversations(
+                user, question, query_embedding, [msg.id for msg in [user_message, *recent_messages] if msg.id]
             )
-            
-            # 11. 모델 선택 (복잡도에 따라)
-            model = self._select_model_by_complexity(question, category)
-            logger.debug(f"🤖 선택된 모델: {model}")
-            
-            # 12. OpenAI API 호출
-            logger.debug(f"🤖 OpenAI API 호출 시작 (경과: {time.time() - start_time:.2f}초)")
-            response = self.client.chat.completions.create(
-                model=model,
-                messages=messages,
-                temperature=0.7,
-                max_tokens=500  # 토큰 수 감소
+        
+        # 답변은 항상 개인화 프롬프트로 생성하고, 공유 가능한 턴에서만 시맨틱 답변 캐시 사용
+        shared = query_embedding is not None and self._is_shareable_turn(
+            question, user_context, user_memory, session, recent_messages, past_snippets
+        )
+        
+        # 11. 모델 선택 (복잡도에 따라, 토큰 계산에 사용)
+        model = self._select_model_by_complexity(question, category)
+        logger.debug(f"🤖 선택된 모델: {model}")
+        
+        # 12. 토큰 예산 안에서 대화 컨텍스트 구성
+        with timer.stage('prompt_build'):
+            messages, context_tokens = self._build_optimized_conversation_context(
+                user, session, system_prompt, question, pdf_knowledge,
+                recent_messages=recent_messages, past_snippets=past_snippets, model=model
             )
-            
-            answer = response.choices[0].message.content
-            logger.debug(f"✅ OpenAI 응답 완료 (경과: {time.time() - start_time:.2f}초)")
-            
-            # 13. 봇 응답 저장 (비동기)
-            ChatMessage.objects.create(
+        
+        return {
+            'category': category,
+            'session': session,
+            'user_context': user_context,
+            'user_memory': user_memory,
+            'pdf_knowledge': pdf_knowledge,
+            'past_snippets': past_snippets,
+            'query_embedding': query_embedding,
+            'shared': shared,
+            'retrieval_available': UltraFastHealthChatbot._vectorstore is not None,
+            'messages': messages,
+            'context_tokens': context_tokens,
+            'model': model,
+        }
+    
+    def _bot_message_context(self, prepared: Dict, start_time: float, extra_context: Dict = None) -> Dict:
+        """봇 응답 메시지에 저장할 컨텍스트"""
+        context = {
+            'action': 'response',
+            'model': prepared['model'],
+            'category': prepared['category'],
+            'pdf_sources_used': len(prepared['pdf_knowledge']),
+            'past_snippets_used': len(prepared.get('past_snippets', [])),
+            'context_tokens': prepared.get('context_tokens'),
+            'response_time': time.time() - start_time,
+            'user_memory_used': bool(prepared['user_memory'])
+        }
+        if extra_context:
+            context.update(extra_context)
+        return context
+    
+    def _save_message(self, message: ChatMessage, state=None) -> ChatMessage:
+        """메시지 저장 (쓰기 버퍼) 후 대화 상태 캐시 갱신"""
+        get_write_buffer().save(message)
+        get_chat_state_store().append(message, state)
+        return message
+    
+    async def _asave_message(self, message: ChatMessage, state=None) -> ChatMessage:
+        """_save_message() 의 비동기 버전 (쓰기 버퍼 비활성화 시 비동기 저장)"""
+        await get_write_buffer().asave(message)
+        get_chat_state_store().append(message, state)
+        return message
+    
+    def _save_bot_message(self, user, prepared: Dict, answer: str, start_time: float, extra_context: Dict = None):
+        """봇 응답 저장 (쓰기 버퍼)"""
+        return self._save_message(ChatMessage(
+            user=user,
+            session=prepared['session'],
+            sender='bot',
+            message=answer,
+            context=self._bot_message_context(prepared, start_time, extra_context)
+        ))
+    
+    async def _asave_bot_message(self, user, prepared: Dict, answer: str, start_time: float, extra_context: Dict = None):
+        """봇 응답 저장 (쓰기 버퍼, 비활성화 시 비동기 저장)"""
+        return await self._asave_message(ChatMessage(
+            user=user,
+            session=prepared['session'],
+            sender='bot',
+            message=answer,
+            context=self._bot_message_context(prepared, start_time, extra_context)
+        ))
+    
+    async def _aprepare_response(self, user, question: str, language: str, timer=NULL_TIMER) -> Dict:
+        """LLM 호출 직전까지의 준비 작업 (비동기 버전)"""
+        with timer.stage('classify'):
+            category = self._classify_query(question)
+        logger.debug(f"📂 쿼리 카테고리: {category}")
+        
+        with timer.stage('session'):
+            state = await self._aget_session_state(user)
+            session = state.session
+        
+        # 프로필 접근이 포함된 작업은 동기 함수를 그대로 재사용
+        with timer.stage('user_context'):
+            user_context = await sync_to_async(self._get_user_context_cached)(user)
+        with timer.stage('memory'):
+            user_memory = await sync_to_async(self._get_user_memory)(user, question)
+        
+        with timer.stage('message_insert'):
+            user_message = await self._asave_message(ChatMessage(
                 user=user,
                 session=session,
-                sender='bot',
-                message=answer,
-                context={
-                    'action': 'response',
-                    'model': model,
-                    'category': category,
-                    'pdf_sources_used': len(pdf_knowledge),
-                    'response_time': time.time() - start_time,
-                    'user_memory_used': bool(user_memory)
-                }
+                sender='user',
+                message=question,
+                context={'action': 'question', 'category': category}
+            ), state)
+        
+        with timer.stage('preferences'):
+            await sync_to_async(self._extract_and_save_preferences)(user, question, user_message.id, True)
+        
+        with timer.stage('prompt_build'):
+            system_prompt = await sync_to_async(self._get_cached_system_prompt_with_memory)(
+                user, user_context, user_memory, language
             )
+        
+        # 임베딩은 배처 Future 를 기다리고, FAISS 검색은 전용 스레드풀에서 실행
+        pdf_knowledge = []
+        query_embedding = None
+        if self._should_search_pdf(question):
+            with timer.stage('retrieval'):
+                query_embedding = await self._aembed_query(question)
+                pdf_knowledge = await self._search_pdf_knowledge_async(
+                    question, k=2, category=category, language=language, query_embedding=query_embedding
+                )
+            logger.debug(f"📚 PDF 검색 완료: {len(pdf_knowledge)}개 문서")
+        
+        with timer.stage('history'):
+            recent_messages = self._recent_messages(state)
+        # 과거 대화 검색은 임베딩이 포함되므로 이벤트 루프 밖 스레드에서 실행
+        with timer.stage('retrieval'):
+            past_snippets = await sync_to_async(self._retrieve_past_conversations, thread_sensitive=False)(
+                user, question, query_embedding, [msg.id for msg in [user_message, *recent_messages] if msg.id]
+            )
+        
+        shared = query_embedding is not None and self._is_shareable_turn(
+            question, user_context, user_memory, session, recent_messages, past_snippets
+        )
+        
+        model = self._select_model_by_complexity(question, category)
+        logger.debug(f"🤖 선택된 모델: {model}")
+        
+        with timer.stage('prompt_build'):
+            messages, context_tokens = self._build_optimized_conversation_context(
+                user, session, system_prompt, question, pdf_knowledge,
+                recent_messages=recent_messages, past_snippets=past_snippets, model=model
+            )
+        
+        return {
+            'category': category,
+            'session': session,
+            'user_context': user_context,
+            'user_memory': user_memory,
+            'pdf_knowledge': pdf_knowledge,
+            'past_snippets': past_snippets,
+            'query_embedding': query_embedding,
+            'shared': shared,
+            'retrieval_available': UltraFastHealthChatbot._vectorstore is not None,
+            'messages': messages,
+            'context_tokens': context_tokens,
+            'model': model,
+        }
+    
+    def get_response(self, user, question: str, language: str = 'ko', debug: bool = False) -> Dict:
+        """사용자 질문에 대한 응답 생성 (동기 래퍼)"""
+        return async_to_sync(self.aget_response)(user, question, language, debug)
+    
+    async def aget_response(self, user, question: str, language: str = 'ko', debug: bool = False) -> Dict:
+        """사용자 질문에 대한 응답 생성 (초고속 비동기 버전)
+        
+        debug=True 이면 단계별 소요 시간(debug.timings)과 프롬프트 토큰 수를 응답에 포함
+        """
+        logger.debug("🎯 aget_response 함수 시작")
+        logger.debug(f"🌍 언어 설정: {language}")
+        start_time = time.time()
+        timer = start_timer('response', force=debug)
+        
+        try:
+            # 1. 간단한 인사나 일반적인 질문은 캐시에서 확인
+            with timer.stage('simple_cache'):
+                simple_response = self._check_simple_questions_cache(question)
+            if simple_response:
+                logger.debug(f"✅ 간단한 질문 캐시 히트: {time.time() - start_time:.2f}초")
+                timings = timer.finish('simple_cache')
+                if debug:
+                    return {**simple_response, 'debug': {'timings': timings}}
+                return simple_response
             
-            # 14. 백그라운드 작업 (응답에서도 선호도 추출)
-            self._schedule_background_tasks(user, question, answer)
+            # 2~11. 분류, 세션, 컨텍스트, 검색, 프롬프트 구성
+            prepared = await self._aprepare_response(user, question, language, timer)
+            model = prepared['model']
+            
+            # 12. 시맨틱 답변 캐시 확인 후 OpenAI API 호출
+            with timer.stage('semantic_cache'):
+                answer = self._lookup_semantic_answer(prepared, language)
+            semantic_hit = answer is not None
+            if not semantic_hit:
+                logger.debug(f"🤖 OpenAI API 호출 시작 (경과: {time.time() - start_time:.2f}초)")
+                llm_start = time.time()
+                with timer.stage('llm'):
+                    response = await self.llm.achat(
+                        prepared['messages'],
+                        model=model,
+                        temperature=0.7,
+                        max_tokens=500  # 토큰 수 감소
+                    )
+                
+                answer = response.content
+                logger.debug(f"✅ OpenAI 응답 완료 (경과: {time.time() - start_time:.2f}초)")
+                with timer.stage('semantic_cache'):
+                    self._store_semantic_answer(prepared, question, language, answer, time.time() - llm_start)
+            
+            with timer.stage('persistence'):
+                # 13. 봇 응답 저장 (비동기)
+                await self._asave_bot_message(user, prepared, answer, start_time, {
+                    'semantic_cache_hit': semantic_hit
+                })
+                
+                # 14. 백그라운드 작업 (응답에서도 선호도 추출)
+                self._schedule_background_tasks(user, question, answer, prepared['session'].id)
             
             logger.info(f"🎉 전체 응답 시간: {time.time() - start_time:.2f}초")
+            timings = timer.finish('semantic_cache' if semantic_hit else 'success')
             
-            return {
+            result = {
                 'success': True,
                 'response': answer,
                 'raw_response': answer,
-                'sources': len(pdf_knowledge),
-                'user_context': user_context,
-                'session_id': session.id,
+                'sources': len(prepared['pdf_knowledge']),
+                'user_context': prepared['user_context'],
+                'session_id': prepared['session'].id,
                 'response_time': time.time() - start_time,
                 'model_used': model,
-                'category': category,
-                'memory_used': bool(user_memory)
+                'category': prepared['category'],
+                'memory_used': bool(prepared['user_memory']),
+                'semantic_cache_hit': semantic_hit,
+                'retrieval_available': prepared['retrieval_available']
             }
+            if debug:
+                result['debug'] = {'timings': timings, 'context_tokens': prepared['context_tokens']}
+            return result
             
         except Exception as e:
             logger.error(f"응답 생성 실패: {str(e)}")
+            timer.finish('error')
             return {
                 'success': False,
                 'response': "죄송합니다. 오류가 발생했습니다. 잠시 후 다시 시도해주세요.",
@@ -366,47 +752,219 @@ class UltraFastHealthChatbot:
                 'response_time': time.time() - start_time
             }
     
-    def _get_user_memory(self, user, current_question: str) -> Dict:
-        """사용자의 기억된 정보 가져오기"""
-        memory = {
-            'food_preferences': {},
-            'exercise_preferences': {},
-            'health_conditions': [],
-            'important_facts': []
+    def _simple_stream_events(self, simple_response: Dict, elapsed: float, timings, debug: bool) -> List[Dict]:
+        """간단한 질문 캐시 응답을 스트림 이벤트로 변환 (한 번에 전송)"""
+        done = {
+            'type': 'done',
+            'response': simple_response['response'],
+            'sources': 0,
+            'cached': True,
+            'time_to_first_byte': elapsed,
+            'response_time': elapsed
+        }
+        if debug:
+            done['debug'] = {'timings': timings}
+        return [
+            {'type': 'start', 'cached': True},
+            {'type': 'token', 'content': simple_response['response']},
+            done,
+        ]
+    
+    @staticmethod
+    def _stream_start_event(prepared: Dict) -> Dict:
+        return {
+            'type': 'start',
+            'session_id': prepared['session'].id,
+            'category': prepared['category'],
+            'model_used': prepared['model'],
+            'sources': len(prepared['pdf_knowledge'])
         }
+    
+    @staticmethod
+    def _stream_done_event(prepared: Dict, answer: str, semantic_hit: bool, time_to_first_byte: Optional[float],
+                           response_time: float, timings, debug: bool) -> Dict:
+        done = {
+            'type': 'done',
+            'response': answer,
+            'sources': len(prepared['pdf_knowledge']),
+            'session_id': prepared['session'].id,
+            'model_used': prepared['model'],
+            'category': prepared['category'],
+            'memory_used': bool(prepared['user_memory']),
+            'semantic_cache_hit': semantic_hit,
+            'retrieval_available': prepared['retrieval_available'],
+            'time_to_first_byte': time_to_first_byte,
+            'response_time': response_time
+        }
+        if debug:
+            done['debug'] = {'timings': timings, 'context_tokens': prepared['context_tokens']}
+        return done
+    
+    @staticmethod
+    def _stream_error_event(e: Exception, start_time: float) -> Dict:
+        return {
+            'type': 'error',
+            'response': "죄송합니다. 오류가 발생했습니다. 잠시 후 다시 시도해주세요.",
+            'error': str(e),
+            'response_time': time.time() - start_time
+        }
+    
+    def stream_response(self, user, question: str, language: str = 'ko', debug: bool = False) -> Iterator[Dict]:
+        """사용자 질문에 대한 스트리밍 응답 생성
+        
+        토큰이 도착하는 대로 이벤트를 yield 합니다.
+        - {'type': 'start', ...}: 세션/카테고리 정보
+        - {'type': 'token', 'content': ...}: 생성된 토큰 조각
+        - {'type': 'done', ...}: 완료 (time_to_first_byte, response_time 포함, debug=True 이면 단계별 소요 시간 포함)
+        - {'type': 'error', ...}: 오류
+        봇 메시지는 스트림이 끝난 뒤 한 번만 저장됩니다.
+        ASGI 뷰에서는 이벤트 루프를 막지 않는 astream_response() 를 사용하세요.
+        """
+        logger.debug("🎯 stream_response 함수 시작")
+        start_time = time.time()
+        timer = start_timer('stream', force=debug)
         
         try:
-            profile = user.profile
+            # 1. 간단한 질문은 캐시 응답을 한 번에 전송
+            with timer.stage('simple_cache'):
+                simple_response = self._check_simple_questions_cache(question)
+            if simple_response:
+                elapsed = time.time() - start_time
+                yield from self._simple_stream_events(simple_response, elapsed, timer.finish('simple_cache'), debug)
+                return
+            
+            prepared = self._prepare_response(user, question, language, timer)
+            yield self._stream_start_event(prepared)
+            
+            # 12. 시맨틱 답변 캐시 확인 후 OpenAI 스트리밍 호출
+            with timer.stage('semantic_cache'):
+                answer = self._lookup_semantic_answer(prepared, language)
+            semantic_hit = answer is not None
+            if semantic_hit:
+                time_to_first_byte = time.time() - start_time
+                yield {'type': 'token', 'content': answer}
+            else:
+                logger.debug(f"🤖 OpenAI 스트리밍 호출 시작 (경과: {time.time() - start_time:.2f}초)")
+                llm_start = time.time()
+                stream = self.llm.stream(
+                    prepared['messages'],
+                    model=prepared['model'],
+                    temperature=0.7,
+                    max_tokens=500
+                )
+                
+                chunks = []
+                time_to_first_byte = None
+                for delta in stream:
+                    if time_to_first_byte is None:
+                        time_to_first_byte = time.time() - start_time
+                        logger.debug(f"⚡ 첫 토큰 도착: {time_to_first_byte:.2f}초")
+                    chunks.append(delta)
+                    yield {'type': 'token', 'content': delta}
+                
+                answer = ''.join(chunks)
+                # 스트림 소비(클라이언트 전송) 시간까지 포함한 생성 시간
+                timer.record('llm', time.time() - llm_start)
+                with timer.stage('semantic_cache'):
+                    self._store_semantic_answer(prepared, question, language, answer, time.time() - llm_start)
+            
+            response_time = time.time() - start_time
+            
+            with timer.stage('persistence'):
+                # 13. 스트림 완료 후 봇 응답 저장
+                self._save_bot_message(user, prepared, answer, start_time, {
+                    'streamed': True,
+                    'time_to_first_byte': time_to_first_byte,
+                    'semantic_cache_hit': semantic_hit
+                })
+                
+                # 14. 백그라운드 작업
+                self._schedule_background_tasks(user, question, answer, prepared['session'].id)
             
-            # 프로필에서 기본 정보 가져오기
-            if profile.preferred_foods:
-                memory['food_preferences']['liked'] = profile.preferred_foods
-            if profile.disliked_foods:
-                memory['food_preferences']['disliked'] = profile.disliked_foods
-            if profile.preferred_exercises:
-                memory['exercise_preferences']['liked'] = profile.preferred_exercises
-            if profile.disliked_exercises:
-                memory['exercise_preferences']['disliked'] = profile.disliked_exercises
-            if profile.diseases:
-                memory['health_conditions'] = profile.diseases
-            
-            # 최근 대화에서 추출한 정보 확인
-            recent_messages = ChatMessage.objects.filter(
-                user=user,
-                sender='user'
-            ).order_by('-created_at')[:20]  # 최근 20개 메시지
+            logger.info(f"🎉 스트리밍 응답 완료 - 첫 토큰: {time_to_first_byte or 0:.2f}초, 전체: {response_time:.2f}초")
+            timings = timer.finish('semantic_cache' if semantic_hit else 'success')
+            yield self._stream_done_event(
+                prepared, answer, semantic_hit, time_to_first_byte, response_time, timings, debug
+            )
             
-            # 중요한 패턴 찾기
-            for msg in recent_messages:
-                text = msg.message.lower()
+        except Exception as e:
+            logger.error(f"스트리밍 응답 생성 실패: {str(e)}")
+            timer.finish('error')
+            yield self._stream_error_event(e, start_time)
+    
+    async def astream_response(self, user, question: str, language: str = 'ko',
+                               debug: bool = False) -> AsyncIterator[Dict]:
+        """stream_response() 의 비동기 버전 (ASGI StreamingHttpResponse 용, 이벤트 형식 동일)"""
+        logger.debug("🎯 astream_response 함수 시작")
+        start_time = time.time()
+        timer = start_timer('stream', force=debug)
+        
+        try:
+            with timer.stage('simple_cache'):
+                simple_response = self._check_simple_questions_cache(question)
+            if simple_response:
+                elapsed = time.time() - start_time
+                for event in self._simple_stream_events(simple_response, elapsed, timer.finish('simple_cache'), debug):
+                    yield event
+                return
+            
+            prepared = await self._aprepare_response(user, question, language, timer)
+            yield self._stream_start_event(prepared)
+            
+            with timer.stage('semantic_cache'):
+                answer = self._lookup_semantic_answer(prepared, language)
+            semantic_hit = answer is not None
+            if semantic_hit:
+                time_to_first_byte = time.time() - start_time
+                yield {'type': 'token', 'content': answer}
+            else:
+                logger.debug(f"🤖 OpenAI 비동기 스트리밍 호출 시작 (경과: {time.time() - start_time:.2f}초)")
+                llm_start = time.time()
+                chunks = []
+                time_to_first_byte = None
+                async with aclosing(self.llm.astream(
+                    prepared['messages'],
+                    model=prepared['model'],
+                    temperature=0.7,
+                    max_tokens=500
+                )) as stream:
+                    async for delta in stream:
+                        if time_to_first_byte is None:
+                            time_to_first_byte = time.time() - start_time
+                            logger.debug(f"⚡ 첫 토큰 도착: {time_to_first_byte:.2f}초")
+                        chunks.append(delta)
+                        yield {'type': 'token', 'content': delta}
                 
-                # 맛 선호도
-                for taste, keywords in self.memory_patterns['taste_preference'].items():
-                    for keyword in keywords:
-                        if keyword in text and ('싫' in text or '못' in text or '안' in text):
-                            memory['important_facts'].append(f"{taste} 맛을 싫어함")
-                        elif keyword in text and ('좋' in text or '자주' in text):
-                            memory['important_facts'].append(f"{taste} 맛을 좋아함")
+                answer = ''.join(chunks)
+                timer.record('llm', time.time() - llm_start)
+                with timer.stage('semantic_cache'):
+                    self._store_semantic_answer(prepared, question, language, answer, time.time() - llm_start)
+            
+            response_time = time.time() - start_time
+            
+            with timer.stage('persistence'):
+                await self._asave_bot_message(user, prepared, answer, start_time, {
+                    'streamed': True,
+                    'time_to_first_byte': time_to_first_byte,
+                    'semantic_cache_hit': semantic_hit
+                })
+                self._schedule_background_tasks(user, question, answer, prepared['session'].id)
+            
+            logger.info(f"🎉 비동기 스트리밍 응답 완료 - 첫 토큰: {time_to_first_byte or 0:.2f}초, 전체: {response_time:.2f}초")
+            timings = timer.finish('semantic_cache' if semantic_hit else 'success')
+            yield self._stream_done_event(
+                prepared, answer, semantic_hit, time_to_first_byte, response_time, timings, debug
+            )
+            
+        except Exception as e:
+            logger.error(f"비동기 스트리밍 응답 생성 실패: {str(e)}")
+            timer.finish('error')
+            yield self._stream_error_event(e, start_time)
+    
+    def _get_user_memory(self, user, current_question: str) -> Dict:
+        """사용자의 기억된 정보 가져오기 (메시지 저장 시 갱신된 UserMemory 캐시 조회)"""
+        try:
+            memory = get_user_memory(user)
             
             # 현재 질문이 기억과 관련된 것인지 확인
             if '뭐' in current_question and '싫어' in current_question:
@@ -417,59 +975,30 @@ class UltraFastHealthChatbot:
             
         except Exception as e:
             logger.error(f"사용자 기억 가져오기 실패: {str(e)}")
-            return memory
+            return {
+                'food_preferences': {},
+                'exercise_preferences': {},
+                'health_conditions': [],
+                'important_facts': []
+            }
     
-    def _extract_and_save_preferences(self, user, text: str):
-        """텍스트에서 선호도 추출하고 즉시 저장"""
+    def _extract_and_save_preferences(self, user, text: str, message_id: Optional[int] = None,
+                                      from_user: bool = False):
+        """텍스트에서 선호도 추출하고 즉시 저장
+        
+        from_user 이면 (사용자 메시지) 맛 선호도 / 질환 언급까지 UserMemory 에 반영
+        (쓰기 버퍼에 있는 메시지는 아직 message_id 가 없음)
+        """
         try:
-            text_lower = text.lower()
             profile = user.profile
             updated = False
             
-            # 음식 선호/비선호
-            food_like_found = []
-            food_dislike_found = []
-            
-            # "매운거 싫어해" 같은 패턴 처리
-            if '매운' in text_lower and any(word in text_lower for word in ['싫어', '못 먹', '안 먹']):
-                food_dislike_found.append('매운 음식')
-            elif '매운' in text_lower and any(word in text_lower for word in ['좋아', '자주 먹']):
-                food_like_found.append('매운 음식')
-            
-            # 단 음식
-            if '단' in text_lower or '달' in text_lower:
-                if any(word in text_lower for word in ['싫어', '못 먹', '안 먹']):
-                    food_dislike_found.append('단 음식')
-                elif any(word in text_lower for word in ['좋아', '자주 먹']):
-                    food_like_found.append('단 음식')
-            
-            # 짠 음식
-            if '짠' in text_lower or '짭짤' in text_lower:
-                if any(word in text_lower for word in ['싫어', '못 먹', '안 먹']):
-                    food_dislike_found.append('짠 음식')
-                elif any(word in text_lower for word in ['좋아', '자주 먹']):
-                    food_like_found.append('짠 음식')
-            
-            # 특정 음식들
-            foods = ['치킨', '피자', '파스타', '김치', '된장', '커피', '차', '샐러드', '과일', '야채', '고기', '생선']
-            for food in foods:
-                if food in text_lower:
-                    if any(word in text_lower for word in ['싫어', '못 먹', '안 먹', '별로']):
-                        food_dislike_found.append(food)
-                    elif any(word in text_lower for word in ['좋아', '자주 먹', '즐겨']):
-                        food_like_found.append(food)
-            
-            # 운동 선호/비선호
-            exercises = ['런닝', '달리기', '요가', '필라테스', '헬스', '웨이트', '수영', '자전거', '등산', '걷기']
-            exercise_like_found = []
-            exercise_dislike_found = []
-            
-            for exercise in exercises:
-                if exercise in text_lower:
-                    if any(word in text_lower for word in ['싫어', '못', '안', '힘들', '어려워']):
-                        exercise_dislike_found.append(exercise)
-                    elif any(word in text_lower for word in ['좋아', '자주', '즐겨']):
-                        exercise_like_found.append(exercise)
+            # 음식/운동/맛/감정 키워드를 한 번에 스캔
+            preferences = extract_preferences(self.text_matcher.scan(text.lower()))
+            food_like_found = preferences['food_like']
+            food_dislike_found = preferences['food_dislike']
+            exercise_like_found = preferences['exercise_like']
+            exercise_dislike_found = preferences['exercise_dislike']
             
             # 프로필 업데이트
             if food_like_found:
@@ -509,28 +1038,35 @@ class UltraFastHealthChatbot:
                 logger.info(f"✅ 운동 비선호 추가: {exercise_dislike_found}")
             
             if updated:
+                # post_save 시그널이 UserMemory 의 선호도 목록을 동기화하고 profile 캐시 세대를 올림
                 profile.save()
-                # 캐시 무효화
-                cache.delete(f"user_context:{user.id}")
-                cache.delete(f"system_prompt:{user.id}:{timezone.now().date()}")
+            
+            if from_user:
+                update_user_memory(user.id, preferences=preferences, message_id=message_id)
                 
         except Exception as e:
             logger.error(f"선호도 추출 및 저장 실패: {str(e)}")
     
     def _get_cached_system_prompt_with_memory(self, user, user_context: Dict, user_memory: Dict, language: str = 'ko') -> str:
         """사용자 기억을 포함한 시스템 프롬프트 생성"""
-        cache_key = f"system_prompt_memory:{user.id}:{timezone.now().date()}:{language}"
-        cached_prompt = cache.get(cache_key)
-        
-        if cached_prompt:
-            return cached_prompt
-        
-        prompt = self._create_system_prompt_with_memory(user, user_context, user_memory, language)
-        cache.set(cache_key, prompt, 1800)  # 30분 캐시
-        return prompt
+        # 기억 버전이 바뀌면 새 프롬프트 생성
+        cache_key = UserCacheNamespace(user.id, CHAT, PROFILE).key(
+            'system_prompt_memory', timezone.now().date(), language, f"v{user_memory.get('version', 0)}"
+        )
+        return get_single_flight().get_or_compute(
+            cache_key,
+            lambda: self._create_system_prompt_with_memory(user, user_context, user_memory, language),
+            1800  # 30분 캐시
+        )
     
     def _create_system_prompt_with_memory(self, user, user_context: Dict, user_memory: Dict, language: str = 'ko') -> str:
         """사용자 기억을 포함한 시스템 프롬프트 생성"""
+        # 기억 목록은 목록마다 토큰 한도 안에서 최근 항목만 포함
+        counter = TokenCounter()
+        list_tokens = get_budget_config()['PROFILE_LIST_TOKENS']
+        
+        def fit(items: List[str]) -> str:
+            return ', '.join(counter.fit_items(items, list_tokens))
         
         # 언어별 프롬프트
         if language == 'en':
@@ -581,20 +1117,20 @@ Important Preferences and Memories:
             # 음식 선호도
             if user_memory.get('food_preferences'):
                 if user_memory['food_preferences'].get('liked'):
-                    prompt += f"- Liked foods: {', '.join(user_memory['food_preferences']['liked'])}\n"
+                    prompt += f"- Liked foods: {fit(user_memory['food_preferences']['liked'])}\n"
                 if user_memory['food_preferences'].get('disliked'):
-                    prompt += f"- Disliked foods: {', '.join(user_memory['food_preferences']['disliked'])}\n"
+                    prompt += f"- Disliked foods: {fit(user_memory['food_preferences']['disliked'])}\n"
             
             # 운동 선호도
             if user_memory.get('exercise_preferences'):
                 if user_memory['exercise_preferences'].get('liked'):
-                    prompt += f"- Liked exercises: {', '.join(user_memory['exercise_preferences']['liked'])}\n"
+                    prompt += f"- Liked exercises: {fit(user_memory['exercise_preferences']['liked'])}\n"
                 if user_memory['exercise_preferences'].get('disliked'):
-                    prompt += f"- Disliked exercises: {', '.join(user_memory['exercise_preferences']['disliked'])}\n"
+                    prompt += f"- Disliked exercises: {fit(user_memory['exercise_preferences']['disliked'])}\n"
             
             # 중요한 사실들
             if user_memory.get('important_facts'):
-                prompt += f"- Other important information: {', '.join(user_memory['important_facts'])}\n"
+                prompt += f"- Other important information: {fit(user_memory['important_facts'])}\n"
             
             prompt += """
 Consider all the information above when answering. Be sure to remember and mention the user's previously stated preferences or restrictions.
@@ -606,20 +1142,20 @@ Always respond in English.
             # 음식 선호도
             if user_memory.get('food_preferences'):
                 if user_memory['food_preferences'].get('liked'):
-                    prompt += f"- 좋아하는 음식: {', '.join(user_memory['food_preferences']['liked'])}\n"
+                    prompt += f"- 좋아하는 음식: {fit(user_memory['food_preferences']['liked'])}\n"
                 if user_memory['food_preferences'].get('disliked'):
-                    prompt += f"- 싫어하는 음식: {', '.join(user_memory['food_preferences']['disliked'])}\n"
+                    prompt += f"- 싫어하는 음식: {fit(user_memory['food_preferences']['disliked'])}\n"
             
             # 운동 선호도
             if user_memory.get('exercise_preferences'):
                 if user_memory['exercise_preferences'].get('liked'):
-                    prompt += f"- 좋아하는 운동: {', '.join(user_memory['exercise_preferences']['liked'])}\n"
+                    prompt += f"- 좋아하는 운동: {fit(user_memory['exercise_preferences']['liked'])}\n"
                 if user_memory['exercise_preferences'].get('disliked'):
-                    prompt += f"- 싫어하는 운동: {', '.join(user_memory['exercise_preferences']['disliked'])}\n"
+                    prompt += f"- 싫어하는 운동: {fit(user_memory['exercise_preferences']['disliked'])}\n"
             
             # 중요한 사실들
             if user_memory.get('important_facts'):
-                prompt += f"- 기타 중요 정보: {', '.join(user_memory['important_facts'])}\n"
+                prompt += f"- 기타 중요 정보: {fit(user_memory['important_facts'])}\n"
             
             prompt += """
 답변 시 위의 모든 정보를 고려하세요. 특히 사용자가 이전에 말한 선호도나 제한사항을 반드시 기억하고 언급하세요.
@@ -694,7 +1230,7 @@ Always respond in English.
     
     def _get_user_context_cached(self, user) -> Dict:
         """캐시된 사용자 컨텍스트 가져오기"""
-        cache_key = f"user_context:{user.id}"
+        cache_key = UserCacheNamespace(user.id, PROFILE).key('user_context')
         cached_context = cache.get(cache_key)
         
         if cached_context:
@@ -706,7 +1242,7 @@ Always respond in English.
     
     def _get_cached_system_prompt(self, user, user_context: Dict) -> str:
         """캐시된 시스템 프롬프트 가져오기"""
-        cache_key = f"system_prompt:{user.id}:{timezone.now().date()}"
+        cache_key = UserCacheNamespace(user.id, CHAT, PROFILE).key('system_prompt', timezone.now().date())
         cached_prompt = cache.get(cache_key)
         
         if cached_prompt:
@@ -716,118 +1252,206 @@ Always respond in English.
         cache.set(cache_key, prompt, 3600)  # 1시간 캐시
         return prompt
     
+    def _unsummarized_messages(self, session):
+        """롤링 요약에 아직 포함되지 않은 세션 메시지 (최신순)"""
+        return session.messages.filter(id__gt=session.summarized_message_id or 0).order_by('-created_at')
+    
+    def _recent_messages(self, state) -> List:
+        """대화 상태의 최근 대화 (최신순, 방금 추가한 현재 질문 제외)"""
+        limit = get_budget_config()['HISTORY_MAX_MESSAGES']
+        return state.recent_messages()[1:limit + 1]
+    
     def _build_optimized_conversation_context(self, user, session, system_prompt: str, 
-                                            current_question: str, pdf_knowledge: List[Dict]) -> List[Dict]:
-        """최적화된 대화 컨텍스트 구성"""
-        messages = [{"role": "system", "content": system_prompt}]
-        
-        # PDF 지식이 있으면 시스템 프롬프트에 추가 (최대 2개, 각 200자)
-        if pdf_knowledge:
-            knowledge_context = "\n\n참고 자료:\n"
-            for idx, doc in enumerate(pdf_knowledge[:2]):
-                knowledge_context += f"{idx+1}. {doc['content'][:200]}...\n"
-            messages[0]["content"] += knowledge_context
-        
-        # 현재 세션의 최근 대화만 포함 (5개로 제한)
-        recent_messages = session.messages.order_by('-created_at')[:5]
-        for msg in reversed(list(recent_messages)[1:]):  # 현재 메시지 제외
-            if msg.sender == 'user':
-                messages.append({"role": "user", "content": msg.message})
-            else:
-                messages.append({"role": "assistant", "content": msg.message})
+                                            current_question: str, pdf_knowledge: List[Dict],
+                                            recent_messages: Optional[List] = None,
+                                            past_snippets: Optional[List[Dict]] = None,
+                                            model: str = 'gpt-4o-mini') -> Tuple[List[Dict], Dict]:
+        """토큰 예산 안에서 대화 컨텍스트 구성 (메시지 목록, 섹션별 토큰 수 반환)
         
-        # 현재 질문 추가
-        messages.append({"role": "user", "content": current_question})
+        시스템 프롬프트와 현재 질문은 항상 포함하고, 기억 / 참고 자료 / 세션 요약 / 최근 대화는
+        CHATBOT_CONTEXT_BUDGET 의 우선순위와 섹션 한도에 따라 남은 예산 안에서 채웁니다.
+        """
+        builder = ContextBuilder(model)
         
-        return messages
-    
-    def _schedule_background_tasks(self, user, question: str, answer: str):
-        """백그라운드 작업 스케줄링"""
-        # ThreadPoolExecutor를 사용하여 비동기 실행
-        UltraFastHealthChatbot._executor.submit(
-            self._background_tasks, user, question, answer
+        # 현재 세션의 최근 대화 (요약되지 않은 메시지, 최신순)
+        if recent_messages is None:
+            limit = builder.config['HISTORY_MAX_MESSAGES']
+            recent_messages = list(self._unsummarized_messages(session)[:limit + 1])[1:]  # 현재 메시지 제외
+        
+        messages, tokens = builder.build(
+            system_prompt,
+            current_question,
+            pdf_knowledge=pdf_knowledge,
+            past_snippets=past_snippets,
+            summary=session.history_summary,
+            history=recent_messages
         )
+        
+        sections = ', '.join(
+            f"{section} {tokens[section]}"
+            for section in ('system', 'knowledge', 'memory', 'summary', 'history', 'question')
+            if section in tokens
+        )
+        logger.info(
+            f"🧮 프롬프트 토큰 ({model}): {tokens['total']}/{tokens['budget']} "
+            f"[{sections}] 최근 대화 {tokens['history_messages']}/{len(recent_messages)}개"
+        )
+        return messages, tokens
+    
+    def _schedule_background_tasks(self, user, question: str, answer: str, session_id: Optional[int] = None):
+        """백그라운드 작업 스케줄링 (작업 정의는 chatbot_jobs.py)
+        
+        사용자 / 세션 상태를 DB 에서 다시 읽는 작업은 대기 중인 것이 있으면 합쳐서 한 번만 실행
+        """
+        jobs = get_job_queue()
+        
+        # 답변에서도 선호도 추출
+        jobs.submit('chatbot.extract_preferences', user.id, answer)
+        
+        # 일일 추천 생성 (필요한 경우)
+        jobs.submit('chatbot.daily_recommendations', user.id, coalesce_key=f"daily_recommendations:{user.id}")
+        
+        # 새 대화를 장기 기억 스니펫으로 저장 및 임베딩
+        jobs.submit('chatbot.vectorize_conversations', user.id, coalesce_key=f"vectorize:{user.id}")
+        
+        # 예산을 넘은 오래된 대화를 세션 요약으로 이동
+        if session_id:
+            jobs.submit('chatbot.session_summary', session_id, coalesce_key=f"session_summary:{session_id}")
     
-    def _background_tasks(self, user, question: str, answer: str):
-        """백그라운드에서 실행될 작업들"""
+    def _update_session_summary(self, session_id: int) -> bool:
+        """최근 대화로 남길 메시지를 제외한 오래된 메시지를 롤링 요약에 합침
+        
+        요약 대상이 SUMMARY_TRIGGER_MESSAGES 개 이상 쌓였을 때만 LLM 을 호출하며,
+        summarized_message_id 비교 후 갱신하므로 동시에 실행된 요약과 겹쳐도 한 번만 반영됩니다.
+        """
+        config = get_budget_config()
         try:
-            # 답변에서도 선호도 추출
-            self._extract_and_save_preferences(user, answer)
-            
-            # 일일 추천 생성 (필요한 경우)
-            self._generate_daily_recommendations(user)
+            session = ChatSession.objects.filter(id=session_id).only(
+                'id', 'user_id', 'history_summary', 'summarized_message_id'
+            ).first()
+            if not session:
+                return False
+            
+            pending = list(
+                ChatMessage.objects.filter(
+                    session_id=session_id, id__gt=session.summarized_message_id or 0
+                ).order_by('id').values_list('id', 'sender', 'message')
+            )
+            counter = TokenCounter(config['SUMMARY_MODEL'])
+            to_summarize, _ = split_overflow(
+                pending, counter, config['HISTORY_MAX_MESSAGES'], config['SUMMARY_KEEP_TOKENS']
+            )
+            if len(to_summarize) < config['SUMMARY_TRIGGER_MESSAGES']:
+                return False
+            
+            response = self.llm.chat(
+                build_summary_messages(
+                    session.history_summary, to_summarize, counter, config['HISTORY_MESSAGE_TOKENS']
+                ),
+                model=config['SUMMARY_MODEL'],
+                temperature=0.3,
+                max_tokens=config['SUMMARY_MAX_TOKENS'],
+                operation='summary'
+            )
+            summary = response.content.strip()
             
-            # 중요한 대화는 벡터화하여 저장 (3세션 이상 지나면)
-            self._vectorize_important_conversations(user)
+            updated = ChatSession.objects.filter(
+                id=session_id, summarized_message_id=session.summarized_message_id
+            ).update(history_summary=summary, summarized_message_id=to_summarize[-1][0])
+            if updated:
+                # 요약된 메시지가 최근 대화로 중복되지 않도록 대화 상태를 다시 만듦
+                get_chat_state_store().invalidate(session.user_id)
+                logger.info(
+                    f"📝 세션 요약 갱신: session={session_id}, 메시지 {len(to_summarize)}개 → "
+                    f"{counter.count(summary)} 토큰"
+                )
+            return bool(updated)
             
         except Exception as e:
-            logger.error(f"백그라운드 작업 실패: {str(e)}")
+            logger.error(f"세션 요약 실패: {str(e)}")
+            return False
+    
+    def _retrieve_past_conversations(self, user, question: str, query_embedding: Optional[np.ndarray],
+                                     exclude_message_ids: List[int]) -> List[Dict]:
+        """현재 질문과 관련된 과거 대화 스니펫 검색 (기억이 없는 사용자는 임베딩 생략)"""
+        config = getattr(settings, 'CHATBOT_CONVERSATION_MEMORY', {})
+        if not config.get('ENABLED', True):
+            return []
+        try:
+            memory = get_conversation_memory()
+            if not memory.size(user.id):
+                return []
+            if query_embedding is None:
+                query_embedding = self._embed_query(question)
+            if query_embedding is None:
+                return []
+            snippets = memory.search(user.id, query_embedding, exclude_message_ids=exclude_message_ids)
+            if snippets:
+                logger.debug(f"🧠 과거 대화 {len(snippets)}개 검색 (최고 유사도 {snippets[0]['score']:.3f})")
+            return snippets
+        except Exception as e:
+            logger.error(f"과거 대화 검색 실패: {str(e)}")
+            return []
     
     def _vectorize_important_conversations(self, user):
-        """중요한 대화를 벡터화하여 저장"""
+        """새 사용자 메시지를 스니펫으로 저장하고 배치로 임베딩 (장기 기억 검색용)"""
         try:
-            # 마지막 벡터화 시점 확인
-            last_vectorized = VectorizedChatHistory.objects.filter(
-                user=user
-            ).order_by('-created_at').first()
+            collected = collect_snippets(user.id)
             
-            # 3세션 이상 지났는지 확인
-            session_count = ChatSession.objects.filter(
-                user=user,
-                started_at__gt=last_vectorized.created_at if last_vectorized else timezone.now() - timedelta(days=30)
-            ).count()
-            
-            if session_count >= 3:
-                # 중요한 대화 추출 및 벡터화
-                important_messages = ChatMessage.objects.filter(
-                    user=user,
-                    created_at__gt=last_vectorized.created_at if last_vectorized else timezone.now() - timedelta(days=30)
-                ).filter(
-                    Q(message__icontains='좋아') | Q(message__icontains='싫어') |
-                    Q(message__icontains='못 먹') | Q(message__icontains='알레르기') |
-                    Q(message__icontains='질병') | Q(message__icontains='선호')
-                )
-                
-                for msg in important_messages:
-                    # 벡터화 및 저장
-                    VectorizedChatHistory.objects.create(
-                        user=user,
-                        session=msg.session,
-                        message=msg.message,
-                        sender=msg.sender,
-                        context={
-                            'original_context': msg.context,
-                            'vectorized_at': timezone.now().isoformat()
-                        }
-                    )
-                
-                logger.info(f"✅ {len(important_messages)}개의 중요 대화 벡터화 완료")
+            # 임베딩 모델이 아직 로드되지 않았으면 대기 스니펫으로 남겨두고 다음 턴 / embed_chat_history 에서 처리
+            if not UltraFastHealthChatbot._embeddings:
+                return
+            
+            config = getattr(settings, 'CHATBOT_CONVERSATION_MEMORY', {})
+            embedded = embed_pending(
+                UltraFastHealthChatbot._embeddings,
+                user_id=user.id,
+                batch_size=config.get('EMBED_BATCH_SIZE', 64)
+            )
+            if collected or embedded:
+                logger.info(f"✅ 대화 스니펫 {collected}개 추가, {embedded}개 벡터화 완료")
                 
         except Exception as e:
             logger.error(f"대화 벡터화 실패: {str(e)}")
     
     # 기존 메서드들은 그대로 유지
-    def get_or_create_session(self, user) -> ChatSession:
-        """활성 세션 가져오기 또는 새 세션 생성"""
-        # 활성 세션 확인
-        active_session = ChatSession.objects.filter(
-            user=user,
-            is_active=True
-        ).first()
+    def _get_session_state(self, user):
+        """활성 세션의 대화 상태 (캐시 → 없으면 DB), 마지막 활동이 IDLE_TIMEOUT 을 넘었으면 새 세션 시작"""
+        return self._resolve_session_state(user, get_chat_state_store().get(user.id))
+    
+    def _resolve_session_state(self, user, state):
+        """캐시에서 읽은 상태가 없으면 DB 에서 만들고, 유휴 세션이면 새 세션으로 교체"""
+        store = get_chat_state_store()
+        state = state or store.load(user)
         
-        if active_session:
-            # 마지막 활동이 1시간 이상 지났으면 새 세션 시작
-            last_message = active_session.messages.order_by('-created_at').first()
-            if last_message and (timezone.now() - last_message.created_at).seconds > 3600:
-                active_session.end_session()
-                active_session = None
+        if state and state.is_idle(store.idle_timeout):
+            # 세션 종료 / 생성 시그널이 CHAT 세대를 올려 이전 상태는 무효화됨
+            state.session.end_session()
+            state = None
         
-        if not active_session:
+        if not state:
             # 새 세션 생성
-            active_session = ChatSession.objects.create(user=user)
-            logger.debug(f"📝 새 세션 생성: {active_session.id}")
+            session = ChatSession.objects.create(user=user)
+            logger.debug(f"📝 새 세션 생성: {session.id}")
+            state = store.start(session)
         
-        return active_session
+        return state
+    
+    async def _aget_session_state(self, user):
+        """_get_session_state() 의 비동기 버전 (캐시에 유효한 상태가 있으면 DB 에 접근하지 않음)"""
+        store = get_chat_state_store()
+        state = store.get(user.id)
+        if state and not state.is_idle(store.idle_timeout):
+            return state
+        return await sync_to_async(self._resolve_session_state)(user, state)
+    
+    def get_or_create_session(self, user) -> ChatSession:
+        """활성 세션 가져오기 또는 새 세션 생성"""
+        return self._get_session_state(user).session
+    
+    async def aget_or_create_session(self, user) -> ChatSession:
+        """활성 세션 가져오기 또는 새 세션 생성 (비동기)"""
+        return (await self._aget_session_state(user)).session
     
     def _get_user_context(self, user) -> Dict:
         """사용자 컨텍스트 정보 수집"""
@@ -917,37 +1541,31 @@ Always respond in English.
                 if '매운 음식' not in disliked:
                     disliked.append('매운 음식')
                     profile.disliked_foods = disliked
-                    profile.save()
-                    
-                    # 캐시 무효화
-                    cache.delete(f"user_context:{user.id}")
+                    profile.save()  # post_save 시그널이 profile 캐시 세대를 올림
                     
         except Exception as e:
             logger.error(f"선호도 업데이트 실패: {str(e)}")
     
     def _generate_daily_recommendations(self, user):
-        """일일 추천 생성 (간단한 체크만)"""
-        today = timezone.now().date()
-        
-        # 오늘의 추천이 이미 있는지 확인
-        existing = DailyRecommendation.objects.filter(
-            user=user,
-            date=today
-        ).exists()
-        
-        if not existing:
-            # 실제 생성은 별도 태스크로 처리
-            logger.info(f"일일 추천 생성 필요: {user.username}")
+        """오늘의 추천이 없으면 생성 (야간 배치 이후 가입 / 활성화된 사용자, 백그라운드 작업)
+
+        버킷 추천은 야간 배치가 캐시해 두므로 대부분 LLM 호출 없이 사용자별 반영만 수행
+        """
+        if not DailyRecommendation.objects.filter(user=user, date=recommendation_date()).exists():
+            generate_daily_recommendations(user_ids=[user.id])
     
     def get_conversation_history(self, user, limit: int = 50) -> List[Dict]:
         """대화 기록 가져오기"""
         # 캐시 확인
-        cache_key = f"chat_history:{user.id}:{limit}"
+        cache_key = UserCacheNamespace(user.id, CHAT).key('chat_history', limit)
         cached_history = cache.get(cache_key)
         if cached_history:
             return cached_history
         
         # 최근 세션들의 메시지
+        # 쓰기 버퍼에 남은 메시지를 먼저 저장
+        get_write_buffer().flush()
+        
         recent_sessions = ChatSession.objects.filter(
             user=user
         ).order_by('-started_at')[:self.max_recent_sessions]
@@ -973,33 +1591,23 @@ Always respond in English.
     
     def clear_user_cache(self, user_id: int):
         """사용자 캐시 삭제"""
-        # 모든 관련 캐시 삭제
-        cache_keys = [
-            f"user_context:{user_id}",
-            f"system_prompt:{user_id}:*",
-            f"system_prompt_memory:{user_id}:*",
-            f"chat_history:{user_id}:*"
-        ]
-        
-        for key_pattern in cache_keys:
-            if '*' in key_pattern:
-                # 패턴 매칭은 Redis 등 고급 캐시 백엔드에서만 지원
-                pass
-            else:
-                cache.delete(key_pattern)
-        
-        # 현재 활성 세션 종료
+        # 현재 활성 세션 종료 (update 는 시그널이 없으므로 아래 세대 갱신보다 먼저)
         ChatSession.objects.filter(
             user_id=user_id,
             is_active=True
         ).update(is_active=False, ended_at=timezone.now())
+        
+        # 세대 번호를 올려 사용자 컨텍스트 / 시스템 프롬프트 / 대화 기록 / 대화 상태 캐시를 모두 무효화
+        # (파생 키를 하나씩 찾아 지울 필요가 없어 캐시 백엔드와 무관하게 동작)
+        bump_generation(user_id, CHAT, PROFILE)
+        cache.delete(memory_cache_key(user_id))
     
     def get_daily_recommendations(self, user, language: str = 'ko') -> Dict:
-        """오늘의 추천 가져오기"""
-        today = timezone.now().date()
+        """오늘의 추천 가져오기 (야간 배치가 미리 만든 행만 조회, LLM 호출 없음)"""
+        remember_language(user.id, language)
         recommendations = DailyRecommendation.objects.filter(
             user=user,
-            date=today
+            date=recommendation_date()
         )
         
         result = {
@@ -1008,22 +1616,8 @@ Always respond in English.
         }
         
         for rec in recommendations:
-            result[rec.type] = {
-                'title': rec.title,
-                'description': rec.description,
-                'details': rec.details,
-                'reasoning': rec.reasoning
-            }
-        
-        # 추천이 없으면 생성 시도
-        if not result['workout'] and not result['diet']:
-            self._generate_daily_recommendations_full(user, language)
-            # 다시 조회
-            recommendations = DailyRecommendation.objects.filter(
-                user=user,
-                date=today
-            )
-            for rec in recommendations:
+            # 최신 추천 우선
+            if result.get(rec.type) is None:
                 result[rec.type] = {
                     'title': rec.title,
                     'description': rec.description,
@@ -1031,217 +1625,13 @@ Always respond in English.
                     'reasoning': rec.reasoning
                 }
         
-        return result
-    
-    def _generate_daily_recommendations_full(self, user, language: str = 'ko'):
-        """일일 추천 실제 생성"""
-        today = timezone.now().date()
-        
-        # 오늘의 추천이 이미 있는지 확인
-        existing_recommendations = DailyRecommendation.objects.filter(
-            user=user,
-            date=today
-        )
-        
-        if existing_recommendations.exists():
-            return
-        
-        try:
-            profile = user.profile
-            
-            # BMI 계산
-            bmi = None
-            if profile.height and profile.weight:
-                height_m = profile.height / 100
-                bmi = round(profile.weight / (height_m ** 2), 1)
-            
-            # 운동 추천 생성
-            workout_recommendation = self._generate_workout_recommendation(user, profile, bmi, language)
-            if workout_recommendation:
-                DailyRecommendation.objects.create(
-                    user=user,
-                    type='workout',
-                    **workout_recommendation
-                )
-            
-            # 식단 추천 생성
-            diet_recommendation = self._generate_diet_recommendation(user, profile, bmi, language)
-            if diet_recommendation:
-                DailyRecommendation.objects.create(
-                    user=user,
-                    type='diet',
-                    **diet_recommendation
-                )
-            
-            logger.info(f"✅ {user.username}님의 일일 추천 생성 완료")
-            
-        except Exception as e:
-            logger.error(f"일일 추천 생성 실패: {str(e)}")
-    
-    def _generate_workout_recommendation(self, user, profile, bmi, language: str = 'ko') -> Optional[Dict]:
-        """운동 추천 생성"""
-        try:
-            # 추천 근거 수집
-            reasoning_data = {
-                'bmi': bmi,
-                'experience': profile.get_exercise_experience_display(),
-                'preferred_exercises': profile.preferred_exercises or [],
-                'disliked_exercises': profile.disliked_exercises or [],
-                'diseases': profile.diseases or [],
-                'age': profile.age
-            }
-            
-            # 언어별 프롬프트
-            if language == 'en':
-                prompt = f"""
-                User information:
-                - BMI: {bmi}
-                - Exercise experience: {reasoning_data['experience']}
-                - Preferred exercises: {', '.join(reasoning_data['preferred_exercises']) or 'None'}
-                - Disliked exercises: {', '.join(reasoning_data['disliked_exercises']) or 'None'}
-                - Diseases: {', '.join(reasoning_data['diseases']) or 'None'}
-                - Age: {reasoning_data['age']} years old
-                
-                Based on the above information, please recommend today's exercise.
-                Please answer in JSON format:
-                {{
-                    "title": "Exercise title",
-                    "description": "Exercise description (2-3 sentences)",
-                    "details": {{
-                        "duration": "Exercise duration",
-                        "intensity": "Exercise intensity",
-                        "exercises": ["exercise1", "exercise2", "exercise3"]
-                    }},
-                    "reasoning": "Reason for recommendation (2-3 sentences)"
-                }}
-                All text must be in English.
-                """
-            else:  # 기본값 한국어
-                prompt = f"""
-                사용자 정보:
-                - BMI: {bmi}
-                - 운동 경력: {reasoning_data['experience']}
-                - 선호 운동: {', '.join(reasoning_data['preferred_exercises']) or '없음'}
-                - 싫어하는 운동: {', '.join(reasoning_data['disliked_exercises']) or '없음'}
-                - 질병: {', '.join(reasoning_data['diseases']) or '없음'}
-                - 나이: {reasoning_data['age']}세
-                
-                위 정보를 바탕으로 오늘의 운동을 추천해주세요.
-                JSON 형식으로 답변해주세요:
-                {{
-                    "title": "운동 제목",
-                    "description": "운동 설명 (2-3문장)",
-                    "details": {{
-                        "duration": "운동 시간",
-                        "intensity": "운동 강도",
-                        "exercises": ["운동1", "운동2", "운동3"]
-                    }},
-                    "reasoning": "추천 이유 (2-3문장)"
-                }}
-                """
-            
-            system_content = "당신은 전문 피트니스 트레이너입니다." if language == 'ko' else "You are a professional fitness trainer."
-            
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": system_content},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7
-            )
-            
-            # JSON 파싱
-            result = json.loads(response.choices[0].message.content)
-            result['based_on'] = reasoning_data
-            
-            return result
-            
-        except Exception as e:
-            logger.error(f"운동 추천 생성 실패: {str(e)}")
-            return None
-    
-    def _generate_diet_recommendation(self, user, profile, bmi, language: str = 'ko') -> Optional[Dict]:
-        """식단 추천 생성"""
-        try:
-            # 추천 근거 수집
-            reasoning_data = {
-                'bmi': bmi,
-                'preferred_foods': profile.preferred_foods or [],
-                'disliked_foods': profile.disliked_foods or [],
-                'allergies': profile.allergies or [],
-                'diseases': profile.diseases or []
-            }
-            
-            # 언어별 프롬프트
-            if language == 'en':
-                prompt = f"""
-                User information:
-                - BMI: {bmi}
-                - Preferred foods: {', '.join(reasoning_data['preferred_foods']) or 'None'}
-                - Disliked foods: {', '.join(reasoning_data['disliked_foods']) or 'None'}
-                - Allergies: {', '.join(reasoning_data['allergies']) or 'None'}
-                - Diseases: {', '.join(reasoning_data['diseases']) or 'None'}
-                
-                Based on the above information, please recommend today's diet.
-                Please answer in JSON format:
-                {{
-                    "title": "Diet title",
-                    "description": "Diet description (2-3 sentences)",
-                    "details": {{
-                        "breakfast": ["food1", "food2"],
-                        "lunch": ["food1", "food2", "food3"],
-                        "dinner": ["food1", "food2", "food3"],
-                        "snack": ["snack1"]
-                    }},
-                    "reasoning": "Reason for recommendation (2-3 sentences)"
-                }}
-                All text must be in English.
-                """
-            else:  # 기본값 한국어
-                prompt = f"""
-                사용자 정보:
-                - BMI: {bmi}
-                - 선호 음식: {', '.join(reasoning_data['preferred_foods']) or '없음'}
-                - 싫어하는 음식: {', '.join(reasoning_data['disliked_foods']) or '없음'}
-                - 알레르기: {', '.join(reasoning_data['allergies']) or '없음'}
-                - 질병: {', '.join(reasoning_data['diseases']) or '없음'}
-                
-                위 정보를 바탕으로 오늘의 식단을 추천해주세요.
-                JSON 형식으로 답변해주세요:
-                {{
-                    "title": "식단 제목",
-                    "description": "식단 설명 (2-3문장)",
-                    "details": {{
-                        "breakfast": ["음식1", "음식2"],
-                        "lunch": ["음식1", "음식2", "음식3"],
-                        "dinner": ["음식1", "음식2", "음식3"],
-                        "snack": ["간식1"]
-                    }},
-                    "reasoning": "추천 이유 (2-3문장)"
-                }}
-                """
-            
-            system_content = "당신은 전문 영양사입니다." if language == 'ko' else "You are a professional nutritionist."
-            
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": system_content},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7
+        # 아직 없으면 백그라운드에서 생성 (다음 조회부터 반영)
+        if not result['workout'] and not result['diet']:
+            get_job_queue().submit(
+                'chatbot.daily_recommendations', user.id, coalesce_key=f"daily_recommendations:{user.id}"
             )
-            
-            # JSON 파싱
-            result = json.loads(response.choices[0].message.content)
-            result['based_on'] = reasoning_data
-            
-            return result
-            
-        except Exception as e:
-            logger.error(f"식단 추천 생성 실패: {str(e)}")
-            return None
+        
+        return result
 
 
 # 전역 챗봇 인스턴스
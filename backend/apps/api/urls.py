@@ -2,7 +2,7 @@ from django.urls import path, include
 from .views import (
     RegisterView, LoginView, LogoutView, UserProfileView,
     ChangePasswordView, health_options, check_email, get_csrf_token,
-    ChatbotView, clear_chat_history, chatbot_status, daily_recommendations,
+    ChatbotView, chatbot_stream, chatbot_async, clear_chat_history, chatbot_status, chatbot_readiness, chatbot_metrics, daily_recommendations,
     ChatSessionView
 )
 from .views_sessions import (
@@ -113,8 +113,12 @@ urlpatterns = [
     
     # AI 챗봇
     path('chatbot/', ChatbotView.as_view(), name='chatbot'),
+    path('chatbot/stream/', chatbot_stream, name='chatbot_stream'),
+    path('chatbot/async/', chatbot_async, name='chatbot_async'),
     path('chatbot/history/clear/', clear_chat_history, name='clear_chat_history'),
     path('chatbot/status/', chatbot_status, name='chatbot_status'),
+    path('chatbot/ready/', chatbot_readiness, name='chatbot_readiness'),
+    path('chatbot/metrics/', chatbot_metrics, name='chatbot_metrics'),
     
     # 대화 세션 관리
     path('chatbot/sessions/', ChatSessionView.as_view(), name='chat_sessions'),
@@ -0,0 +1,221 @@
+"""
+사용자 기억(UserMemory) 관리
+- 메시지 저장 시 추출한 선호도로 증분 갱신하고, 프로필이 바뀌면 선호도 목록을 동기화
+- 응답 생성 시에는 캐시 한 번(미스 시 DB 한 번)으로 읽음
+- 최근 메시지를 매 요청마다 다시 스캔하던 방식을 대체
+"""
+import logging
+from typing import Dict, Iterable, Optional
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from apps.core.models import DISEASE_CHOICES, ChatMessage, UserMemory, UserProfile
+
+logger = logging.getLogger(__name__)
+
+MEMORY_CACHE_TIMEOUT = 3600  # 1시간 (갱신 시 바로 덮어씀)
+
+# 선호도 추출 키워드
+TASTE_KEYWORDS = {
+    'spicy': ['매운', '맵', '스파이시', '칼칼'],
+    'sweet': ['단', '달', '스위트', '디저트'],
+    'salty': ['짠', '짭짤', '소금'],
+    'sour': ['신', '새콤', '시큼'],
+    'bitter': ['쓴', '씁쓸'],
+}
+FOOD_TASTE_KEYWORDS = {
+    '매운 음식': ['매운'],
+    '단 음식': ['단', '달'],
+    '짠 음식': ['짠', '짭짤'],
+}
+PREFERENCE_FOODS = ['치킨', '피자', '파스타', '김치', '된장', '커피', '차', '샐러드', '과일', '야채', '고기', '생선']
+PREFERENCE_EXERCISES = ['런닝', '달리기', '요가', '필라테스', '헬스', '웨이트', '수영', '자전거', '등산', '걷기']
+SENTIMENT_WORDS = {
+    'food_dislike': ['싫어', '못 먹', '안 먹'],
+    'food_like': ['좋아', '자주 먹'],
+    'food_dislike_extra': ['별로'],
+    'food_like_extra': ['즐겨'],
+    'exercise_dislike': ['싫어', '못', '안', '힘들', '어려워'],
+    'exercise_like': ['좋아', '자주', '즐겨'],
+    'taste_dislike': ['싫', '못', '안'],
+    'taste_like': ['좋', '자주'],
+    'condition': ['있어', '진단', '앓고'],
+}
+
+
+def preference_groups() -> Dict[str, Dict[str, Iterable[str]]]:
+    """MultiPatternMatcher 에 넣을 선호도 키워드 그룹"""
+    return {
+        'taste': TASTE_KEYWORDS,
+        'food_taste': FOOD_TASTE_KEYWORDS,
+        'food': {food: [food] for food in PREFERENCE_FOODS},
+        'exercise': {exercise: [exercise] for exercise in PREFERENCE_EXERCISES},
+        'condition': {condition: [condition] for condition in DISEASE_CHOICES},
+        'sentiment': SENTIMENT_WORDS,
+    }
+
+
+_preference_matcher = None
+
+
+def get_preference_matcher():
+    """선호도 그룹만 담은 매처 (챗봇 인스턴스 없이 백필할 때 사용)"""
+    global _preference_matcher
+    if _preference_matcher is None:
+        from .keyword_matcher import MultiPatternMatcher
+        _preference_matcher = MultiPatternMatcher(preference_groups())
+    return _preference_matcher
+
+
+def extract_preferences(hits) -> Dict:
+    """매처 스캔 결과에서 음식/운동 선호, 맛 선호도, 언급된 질환 추출"""
+    food_dislike = hits.has('sentiment', 'food_dislike')
+    food_like = hits.has('sentiment', 'food_like')
+    preferences = {
+        'food_like': [],
+        'food_dislike': [],
+        'exercise_like': [],
+        'exercise_dislike': [],
+        'taste': {},
+        'conditions': [],
+    }
+
+    # "매운거 싫어해" 같은 패턴 처리 (매운 / 단 / 짠 음식)
+    for taste_food in FOOD_TASTE_KEYWORDS:
+        if hits.has('food_taste', taste_food):
+            if food_dislike:
+                preferences['food_dislike'].append(taste_food)
+            elif food_like:
+                preferences['food_like'].append(taste_food)
+
+    # 특정 음식들
+    for food in PREFERENCE_FOODS:
+        if hits.has('food', food):
+            if food_dislike or hits.has('sentiment', 'food_dislike_extra'):
+                preferences['food_dislike'].append(food)
+            elif food_like or hits.has('sentiment', 'food_like_extra'):
+                preferences['food_like'].append(food)
+
+    # 운동 선호/비선호
+    for exercise in PREFERENCE_EXERCISES:
+        if hits.has('exercise', exercise):
+            if hits.has('sentiment', 'exercise_dislike'):
+                preferences['exercise_dislike'].append(exercise)
+            elif hits.has('sentiment', 'exercise_like'):
+                preferences['exercise_like'].append(exercise)
+
+    # 맛 선호도
+    for taste in TASTE_KEYWORDS:
+        if hits.has('taste', taste):
+            if hits.has('sentiment', 'taste_dislike'):
+                preferences['taste'][taste] = 'dislike'
+            elif hits.has('sentiment', 'taste_like'):
+                preferences['taste'][taste] = 'like'
+
+    # "당뇨병이 있어요" 같은 질환 언급
+    if hits.has('sentiment', 'condition'):
+        preferences['conditions'] = [c for c in DISEASE_CHOICES if hits.has('condition', c)]
+
+    return preferences
+
+
+def memory_cache_key(user_id: int) -> str:
+    return f"user_memory:{user_id}"
+
+
+def update_user_memory(user_id: int, profile=None, preferences: Dict = None,
+                       message_id: Optional[int] = None) -> Optional[UserMemory]:
+    """프로필 동기화 / 메시지 선호도 반영 후 변경이 있으면 버전을 올려 저장하고 캐시를 덮어씀
+
+    매 사용자 메시지마다 호출되므로, 반영할 맛 선호도 / 질환이 없으면 DB 를 건드리지 않고 None 을 반환하고
+    이미 반영된 내용이면 잠금 없이 끝냄 (행 잠금은 실제로 바뀔 때만)
+    """
+    if profile is None:
+        if not preferences or not (preferences.get('taste') or preferences.get('conditions')):
+            return None
+        current = UserMemory.objects.filter(user_id=user_id).first()
+        if current is not None and not current.apply_preferences(preferences):
+            return current
+
+    with transaction.atomic():
+        memory, _ = UserMemory.objects.select_for_update().get_or_create(user_id=user_id)
+        changed = False
+        if profile is not None:
+            changed = memory.sync_profile(profile) or changed
+        if preferences:
+            changed = memory.apply_preferences(preferences) or changed
+        if changed:
+            if message_id is not None and (memory.last_message_id or 0) < message_id:
+                memory.last_message_id = message_id
+            memory.version += 1
+            memory.save()
+
+    if changed:
+        cache.set(memory_cache_key(user_id), memory.to_memory(), MEMORY_CACHE_TIMEOUT)
+        logger.debug(f"🧠 사용자 기억 갱신: user={user_id}, v{memory.version}")
+    return memory
+
+
+def get_user_memory(user) -> Dict:
+    """캐시된 사용자 기억 (없으면 DB 에서 읽고, 행이 없으면 프로필로 생성)"""
+    cache_key = memory_cache_key(user.id)
+    memory = cache.get(cache_key)
+    if memory is not None:
+        return memory
+
+    row = UserMemory.objects.filter(user_id=user.id).first()
+    if row is None:
+        profile = user.profile if hasattr(user, 'profile') else None
+        # 프로필이 없으면 빈 기억 (행은 프로필 저장 / 선호도 언급 시 생성)
+        row = update_user_memory(user.id, profile=profile) if profile is not None else UserMemory(user_id=user.id)
+    memory = row.to_memory()
+    # 동시에 갱신된 최신 값을 덮어쓰지 않도록 비어 있을 때만 채움
+    cache.add(cache_key, memory, MEMORY_CACHE_TIMEOUT)
+    return memory
+
+
+def backfill_user_memory(user_id: int, rebuild: bool = False, chunk_size: int = 500):
+    """기존 사용자 메시지 기록으로 기억 채우기 (last_message_id 이후 메시지만), (기억, 처리한 메시지 수) 반환"""
+    matcher = get_preference_matcher()
+    with transaction.atomic():
+        memory, _ = UserMemory.objects.select_for_update().get_or_create(user_id=user_id)
+        changed = rebuild
+        if rebuild:
+            memory.taste_preferences = {}
+            memory.mentioned_conditions = []
+            memory.last_message_id = None
+
+        profile = UserProfile.objects.filter(user_id=user_id).first()
+        if profile is not None:
+            changed = memory.sync_profile(profile) or changed
+
+        messages = ChatMessage.objects.filter(
+            user_id=user_id,
+            sender='user',
+            id__gt=memory.last_message_id or 0
+        ).order_by('id').values_list('id', 'message')
+
+        processed = 0
+        for message_id, text in messages.iterator(chunk_size=chunk_size):
+            memory.apply_preferences(extract_preferences(matcher.scan(text.lower())))
+            memory.last_message_id = message_id
+            processed += 1
+
+        if changed or processed:
+            memory.version += 1
+            memory.save()
+
+    cache.set(memory_cache_key(user_id), memory.to_memory(), MEMORY_CACHE_TIMEOUT)
+    return memory, processed
+
+
+@receiver(post_save, sender=UserProfile)
+def sync_user_memory_with_profile(sender, instance, **kwargs):
+    """프로필 저장 시 기억의 선호도/질병 목록 동기화 (변경 없으면 쓰지 않음)"""
+    try:
+        update_user_memory(instance.user_id, profile=instance)
+    except Exception as e:
+        logger.error(f"사용자 기억 동기화 실패: {str(e)}")
@@ -0,0 +1,373 @@
+"""
+벡터스토어 증분 수집
+- 원본 파일/청크를 콘텐츠 해시로 식별하여 새로 생긴 청크만 임베딩
+- IVF 인덱스에 재학습 없이 추가 (add_with_ids), 분포 변화(drift)가 임계값을 넘을 때만 재학습
+- 원본에서 사라진 청크는 인덱스에서 제거하고 매니페스트에 tombstone 기록
+- 파생 인덱스(BM25, 카테고리 샤드)도 추가/제거된 청크만 갱신 (샤드는 같은 drift 임계값으로 재학습)
+- 매니페스트(ingest_manifest.json)는 인덱스와 같은 디렉토리에 저장
+"""
+import os
+import json
+import time
+import uuid
+import hashlib
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "ingest_manifest.json"
+MANIFEST_VERSION = 1
+
+# 기준 양자화 오차 계산에 사용할 최대 샘플 수
+BASELINE_SAMPLE_SIZE = 2000
+
+
+def chunk_hash(text: str) -> str:
+    """공백 차이를 무시한 청크 콘텐츠 해시"""
+    return hashlib.sha1(' '.join(text.split()).encode('utf-8')).hexdigest()
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class IngestionManifest:
+    """청크 해시 → 인덱스 위치, 원본 파일 → 청크 해시 목록, IVF 학습 상태"""
+
+    def __init__(self, data: Optional[Dict] = None):
+        self.data = data or {
+            'version': MANIFEST_VERSION,
+            'next_position': 0,
+            'chunks': {},
+            'sources': {},
+            'tombstones': [],
+            'ivf': {'baseline_error': None, 'trained_at': None, 'added_since_train': 0},
+        }
+
+    @property
+    def chunks(self) -> Dict[str, Dict]:
+        return self.data['chunks']
+
+    @property
+    def sources(self) -> Dict[str, Dict]:
+        return self.data['sources']
+
+    @property
+    def ivf(self) -> Dict:
+        return self.data['ivf']
+
+    @classmethod
+    def load(cls, directory: str) -> Optional['IngestionManifest']:
+        path = os.path.join(directory, MANIFEST_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def save(self, directory: str):
+        # 쓰는 도중 중단되어도 이전 매니페스트가 남도록 임시 파일 후 교체
+        path = os.path.join(directory, MANIFEST_FILE)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def from_vectorstore(cls, vectorstore) -> 'IngestionManifest':
+        """기존 벡터스토어의 청크를 해시하여 매니페스트 생성 (전체 재구축 직후 / 최초 증분 수집 시)"""
+        manifest = cls()
+        for position, doc_id in vectorstore.index_to_docstore_id.items():
+            doc = vectorstore.docstore.search(doc_id)
+            if not hasattr(doc, 'page_content'):
+                continue
+            source = (doc.metadata or {}).get('source', 'unknown')
+            entry = manifest.chunks.setdefault(chunk_hash(doc.page_content), {'position': position, 'sources': []})
+            if source not in entry['sources']:
+                entry['sources'].append(source)
+        manifest.data['next_position'] = max(vectorstore.index_to_docstore_id.keys(), default=-1) + 1
+        return manifest
+
+
+class VectorstoreIngestor:
+    """IVF 벡터스토어에 원본 파일을 증분 수집"""
+
+    def __init__(self, vectorstore_path: str, drift_threshold: float = 0.2, nprobe: int = 10):
+        from .optimize_vectorstore import VectorstoreOptimizer
+
+        self.vectorstore_path = vectorstore_path
+        self.drift_threshold = drift_threshold
+        self.nprobe = nprobe
+        self.optimizer = VectorstoreOptimizer()
+        self.optimizer.optimized_path = vectorstore_path
+        self.embeddings = None
+        self.vectorstore = None
+        self.manifest = None
+        self.bm25_index = None
+        self.category_shards = None
+
+    def load(self):
+        import faiss
+        from langchain_community.vectorstores import FAISS
+        from .ann_index import apply_search_params, load_saved_index_config
+        from .category_shards import CategoryShardIndex
+        from .hybrid_retrieval import BM25Index
+
+        self.embeddings = self.optimizer.load_embeddings()
+        self.vectorstore = FAISS.load_local(
+            self.vectorstore_path,
+            self.embeddings,
+            allow_dangerous_deserialization=True
+        )
+        index = self.vectorstore.index
+        if not isinstance(index, faiss.IndexIVF):
+            raise ValueError(f"증분 수집은 IVF 인덱스만 지원합니다: {type(index).__name__}")
+        # 위치 ID 로 벡터를 복원/삭제할 수 있도록 해시 direct map 사용
+        index.set_direct_map_type(faiss.DirectMap.Hashtable)
+        index_config = load_saved_index_config(self.vectorstore_path)
+        if index_config:
+            apply_search_params(index, index_config)
+        else:
+            index.nprobe = self.nprobe
+
+        self.manifest = IngestionManifest.load(self.vectorstore_path)
+        if self.manifest is None:
+            logger.info("매니페스트가 없어 기존 청크로 생성합니다")
+            self.manifest = IngestionManifest.from_vectorstore(self.vectorstore)
+        if not self.manifest.ivf.get('baseline_error'):
+            self.manifest.ivf['baseline_error'] = self._quantization_error(self._sample_vectors())
+
+        # 파생 인덱스는 증분 갱신, 없거나 이전 형식의 샤드면 저장 시 한 번만 전체 생성
+        self.bm25_index = BM25Index.load(self.vectorstore_path)
+        self.category_shards = CategoryShardIndex.load(self.vectorstore_path)
+        if self.category_shards is not None and not self.category_shards.position_ids:
+            logger.info("이전 형식의 카테고리 샤드라 전체 재생성합니다")
+            self.category_shards = None
+
+    def load_source_documents(self, path: str):
+        """원본 파일을 Document 목록으로 로드 (PDF / 텍스트)"""
+        from langchain_community.document_loaders import PyPDFLoader, TextLoader
+
+        if path.lower().endswith('.pdf'):
+            documents = PyPDFLoader(path).load()
+        else:
+            documents = TextLoader(path, encoding='utf-8').load()
+        for doc in documents:
+            doc.metadata['source'] = path
+        return documents
+
+    def _sample_vectors(self) -> np.ndarray:
+        positions = np.array(sorted(self.vectorstore.index_to_docstore_id.keys()), dtype='int64')
+        if len(positions) > BASELINE_SAMPLE_SIZE:
+            positions = np.random.default_rng(0).choice(positions, BASELINE_SAMPLE_SIZE, replace=False)
+        return self.vectorstore.index.reconstruct_batch(positions)
+
+    def _quantization_error(self, vectors: np.ndarray) -> float:
+        """벡터와 가장 가까운 IVF 중심점 사이의 평균 거리"""
+        if not len(vectors):
+            return 0.0
+        distances, _ = self.vectorstore.index.quantizer.search(np.ascontiguousarray(vectors, dtype='float32'), 1)
+        return float(distances.mean())
+
+    def measure_drift(self, vectors: np.ndarray) -> float:
+        """새 벡터의 양자화 오차가 학습 시점 기준보다 얼마나 커졌는지 (비율)"""
+        baseline = self.manifest.ivf.get('baseline_error')
+        if not baseline:
+            return 0.0
+        return self._quantization_error(vectors) / baseline - 1
+
+    def _release_chunks(self, source: str, hashes: Iterable[str], tombstoned: List[int]):
+        """원본에서 청크 참조 제거, 더 이상 참조가 없으면 tombstone 대상"""
+        for h in hashes:
+            entry = self.manifest.chunks.get(h)
+            if entry is None:
+                continue
+            if source in entry['sources']:
+                entry['sources'].remove(source)
+            if not entry['sources']:
+                tombstoned.append(entry['position'])
+                del self.manifest.chunks[h]
+
+    def _remove_positions(self, positions: List[int]):
+        if not positions:
+            return
+        if self.bm25_index is not None:
+            # BM25 는 제거할 청크의 토큰만 갱신하므로 docstore 에서 지우기 전에 본문 조회
+            removed_documents = []
+            for position in positions:
+                doc_id = self.vectorstore.index_to_docstore_id.get(position)
+                doc = self.vectorstore.docstore.search(doc_id) if doc_id else None
+                if hasattr(doc, 'page_content'):
+                    removed_documents.append((position, doc.page_content))
+            self.bm25_index.remove(removed_documents)
+        if self.category_shards is not None:
+            self.category_shards.remove(positions)
+
+        self.vectorstore.index.remove_ids(np.array(positions, dtype='int64'))
+        doc_ids = [self.vectorstore.index_to_docstore_id.pop(position) for position in positions
+                   if position in self.vectorstore.index_to_docstore_id]
+        if doc_ids:
+            self.vectorstore.docstore.delete(doc_ids)
+        self.manifest.data['tombstones'].extend(
+            {'position': position, 'removed_at': time.time()} for position in positions
+        )
+
+    def _add_chunks(self, new_chunks: Dict[str, Dict]) -> Tuple[float, List[str]]:
+        """새 청크만 임베딩하여 재학습 없이 IVF 인덱스와 파생 인덱스에 추가
+
+        drift 와 다시 만든 카테고리 샤드 목록 반환
+        """
+        from .category_shards import GENERAL_CATEGORY
+
+        if not new_chunks:
+            return 0.0, []
+
+        hashes = list(new_chunks.keys())
+        documents = [new_chunks[h]['document'] for h in hashes]
+        vectors = np.asarray(
+            self.embeddings.embed_documents([doc.page_content for doc in documents]), dtype='float32'
+        )
+        drift = self.measure_drift(vectors)
+
+        start = self.manifest.data['next_position']
+        positions = np.arange(start, start + len(hashes), dtype='int64')
+        self.vectorstore.index.add_with_ids(vectors, positions)
+
+        doc_ids = [str(uuid.uuid4()) for _ in hashes]
+        self.vectorstore.docstore.add(dict(zip(doc_ids, documents)))
+        for h, position, doc_id in zip(hashes, positions.tolist(), doc_ids):
+            self.vectorstore.index_to_docstore_id[position] = doc_id
+            self.manifest.chunks[h] = {'position': position, 'sources': new_chunks[h]['sources']}
+
+        self.manifest.data['next_position'] = start + len(hashes)
+        self.manifest.ivf['added_since_train'] += len(hashes)
+
+        if self.bm25_index is not None:
+            self.bm25_index.add(zip(positions.tolist(), [doc.page_content for doc in documents]))
+        rebuilt_shards = []
+        if self.category_shards is not None:
+            rebuilt_shards = self.category_shards.add(
+                vectors,
+                [doc.metadata.get('category', GENERAL_CATEGORY) for doc in documents],
+                positions,
+                reconstruct=self.vectorstore.index.reconstruct_batch,
+                drift_threshold=self.drift_threshold,
+            )
+        return drift, rebuilt_shards
+
+    def retrain(self):
+        """살아있는 벡터로 IVF 재학습 (위치 ID 유지, 저장된 인덱스 설정 사용)"""
+        import faiss
+        from .ann_index import build_index, load_saved_index_config
+
+        positions = np.array(sorted(self.vectorstore.index_to_docstore_id.keys()), dtype='int64')
+        vectors = self.vectorstore.index.reconstruct_batch(positions)
+        config = load_saved_index_config(self.vectorstore_path) or {'type': 'ivf_flat', 'nprobe': self.nprobe}
+        logger.info(f"IVF 재학습 중: {len(positions)}개 벡터, 설정={config}")
+
+        new_index = build_index(vectors, config, ids=positions)
+        new_index.set_direct_map_type(faiss.DirectMap.Hashtable)
+        self.vectorstore.index = new_index
+
+        self.manifest.ivf.update({
+            'baseline_error': self._quantization_error(vectors),
+            'trained_at': time.time(),
+            'added_since_train': 0,
+        })
+
+    def ingest(self, paths: Iterable[str] = (), removed_sources: Iterable[str] = (),
+               force_retrain: bool = False) -> Dict:
+        """원본 파일 수집/제거 후 인덱스, 매니페스트, 파생 인덱스 저장"""
+        if self.vectorstore is None:
+            self.load()
+
+        stats = {'added': 0, 'reused': 0, 'tombstoned': 0, 'unchanged_sources': 0,
+                 'drift': 0.0, 'retrained': False, 'retrained_shards': []}
+        new_chunks: Dict[str, Dict] = {}
+        tombstoned: List[int] = []
+
+        for path in paths:
+            source = os.path.abspath(path)
+            current_hash = file_hash(source)
+            previous = self.manifest.sources.get(source)
+            if previous and previous['file_hash'] == current_hash:
+                stats['unchanged_sources'] += 1
+                continue
+
+            hashes = []
+            for doc in self.optimizer.split_documents(self.load_source_documents(source)):
+                h = chunk_hash(doc.page_content)
+                if h in hashes:
+                    continue
+                hashes.append(h)
+
+                if h in self.manifest.chunks:
+                    if source not in self.manifest.chunks[h]['sources']:
+                        self.manifest.chunks[h]['sources'].append(source)
+                    stats['reused'] += 1
+                elif h in new_chunks:
+                    if source not in new_chunks[h]['sources']:
+                        new_chunks[h]['sources'].append(source)
+                else:
+                    doc.metadata.update({
+                        'category': self.optimizer.classify_document(doc.page_content),
+                        'chunk_size': len(doc.page_content),
+                        'indexed_at': time.time(),
+                        'content_hash': h,
+                    })
+                    new_chunks[h] = {'document': doc, 'sources': [source]}
+
+            if previous:
+                self._release_chunks(source, set(previous['chunks']) - set(hashes), tombstoned)
+            self.manifest.sources[source] = {
+                'file_hash': current_hash,
+                'chunks': hashes,
+                'ingested_at': time.time(),
+            }
+
+        for path in removed_sources:
+            source = os.path.abspath(path)
+            previous = self.manifest.sources.pop(source, None)
+            if previous:
+                self._release_chunks(source, previous['chunks'], tombstoned)
+
+        self._remove_positions(tombstoned)
+        stats['tombstoned'] = len(tombstoned)
+
+        stats['drift'], stats['retrained_shards'] = self._add_chunks(new_chunks)
+        stats['added'] = len(new_chunks)
+
+        if force_retrain or stats['drift'] > self.drift_threshold:
+            self.retrain()
+            stats['retrained'] = True
+
+        if stats['added'] or stats['tombstoned'] or stats['retrained']:
+            self.save()
+        else:
+            self.manifest.save(self.vectorstore_path)
+        return stats
+
+    def save(self):
+        """인덱스 + 매니페스트 + 파생 인덱스(BM25, 카테고리 샤드, mmap docstore) 저장
+
+        BM25 / 카테고리 샤드는 증분 갱신한 인덱스를 그대로 저장하고, 없을 때만 전체 생성
+        """
+        from .mmap_vectorstore import export_mmap_docstore
+
+        self.vectorstore.save_local(self.vectorstore_path)
+        self.manifest.save(self.vectorstore_path)
+        if self.bm25_index is None:
+            self.bm25_index = self.optimizer.create_bm25_index(self.vectorstore)
+        else:
+            self.bm25_index.save(self.vectorstore_path)
+        if self.category_shards is None:
+            self.category_shards = self.optimizer.create_category_shards(self.vectorstore)
+        self.category_shards.save(self.vectorstore_path)
+        export_mmap_docstore(self.vectorstore, self.vectorstore_path)
+        logger.info(f"증분 수집 결과 저장 완료: {self.vectorstore_path}")
@@ -3,7 +3,7 @@
 from .auth import (
     RegisterView, LoginView, LogoutView, UserProfileView,
     ChangePasswordView, health_options, check_email, get_csrf_token,
-    ChatbotView, clear_chat_history, chatbot_status, daily_recommendations,
+    ChatbotView, chatbot_stream, chatbot_async, clear_chat_history, chatbot_status, chatbot_readiness, chatbot_metrics, daily_recommendations,
     ChatSessionView
 )
 
@@ -14,6 +14,6 @@ from .image_proxy import ImageProxyView
 __all__ = [
     'RegisterView', 'LoginView', 'LogoutView', 'UserProfileView',
     'ChangePasswordView', 'health_options', 'check_email', 'get_csrf_token',
-    'ChatbotView', 'clear_chat_history', 'chatbot_status', 'daily_recommendations',
+    'ChatbotView', 'chatbot_stream', 'chatbot_async', 'clear_chat_history', 'chatbot_status', 'chatbot_readiness', 'chatbot_metrics', 'daily_recommendations',
     'ChatSessionView', 'ImageProxyView'
 ]
@@ -7,9 +7,12 @@ from rest_framework.authentication import SessionAuthentication
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth import get_user_model
 from django.middleware.csrf import get_token
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from asgiref.sync import sync_to_async
 from django.views.decorators.csrf import ensure_csrf_cookie, csrf_exempt
 from django.utils.decorators import method_decorator
-from django.utils import timezone
 from django.utils.translation import gettext as _
 from django.utils import translation
 from ..serializers import (
@@ -18,28 +21,58 @@ from ..serializers import (
     HealthOptionsSerializer
 )
 from apps.core.models import UserProfile, DISEASE_CHOICES, ALLERGY_CHOICES, ChatMessage, ChatSession
-# from ..chatbot import get_chatbot
-# from ..simple_chatbot import get_chatbot
-# from ..enhanced_chatbot import get_chatbot
-# from ..optimized_chatbot import get_chatbot
-try:
-    from ..ultrafast_chatbot_enhanced import get_chatbot  # 초고속 최적화 챗봇 사용 (다국어 지원)
-except ImportError:
-    try:
-        from ..ultrafast_chatbot import get_chatbot  # 기본 ultrafast 챗봇
-    except ImportError:
-        try:
-            from ..optimized_chatbot import get_chatbot  # 최적화 챗봇
-        except ImportError:
-            from ..simple_chatbot import get_chatbot  # Fallback to simple chatbot
 from ..authentication import CsrfExemptSessionAuthentication
+from ..semantic_cache import get_semantic_cache
+from ..chatbot_resources import resource_registry
+from ..write_buffer import get_write_buffer
+from ..jobs import get_job_queue
+from ..single_flight import get_single_flight
+from ..llm_gateway import get_llm_gateway
+from ..chat_state import get_chat_state_store
+from ..daily_recommendations import recommendation_date
+from ..stage_metrics import render_metrics
+from ..cache_namespace import PROFILE, UserCacheNamespace
+import hmac
+import json
 import logging
 import traceback
 
 logger = logging.getLogger(__name__)
 
+
+def _debug_kwargs(data):
+    """요청에 debug 가 있으면 챗봇에 단계별 소요 시간 반환 요청 (지원하지 않는 챗봇에는 인자를 넘기지 않음)"""
+    return {'debug': True} if str(data.get('debug', '')).lower() in ('1', 'true') else {}
+
 User = get_user_model()
 
+_chatbot_factory = None
+
+def get_chatbot():
+    """챗봇 인스턴스 가져오기
+    
+    챗봇 모듈은 최초 호출 시점에 import 합니다.
+    (migrate 등 관리 명령과 URL 로딩 시 무거운 import 비용 제거)
+    """
+    global _chatbot_factory
+    if _chatbot_factory is None:
+        # from ..chatbot import get_chatbot
+        # from ..simple_chatbot import get_chatbot
+        # from ..enhanced_chatbot import get_chatbot
+        # from ..optimized_chatbot import get_chatbot
+        try:
+            from ..ultrafast_chatbot_enhanced import get_chatbot as factory  # 초고속 최적화 챗봇 사용 (다국어 지원)
+        except ImportError:
+            try:
+                from ..ultrafast_chatbot import get_chatbot as factory  # 기본 ultrafast 챗봇
+            except ImportError:
+                try:
+                    from ..optimized_chatbot import get_chatbot as factory  # 최적화 챗봇
+                except ImportError:
+                    from ..simple_chatbot import get_chatbot as factory  # Fallback to simple chatbot
+        _chatbot_factory = factory
+    return _chatbot_factory()
+
 class RegisterView(generics.CreateAPIView):
     """회원가입 뷰"""
     queryset = User.objects.all()
@@ -143,15 +176,19 @@ class UserProfileView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        serializer = UserSerializer(request.user, context={'request': request})
-        return Response(serializer.data)
+        cache_key = UserCacheNamespace(request.user.id, PROFILE).key('user_profile', request.get_host())
+        data = cache.get(cache_key)
+        if data is None:
+            data = UserSerializer(request.user, context={'request': request}).data
+            cache.set(cache_key, data, 600)  # 프로필 / 사용자 저장 시 세대가 올라가 무효화
+        return Response(data)
     
     def patch(self, request):
         profile = request.user.profile
         serializer = ProfileUpdateSerializer(profile, data=request.data, partial=True)
         
         if serializer.is_valid():
-            serializer.save()
+            serializer.save()  # post_save 시그널이 profile 캐시 세대를 올림
             user_serializer = UserSerializer(request.user, context={'request': request})
             return Response({
                 'user': user_serializer.data,
@@ -307,7 +344,9 @@ class ChatbotView(APIView):
             
             # 응답 생성 (언어 정보 전달)
             logger.info("  2️⃣ 챗봇 응답 생성 시작")
-            result = chatbot.get_response(request.user, message, language=user_language)
+            result = chatbot.get_response(
+                request.user, message, language=user_language, **_debug_kwargs(request.data)
+            )
             logger.info(f"  ✅ 챗봇 응답 완료")
             logger.info(f"  📊 응답 성공 여부: {result.get('success')}")
             logger.info(f"  📦 응답 키: {list(result.keys())}")
@@ -320,6 +359,8 @@ class ChatbotView(APIView):
                     'sources': result.get('sources', 0),
                     'user_context': result.get('user_context')
                 }
+                if 'debug' in result:
+                    response_data['debug'] = result['debug']
                 logger.info(f"  ✅ 응답 데이터 준비 완료")
                 logger.info(f"  📏 응답 길이: {len(result['response'])}자")
                 logger.info("🎉 ChatbotView.post() 성공 완료")
@@ -372,12 +413,145 @@ class ChatbotView(APIView):
                 'error': '대화 기록을 불러올 수 없습니다.'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+def _sse_event(payload):
+    """Server-Sent Events 프레임 생성"""
+    return f"event: {payload.get('type', 'message')}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+@csrf_exempt
+async def chatbot_stream(request):
+    """AI 챗봇 스트리밍 API (SSE, ASGI 비동기 버전)
+    
+    비동기 제너레이터를 반환하므로 ASGI 에서 토큰이 도착하는 대로 클라이언트에 전송됩니다.
+    (동기 제너레이터는 ASGI 핸들러가 끝까지 모은 뒤 한 번에 보냄)
+    """
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Method not allowed'}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
+    
+    def resolve_user():
+        user = request.user
+        return user if user.is_authenticated else None
+    
+    user = await sync_to_async(resolve_user)()
+    if user is None:
+        return JsonResponse({'error': _('Authentication required.')}, status=status.HTTP_401_UNAUTHORIZED)
+    
+    try:
+        data = json.loads(request.body or b'{}')
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'Invalid JSON'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    user_language = data.get('language', 'ko')
+    translation.activate(user_language)
+    
+    message = (data.get('message') or '').strip()
+    if not message:
+        return JsonResponse({
+            'error': _('Please enter a message.')
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    chatbot = await sync_to_async(get_chatbot)()
+    debug_kwargs = _debug_kwargs(data)
+    logger.info(f"🌊 챗봇 스트리밍 시작: {user.email}")
+    
+    async def event_stream():
+        if hasattr(chatbot, 'astream_response'):
+            async for event in chatbot.astream_response(user, message, language=user_language, **debug_kwargs):
+                yield _sse_event(event)
+            return
+        
+        # 스트리밍을 지원하지 않는 챗봇은 전체 응답을 한 번에 전송
+        if hasattr(chatbot, 'aget_response'):
+            result = await chatbot.aget_response(user, message, language=user_language, **debug_kwargs)
+        else:
+            result = await sync_to_async(chatbot.get_response)(user, message, language=user_language, **debug_kwargs)
+        if result.get('success'):
+            events = [
+                {'type': 'token', 'content': result['response']},
+                {'type': 'done', **{k: v for k, v in result.items() if k != 'user_context'}}
+            ]
+        else:
+            events = [{'type': 'error', 'response': result['response'], 'error': result.get('error')}]
+        for event in events:
+            yield _sse_event(event)
+    
+    response = StreamingHttpResponse(event_stream(), content_type='text/event-stream; charset=utf-8')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx 버퍼링 비활성화
+    return response
+
+@csrf_exempt
+async def chatbot_async(request):
+    """AI 챗봇 API (ASGI 비동기 버전)
+    
+    LLM 응답을 기다리는 동안 워커 스레드를 점유하지 않습니다.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Method not allowed'}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
+    
+    def resolve_user():
+        # 세션 인증 및 X-Auth-User 헤더 인증 결과를 모두 반영
+        user = request.user
+        return user if user.is_authenticated else None
+    
+    user = await sync_to_async(resolve_user)()
+    if user is None:
+        return JsonResponse({'error': _('Authentication required.')}, status=status.HTTP_401_UNAUTHORIZED)
+    
+    try:
+        data = json.loads(request.body or b'{}')
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'Invalid JSON'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    user_language = data.get('language', 'ko')
+    translation.activate(user_language)
+    
+    message = (data.get('message') or '').strip()
+    if not message:
+        return JsonResponse({
+            'error': _('Please enter a message.')
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        chatbot = await sync_to_async(get_chatbot)()
+        debug_kwargs = _debug_kwargs(data)
+        if hasattr(chatbot, 'aget_response'):
+            result = await chatbot.aget_response(user, message, language=user_language, **debug_kwargs)
+        else:
+            result = await sync_to_async(chatbot.get_response)(user, message, language=user_language, **debug_kwargs)
+        
+        if result['success']:
+            response_data = {
+                'response': result['response'],
+                'raw_response': result.get('raw_response'),
+                'sources': result.get('sources', 0),
+                'user_context': result.get('user_context')
+            }
+            if 'debug' in result:
+                response_data['debug'] = result['debug']
+            return JsonResponse(response_data)
+        
+        logger.error(f"❌ 비동기 챗봇 응답 실패: {result.get('error')}")
+        return JsonResponse({
+            'error': result['response'],
+            'debug_error': result.get('error')
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        
+    except Exception as e:
+        logger.error(f"❌ 비동기 챗봇 처리 오류: {str(e)}")
+        logger.error(traceback.format_exc())
+        return JsonResponse({
+            'error': _('An error occurred while generating the chatbot response.'),
+            'debug_error': str(e),
+            'debug_type': type(e).__name__
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
 @api_view(['DELETE'])
 @permission_classes([IsAuthenticated])
 def clear_chat_history(request):
     """대화 기록 삭제"""
     try:
-        # 데이터베이스에서 삭제
+        # 데이터베이스에서 삭제 (쓰기 버퍼에 남은 메시지가 삭제 후 저장되지 않도록 먼저 flush)
+        get_write_buffer().flush()
         ChatMessage.objects.filter(user=request.user).delete()
         
         # 캐시 삭제
@@ -416,13 +590,20 @@ def chatbot_status(request):
             }
         
         # 대화 기록 수
+        get_write_buffer().flush()
         message_count = ChatMessage.objects.filter(user=request.user).count()
         
         return Response({
             'status': 'active',
             'user_context': user_context,
             'message_count': message_count,
-            'has_profile': user_context is not None
+            'has_profile': user_context is not None,
+            'semantic_cache': get_semantic_cache().stats(),
+            'write_buffer': get_write_buffer().stats(),
+            'background_jobs': get_job_queue().stats(),
+            'single_flight': get_single_flight().stats(),
+            'llm_gateway': get_llm_gateway().stats(),
+            'chat_state': get_chat_state_store().stats()
         })
         
     except Exception as e:
@@ -432,6 +613,34 @@ def chatbot_status(request):
             'error': str(e)
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def chatbot_readiness(request):
+    """챗봇 준비 상태 확인 (readiness probe)
+    
+    워밍업이 끝나기 전에는 503을 반환하지만, 챗봇 API는 검색 없이 계속 응답합니다.
+    """
+    ready = resource_registry.is_ready()
+    return Response({
+        'ready': ready,
+        'resources': resource_registry.status()
+    }, status=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE)
+
+def chatbot_metrics(request):
+    """챗봇 단계별 지연시간 히스토그램 (Prometheus 텍스트 형식)
+
+    CHATBOT_METRICS['TOKEN'] 이 설정되어 있으면 Authorization: Bearer <토큰> 헤더 필요,
+    설정되어 있지 않으면 관리자(is_staff) 로그인 세션에만 제공 (프로바이더별 호출 / 토큰 수 노출 방지)
+    """
+    token = getattr(settings, 'CHATBOT_METRICS', {}).get('TOKEN')
+    if token:
+        authorized = hmac.compare_digest(request.headers.get('Authorization', ''), f"Bearer {token}")
+    else:
+        authorized = request.user.is_authenticated and request.user.is_staff
+    if not authorized:
+        return HttpResponse(status=status.HTTP_403_FORBIDDEN)
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def daily_recommendations(request):
@@ -445,7 +654,7 @@ def daily_recommendations(request):
         
         return Response({
             'recommendations': recommendations,
-            'date': timezone.now().date().isoformat()
+            'date': recommendation_date().isoformat()
         })
         
     except Exception as e:
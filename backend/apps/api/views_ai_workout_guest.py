@@ -2,7 +2,6 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
-from django.conf import settings
 from django.db import transaction
 from django.core.cache import cache
 import json
@@ -12,6 +11,7 @@ from .models import Exercise, Routine, RoutineExercise
 from .serializers import RoutineSerializer, AIWorkoutRequestSerializer
 from .views_workout import VALID_EXERCISES_WITH_GIF, VALID_EXERCISES_BY_GROUP, EXERCISES_BY_LEVEL
 
+from .llm_gateway import get_llm_gateway
 from .guest_utils import check_guest_api_limit, get_or_create_guest_id, GUEST_API_LIMITS
 
 logger = logging.getLogger(__name__)
@@ -154,22 +154,20 @@ def ai_workout_recommendation_guest(request):
     """
     
     try:
-        # OpenAI 클라이언트 사용
-        import openai
-        client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
-        
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
+        response = get_llm_gateway().chat(
+            [
                 {"role": "system", "content": "You are a professional fitness trainer. Only use the exercises provided in the prompt. Never add exercises not in the list."},
                 {"role": "user", "content": prompt}
             ],
+            model="gpt-3.5-turbo",
             temperature=0.7,
-            max_tokens=500  # 비회원은 토큰 제한
+            max_tokens=500,  # 비회원은 토큰 제한
+            timeout=15,  # 실패 시 기본 루틴으로 대체
+            operation='guest_workout_routine'
         )
         
         # 응답 파싱
-        content = response.choices[0].message.content
+        content = response.content
         try:
             routine_data = json.loads(content)
         except json.JSONDecodeError:
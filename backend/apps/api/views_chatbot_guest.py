@@ -5,13 +5,13 @@ from django.core.cache import cache
 from datetime import datetime
 import json
 import logging
-import openai
-from django.conf import settings
+from .llm_gateway import get_llm_gateway
 
 logger = logging.getLogger(__name__)
 
 # 비회원 일일 메시지 제한
 GUEST_CHATBOT_LIMIT = 5  # 5번으로 변경
+GUEST_RESPONSE_CACHE_TIMEOUT = 600  # 같은 질문의 비회원 답변 캐시 (10분)
 
 def get_guest_id(request):
     """비회원 식별자 생성"""
@@ -118,20 +118,21 @@ def guest_chatbot(request):
         
         # 간단한 AI 응답 생성
         try:
-            # OpenAI API 사용
-            client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
-            
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
+            # 개인화 없는 응답이므로 같은 질문은 캐시된 답변 재사용
+            response = get_llm_gateway().chat(
+                [
                     {"role": "system", "content": "당신은 건강 관리를 도와주는 친절한 AI 헬스케어 도우미입니다. 사용자가 비회원이라는 점을 고려하여 간단하고 유용한 조언을 제공하되, 전문적인 의료 조언은 하지 마세요."},
                     {"role": "user", "content": message}
                 ],
+                model="gpt-3.5-turbo",
                 max_tokens=150,  # 비회원은 짧은 응답
-                temperature=0.7
+                temperature=0.7,
+                timeout=15,
+                cache_ttl=GUEST_RESPONSE_CACHE_TIMEOUT,
+                operation='guest_chat'
             )
             
-            ai_response = response.choices[0].message.content
+            ai_response = response.content
             
         except Exception as e:
             logger.error(f"OpenAI API error: {str(e)}")
@@ -2,10 +2,8 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from django.conf import settings
 from django.db import transaction
 from django.db.models import Sum
-import google.generativeai as genai
 import json
 import base64
 import logging
@@ -16,12 +14,14 @@ from apps.api.serializers.nutrition import (
     DailyNutritionSerializer
 )
 from apps.core.models import UserProfile
+from .llm_gateway import get_llm_gateway
 from django.utils import translation
 
 logger = logging.getLogger(__name__)
 
-# Google Gemini API 설정
-genai.configure(api_key=settings.GEMINI_API_KEY)
+# Google Gemini (클라이언트 설정은 LLM 게이트웨이가 담당)
+NUTRITION_MODEL = 'gemini-1.5-flash'
+NUTRITION_TIMEOUT = 60  # 이미지 분석은 텍스트보다 오래 걸림
 
 
 @api_view(['POST'])
@@ -168,22 +168,27 @@ def ai_nutrition_analysis_only(request):
     prompt = prompts.get(current_language, prompts['en'])
     
     try:
-        model = genai.GenerativeModel('gemini-1.5-flash' if data.get('image_base64') else 'gemini-1.5-flash')
-        
         # 이미지가 있는 경우
         if data.get('image_base64'):
             # base64 디코딩
             image_data = base64.b64decode(data['image_base64'].split(',')[1] if ',' in data['image_base64'] else data['image_base64'])
-            
-            response = model.generate_content([
+            content = [
                 prompt,
                 {"mime_type": "image/jpeg", "data": image_data}
-            ])
+            ]
         else:
-            response = model.generate_content(prompt)
+            content = prompt
+        
+        response = get_llm_gateway().chat(
+            [{"role": "user", "content": content}],
+            model=NUTRITION_MODEL,
+            provider='gemini',
+            timeout=NUTRITION_TIMEOUT,
+            operation='nutrition_analysis'
+        )
         
         # 응답 파싱
-        response_text = response.text
+        response_text = response.content
         # JSON 블록 추출
         if '```json' in response_text:
             json_str = response_text.split('```json')[1].split('```')[0].strip()
@@ -360,22 +365,27 @@ def ai_nutrition_analysis(request):
     prompt = prompts.get(current_language, prompts['en'])
     
     try:
-        model = genai.GenerativeModel('gemini-1.5-flash' if data.get('image_base64') else 'gemini-1.5-flash')
-        
         # 이미지가 있는 경우
         if data.get('image_base64'):
             # base64 디코딩
             image_data = base64.b64decode(data['image_base64'].split(',')[1] if ',' in data['image_base64'] else data['image_base64'])
-            
-            response = model.generate_content([
+            content = [
                 prompt,
                 {"mime_type": "image/jpeg", "data": image_data}
-            ])
+            ]
         else:
-            response = model.generate_content(prompt)
+            content = prompt
+        
+        response = get_llm_gateway().chat(
+            [{"role": "user", "content": content}],
+            model=NUTRITION_MODEL,
+            provider='gemini',
+            timeout=NUTRITION_TIMEOUT,
+            operation='nutrition_analysis'
+        )
         
         # 응답 파싱
-        response_text = response.text
+        response_text = response.content
         # JSON 블록 추출
         if '```json' in response_text:
             json_str = response_text.split('```json')[1].split('```')[0].strip()
@@ -9,6 +9,8 @@ from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from apps.core.models import ChatSession, ChatMessage
 from .authentication import CsrfExemptSessionAuthentication
+from .write_buffer import get_write_buffer
+from .cache_namespace import CHAT, bump_generation
 import logging
 from datetime import timedelta
 import re
@@ -30,6 +32,9 @@ class ChatSessionView(APIView):
             limit = int(request.query_params.get('limit', 7))
             offset = int(request.query_params.get('offset', 0))
             
+            # 쓰기 버퍼에 남은 메시지를 먼저 저장 (메시지 수 / 마지막 메시지 시간 반영)
+            get_write_buffer().flush()
+            
             # 명시적으로 현재 사용자의 세션만 조회
             sessions = ChatSession.objects.filter(
                 user__id=request.user.id  # 명시적 ID 매칭
@@ -153,8 +158,10 @@ class ChatSessionView(APIView):
                 user=request.user
             )
             
-            # 세션과 관련된 메시지도 함께 삭제
+            # 세션과 관련된 메시지도 함께 삭제 (쓰기 버퍼의 메시지까지)
+            get_write_buffer().flush()
             session.delete()
+            bump_generation(request.user.id, CHAT)  # 캐시된 대화 기록 무효화
             
             return Response({
                 'message': '세션이 삭제되었습니다.'
@@ -200,7 +207,8 @@ def get_session_messages(request, session_id):
             user__id=request.user.id  # 명시적 ID 매칭
         )
         
-        # 메시지 조회 - 이중 보안 확인
+        # 메시지 조회 - 이중 보안 확인 (쓰기 버퍼에 남은 메시지를 먼저 저장)
+        get_write_buffer().flush()
         messages = ChatMessage.objects.filter(
             session=session,
             user=request.user  # 메시지도 사용자 필터링
@@ -253,6 +261,7 @@ def get_active_session(request):
             )
         
         # 세션의 메시지 수 확인
+        get_write_buffer().flush()
         message_count = session.messages.count()
         
         return Response({
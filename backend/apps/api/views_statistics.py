@@ -1,4 +1,5 @@
 from django.db.models import Sum, Count, Avg, Q, F
+from django.core.cache import cache
 from django.utils import timezone
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
@@ -6,10 +7,14 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from datetime import datetime, timedelta
 from apps.core.models import WorkoutLog, UserProfile
+from .cache_namespace import PROFILE, STATS, UserCacheNamespace
 import logging
 
 logger = logging.getLogger(__name__)
 
+# 운동 기록 / 프로필이 바뀌면 캐시 세대가 올라가므로 TTL 은 날짜가 바뀌는 경우만 고려
+STATS_CACHE_TIMEOUT = 600  # 10분
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def workout_statistics(request):
@@ -23,6 +28,11 @@ def workout_statistics(request):
         
         # 현재 시간 기준으로 기간 설정
         now = timezone.now()
+        cache_key = UserCacheNamespace(user.id, STATS).key('workout_statistics', period, now.date())
+        cached_stats = cache.get(cache_key)
+        if cached_stats is not None:
+            return Response(cached_stats)
+        
         if period == 'week':
             start_date = now - timedelta(days=7)
         elif period == 'month':
@@ -72,6 +82,7 @@ def workout_statistics(request):
             })
         stats['daily_stats'] = daily_stats
         
+        cache.set(cache_key, stats, STATS_CACHE_TIMEOUT)
         return Response(stats)
         
     except Exception as e:
@@ -90,6 +101,11 @@ def workout_goals(request):
     """
     try:
         user = request.user
+        cache_key = UserCacheNamespace(user.id, PROFILE).key('workout_goals')
+        cached_goals = cache.get(cache_key)
+        if cached_goals is not None:
+            return Response(cached_goals)
+        
         profile = user.profile
         
         goals = {
@@ -104,6 +120,7 @@ def workout_goals(request):
             'distance_unit': profile.distance_unit,
         }
         
+        cache.set(cache_key, goals, STATS_CACHE_TIMEOUT)
         return Response(goals)
         
     except UserProfile.DoesNotExist:
@@ -143,7 +160,7 @@ def update_workout_goals(request):
             if field in request.data:
                 update_data[field] = request.data[field]
         
-        # 프로필 업데이트
+        # 프로필 업데이트 (post_save 시그널이 profile / stats 캐시 세대를 올림)
         for field, value in update_data.items():
             setattr(profile, field, value)
         profile.save()
@@ -184,8 +201,14 @@ def workout_summary(request):
     """
     try:
         user = request.user
-        profile = user.profile
         now = timezone.now()
+        # 프로필(목표)이 바뀌어도 stats 세대가 올라감
+        cache_key = UserCacheNamespace(user.id, STATS).key('workout_summary', now.date())
+        cached_summary = cache.get(cache_key)
+        if cached_summary is not None:
+            return Response(cached_summary)
+        
+        profile = user.profile
         
         # 이번 주 시작일 (월요일)
         week_start = now - timedelta(days=now.weekday())
@@ -250,6 +273,7 @@ def workout_summary(request):
         consecutive_days = calculate_consecutive_days(user)
         summary['consecutive_days'] = consecutive_days
         
+        cache.set(cache_key, summary, STATS_CACHE_TIMEOUT)
         return Response(summary)
         
     except UserProfile.DoesNotExist:
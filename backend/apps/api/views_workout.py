@@ -41,7 +41,6 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from django.conf import settings
 from django.db import transaction
 import json
 import logging
@@ -50,6 +49,7 @@ from .models import (
     Exercise, Routine, RoutineExercise, FitnessProfile,
     WorkoutRoutineLog, FoodAnalysis, DailyNutrition
 )
+from .llm_gateway import get_llm_gateway
 from .serializers.workout import (
     ExerciseSerializer, RoutineSerializer, FitnessProfileSerializer,
     WorkoutRoutineLogSerializer, AIWorkoutRequestSerializer,
@@ -342,21 +342,18 @@ def ai_workout_recommendation(request):
     """
     
     try:
-        # OpenAI 클라이언트 사용
-        import openai
-        client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
-        
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
+        response = get_llm_gateway().chat(
+            [
                 {"role": "system", "content": "You are a professional fitness trainer. Only use the exercises provided in the prompt. Never add exercises not in the list."},
                 {"role": "user", "content": prompt}
             ],
-            temperature=0.7
+            model="gpt-3.5-turbo",
+            temperature=0.7,
+            operation='workout_routine'
         )
         
         # 응답 파싱
-        content = response.choices[0].message.content
+        content = response.content
         try:
             routine_data = json.loads(content)
         except json.JSONDecodeError:
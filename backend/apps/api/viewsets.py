@@ -22,6 +22,7 @@ from apps.api.serializers import (
     DailyRecommendationSerializer
 )
 from apps.core.services.user_service import UserService
+from apps.api.write_buffer import get_write_buffer
 from apps.core.services.workout_service import WorkoutService
 from apps.core.services.nutrition_service import NutritionService
 
@@ -314,7 +315,8 @@ class OptimizedChatSessionViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
-        """사용자 세션만 조회"""
+        """사용자 세션만 조회 (쓰기 버퍼에 남은 메시지를 먼저 저장)"""
+        get_write_buffer().flush()
         return ChatSession.objects.filter(
             user=self.request.user
         ).select_related('user').prefetch_related(
@@ -0,0 +1,207 @@
+"""
+챗봇 메시지 지연 쓰기(write-behind) 버퍼
+- 요청 경로에서는 ChatMessage 등 모델 인스턴스를 큐에 넣기만 하고 즉시 반환
+- 행 수(MAX_ROWS) 또는 시간(FLUSH_INTERVAL) 기준으로 백그라운드 스레드가 모델별 bulk_create
+- 큐가 MAX_PENDING 을 넘으면 (DB 지연 등) 호출한 스레드에서 바로 flush 하여 메모리 증가를 제한
+- 프로세스 종료 시(atexit) 남은 행을 모두 저장
+- pending() 으로 아직 저장되지 않은 행을 조회하여 같은 프로세스의 다음 턴이 방금 쓴 메시지를 읽을 수 있음
+
+주의
+- 저장 전 인스턴스는 id / created_at 이 없고, created_at(auto_now_add)은 flush 시각으로 기록됨
+- 버퍼는 프로세스(워커)마다 따로 있으므로 다른 워커에서는 최대 FLUSH_INTERVAL 만큼 늦게 보임
+"""
+import atexit
+import threading
+import time
+import logging
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+    """모델 인스턴스를 모아 bulk_create 로 저장하는 버퍼"""
+
+    def __init__(self, enabled: bool = True, max_rows: int = 50, flush_interval: float = 1.0,
+                 max_pending: int = 1000):
+        self.enabled = enabled
+        self.max_rows = max_rows
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+
+        self._queue: List = []
+        self._inflight: List = []
+        self._oldest: Optional[float] = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # flush 는 한 번에 하나만 (행 순서 유지)
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+        # 메트릭
+        self.rows_written = 0
+        self.flushes = 0
+        self.failed_rows = 0
+
+        atexit.register(self.close)
+
+    @classmethod
+    def from_settings(cls) -> 'WriteBehindBuffer':
+        config = getattr(settings, 'CHATBOT_WRITE_BUFFER', {})
+        return cls(
+            enabled=config.get('ENABLED', True),
+            max_rows=config.get('MAX_ROWS', 50),
+            flush_interval=config.get('FLUSH_INTERVAL', 1.0),
+            max_pending=config.get('MAX_PENDING', 1000),
+        )
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='write-behind-buffer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            with self._lock:
+                due = bool(self._queue) and (
+                    len(self._queue) >= self.max_rows
+                    or time.monotonic() - self._oldest >= self.flush_interval
+                )
+            if due:
+                close_old_connections()
+                self.flush()
+                close_old_connections()
+
+    def add(self, instance) -> bool:
+        """인스턴스를 큐에 추가 (비활성화 상태면 False 를 반환하고 호출한 쪽에서 직접 저장)"""
+        if not self.enabled or self._closed:
+            return False
+
+        with self._lock:
+            if not self._queue:
+                self._oldest = time.monotonic()
+            self._queue.append(instance)
+            size = len(self._queue)
+            self._ensure_thread()
+
+        if size >= self.max_pending:
+            # 백그라운드 flush 가 따라가지 못하면 호출한 스레드에서 저장 (백프레셔)
+            logger.warning(f"⚠️ 쓰기 버퍼 {size}행 대기 중, 요청 스레드에서 flush")
+            self.flush()
+        elif size >= self.max_rows:
+            self._wake.set()
+        return True
+
+    def save(self, instance):
+        """큐에 추가하거나 (비활성화 시) 바로 저장"""
+        if not self.add(instance):
+            instance.save()
+        return instance
+
+    async def asave(self, instance):
+        """save() 의 비동기 버전"""
+        if not self.add(instance):
+            await instance.asave()
+        return instance
+
+    def pending(self, model, **filters) -> List:
+        """아직 DB 에 반영되지 않았을 수 있는 인스턴스 (추가된 순서, 속성 값이 filters 와 같은 것만)
+
+        flush 중인 행도 포함하므로 DB 조회 결과와 함께 쓸 때는 pk 로 중복을 제거해야 함
+        (pending 을 먼저 읽고 DB 를 읽으면 누락 없이 합칠 수 있음)
+        """
+        with self._lock:
+            candidates = self._inflight + self._queue
+        return [
+            instance for instance in candidates
+            if isinstance(instance, model)
+            and all(getattr(instance, name) == value for name, value in filters.items())
+        ]
+
+    def flush(self) -> int:
+        """대기 중인 행을 모델별 bulk_create 로 저장, 저장한 행 수 반환"""
+        with self._flush_lock:
+            with self._lock:
+                if not self._queue:
+                    return 0
+                batch, self._queue = self._queue, []
+                self._inflight = batch
+                self._oldest = None
+
+            try:
+                written = self._write(batch)
+            finally:
+                with self._lock:
+                    self._inflight = []
+
+        self.flushes += 1
+        self.rows_written += written
+        logger.debug(f"💾 쓰기 버퍼 flush: {written}/{len(batch)}행")
+        return written
+
+    def _write(self, batch: List) -> int:
+        groups: "OrderedDict[type, List]" = OrderedDict()
+        for instance in batch:
+            groups.setdefault(type(instance), []).append(instance)
+
+        written = 0
+        for model, instances in groups.items():
+            try:
+                model.objects.bulk_create(instances, batch_size=self.max_rows)
+                written += len(instances)
+            except Exception as e:
+                # 한 행 때문에 (예: 그 사이 삭제된 세션) 배치 전체를 잃지 않도록 행 단위로 재시도
+                logger.error(f"❌ {model.__name__} bulk_create 실패, 행 단위 저장으로 재시도: {str(e)}")
+                for instance in instances:
+                    try:
+                        instance.save()
+                        written += 1
+                    except Exception as row_error:
+                        self.failed_rows += 1
+                        logger.error(f"❌ {model.__name__} 저장 실패 (버림): {str(row_error)}")
+        return written
+
+    def close(self):
+        """남은 행을 저장하고 백그라운드 스레드 종료 (프로세스 종료 시 호출)"""
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"❌ 종료 시 쓰기 버퍼 flush 실패: {str(e)}")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            pending = len(self._queue) + len(self._inflight)
+        return {
+            'enabled': self.enabled,
+            'pending': pending,
+            'rows_written': self.rows_written,
+            'flushes': self.flushes,
+            'failed_rows': self.failed_rows,
+        }
+
+
+def merge_pending(pending: List, rows: List) -> List:
+    """pending 인스턴스(추가된 순서)와 DB 조회 결과(최신순)를 최신순 하나의 목록으로 합침"""
+    pending_ids = {instance.pk for instance in pending if instance.pk is not None}
+    return list(reversed(pending)) + [row for row in rows if row.pk not in pending_ids]
+
+
+# 전역 쓰기 버퍼 인스턴스
+write_buffer_instance = None
+
+def get_write_buffer() -> WriteBehindBuffer:
+    """쓰기 버퍼 인스턴스 가져오기"""
+    global write_buffer_instance
+    if not write_buffer_instance:
+        write_buffer_instance = WriteBehindBuffer.from_settings()
+    return write_buffer_instance
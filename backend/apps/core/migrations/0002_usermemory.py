@@ -0,0 +1,35 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserMemory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('liked_foods', models.JSONField(default=list, help_text='좋아하는 음식 목록')),
+                ('disliked_foods', models.JSONField(default=list, help_text='싫어하는 음식 목록')),
+                ('liked_exercises', models.JSONField(default=list, help_text='좋아하는 운동 목록')),
+                ('disliked_exercises', models.JSONField(default=list, help_text='싫어하는 운동 목록')),
+                ('health_conditions', models.JSONField(default=list, help_text='질병 목록')),
+                ('taste_preferences', models.JSONField(default=dict, help_text='맛 선호도 {맛: like/dislike}')),
+                ('mentioned_conditions', models.JSONField(default=list, help_text='대화에서 언급된 질환')),
+                ('last_message_id', models.BigIntegerField(blank=True, help_text='마지막으로 반영된 메시지 ID', null=True)),
+                ('version', models.PositiveIntegerField(default=0, help_text='갱신될 때마다 증가')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='chat_memory', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': '사용자 기억',
+                'verbose_name_plural': '사용자 기억들',
+                'db_table': 'user_memories',
+            },
+        ),
+    ]
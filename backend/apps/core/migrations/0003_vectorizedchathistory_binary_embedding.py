@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_usermemory'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vectorizedchathistory',
+            name='source_message_id',
+            field=models.BigIntegerField(blank=True, help_text='원본 메시지 ID', null=True),
+        ),
+        # JSON → 바이너리 변환은 DB 캐스팅이 불가능하므로 다시 생성 (기존 JSON 임베딩은 사용되지 않았음)
+        migrations.RemoveField(
+            model_name='vectorizedchathistory',
+            name='embedding',
+        ),
+        migrations.AddField(
+            model_name='vectorizedchathistory',
+            name='embedding',
+            field=models.BinaryField(blank=True, help_text='float16 임베딩 바이트 (없으면 임베딩 대기 중)', null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='vectorizedchathistory',
+            constraint=models.UniqueConstraint(fields=('user', 'source_message_id'), name='unique_vectorized_source_message'),
+        ),
+    ]
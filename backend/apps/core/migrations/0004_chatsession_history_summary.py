@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_vectorizedchathistory_binary_embedding'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatsession',
+            name='history_summary',
+            field=models.TextField(blank=True, help_text='프롬프트 예산을 넘은 이전 대화의 롤링 요약'),
+        ),
+        migrations.AddField(
+            model_name='chatsession',
+            name='summarized_message_id',
+            field=models.BigIntegerField(blank=True, help_text='롤링 요약에 포함된 마지막 메시지 ID', null=True),
+        ),
+    ]
@@ -254,6 +254,9 @@ class ChatSession(models.Model):
     
     # 세션 요약 정보
     summary = models.TextField(blank=True, help_text='세션 대화 요약')
+    # 챗봇 프롬프트용 롤링 요약 (summary 는 세션 제목으로 사용되므로 분리)
+    history_summary = models.TextField(blank=True, help_text='프롬프트 예산을 넘은 이전 대화의 롤링 요약')
+    summarized_message_id = models.BigIntegerField(null=True, blank=True, help_text='롤링 요약에 포함된 마지막 메시지 ID')
     extracted_preferences = models.JSONField(default=dict, help_text='추출된 선호도 정보')
     
     class Meta:
@@ -312,12 +315,13 @@ class ChatMessage(models.Model):
 
 
 class VectorizedChatHistory(models.Model):
-    """벡터화된 챗봇 대화 기록"""
+    """벡터화된 챗봇 대화 기록 (장기 기억 검색용 스니펫)"""
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='vectorized_chats')
     sessions = models.JSONField(default=list, help_text='벡터화된 세션 ID 목록')
+    source_message_id = models.BigIntegerField(null=True, blank=True, help_text='원본 메시지 ID')
     
     # 벡터 저장
-    embedding = models.JSONField(help_text='대화 내용의 통합 임베딩')
+    embedding = models.BinaryField(null=True, blank=True, help_text='float16 임베딩 바이트 (없으면 임베딩 대기 중)')
     summary = models.TextField(help_text='대화 내용 요약')
     
     # 메타데이터
@@ -336,11 +340,98 @@ class VectorizedChatHistory(models.Model):
         verbose_name = '벡터화된 대화 기록'
         verbose_name_plural = '벡터화된 대화 기록들'
         ordering = ['-date_range_end']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'source_message_id'], name='unique_vectorized_source_message'),
+        ]
     
     def __str__(self):
         return f"{self.user.email} - 벡터화 기록 ({self.date_range_start} ~ {self.date_range_end})"
 
 
+class UserMemory(models.Model):
+    """챗봇이 기억하는 사용자 정보 (메시지 저장 / 프로필 변경 시 증분 갱신)"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='chat_memory')
+
+    # 프로필과 동기화되는 선호도
+    liked_foods = models.JSONField(default=list, help_text='좋아하는 음식 목록')
+    disliked_foods = models.JSONField(default=list, help_text='싫어하는 음식 목록')
+    liked_exercises = models.JSONField(default=list, help_text='좋아하는 운동 목록')
+    disliked_exercises = models.JSONField(default=list, help_text='싫어하는 운동 목록')
+    health_conditions = models.JSONField(default=list, help_text='질병 목록')
+
+    # 대화에서 추출한 정보
+    taste_preferences = models.JSONField(default=dict, help_text='맛 선호도 {맛: like/dislike}')
+    mentioned_conditions = models.JSONField(default=list, help_text='대화에서 언급된 질환')
+
+    last_message_id = models.BigIntegerField(null=True, blank=True, help_text='마지막으로 반영된 메시지 ID')
+    version = models.PositiveIntegerField(default=0, help_text='갱신될 때마다 증가')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'user_memories'
+        verbose_name = '사용자 기억'
+        verbose_name_plural = '사용자 기억들'
+
+    def __str__(self):
+        return f"{self.user.email} - 기억 v{self.version}"
+
+    def sync_profile(self, profile) -> bool:
+        """프로필의 선호도/질병 목록 반영, 변경 여부 반환"""
+        changed = False
+        for field, profile_field in (
+            ('liked_foods', 'preferred_foods'),
+            ('disliked_foods', 'disliked_foods'),
+            ('liked_exercises', 'preferred_exercises'),
+            ('disliked_exercises', 'disliked_exercises'),
+            ('health_conditions', 'diseases'),
+        ):
+            value = list(getattr(profile, profile_field) or [])
+            if getattr(self, field) != value:
+                setattr(self, field, value)
+                changed = True
+        return changed
+
+    def apply_preferences(self, preferences: dict) -> bool:
+        """메시지에서 추출한 맛 선호도 / 질환 반영 (최신 메시지 우선), 변경 여부 반환"""
+        changed = False
+        for taste, sentiment in preferences.get('taste', {}).items():
+            if self.taste_preferences.get(taste) != sentiment:
+                self.taste_preferences[taste] = sentiment
+                changed = True
+        for condition in preferences.get('conditions', []):
+            if condition not in self.mentioned_conditions:
+                self.mentioned_conditions.append(condition)
+                changed = True
+        return changed
+
+    def to_memory(self) -> dict:
+        """챗봇 프롬프트용 기억 딕셔너리"""
+        memory = {
+            'food_preferences': {},
+            'exercise_preferences': {},
+            'health_conditions': list(self.health_conditions),
+            'important_facts': [],
+            'version': self.version,
+        }
+        if self.liked_foods:
+            memory['food_preferences']['liked'] = self.liked_foods
+        if self.disliked_foods:
+            memory['food_preferences']['disliked'] = self.disliked_foods
+        if self.liked_exercises:
+            memory['exercise_preferences']['liked'] = self.liked_exercises
+        if self.disliked_exercises:
+            memory['exercise_preferences']['disliked'] = self.disliked_exercises
+
+        for taste, sentiment in self.taste_preferences.items():
+            memory['important_facts'].append(
+                f"{taste} 맛을 {'싫어함' if sentiment == 'dislike' else '좋아함'}"
+            )
+        for condition in self.mentioned_conditions:
+            if condition not in memory['health_conditions']:
+                memory['health_conditions'].append(condition)
+        return memory
+
+
 class DailyRecommendation(models.Model):
     """일일 추천"""
     RECOMMENDATION_TYPE_CHOICES = [
@@ -0,0 +1,7 @@
+# Celery 가 설치된 경우에만 앱 로드 (챗봇 작업 큐 celery 백엔드, 소셜 태스크)
+try:
+    from .celery import app as celery_app
+except ImportError:
+    celery_app = None
+
+__all__ = ('celery_app',)
@@ -19,6 +19,13 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'healthwise.settings')
 # Import Django first
 django_asgi_app = get_asgi_application()
 
+# 챗봇 임베딩 모델/벡터스토어를 백그라운드에서 미리 로드 (요청을 막지 않음)
+from django.conf import settings
+
+if getattr(settings, 'CHATBOT_WARMUP_ON_STARTUP', False):
+    from apps.api.chatbot_resources import resource_registry
+    resource_registry.warm_up()
+
 # Import routing after Django setup
 from apps.social.routing import websocket_urlpatterns as social_urls
 
@@ -0,0 +1,10 @@
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'healthwise.settings')
+
+# CELERY_ 로 시작하는 Django 설정 사용 (예: CELERY_BROKER_URL, CELERY_TASK_ALWAYS_EAGER)
+app = Celery('healthwise')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
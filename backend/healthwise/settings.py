@@ -293,6 +293,167 @@ GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY', '')
 YOUTUBE_API_KEY = os.environ.get('YOUTUBE_API_KEY', '')
 KAKAO_API_KEY = os.environ.get('KAKAO_API_KEY', '')
 
+# ASGI 시작 시 챗봇 리소스(임베딩 모델, 벡터스토어) 백그라운드 워밍업 여부
+CHATBOT_WARMUP_ON_STARTUP = os.environ.get('CHATBOT_WARMUP_ON_STARTUP', 'True') == 'True'
+
+# 챗봇 시맨틱 캐시 설정 (임베딩 유사도 기반 질문 캐시)
+CHATBOT_SEMANTIC_CACHE = {
+    'THRESHOLD': float(os.environ.get('CHATBOT_SEMANTIC_CACHE_THRESHOLD', '0.9')),  # 코사인 유사도 임계값
+    'MAX_ENTRIES': int(os.environ.get('CHATBOT_SEMANTIC_CACHE_MAX_ENTRIES', '500')),  # 카테고리/언어별 최대 항목 수
+    'TTL': int(os.environ.get('CHATBOT_SEMANTIC_CACHE_TTL', '1800')),  # 초 단위
+}
+
+# 임베딩 백엔드 설정 (torch | onnx)
+# onnx 사용 시 먼저 python manage.py export_embedding_onnx 로 모델을 내보내야 합니다
+CHATBOT_EMBEDDING_BACKEND = {
+    'BACKEND': os.environ.get('CHATBOT_EMBEDDING_BACKEND', 'torch'),
+    'ONNX_MODEL_DIR': os.environ.get('CHATBOT_EMBEDDING_ONNX_DIR', str(BASE_DIR / 'apps' / 'api' / 'embedding_onnx')),
+    'QUANTIZED': os.environ.get('CHATBOT_EMBEDDING_ONNX_QUANTIZED', 'True') == 'True',  # int8 동적 양자화 모델 사용
+    'NUM_THREADS': int(os.environ.get('CHATBOT_EMBEDDING_ONNX_THREADS', '0')),  # 0이면 ONNX Runtime 기본값
+}
+
+# 챗봇 쿼리 임베딩 마이크로 배칭 설정
+CHATBOT_EMBEDDING_BATCHER = {
+    'ENABLED': os.environ.get('CHATBOT_EMBEDDING_BATCHER_ENABLED', 'True') == 'True',
+    'MAX_BATCH_SIZE': int(os.environ.get('CHATBOT_EMBEDDING_BATCH_SIZE', '32')),  # 한 번에 인코딩할 최대 쿼리 수
+    'MAX_WAIT_MS': float(os.environ.get('CHATBOT_EMBEDDING_BATCH_WAIT_MS', '5')),  # 배치를 모으는 최대 대기 시간
+}
+
+# 하이브리드 검색 설정 (BM25 + 벡터, Reciprocal Rank Fusion)
+# BM25 인덱스는 optimize_vectorstore.py 실행 시 벡터스토어와 함께 생성됩니다
+CHATBOT_HYBRID_RETRIEVAL = {
+    'ENABLED': os.environ.get('CHATBOT_HYBRID_RETRIEVAL_ENABLED', 'True') == 'True',
+    'FETCH_K': int(os.environ.get('CHATBOT_HYBRID_FETCH_K', '20')),  # 각 검색기에서 가져올 후보 수
+    'RRF_K': int(os.environ.get('CHATBOT_HYBRID_RRF_K', '60')),  # RRF 순위 평활 상수
+}
+
+# 벡터스토어를 mmap 으로 열어 워커 프로세스 간 메모리 공유 (mmap docstore 파일이 있을 때만 적용)
+CHATBOT_VECTORSTORE_MMAP = os.environ.get('CHATBOT_VECTORSTORE_MMAP', 'True') == 'True'
+
+# 장기 대화 기억 검색 (과거 사용자 메시지 스니펫을 임베딩하여 관련 내용을 프롬프트에 주입)
+# 기존 기록은 python manage.py embed_chat_history 로 일괄 임베딩합니다
+CHATBOT_CONVERSATION_MEMORY = {
+    'ENABLED': os.environ.get('CHATBOT_CONVERSATION_MEMORY_ENABLED', 'True') == 'True',
+    'TOP_K': int(os.environ.get('CHATBOT_CONVERSATION_MEMORY_TOP_K', '3')),  # 주입할 스니펫 수
+    'MIN_SCORE': float(os.environ.get('CHATBOT_CONVERSATION_MEMORY_MIN_SCORE', '0.45')),  # 코사인 유사도 하한
+    'MAX_CACHED_USERS': int(os.environ.get('CHATBOT_CONVERSATION_MEMORY_MAX_USERS', '200')),  # 워커당 인덱스 캐시 사용자 수
+    'MAX_CACHED_VECTORS': int(os.environ.get('CHATBOT_CONVERSATION_MEMORY_MAX_VECTORS', '200000')),  # 워커당 최대 벡터 수
+    'EMBED_BATCH_SIZE': int(os.environ.get('CHATBOT_CONVERSATION_MEMORY_BATCH_SIZE', '64')),
+}
+
+# 챗봇 프롬프트 토큰 예산 (apps/api/context_builder.py)
+CHATBOT_CONTEXT_BUDGET = {
+    'MAX_PROMPT_TOKENS': int(os.environ.get('CHATBOT_MAX_PROMPT_TOKENS', '1800')),  # 응답 토큰 제외 프롬프트 전체
+    'PRIORITY': ['memory', 'knowledge', 'summary', 'history'],  # 예산을 먼저 배정받는 순서
+    'SECTION_TOKENS': {'memory': 200, 'knowledge': 600, 'summary': 300, 'history': None},  # None: 남은 예산 전부
+    'PROFILE_LIST_TOKENS': 60,  # 선호도/기억 목록 하나당
+    'KNOWLEDGE_CHUNK_TOKENS': 250,  # 참고 자료 청크 하나당
+    'MEMORY_SNIPPET_TOKENS': 80,  # 과거 대화 스니펫 하나당
+    'HISTORY_MESSAGE_TOKENS': 300,  # 최근 대화 메시지 하나당
+    'HISTORY_MAX_MESSAGES': 10,
+    'SUMMARY_KEEP_TOKENS': 800,  # 롤링 요약 시 요약하지 않고 남길 최근 대화 토큰
+    'SUMMARY_TRIGGER_MESSAGES': 6,  # 요약 대상 메시지가 이만큼 쌓이면 요약 갱신
+    'SUMMARY_MODEL': os.environ.get('CHATBOT_SUMMARY_MODEL', 'gpt-4o-mini'),
+    'SUMMARY_MAX_TOKENS': 300,
+}
+
+# 챗봇 메시지 지연 쓰기 버퍼 (apps/api/write_buffer.py)
+CHATBOT_WRITE_BUFFER = {
+    'ENABLED': os.environ.get('CHATBOT_WRITE_BUFFER_ENABLED', 'True') == 'True',
+    'MAX_ROWS': int(os.environ.get('CHATBOT_WRITE_BUFFER_MAX_ROWS', '50')),  # 이만큼 쌓이면 flush
+    'FLUSH_INTERVAL': float(os.environ.get('CHATBOT_WRITE_BUFFER_FLUSH_INTERVAL', '1.0')),  # 초, 가장 오래된 행 기준
+    'MAX_PENDING': 1000,  # 넘으면 요청 스레드에서 바로 flush (백프레셔)
+}
+
+# 활성 대화 세션의 사용자별 상태 캐시 (apps/api/chat_state.py)
+# 활성 세션 / 마지막 활동 시각 / 최근 메시지를 캐시에서 읽고, 없을 때만 DB 조회
+CHATBOT_CHAT_STATE = {
+    'ENABLED': os.environ.get('CHATBOT_CHAT_STATE_ENABLED', 'True') == 'True',
+    'TURNS': 12,  # 링 버퍼 메시지 수 (HISTORY_MAX_MESSAGES + 1 이상으로 맞춰짐)
+    'TIMEOUT': 60 * 60 * 2,  # 캐시 만료 (초)
+    'IDLE_TIMEOUT': 3600,  # 마지막 활동 후 이 시간이 지나면 새 세션 (초)
+}
+
+# 챗봇 백그라운드 작업 큐 (apps/api/jobs.py)
+CHATBOT_JOBS = {
+    'BACKEND': os.environ.get('CHATBOT_JOBS_BACKEND', 'thread'),  # 'thread' 또는 'celery'
+    'WORKERS': int(os.environ.get('CHATBOT_JOBS_WORKERS', '2')),
+    'MAX_QUEUE': int(os.environ.get('CHATBOT_JOBS_MAX_QUEUE', '500')),  # 넘으면 새 작업을 버림
+    'DRAIN_TIMEOUT': float(os.environ.get('CHATBOT_JOBS_DRAIN_TIMEOUT', '10')),  # 종료 시 남은 작업 처리 대기 시간 (초)
+    'COALESCE_TIMEOUT': 300,  # celery: 대기 중 표시 캐시 키 만료 (초)
+}
+
+# Celery (CHATBOT_JOBS BACKEND='celery' 일 때 사용, healthwise/celery.py)
+CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'redis://127.0.0.1:6379/0')
+CELERY_TASK_ALWAYS_EAGER = os.environ.get('CELERY_TASK_ALWAYS_EAGER', 'False') == 'True'  # 테스트: 제출 즉시 같은 프로세스에서 실행
+CELERY_TASK_EAGER_PROPAGATES = CELERY_TASK_ALWAYS_EAGER
+CELERY_TIMEZONE = TIME_ZONE
+
+# 야간 배치 (celery beat)
+try:
+    from celery.schedules import crontab
+
+    CELERY_BEAT_SCHEDULE = {
+        'generate-daily-recommendations': {
+            'task': 'apps.api.generate_daily_recommendations',
+            'schedule': crontab(hour=3, minute=0),
+        },
+    }
+except ImportError:
+    CELERY_BEAT_SCHEDULE = {}
+
+# 일일 추천 사전 생성 (apps/api/daily_recommendations.py)
+# 활성 사용자를 프로필 버킷(목표, 경험, BMI 구간, 언어)으로 묶어 버킷마다 LLM 을 한 번만 호출
+DAILY_RECOMMENDATIONS = {
+    'CHUNK_SIZE': int(os.environ.get('DAILY_RECOMMENDATIONS_CHUNK_SIZE', '500')),  # 한 번에 읽고 저장할 사용자 수
+    'ACTIVE_DAYS': int(os.environ.get('DAILY_RECOMMENDATIONS_ACTIVE_DAYS', '14')),  # 최근 로그인 / 대화 기준 활성 사용자
+    'DEFAULT_LANGUAGE': 'ko',  # 추천을 조회한 적 없는 사용자의 언어
+    'MODEL': os.environ.get('DAILY_RECOMMENDATIONS_MODEL', 'gpt-3.5-turbo'),
+}
+
+# 챗봇 단계별 지연시간 계측 (apps/api/stage_metrics.py, /api/chatbot/metrics/)
+CHATBOT_METRICS = {
+    'ENABLED': os.environ.get('CHATBOT_METRICS_ENABLED', 'True') == 'True',
+    'SAMPLE_RATE': float(os.environ.get('CHATBOT_METRICS_SAMPLE_RATE', '1.0')),  # 계측할 요청 비율 (debug 요청은 항상 계측)
+    'TOKEN': os.environ.get('CHATBOT_METRICS_TOKEN', ''),  # 설정 시 Bearer 토큰 필요, 비어 있으면 관리자 로그인만 허용
+}
+
+# 캐시 스탬피드 방지 (apps/api/single_flight.py)
+# 같은 키의 값은 한 요청만 계산하고, 만료된 값은 STALE_TTL 동안 갱신 중에 대신 반환
+CHATBOT_SINGLE_FLIGHT = {
+    'DISTRIBUTED': os.environ.get('CHATBOT_SINGLE_FLIGHT_DISTRIBUTED', 'True') == 'True',  # Redis 잠금 (django_redis 일 때만)
+    'WAIT_TIMEOUT': float(os.environ.get('CHATBOT_SINGLE_FLIGHT_WAIT_TIMEOUT', '10')),  # 계산 중인 요청을 기다리는 최대 시간 (초)
+    'LOCK_TIMEOUT': 30,  # Redis 잠금 만료 (초, 계산 중 프로세스가 죽어도 풀림)
+    'STALE_TTL': int(os.environ.get('CHATBOT_SINGLE_FLIGHT_STALE_TTL', '300')),  # 만료 후 이전 값을 보관하는 시간 (초)
+}
+
+# LLM 호출 게이트웨이 (apps/api/llm_gateway.py)
+# 프로바이더별 클라이언트 재사용, 동시 호출 제한, 호출 기한(TIMEOUT, 슬롯 대기 / 재시도 포함), 재시도, 서킷 브레이커
+LLM_GATEWAY = {
+    'DEFAULT_PROVIDER': 'openai',
+    'FAKE': os.environ.get('LLM_GATEWAY_FAKE', 'False') == 'True',  # 모든 프로바이더를 가짜 응답으로 (개발 / 테스트)
+    'PROVIDERS': {
+        'openai': {
+            'API_KEY': OPENAI_API_KEY,
+            'BASE_URL': os.environ.get('OPENAI_BASE_URL') or None,
+            'MAX_CONCURRENCY': int(os.environ.get('LLM_OPENAI_MAX_CONCURRENCY', '16')),
+            'TIMEOUT': float(os.environ.get('LLM_OPENAI_TIMEOUT', '30')),
+            'MAX_RETRIES': 2,
+            'MAX_CONNECTIONS': 32,
+            'CIRCUIT_FAILURES': 5,  # 연속 실패 횟수
+            'CIRCUIT_RESET': 30,  # 서킷이 열린 뒤 다시 시험하기까지 (초)
+        },
+        'gemini': {
+            'API_KEY': GEMINI_API_KEY,
+            'MAX_CONCURRENCY': int(os.environ.get('LLM_GEMINI_MAX_CONCURRENCY', '8')),
+            'TIMEOUT': float(os.environ.get('LLM_GEMINI_TIMEOUT', '60')),
+            'MAX_RETRIES': 1,
+            'CIRCUIT_FAILURES': 5,
+            'CIRCUIT_RESET': 30,
+        },
+    },
+}
+
 # Cache settings - Redis로 변경 (django-redis 설치 필요)
 try:
     import django_redis